@@ -21,7 +21,7 @@ import type { Request } from 'express';
  */
 interface LLMWebhookPayload {
   jobId: string;
-  type: 'company' | 'position' | 'musashi';
+  type: 'company' | 'position' | 'musashi' | 'musashi_batch';
   status: 'completed' | 'failed';
   data?: any;
   error?: string;
@@ -65,38 +65,64 @@ export class WebhooksController {
     summary: 'Receive research results from LLM service',
     description:
       'Webhook endpoint called by LLM service when company enrichment or position scoring completes. ' +
+      'Accepts a single result or, in batched callback mode, a JSON array of results ' +
+      '(optionally gzip-encoded; the signature covers the uncompressed body). ' +
       'Request must include X-Webhook-Signature header for security.',
   })
   async handleLLMResult(
     @Req() req: Request & { rawBody?: Buffer },
-    @Body() payload: LLMWebhookPayload,
+    @Body() body: LLMWebhookPayload | LLMWebhookPayload[],
     @Headers('x-webhook-signature') signature: string,
     @Headers('x-job-id') jobId: string,
   ): Promise<{ success: boolean; message: string }> {
-    this.logger.log(`Received webhook for job ${payload.jobId} (${payload.type}): ${payload.status}`);
-    
+    const payloads = Array.isArray(body) ? body : [body];
+    this.logger.log(
+      Array.isArray(body)
+        ? `Received batched webhook with ${payloads.length} results`
+        : `Received webhook for job ${body.jobId} (${body.type}): ${body.status}`,
+    );
+
     // Log what we received BEFORE any processing
     this.logger.log(`=== RECEIVED WEBHOOK (API) ===`);
-    this.logger.log(`  Job ID: ${payload.jobId}`);
+    this.logger.log(`  Job ID: ${jobId}`);
     this.logger.log(`  Signature Header: ${signature}`);
-    this.logger.log(`  Received Payload (as parsed by NestJS):\n${JSON.stringify(payload, null, 2)}`);
+    this.logger.log(`  Received Payload (as parsed by NestJS):\n${JSON.stringify(body, null, 2)}`);
     this.logger.log(`===============================`);
 
     // Verify webhook signature against RAW body (before parsing)
     if (!this.verifyWebhookSignature(req.rawBody, signature)) {
-      this.logger.error(`Invalid webhook signature for job ${payload.jobId}`);
+      this.logger.error(`Invalid webhook signature for job ${jobId}`);
       throw new UnauthorizedException('Invalid webhook signature');
     }
 
-    // Validate payload
-    if (!payload.jobId || !payload.type || !payload.status) {
-      throw new BadRequestException('Missing required fields: jobId, type, status');
+    // Validate every payload before processing any of them
+    for (const payload of payloads) {
+      if (!payload || !payload.jobId || !payload.type || !payload.status) {
+        throw new BadRequestException('Missing required fields: jobId, type, status');
+      }
+    }
+
+    for (const payload of payloads) {
+      await this.processPayload(payload);
     }
 
+    return {
+      success: true,
+      message:
+        payloads.length === 1
+          ? 'Webhook processed successfully'
+          : `${payloads.length} webhooks processed successfully`,
+    };
+  }
+
+  /**
+   * Dispatch one LLM result to its type-specific handler
+   */
+  private async processPayload(payload: LLMWebhookPayload): Promise<void> {
     try {
       if (payload.status === 'failed') {
         await this.handleFailure(payload);
-        return { success: true, message: 'Failure recorded' };
+        return;
       }
 
       if (payload.type === 'company') {
@@ -105,12 +131,12 @@ export class WebhooksController {
         await this.handlePositionResult(payload);
       } else if (payload.type === 'musashi') {
         await this.handleMusashiResult(payload);
+      } else if (payload.type === 'musashi_batch') {
+        await this.handleMusashiBatchResult(payload);
       } else {
         this.logger.warn(`Unknown webhook type: ${payload.type}`);
         throw new BadRequestException(`Unknown type: ${payload.type}`);
       }
-
-      return { success: true, message: 'Webhook processed successfully' };
     } catch (error) {
       this.logger.error(
         `Error processing webhook for job ${payload.jobId}: ${error.message}`,
@@ -392,6 +418,35 @@ export class WebhooksController {
     }
   }
 
+  /**
+   * Handle a batch of Musashi results from a bulk re-scoring job.
+   * Each item carries its own metadata (resumeId) and is persisted like a
+   * single musashi result; failed items are only logged.
+   */
+  private async handleMusashiBatchResult(payload: LLMWebhookPayload): Promise<void> {
+    const results: any[] = payload.data?.results ?? [];
+
+    for (const item of results) {
+      if (item.status !== 'completed') {
+        this.logger.warn(
+          `Musashi batch ${payload.jobId}: profile ${item.id} failed: ${item.error}`,
+        );
+        continue;
+      }
+      await this.handleMusashiResult({
+        ...payload,
+        type: 'musashi',
+        data: item.data,
+        metadata: { ...payload.metadata, ...item.metadata },
+      });
+    }
+
+    this.logger.log(
+      `Processed Musashi batch ${payload.jobId}: ${results.length} results` +
+        (payload.data?.final ? ' (final)' : ''),
+    );
+  }
+
   private async handleMusashiResult(payload: LLMWebhookPayload): Promise<void> {
     const { data, metadata } = payload;
 
@@ -1,53 +1,171 @@
 """
-API Key authentication middleware for Flask LLM service.
-Validates X-API-Key header against a list of configured keys.
+API key authentication for the LLM service.
+Validates the X-API-Key header (and X-Tenant-Id) against the configured keys;
+used by the FastAPI verify_api_key dependency and the legacy Flask decorator.
+
+Keys are held only as HMAC-SHA256 digests under a per-process random salt,
+indexed by digest prefix, so a lookup costs one hash whatever the number of
+keys, and the full digest is then confirmed with hmac.compare_digest. Tenant
+allowlists are compiled into sets, and recent (key, tenant) decisions are
+cached for LLM_API_KEY_CACHE_TTL seconds.
+
+Keys come from LLM_API_KEYS (JSON) or, if set, LLM_API_KEYS_FILE. The
+source is re-checked every LLM_API_KEYS_RELOAD_SECONDS and reloaded when it
+changed, so keys can be rotated without a restart. A reload that cannot read
+or parse the source (missing or half-written file, bad JSON) keeps the keys
+already loaded; only a failed first load at startup leaves the service with
+no keys configured.
 """
 
+import hashlib
+import hmac
 import json
 import os
 import logging
+import secrets
+import threading
+import time
 from functools import wraps
-from flask import request, jsonify
-from typing import Dict, Optional
+from typing import Any, Dict, FrozenSet, NamedTuple, Optional
+
+from result_cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
+LLM_API_KEYS_FILE = os.getenv("LLM_API_KEYS_FILE", "")
+LLM_API_KEYS_RELOAD_SECONDS = float(os.getenv("LLM_API_KEYS_RELOAD_SECONDS", "30"))
+LLM_API_KEY_CACHE_TTL = float(os.getenv("LLM_API_KEY_CACHE_TTL", "60"))
+
+# Digest bytes used as the dict key; the full digest is then compared
+_INDEX_BYTES = 8
+
+# (is_valid, service_name, failure_reason)
+Decision = tuple[bool, Optional[str], Optional[str]]
+
+
+class _KeyState(NamedTuple):
+    """One loaded configuration; replaced as a whole on reload."""
+
+    source: Any  # fingerprint of what was loaded (env hash or file mtime)
+    # digest prefix -> (full key digest, service name)
+    services: Dict[bytes, tuple[bytes, str]]
+    # service -> allowed tenants; None allows any tenant
+    tenants: Dict[str, Optional[FrozenSet[str]]]
+    allowlist_configured: bool
+
 
 class APIKeyManager:
-    """Manages API key validation for multiple services."""
+    """Manages API key validation for multiple services.
+
+    Args:
+        keys_file: JSON file with the keys, either {service: key} or
+            {"keys": {service: key}, "tenants": {service: [tenant, ...] | "*"}};
+            defaults to LLM_API_KEYS_FILE, else the environment is used
+        reload_seconds: How often to check the source for changes
+        cache_ttl: Lifetime of cached (key, tenant) decisions
+    """
+
+    def __init__(
+        self,
+        keys_file: Optional[str] = None,
+        reload_seconds: float = LLM_API_KEYS_RELOAD_SECONDS,
+        cache_ttl: float = LLM_API_KEY_CACHE_TTL,
+    ):
+        self.keys_file = LLM_API_KEYS_FILE if keys_file is None else keys_file
+        self.reload_seconds = reload_seconds
+        self._salt = secrets.token_bytes(16)
+        self._decisions = LRUCache(max_entries=4096, ttl=cache_ttl)
+        self._reload_lock = threading.Lock()
+        self._next_check = time.monotonic() + reload_seconds
+        source = self._source()
+        try:
+            self._state = self._load(source)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load API keys: {e}")
+            self._state = _KeyState(source, {}, {}, False)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _source(self) -> Any:
+        """Cheap fingerprint of the configuration source."""
+        if self.keys_file:
+            try:
+                stat = os.stat(self.keys_file)
+                return ("file", stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                return ("file", None, None)
+        # Hashed so the plaintext keys are not kept around
+        raw = "\0".join(
+            (os.getenv("LLM_API_KEYS", "{}"), os.getenv("LLM_API_KEY_TENANTS", "{}"))
+        )
+        return ("env", hashlib.sha256(raw.encode("utf-8")).hexdigest())
+
+    def _digest(self, key: str) -> bytes:
+        return hmac.new(self._salt, key.encode("utf-8"), hashlib.sha256).digest()
 
-    def __init__(self):
-        self.api_keys: Dict[str, str] = {}
-        self.tenant_allowlist: Dict[str, list[str] | str] = {}
-        self._load_api_keys()
-        self._load_tenant_allowlist()
+    def _read_config(self) -> tuple[Any, Any]:
+        """Raw (keys, tenants) objects from the file or the environment.
 
-    def _load_api_keys(self):
-        """Load API keys from environment variable."""
-        api_keys_json = os.getenv("LLM_API_KEYS", "{}")
+        Raises:
+            OSError: If the keys file cannot be read
+            ValueError: If the file or environment holds invalid JSON
+        """
+        if self.keys_file:
+            with open(self.keys_file, "r", encoding="utf-8") as f:
+                try:
+                    config = json.load(f)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"API keys file {self.keys_file}: {e}") from e
+            if isinstance(config, dict) and "keys" in config:
+                return config.get("keys"), config.get("tenants", {})
+            return config, {}
 
         try:
-            self.api_keys = json.loads(api_keys_json)
-            if not isinstance(self.api_keys, dict):
-                logger.error("LLM_API_KEYS must be a JSON object")
-                self.api_keys = {}
-            else:
-                logger.info(
-                    f"✅ Loaded {len(self.api_keys)} API keys: "
-                    f"{list(self.api_keys.keys())}"
-                )
+            keys = json.loads(os.getenv("LLM_API_KEYS", "{}"))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid LLM_API_KEYS JSON: {e}") from e
+        try:
+            tenants = json.loads(os.getenv("LLM_API_KEY_TENANTS", "{}"))
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM_API_KEYS JSON: {e}")
-            self.api_keys = {}
+            raise ValueError(f"Invalid LLM_API_KEY_TENANTS JSON: {e}") from e
+        return keys, tenants
 
-        if not self.api_keys:
+    def _load(self, source: Any) -> _KeyState:
+        """Read and compile the keys.
+
+        Raises:
+            OSError: If the keys file cannot be read
+            ValueError: If the keys or tenants are not valid JSON objects
+        """
+        keys, tenants = self._read_config()
+        if not isinstance(keys, dict):
+            raise ValueError("LLM_API_KEYS must be a JSON object")
+        if not isinstance(tenants, dict):
+            raise ValueError("LLM_API_KEY_TENANTS must be a JSON object")
+
+        services: Dict[bytes, tuple[bytes, str]] = {}
+        for service_name, api_key in keys.items():
+            if isinstance(api_key, str) and api_key:
+                digest = self._digest(api_key)
+                services[digest[:_INDEX_BYTES]] = (digest, service_name)
+            else:
+                logger.error(f"Ignoring empty or non-string API key for {service_name}")
+        logger.info(f"✅ Loaded {len(services)} API keys: {list(keys.keys())}")
+        if not services:
             logger.warning(
                 "⚠️  No API keys configured! LLM service will be unprotected. "
                 "Set LLM_API_KEYS in .env"
             )
 
-    def _load_tenant_allowlist(self):
-        """Load tenant allowlist map from environment variable.
+        compiled = self._compile_tenants(tenants)
+        return _KeyState(source, services, compiled, bool(compiled))
+
+    def _compile_tenants(
+        self, tenants: Dict[str, Any]
+    ) -> Dict[str, Optional[FrozenSet[str]]]:
+        """Compile the tenant allowlist map.
 
         Format:
         {
@@ -55,47 +173,75 @@ class APIKeyManager:
           "admin-dashboard": "*"
         }
         """
-        tenants_json = os.getenv("LLM_API_KEY_TENANTS", "{}")
-
-        try:
-            parsed = json.loads(tenants_json)
-            if not isinstance(parsed, dict):
-                logger.error("LLM_API_KEY_TENANTS must be a JSON object")
-                self.tenant_allowlist = {}
+        compiled: Dict[str, Optional[FrozenSet[str]]] = {}
+        for service_name, rule in tenants.items():
+            if rule == "*":
+                compiled[service_name] = None
+            elif isinstance(rule, list):
+                compiled[service_name] = frozenset(str(tenant) for tenant in rule)
             else:
-                self.tenant_allowlist = parsed
-                if self.tenant_allowlist:
-                    logger.info(
-                        "✅ Loaded tenant allowlist for services: "
-                        f"{list(self.tenant_allowlist.keys())}"
-                    )
-                else:
-                    logger.info(
-                        "No tenant allowlist configured; tenant checks are permissive"
-                    )
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM_API_KEY_TENANTS JSON: {e}")
-            self.tenant_allowlist = {}
+                logger.warning(
+                    f"Invalid tenant allowlist format for service '{service_name}': "
+                    f"{type(rule)}; denying all tenants"
+                )
+                compiled[service_name] = frozenset()
+
+        if compiled:
+            logger.info(f"✅ Loaded tenant allowlist for services: {list(compiled)}")
+        else:
+            logger.info("No tenant allowlist configured; tenant checks are permissive")
+        return compiled
+
+    def reload(self) -> bool:
+        """Reload the keys if their source changed; True if it did."""
+        with self._reload_lock:
+            self._next_check = time.monotonic() + self.reload_seconds
+            source = self._source()
+            if source == self._state.source:
+                return False
+            try:
+                state = self._load(source)
+            except (OSError, ValueError) as e:
+                # Retried at the next check; never fall back to "no keys"
+                logger.error(f"API keys reload failed, keeping current keys: {e}")
+                return False
+            self._state = state
+            self._decisions.clear()
+            logger.info("API keys reloaded")
+            return True
 
-    def validate_key(self, provided_key: Optional[str]) -> tuple[bool, Optional[str]]:
-        """
-        Validate provided API key.
-        Returns (is_valid, service_name) tuple.
-        """
-        if not self.api_keys:
+    def _maybe_reload(self) -> None:
+        if time.monotonic() < self._next_check:
+            return
+        # One request does the check; the others keep using the current keys
+        if self._reload_lock.locked():
+            return
+        self.reload()
+
+    # ------------------------------------------------------------------
+    # Validation
+    # ------------------------------------------------------------------
+
+    def _check_digest(self, digest: Optional[bytes]) -> tuple[bool, Optional[str]]:
+        state = self._state
+        if not state.services:
             # If no keys configured, allow all requests (backward compatible)
-            logger.warning("No API keys configured - allowing request")
             return True, "unknown"
-
-        if not provided_key:
+        if digest is None:
             return False, None
 
-        # Check if key matches any configured service
-        for service_name, api_key in self.api_keys.items():
-            if provided_key == api_key:
-                return True, service_name
+        # O(1) lookup on a digest prefix, then a constant-time full compare
+        entry = state.services.get(digest[:_INDEX_BYTES])
+        if entry is None or not hmac.compare_digest(entry[0], digest):
+            return False, None
+        return True, entry[1]
 
-        return False, None
+    def validate_key(self, provided_key: Optional[str]) -> tuple[bool, Optional[str]]:
+        """
+        Validate provided API key.
+        Returns (is_valid, service_name) tuple.
+        """
+        return self._check_digest(self._digest(provided_key) if provided_key else None)
 
     def validate_tenant(
         self, service_name: Optional[str], tenant_id: Optional[str]
@@ -109,45 +255,54 @@ class APIKeyManager:
         if not service_name:
             return False
 
-        if not self.tenant_allowlist:
-            return True
-
-        rule = self.tenant_allowlist.get(service_name)
-        if rule is None:
+        state = self._state
+        if not state.allowlist_configured or service_name not in state.tenants:
             return True
 
-        if rule == "*":
+        allowed = state.tenants[service_name]
+        if allowed is None:
             return True
-
-        if isinstance(rule, list):
-            if not tenant_id:
-                return False
-            return tenant_id in rule
-
-        logger.warning(
-            f"Invalid tenant allowlist format for service '{service_name}': {type(rule)}"
-        )
-        return False
+        return bool(tenant_id) and tenant_id in allowed
 
     def validate_request(
         self, provided_key: Optional[str], tenant_id: Optional[str]
-    ) -> tuple[bool, Optional[str], Optional[str]]:
+    ) -> Decision:
         """Validate API key + tenant pair.
 
         Returns (is_valid, service_name, failure_reason).
         """
-        is_valid_key, service_name = self.validate_key(provided_key)
+        self._maybe_reload()
+
+        # Cached by key digest, never by the key itself
+        digest = self._digest(provided_key) if provided_key else None
+        cache_key = None
+        if digest is not None:
+            cache_key = f"{digest.hex()}\0{tenant_id or ''}"
+            cached = self._decisions.get(cache_key)
+            if cached is not None:
+                return cached
+
+        is_valid_key, service_name = self._check_digest(digest)
         if not is_valid_key:
-            return False, None, "invalid_api_key"
-
-        if not self.validate_tenant(service_name, tenant_id):
-            return False, service_name, "tenant_not_allowed"
-
-        return True, service_name, None
+            decision: Decision = (False, None, "invalid_api_key")
+        elif not self.validate_tenant(service_name, tenant_id):
+            decision = (False, service_name, "tenant_not_allowed")
+        else:
+            decision = (True, service_name, None)
+
+        if cache_key is not None:
+            self._decisions.set(cache_key, decision)
+        return decision
+
+    def key_fingerprint(self, provided_key: Optional[str]) -> str:
+        """Short non-reversible id of a key for logs (never log the key)."""
+        if not provided_key:
+            return "none"
+        return hashlib.sha256(provided_key.encode("utf-8")).hexdigest()[:12]
 
     def get_service_count(self) -> int:
         """Get number of configured services."""
-        return len(self.api_keys)
+        return len(self._state.services)
 
 
 # Global API key manager instance
@@ -175,6 +330,9 @@ def require_api_key(f):
             return jsonify({"response": "..."})
     """
 
+    # Flask is only needed by the legacy Flask app; keep it off the FastAPI import path
+    from flask import jsonify, request
+
     @wraps(f)
     def decorated_function(*args, **kwargs):
         manager = get_api_key_manager()
@@ -205,8 +363,7 @@ def require_api_key(f):
                 401,
             )
 
-        # Log successful authentication
-        logger.info(
+        logger.debug(
             f"✅ Authenticated request from service: {service_name} "
             f"to {request.path}"
         )
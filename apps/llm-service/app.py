@@ -13,6 +13,8 @@ import requests
 from functools import lru_cache
 from prompt_manager import get_prompt_manager
 from company_research_agent import CompanyResearchAgent
+from llm_guard_service import GuardRejection
+from streaming_guard import StreamingOutputGuard
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -193,16 +195,28 @@ def chat_stream():
         )
 
         def generate():
-            for output in llm(
-                prompt,
-                max_tokens=256,
-                temperature=0.7,
-                top_p=0.9,
-                stop=["User:", "\n\n"],
-                stream=True,
-            ):
-                token = output["choices"][0]["text"]
-                yield f"data: {token}\n\n"
+            tokens = (
+                output["choices"][0]["text"]
+                for output in llm(
+                    prompt,
+                    max_tokens=256,
+                    temperature=0.7,
+                    top_p=0.9,
+                    stop=["User:", "\n\n"],
+                    stream=True,
+                )
+            )
+            # Sends each sentence once it has been redacted and scanned
+            guard = StreamingOutputGuard(
+                source="app.chat_stream", prompt_context=user_message
+            )
+            try:
+                for text in guard.stream(tokens):
+                    # Released units can span lines; one data field per line
+                    lines = "".join(f"data: {line}\n" for line in text.split("\n"))
+                    yield f"{lines}\n"
+            except GuardRejection:
+                yield "event: error\ndata: Output rejected by LLM guard\n\n"
 
         return app.response_class(generate(), mimetype="text/event-stream")
 
@@ -4,6 +4,8 @@ FastAPI service that connects to an existing LLAMA server.
 Provides automatic OpenAPI/Swagger documentation at /docs endpoint.
 """
 
+import asyncio
+import importlib.util
 import re
 import hmac
 import hashlib
@@ -12,11 +14,13 @@ import uuid
 import time
 import logging
 import os
-from typing import Optional, List, Dict, Any
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional, List, Dict, Any, Tuple
 
-from fastapi import FastAPI, HTTPException, Header, Request, Depends, status
+from fastapi import FastAPI, HTTPException, Header, Query, Request, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel, Field
 import requests
 from dotenv import load_dotenv
@@ -24,34 +28,43 @@ from dotenv import load_dotenv
 # Import existing modules
 from prompt_manager import get_prompt_manager
 from musashi_index_agent import MusashiIndexAgent
-from llm_guard_service import protect_prompt, protect_output, GuardRejection
+import musashi_batch
+from llm_guard_service import (
+    GuardRejection,
+    guard_stats,
+    guard_status,
+    preload_guard_runtime,
+    protect_output,
+    protect_prompt,
+)
 from api_key_auth import get_api_key_manager
+from idempotency import get_idempotency_store, idempotency_key
+from job_control import DEADLINE_HEADER, JOB_DEADLINE_SECONDS, deadline_after
+from job_registry import JOB_DEFAULT_DURATION, get_job_registry, run_tracked
+from position_prescorer import POSITION_PRESCORE_SKIP_THRESHOLD
+from rate_limiter import LLM_RATE_LIMITING, RateLimitExceeded, get_rate_limiter
+from structured_output import structured_output_stats
+from tenant_scheduler import enqueue_for_tenant, get_tenant_scheduler, tenant_key
+from webhook_dispatcher import enqueue_delivery
+from webhook_outbox import get_outbox
 from llm_wrapper import (
     RemoteLLMWrapper,
     analyze_position_async,
+    analyze_positions_batch,
+    cache_company_research,
     get_musashi_agent,
     get_position_fit_agent,
     get_research_agent,
+    research_companies_batch,
     research_company_async,
+    send_cached_musashi_result,
 )
 
-# Import Celery app and tasks (optional - graceful fallback if not available)
-try:
-    from celery_config import celery_app
-    from tasks import (
-        research_company_task,
-        analyze_position_task,
-        calculate_musashi_task,
-    )
-
-    CELERY_AVAILABLE = True
-    logger = logging.getLogger(__name__)
-    logger.info("Celery enabled - using task queue for async operations")
-except ImportError:
-    CELERY_AVAILABLE = False
-    logger = logging.getLogger(__name__)
-    logger.warning("Celery not available - falling back to threading mode")
-    import threading
+# Celery is optional (threading fallback). The app and task modules are
+# imported on first use, see celery_tasks()
+CELERY_AVAILABLE = importlib.util.find_spec("celery") is not None
+_celery_tasks = None
+_celery_lock = threading.Lock()
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -59,6 +72,32 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+
+def celery_tasks():
+    """Return the Celery tasks module, importing it on first use.
+
+    Returns None when Celery is not installed or the tasks fail to import;
+    callers then fall back to threading mode.
+    """
+    global _celery_tasks, CELERY_AVAILABLE
+    if _celery_tasks is None and CELERY_AVAILABLE:
+        with _celery_lock:
+            if _celery_tasks is None and CELERY_AVAILABLE:
+                try:
+                    import tasks
+
+                    _celery_tasks = tasks
+                    logger.info(
+                        "Celery enabled - using task queue for async operations"
+                    )
+                except ImportError as e:
+                    CELERY_AVAILABLE = False
+                    logger.warning(
+                        f"Celery not available ({e}) - falling back to threading mode"
+                    )
+    return _celery_tasks
+
+
 # Initialize prompt manager
 prompts = get_prompt_manager()
 
@@ -112,6 +151,19 @@ WEBHOOK_SECRET: bytes = (
     _raw_webhook_secret.encode("utf-8") if _raw_webhook_secret else b""
 )
 
+# Token for operator endpoints (X-Admin-Token header)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Load the guard scanners and Celery tasks in the background after startup
+# (off: they load on first use and /ready reports ready at once)
+LLM_STARTUP_WARMUP = os.getenv("LLM_STARTUP_WARMUP", "true").strip().lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+_warmup_done = threading.Event()
+
 # Initialize API key manager
 api_key_manager = get_api_key_manager()
 if api_key_manager.get_service_count() > 0:
@@ -277,6 +329,14 @@ class CompanyEnrichResponse(BaseModel):
 
     company_data: Dict[str, Any] = Field(..., description="Company research data")
     sources: List[str] = Field(..., description="Data sources")
+    research_stats: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Field coverage and queries saved by incremental research",
+        alias="researchStats",
+    )
+
+    class Config:
+        populate_by_name = True
 
 
 class CompanyEnrichAsyncResponse(BaseModel):
@@ -287,6 +347,49 @@ class CompanyEnrichAsyncResponse(BaseModel):
     estimated_time: str = Field(
         ..., description="Estimated completion time", alias="estimatedTime"
     )
+    result: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Result of an earlier identical submission (same idempotency key)",
+    )
+
+    class Config:
+        populate_by_name = True
+
+
+class CompanyBatchEnrichRequest(BaseModel):
+    """Batch company research request (always async)"""
+
+    company_names: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=200,
+        description="Company names to research (duplicates are collapsed)",
+        alias="companyNames",
+    )
+    callback_url: str = Field(
+        ...,
+        description="Webhook URL that receives one result per company",
+        alias="callbackUrl",
+    )
+    force_refresh: bool = Field(
+        False,
+        description="Ignore cached research results",
+        alias="forceRefresh",
+    )
+    metadata: Optional[Dict[str, Any]] = Field(
+        None, description="Additional metadata to pass back with every result"
+    )
+
+    class Config:
+        populate_by_name = True
+
+
+class CompanyBatchEnrichAsyncResponse(BaseModel):
+    """Batch company research async response"""
+
+    job_id: str = Field(..., description="Batch job ID for tracking", alias="jobId")
+    status: str = Field(..., description="Processing status")
+    companies: int = Field(..., description="Number of unique companies queued")
 
     class Config:
         populate_by_name = True
@@ -319,6 +422,94 @@ class PositionScoreRequest(BaseModel):
         populate_by_name = True
 
 
+class PositionBatchItem(BaseModel):
+    """One job in a batch scoring request"""
+
+    company: str = Field(..., description="Company name")
+    position: str = Field(..., description="Position title")
+    job_url: Optional[str] = Field(None, description="Job posting URL", alias="jobUrl")
+    job_description: Optional[str] = Field(
+        None, description="Job description", alias="jobDescription"
+    )
+    metadata: Optional[Dict[str, Any]] = Field(
+        None, description="Per-job metadata (e.g. interviewId) merged into its webhook"
+    )
+
+    class Config:
+        populate_by_name = True
+
+
+class PositionBatchScoreRequest(BaseModel):
+    """Batch position scoring request: one resume against many jobs"""
+
+    jobs: List[PositionBatchItem] = Field(
+        ..., min_length=1, max_length=200, description="Jobs to score"
+    )
+    resume: Dict[str, str] = Field(
+        ..., description="Resume with content and llmContext"
+    )
+    journal_entries: Optional[List[Dict[str, Any]]] = Field(
+        None, description="Journal entries", alias="journalEntries"
+    )
+    callback_url: str = Field(
+        ...,
+        description="Webhook URL that receives one result per job",
+        alias="callbackUrl",
+    )
+    metadata: Optional[Dict[str, Any]] = Field(
+        None, description="Metadata passed back with every result"
+    )
+
+    class Config:
+        populate_by_name = True
+
+
+class BatchAsyncResponse(BaseModel):
+    """Batch job async response"""
+
+    job_id: str = Field(..., description="Batch job ID for tracking", alias="jobId")
+    status: str = Field(..., description="Processing status")
+    count: int = Field(..., description="Number of items queued")
+
+    class Config:
+        populate_by_name = True
+
+
+class PositionPrescoreRequest(BaseModel):
+    """Lexical pre-scoring request: one resume against many jobs, no LLM"""
+
+    jobs: List[PositionBatchItem] = Field(
+        ..., min_length=1, max_length=1000, description="Jobs to pre-score"
+    )
+    resume: Dict[str, str] = Field(
+        ..., description="Resume with content and llmContext"
+    )
+    fetch_postings: bool = Field(
+        False,
+        description="Fetch jobUrl pages (slower); otherwise score jobDescription only",
+        alias="fetchPostings",
+    )
+
+    class Config:
+        populate_by_name = True
+
+
+class PositionPrescoreResponse(BaseModel):
+    """Pre-score results, ranked best first"""
+
+    results: List[Dict[str, Any]] = Field(
+        ..., description="Per-job pre-scores with the job's index and metadata"
+    )
+    skip_threshold: float = Field(
+        ...,
+        description="Pre-score below which full analysis is skipped (0 = never)",
+        alias="skipThreshold",
+    )
+
+    class Config:
+        populate_by_name = True
+
+
 class PositionScoreResponse(BaseModel):
     """Position scoring response"""
 
@@ -386,6 +577,11 @@ class MusashiIndexRequest(BaseModel):
         None,
         description="Additional metadata echoed in webhook payload",
     )
+    force_refresh: bool = Field(
+        False,
+        alias="forceRefresh",
+        description="Ignore any cached evaluation of this profile and re-evaluate",
+    )
 
     class Config:
         populate_by_name = True
@@ -416,6 +612,83 @@ class MusashiIndexResponse(BaseModel):
         ..., alias="growthArea", description="Primary area for further development"
     )
     rationale: str = Field(..., description="Scoring rationale (max ~200 words)")
+    cached: bool = Field(
+        False, description="True when served from the evaluation cache"
+    )
+
+    class Config:
+        populate_by_name = True
+
+
+class MusashiBatchRequest(BaseModel):
+    """Bulk Musashi scoring request"""
+
+    profiles: List[Dict[str, Any]] = Field(
+        ...,
+        min_length=1,
+        max_length=20000,
+        description=(
+            "Profiles with the /api/musashi-index fields (resume, aiContext, "
+            "careerProfile, ...) plus id and per-profile metadata (e.g. resumeId)"
+        ),
+    )
+    callback_url: Optional[str] = Field(
+        None,
+        alias="callbackUrl",
+        description="Webhook URL for batched musashi_batch results",
+    )
+    metadata: Optional[Dict[str, Any]] = Field(
+        None, description="Metadata echoed in every webhook payload"
+    )
+    force_refresh: bool = Field(
+        False,
+        alias="forceRefresh",
+        description="Ignore cached evaluations and re-score every profile",
+    )
+
+    class Config:
+        populate_by_name = True
+
+
+class MusashiBatchResponse(BaseModel):
+    """Bulk Musashi scoring job status"""
+
+    job_id: str = Field(..., description="Batch job ID", alias="jobId")
+    status: str = Field(..., description="queued, running, paused or completed")
+    total: int = Field(0, description="Profiles in the job")
+    completed: int = Field(0, description="Profiles scored")
+    failed: int = Field(0, description="Profiles that failed")
+    delivered: int = Field(0, description="Results acknowledged by the webhook")
+    results_url: str = Field(
+        ..., description="Download URL of the JSONL results file", alias="resultsUrl"
+    )
+
+    class Config:
+        populate_by_name = True
+
+
+class MusashiIndexAsyncResponse(BaseModel):
+    """Índice de Musashi — async response (includes the result on a cache hit)"""
+
+    job_id: str = Field(..., description="Job ID for tracking", alias="jobId")
+    status: str = Field(..., description="Processing status")
+    estimated_time: str = Field(
+        ..., description="Estimated completion time", alias="estimatedTime"
+    )
+    result: Optional[MusashiIndexResponse] = Field(
+        None, description="Cached evaluation, also delivered to callbackUrl"
+    )
+
+    class Config:
+        populate_by_name = True
+
+
+class JobStatusBatchRequest(BaseModel):
+    """Bulk job status lookup"""
+
+    job_ids: List[str] = Field(
+        ..., min_length=1, max_length=500, description="Job IDs", alias="jobIds"
+    )
 
     class Config:
         populate_by_name = True
@@ -429,10 +702,11 @@ class MusashiIndexResponse(BaseModel):
 async def verify_api_key(
     x_api_key: Optional[str] = Header(None, alias="X-API-Key"),
     x_tenant_id: Optional[str] = Header(None, alias="X-Tenant-Id"),
-) -> Dict[str, Optional[str]]:
+) -> AsyncIterator[Dict[str, Optional[str]]]:
     """
-    Verify API key from X-API-Key header.
-    Returns service name if valid, raises HTTPException if invalid.
+    Verify API key from X-API-Key header and apply the caller's rate limits.
+    Yields the caller (service name and tenant) if valid, raises
+    HTTPException 401 if invalid and 429 if over a limit.
     """
     logger.debug(f"[AUTH] Verifying API key (present: {x_api_key is not None})")
     manager = get_api_key_manager()
@@ -442,7 +716,8 @@ async def verify_api_key(
 
     if not is_valid:
         logger.warning(
-            f"[AUTH] ❌ Invalid API key attempt: {x_api_key[:10] if x_api_key else 'None'}..."
+            f"[AUTH] ❌ Invalid API key attempt "
+            f"(key {manager.key_fingerprint(x_api_key)}, reason={failure_reason})"
         )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -450,8 +725,40 @@ async def verify_api_key(
             headers={"WWW-Authenticate": "ApiKey"},
         )
 
-    logger.info(f"[AUTH] ✅ Valid API key for service: {service_name}")
-    return {"service_name": service_name, "tenant_id": x_tenant_id}
+    logger.debug(f"[AUTH] ✅ Valid API key for service: {service_name}")
+    async with rate_limited(service_name, tenant=x_tenant_id):
+        yield {"service_name": service_name, "tenant_id": x_tenant_id}
+
+
+@asynccontextmanager
+async def rate_limited(
+    identity: str, budget: str = "default", tenant: Optional[str] = None
+) -> AsyncIterator[None]:
+    """
+    Hold a request against the caller's rate limits and in-flight cap.
+    Raises HTTPException 429 with Retry-After when over a limit.
+    """
+    if not LLM_RATE_LIMITING:
+        yield
+        return
+
+    limiter = get_rate_limiter()
+    try:
+        lease = await asyncio.to_thread(limiter.acquire, identity, budget, tenant)
+    except RateLimitExceeded as exc:
+        logger.warning(
+            f"[RATE LIMIT] {identity} (tenant={tenant}) over {exc.budget} "
+            f"{exc.scope} limit, retry after {exc.retry_after}s"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+    try:
+        yield
+    finally:
+        await asyncio.to_thread(limiter.release, lease)
 
 
 async def verify_webhook_signature(
@@ -479,6 +786,145 @@ async def verify_webhook_signature(
     return True
 
 
+async def verify_admin_token(
+    x_admin_token: Optional[str] = Header(None, alias="X-Admin-Token"),
+) -> bool:
+    """Verify the X-Admin-Token header for operator endpoints."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Admin endpoints disabled (ADMIN_TOKEN not set)",
+        )
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin token"
+        )
+    return True
+
+
+def submit_idempotent(
+    kind: str,
+    key: Optional[str],
+    caller: Dict[str, Optional[str]],
+    job_id: str,
+    enqueue: Callable[[], None],
+) -> Optional[Dict[str, Any]]:
+    """
+    Enqueue a job unless its idempotency key was already submitted.
+
+    Returns:
+        None if *enqueue* ran, otherwise the existing job record (jobId,
+        status and, once completed, result)
+    """
+    store = get_idempotency_store()
+    tenant = tenant_key(caller)
+    if key:
+        existing = store.claim(kind, tenant, key, job_id)
+        if existing is not None:
+            logger.info(
+                f"Idempotent resubmission of {kind} job {existing['jobId']} "
+                f"({existing['status']}) — not re-running"
+            )
+            return existing
+    try:
+        enqueue()
+    except Exception:
+        if key:
+            store.release(kind, tenant, key)
+        raise
+    return None
+
+
+def idempotent_async_response(record: Dict[str, Any]) -> "CompanyEnrichAsyncResponse":
+    completed = record["status"] == "completed"
+    return CompanyEnrichAsyncResponse(
+        job_id=record["jobId"],
+        status=record["status"],
+        estimated_time="0s" if completed else estimated_time(record["jobId"]),
+        result=record.get("result") if completed else None,
+    )
+
+
+def job_deadline(
+    requested: Optional[float], default: float = JOB_DEADLINE_SECONDS
+) -> Tuple[Optional[float], Optional[float]]:
+    """
+    (deadline, run budget) of a new job. An X-Job-Deadline header (seconds;
+    0 = none) is an absolute deadline counted from submission, time spent
+    queued included. Without it the job gets *default* seconds counted from
+    when it starts running, so queueing under tenant fair-share does not
+    eat its budget.
+    """
+    if requested is not None:
+        return deadline_after(requested), None
+    return None, default or None
+
+
+def register_job(
+    job_id: str,
+    kind: str,
+    caller: Dict[str, Optional[str]],
+    deadline: Optional[float] = None,
+    run_budget: Optional[float] = None,
+) -> None:
+    """Record a job in the job registry before it is started (threading mode)."""
+    get_job_registry().register(
+        job_id,
+        kind,
+        queue="thread",
+        tenant=tenant_key(caller),
+        deadline=deadline,
+        run_budget=run_budget,
+    )
+
+
+def enqueue_job(
+    task: Any,
+    job_id: str,
+    kind: str,
+    caller: Dict[str, Optional[str]],
+    *args: Any,
+    deadline: Optional[float] = None,
+    run_budget: Optional[float] = None,
+) -> Any:
+    """
+    Register *job_id* and enqueue *task* for the caller's tenant.
+
+    The Celery task ID is chosen up front so workers can find the job
+    record as soon as the message is picked up. An absolute deadline
+    travels in the message headers; a run budget is kept in the job record
+    and turned into a deadline when the job first starts.
+    """
+    registry = get_job_registry()
+    task_id = str(uuid.uuid4())
+    route = (celery_tasks().celery_app.conf.task_routes or {}).get(task.name) or {}
+    registry.register(
+        job_id,
+        kind,
+        task_id=task_id,
+        queue=route.get("queue", "celery"),
+        tenant=tenant_key(caller),
+        deadline=deadline,
+        run_budget=run_budget,
+    )
+    headers = {DEADLINE_HEADER: deadline} if deadline else {}
+    try:
+        return enqueue_for_tenant(
+            task, tenant_key(caller), *args, task_id=task_id, headers=headers
+        )
+    except Exception as e:
+        registry.mark_finished(job_id, "failed", error=str(e), task_id=task_id)
+        raise
+
+
+def estimated_time(job_id: str) -> str:
+    """ETA of a registered job from its queue position and recent runtimes."""
+    job = get_job_registry().status(job_id)
+    if job is None:
+        return f"{JOB_DEFAULT_DURATION:.0f}s"
+    return f"{job['etaSeconds']}s"
+
+
 # ============================================================================
 # Helper Functions (imported from original Flask app)
 # ============================================================================
@@ -812,6 +1258,52 @@ async def health_check():
     )
 
 
+@app.get("/ready", tags=["Health"])
+async def readiness_check():
+    """
+    Readiness probe - 200 once deferred components have finished loading.
+
+    The port is served as soon as the app imports; the llm_guard scanners
+    and the Celery tasks load in the background afterwards. Until then this
+    returns 503, so a startup probe can hold traffic back while /health
+    already answers.
+    """
+    ready = _warmup_done.is_set() or not LLM_STARTUP_WARMUP
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "components": {
+                "guard": guard_status(),
+                "celery": (
+                    "disabled"
+                    if not CELERY_AVAILABLE
+                    else "ready"
+                    if _celery_tasks is not None
+                    else "cold"
+                ),
+            },
+        },
+    )
+
+
+@app.get("/api/metrics", tags=["Health"])
+async def service_metrics(service_name: str = Depends(verify_api_key)):
+    """
+    Per-process counters for this API instance (structured output, guard
+    scan batching and per-scanner latency), plus fleet-wide per-tenant
+    queue depth (queued/running/throttled jobs).
+
+    Requires X-API-Key header for authentication.
+    """
+    return {
+        "structuredOutput": structured_output_stats.snapshot(),
+        "guard": guard_stats(),
+        "rateLimits": get_rate_limiter().stats(),
+        "tenants": await asyncio.to_thread(get_tenant_scheduler().stats),
+    }
+
+
 @app.post("/api/chat", response_model=ChatResponse, tags=["Chat"])
 async def chat(
     request: Request,
@@ -865,10 +1357,15 @@ async def chat(
             resume_context=resume_context,
         )
 
-        # Generate response via LLAMA server
+        # Generate response via LLAMA server. Guard scans and the LLM call
+        # block, so they run off the event loop.
         logger.info(f"Generating response for: {user_message[:100]}")
-        result = generate_completion(
-            system_prompt, user_message, max_tokens=200, history=conversation_history
+        result = await asyncio.to_thread(
+            generate_completion,
+            system_prompt,
+            user_message,
+            max_tokens=200,
+            history=conversation_history,
         )
 
         # Compute analytics hints and return them to api-service for persistence.
@@ -1013,7 +1510,10 @@ async def reload_resume(
 
 @app.post("/api/companies/enrich", tags=["Research"])
 async def enrich_company(
-    enrich_request: CompanyEnrichRequest, service_name: str = Depends(verify_api_key)
+    enrich_request: CompanyEnrichRequest,
+    service_name: str = Depends(verify_api_key),
+    idempotency_key_header: Optional[str] = Header(None, alias="Idempotency-Key"),
+    deadline_header: Optional[float] = Header(None, alias="X-Job-Deadline", ge=0),
 ):
     """
     Research and enrich company data.
@@ -1022,6 +1522,10 @@ async def enrich_company(
     1. Async (with callbackUrl): Returns immediately, sends results to webhook when done
     2. Sync (no callbackUrl): Blocks and returns data directly
 
+    Async submissions are idempotent per Idempotency-Key header (or
+    metadata.jobId): a repeat returns the original job, or its result once
+    completed, instead of researching again.
+
     Requires X-API-Key header for authentication.
     """
     try:
@@ -1032,30 +1536,53 @@ async def enrich_company(
         # ASYNC MODE: Webhook callback provided
         if callback_url:
             job_id = f"llm_job_{uuid.uuid4().hex[:12]}"
+            deadline, run_budget = job_deadline(deadline_header)
             logger.info(
                 f"Queueing async enrichment for: {company_name} (job: {job_id})"
             )
 
-            if CELERY_AVAILABLE:
-                # Queue task with Celery
-                task = research_company_task.delay(
-                    company_name, callback_url, metadata, job_id
-                )
-                logger.info(f"Celery task queued: {task.id}")
-            else:
-                # Fallback to threading
-                import threading
-
-                thread = threading.Thread(
-                    target=research_company_async,
-                    args=(company_name, callback_url, metadata, job_id),
-                    daemon=True,
-                )
-                thread.start()
-                logger.info(f"Thread started for job: {job_id}")
+            def enqueue() -> None:
+                celery = celery_tasks()
+                if celery is not None:
+                    # Queue task with Celery
+                    task = enqueue_job(
+                        celery.research_company_task,
+                        job_id,
+                        "company",
+                        service_name,
+                        company_name,
+                        callback_url,
+                        metadata,
+                        job_id,
+                        deadline=deadline,
+                        run_budget=run_budget,
+                    )
+                    logger.info(f"Celery task queued: {task.id}")
+                else:
+                    # Fallback to threading
+                    register_job(job_id, "company", service_name, deadline, run_budget)
+                    thread = threading.Thread(
+                        target=research_company_async,
+                        args=(company_name, callback_url, metadata, job_id),
+                        daemon=True,
+                    )
+                    thread.start()
+                    logger.info(f"Thread started for job: {job_id}")
+
+            existing = submit_idempotent(
+                "company",
+                idempotency_key(idempotency_key_header, metadata),
+                service_name,
+                job_id,
+                enqueue,
+            )
+            if existing is not None:
+                return idempotent_async_response(existing)
 
             return CompanyEnrichAsyncResponse(
-                job_id=job_id, status="processing", estimated_time="30s"
+                job_id=job_id,
+                status="processing",
+                estimated_time=estimated_time(job_id),
             )
 
         # SYNC MODE: No callback, return directly
@@ -1064,17 +1591,23 @@ async def enrich_company(
                 f"[SYNC MODE] Starting synchronous enrichment for: {company_name}"
             )
             logger.info(f"[SYNC MODE] Initializing research agent...")
-            agent = get_research_agent()
-            logger.info(f"[SYNC MODE] Research agent ready, starting research...")
-            result = agent.research_company(company_name)
+            async with rate_limited(service_name["service_name"], "expensive"):
+                agent = get_research_agent()
+                logger.info(f"[SYNC MODE] Research agent ready, starting research...")
+                result, research_stats = agent.research_company_with_stats(company_name)
+            cache_company_research(company_name, result)
             logger.info(
                 f"[SYNC MODE] Research complete for {company_name}, got {len(result)} result fields"
             )
             logger.info(f"[SYNC MODE] Result keys: {list(result.keys())}")
 
             return CompanyEnrichResponse(
-                company_data=result, sources=["web_search", "company_website"]
+                company_data=result,
+                sources=["web_search", "company_website"],
+                research_stats=research_stats,
             )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(
             f"[ERROR] Company enrichment failed for {company_name}: {e}", exc_info=True
@@ -1082,9 +1615,83 @@ async def enrich_company(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post(
+    "/api/companies/enrich/batch",
+    response_model=CompanyBatchEnrichAsyncResponse,
+    tags=["Research"],
+)
+async def enrich_companies_batch(
+    batch_request: CompanyBatchEnrichRequest,
+    service_name: str = Depends(verify_api_key),
+    deadline_header: Optional[float] = Header(None, alias="X-Job-Deadline", ge=0),
+):
+    """
+    Research and enrich many companies in one job.
+
+    Names are deduped and served from the research cache when possible; the
+    rest share one search rate limiter and run LLM extraction concurrently.
+    Each company's result is POSTed to callbackUrl as soon as it finishes,
+    using the same payload shape as /api/companies/enrich.
+
+    Requires X-API-Key header for authentication.
+    """
+    metadata = batch_request.metadata or {}
+    company_names = [name for name in batch_request.company_names if name.strip()]
+    if not company_names:
+        raise HTTPException(status_code=400, detail="companyNames must not be empty")
+
+    unique_count = len({" ".join(name.split()).casefold() for name in company_names})
+    job_id = f"llm_batch_{uuid.uuid4().hex[:12]}"
+    deadline, run_budget = job_deadline(deadline_header, default=0)
+    logger.info(
+        f"Queueing batch enrichment for {unique_count} companies (job: {job_id})"
+    )
+
+    celery = celery_tasks()
+    if celery is not None:
+        task = enqueue_job(
+            celery.research_companies_batch_task,
+            job_id,
+            "company_batch",
+            service_name,
+            company_names,
+            batch_request.callback_url,
+            metadata,
+            job_id,
+            batch_request.force_refresh,
+            deadline=deadline,
+            run_budget=run_budget,
+        )
+        logger.info(f"Celery task queued: {task.id}")
+    else:
+        register_job(job_id, "company_batch", service_name, deadline, run_budget)
+        thread = threading.Thread(
+            target=run_tracked,
+            args=(
+                job_id,
+                research_companies_batch,
+                company_names,
+                batch_request.callback_url,
+                metadata,
+                job_id,
+            ),
+            kwargs={"force_refresh": batch_request.force_refresh},
+            daemon=True,
+        )
+        thread.start()
+        logger.info(f"Thread started for batch job: {job_id}")
+
+    return CompanyBatchEnrichAsyncResponse(
+        job_id=job_id, status="processing", companies=unique_count
+    )
+
+
 @app.post("/api/positions/score", tags=["Analysis"])
 async def score_position(
-    score_request: PositionScoreRequest, service_name: str = Depends(verify_api_key)
+    score_request: PositionScoreRequest,
+    service_name: str = Depends(verify_api_key),
+    idempotency_key_header: Optional[str] = Header(None, alias="Idempotency-Key"),
+    deadline_header: Optional[float] = Header(None, alias="X-Job-Deadline", ge=0),
 ):
     """
     Score position fit for a resume.
@@ -1093,6 +1700,9 @@ async def score_position(
     1. Async (with callbackUrl): Returns immediately, sends results to webhook when done
     2. Sync (no callbackUrl): Blocks and returns data directly (requires resume_slug)
 
+    Async submissions are idempotent per Idempotency-Key header (or
+    metadata.jobId).
+
     Requires X-API-Key header for authentication.
     """
     try:
@@ -1124,32 +1734,20 @@ async def score_position(
                 )
 
             job_id = f"llm_job_{uuid.uuid4().hex[:12]}"
+            deadline, run_budget = job_deadline(deadline_header)
             logger.info(
                 f"Queueing async position analysis: {position} at {company} (job: {job_id})"
             )
 
-            if CELERY_AVAILABLE:
-                # Queue task with Celery
-                task = analyze_position_task.delay(
-                    company,
-                    position,
-                    job_url,
-                    job_description,
-                    resume_content,
-                    resume_llm_context,
-                    journal_entries,
-                    callback_url,
-                    metadata,
-                    job_id,
-                )
-                logger.info(f"Celery task queued: {task.id}")
-            else:
-                # Fallback to threading
-                import threading
-
-                thread = threading.Thread(
-                    target=analyze_position_async,
-                    args=(
+            def enqueue() -> None:
+                celery = celery_tasks()
+                if celery is not None:
+                    # Queue task with Celery
+                    task = enqueue_job(
+                        celery.analyze_position_task,
+                        job_id,
+                        "position",
+                        service_name,
                         company,
                         position,
                         job_url,
@@ -1160,14 +1758,46 @@ async def score_position(
                         callback_url,
                         metadata,
                         job_id,
-                    ),
-                    daemon=True,
-                )
-                thread.start()
-                logger.info(f"Thread started for job: {job_id}")
+                        deadline=deadline,
+                        run_budget=run_budget,
+                    )
+                    logger.info(f"Celery task queued: {task.id}")
+                else:
+                    # Fallback to threading
+                    register_job(job_id, "position", service_name, deadline, run_budget)
+                    thread = threading.Thread(
+                        target=analyze_position_async,
+                        args=(
+                            company,
+                            position,
+                            job_url,
+                            job_description,
+                            resume_content,
+                            resume_llm_context,
+                            journal_entries,
+                            callback_url,
+                            metadata,
+                            job_id,
+                        ),
+                        daemon=True,
+                    )
+                    thread.start()
+                    logger.info(f"Thread started for job: {job_id}")
+
+            existing = submit_idempotent(
+                "position",
+                idempotency_key(idempotency_key_header, metadata),
+                service_name,
+                job_id,
+                enqueue,
+            )
+            if existing is not None:
+                return idempotent_async_response(existing)
 
             return CompanyEnrichAsyncResponse(
-                job_id=job_id, status="processing", estimated_time="30s"
+                job_id=job_id,
+                status="processing",
+                estimated_time=estimated_time(job_id),
             )
 
         # SYNC MODE: No callback, use resume_slug
@@ -1207,6 +1837,141 @@ async def score_position(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post(
+    "/api/positions/score/batch",
+    response_model=BatchAsyncResponse,
+    tags=["Analysis"],
+)
+async def score_positions_batch(
+    batch_request: PositionBatchScoreRequest,
+    service_name: str = Depends(verify_api_key),
+    deadline_header: Optional[float] = Header(None, alias="X-Job-Deadline", ge=0),
+):
+    """
+    Score one resume against many jobs.
+
+    Postings are fetched concurrently and the shared candidate block is sent
+    as a common prompt prefix, so backends with prefix caching only process
+    the resume once. Each job's result is POSTed to callbackUrl as it
+    finishes, using the same payload shape as /api/positions/score.
+
+    Requires X-API-Key header for authentication.
+    """
+    resume_content = (batch_request.resume.get("content") or "").strip()
+    resume_llm_context = (batch_request.resume.get("llmContext") or "").strip()
+    if not resume_content:
+        raise HTTPException(status_code=400, detail="resume.content is required")
+
+    metadata = batch_request.metadata or {}
+    journal_entries = batch_request.journal_entries or []
+    jobs = [
+        {
+            "company": job.company,
+            "position": job.position,
+            "jobUrl": job.job_url,
+            "jobDescription": job.job_description,
+            "metadata": job.metadata or {},
+        }
+        for job in batch_request.jobs
+    ]
+
+    job_id = f"llm_batch_{uuid.uuid4().hex[:12]}"
+    deadline, run_budget = job_deadline(deadline_header, default=0)
+    logger.info(f"Queueing batch position analysis of {len(jobs)} jobs (job: {job_id})")
+
+    args = (
+        jobs,
+        resume_content,
+        resume_llm_context,
+        journal_entries,
+        batch_request.callback_url,
+        metadata,
+        job_id,
+    )
+    celery = celery_tasks()
+    if celery is not None:
+        task = enqueue_job(
+            celery.analyze_positions_batch_task,
+            job_id,
+            "position_batch",
+            service_name,
+            *args,
+            deadline=deadline,
+            run_budget=run_budget,
+        )
+        logger.info(f"Celery task queued: {task.id}")
+    else:
+        register_job(job_id, "position_batch", service_name, deadline, run_budget)
+        thread = threading.Thread(
+            target=run_tracked,
+            args=(job_id, analyze_positions_batch, *args),
+            daemon=True,
+        )
+        thread.start()
+        logger.info(f"Thread started for batch job: {job_id}")
+
+    return BatchAsyncResponse(job_id=job_id, status="processing", count=len(jobs))
+
+
+@app.post(
+    "/api/positions/prescore",
+    response_model=PositionPrescoreResponse,
+    tags=["Analysis"],
+)
+async def prescore_positions(
+    prescore_request: PositionPrescoreRequest,
+    service_name: str = Depends(verify_api_key),
+):
+    """
+    Instant lexical triage of many jobs against one resume.
+
+    Scores skill overlap, TF-IDF similarity and seniority alignment without
+    calling the LLM, and returns provisional 1-10 scores ranked best first.
+    Use it to pick which jobs deserve a full /api/positions/score analysis.
+
+    Requires X-API-Key header for authentication.
+    """
+    resume_content = (prescore_request.resume.get("content") or "").strip()
+    resume_llm_context = (prescore_request.resume.get("llmContext") or "").strip()
+    if not resume_content:
+        raise HTTPException(status_code=400, detail="resume.content is required")
+
+    jobs = [
+        {
+            "company": job.company,
+            "position": job.position,
+            "jobUrl": job.job_url,
+            "jobDescription": job.job_description,
+        }
+        for job in prescore_request.jobs
+    ]
+
+    agent = get_position_fit_agent()
+    prescores = await asyncio.to_thread(
+        agent.prescore_jobs,
+        jobs,
+        resume_content,
+        resume_llm_context,
+        prescore_request.fetch_postings,
+    )
+
+    results = [
+        {
+            "index": index,
+            "company": job.company,
+            "position": job.position,
+            "metadata": job.metadata or {},
+            **prescore,
+        }
+        for index, (job, prescore) in enumerate(zip(prescore_request.jobs, prescores))
+    ]
+    results.sort(key=lambda item: item["prescore"], reverse=True)
+
+    return PositionPrescoreResponse(
+        results=results, skip_threshold=POSITION_PRESCORE_SKIP_THRESHOLD
+    )
+
+
 # ============================================================================
 # Startup/Shutdown Events
 
@@ -1252,6 +2017,38 @@ def resolve_musashi_context(request: MusashiIndexRequest) -> tuple[str, str]:
     return resume_content, hidden_context
 
 
+def musashi_profile(
+    request: MusashiIndexRequest, resume_content: str, hidden_context: str
+) -> Dict[str, Any]:
+    """Profile arguments for MusashiIndexAgent.score() / cached_score()."""
+    return {
+        "career_profile": request.career_profile,
+        "resume_content": resume_content,
+        "ai_context": hidden_context,
+        "experience_years": request.experience_years,
+        "portfolio_items": request.portfolio_items,
+        "impact_highlights": request.impact_highlights,
+        "learning_highlights": request.learning_highlights,
+    }
+
+
+def musashi_response(
+    result: Dict[str, Any], cached: bool = False
+) -> MusashiIndexResponse:
+    """Build the API response from an agent result dict."""
+    return MusashiIndexResponse(
+        imScore=result["im_score"],
+        scores=MusashiScores(**result["scores"]),
+        academicEquivalent=result["academic_equivalent"],
+        academicEquivalentEn=result["academic_equivalent_en"],
+        citation=result["citation"],
+        duelsWon=result["duels_won"],
+        growthArea=result["growth_area"],
+        rationale=result["rationale"],
+        cached=cached,
+    )
+
+
 @app.post(
     "/api/musashi-index",
     response_model=MusashiIndexResponse,
@@ -1264,43 +2061,38 @@ def resolve_musashi_context(request: MusashiIndexRequest) -> tuple[str, str]:
     ),
     tags=["Musashi Index"],
 )
-async def calculate_musashi_index(request: MusashiIndexRequest):
-    """Compute the Índice de Musashi for the supplied career profile."""
+async def calculate_musashi_index(request: MusashiIndexRequest, http_request: Request):
+    """Compute the Índice de Musashi for the supplied career profile.
+
+    Unauthenticated, so the expensive-route budget applies per client address.
+    """
+    client_host = http_request.client.host if http_request.client else "unknown"
     try:
-        resume_content, hidden_context = resolve_musashi_context(request)
+        async with rate_limited(f"client:{client_host}", "expensive"):
+            resume_content, hidden_context = resolve_musashi_context(request)
 
-        logger.info(
-            f"Musashi Index evaluation started — "
-            f"resume_length={len(resume_content)}, "
-            f"ai_context_length={len(hidden_context)}, "
-            f"profile_length={len((request.career_profile or ''))}, "
-            f"experience_years={request.experience_years}"
-        )
-        agent = get_musashi_agent()
-        result = agent.score(
-            career_profile=request.career_profile,
-            resume_content=resume_content,
-            ai_context=hidden_context,
-            experience_years=request.experience_years,
-            portfolio_items=request.portfolio_items,
-            impact_highlights=request.impact_highlights,
-            learning_highlights=request.learning_highlights,
-        )
-        logger.info(
-            f"Musashi Index evaluation complete — "
-            f"im_score={result['im_score']}, "
-            f"academic_equivalent={result['academic_equivalent']}"
-        )
-        return MusashiIndexResponse(
-            imScore=result["im_score"],
-            scores=MusashiScores(**result["scores"]),
-            academicEquivalent=result["academic_equivalent"],
-            academicEquivalentEn=result["academic_equivalent_en"],
-            citation=result["citation"],
-            duelsWon=result["duels_won"],
-            growthArea=result["growth_area"],
-            rationale=result["rationale"],
-        )
+            logger.info(
+                f"Musashi Index evaluation started — "
+                f"resume_length={len(resume_content)}, "
+                f"ai_context_length={len(hidden_context)}, "
+                f"profile_length={len((request.career_profile or ''))}, "
+                f"experience_years={request.experience_years}"
+            )
+            agent = get_musashi_agent()
+            profile = musashi_profile(request, resume_content, hidden_context)
+
+            result = None if request.force_refresh else agent.cached_score(**profile)
+            cached = result is not None
+            if result is None:
+                result = agent.score(**profile, force_refresh=request.force_refresh)
+
+            logger.info(
+                f"Musashi Index evaluation complete — "
+                f"im_score={result['im_score']}, "
+                f"academic_equivalent={result['academic_equivalent']}, "
+                f"cached={cached}"
+            )
+            return musashi_response(result, cached=cached)
     except HTTPException:
         raise
     except Exception as e:
@@ -1310,14 +2102,23 @@ async def calculate_musashi_index(request: MusashiIndexRequest):
 
 @app.post(
     "/api/musashi-index/async",
-    response_model=CompanyEnrichAsyncResponse,
+    response_model=MusashiIndexAsyncResponse,
+    response_model_exclude_none=True,
     summary="Índice de Musashi — async calculation",
     tags=["Musashi Index"],
 )
 async def calculate_musashi_index_async(
-    request: MusashiIndexRequest, service_name: str = Depends(verify_api_key)
+    request: MusashiIndexRequest,
+    service_name: str = Depends(verify_api_key),
+    idempotency_key_header: Optional[str] = Header(None, alias="Idempotency-Key"),
+    deadline_header: Optional[float] = Header(None, alias="X-Job-Deadline", ge=0),
 ):
-    """Queue Musashi Index calculation and send result to callbackUrl webhook."""
+    """
+    Queue Musashi Index calculation and send result to callbackUrl webhook.
+
+    Idempotent per Idempotency-Key header (or metadata.jobId): a repeat
+    returns the original job, or its result once completed.
+    """
     callback_url = getattr(request, "callback_url", None)
     metadata = getattr(request, "metadata", None) or {}
 
@@ -1335,38 +2136,556 @@ async def calculate_musashi_index_async(
     )
 
     job_id = f"llm_job_{uuid.uuid4().hex[:12]}"
+    profile = musashi_profile(request, resume_content, hidden_context)
+
+    # Unchanged profile: answer now, still deliver the webhook api-service expects
+    if not request.force_refresh:
+        cached_result = get_musashi_agent().cached_score(**profile)
+        if cached_result is not None:
+            logger.info(f"Musashi evaluation served from cache (job: {job_id})")
+            threading.Thread(
+                target=send_cached_musashi_result,
+                args=(callback_url, cached_result, metadata, job_id),
+                daemon=True,
+            ).start()
+            return MusashiIndexAsyncResponse(
+                job_id=job_id,
+                status="completed",
+                estimated_time="0s",
+                result=musashi_response(cached_result, cached=True),
+            )
+
     logger.info(f"Queueing async Musashi evaluation (job: {job_id})")
+    deadline, run_budget = job_deadline(deadline_header)
+
+    def enqueue() -> None:
+        celery = celery_tasks()
+        if celery is not None:
+            task = enqueue_job(
+                celery.calculate_musashi_task,
+                job_id,
+                "musashi",
+                service_name,
+                resume_content,
+                hidden_context,
+                request.career_profile or "",
+                request.experience_years,
+                request.portfolio_items or [],
+                request.impact_highlights or [],
+                request.learning_highlights or [],
+                callback_url,
+                metadata,
+                job_id,
+                request.force_refresh,
+                deadline=deadline,
+                run_budget=run_budget,
+            )
+            logger.info(f"Celery task queued: {task.id}")
+        else:
+            raise HTTPException(
+                status_code=503,
+                detail="Celery is not available for async Musashi processing",
+            )
 
-    if CELERY_AVAILABLE:
-        task = calculate_musashi_task.delay(
-            resume_content,
-            hidden_context,
-            request.career_profile or "",
-            request.experience_years or 0,
-            request.portfolio_items or [],
-            request.impact_highlights or [],
-            request.learning_highlights or [],
-            callback_url,
-            metadata,
-            job_id,
+    existing = submit_idempotent(
+        "musashi",
+        idempotency_key(idempotency_key_header, metadata),
+        service_name,
+        job_id,
+        enqueue,
+    )
+    if existing is not None:
+        completed = existing["status"] == "completed"
+        return MusashiIndexAsyncResponse(
+            job_id=existing["jobId"],
+            status=existing["status"],
+            estimated_time="0s" if completed else estimated_time(existing["jobId"]),
+            result=musashi_response(existing["result"]) if completed else None,
+        )
+
+    return MusashiIndexAsyncResponse(
+        job_id=job_id,
+        status="processing",
+        estimated_time=estimated_time(job_id),
+    )
+
+
+# ============================================================================
+# Bulk Musashi scoring
+# ============================================================================
+
+
+def _musashi_batch_response(state: Dict[str, Any]) -> MusashiBatchResponse:
+    job_id = state["jobId"]
+    return MusashiBatchResponse(
+        job_id=job_id,
+        status=state.get("status", "queued"),
+        total=state.get("total", 0),
+        completed=state.get("completed", 0),
+        failed=state.get("failed", 0),
+        delivered=state.get("delivered", 0),
+        results_url=f"/api/musashi-index/batch/{job_id}/results",
+    )
+
+
+def _musashi_batch_state(
+    job_id: str, caller: Dict[str, Optional[str]]
+) -> Dict[str, Any]:
+    """Checkpointed state of one of the caller's batch jobs (404 otherwise)."""
+    state = musashi_batch.job_status(job_id)
+    if state is None or state.get("tenant") not in (None, tenant_key(caller)):
+        raise HTTPException(status_code=404, detail=f"Unknown batch job: {job_id}")
+    return state
+
+
+def _start_musashi_batch(
+    job_id: str,
+    total: int,
+    callback_url: Optional[str],
+    metadata: Dict[str, Any],
+    force_refresh: bool,
+    tenant: str,
+) -> MusashiBatchResponse:
+    state = {
+        "jobId": job_id,
+        "status": "queued",
+        "total": total,
+        "completed": 0,
+        "failed": 0,
+        "delivered": 0,
+        "callbackUrl": callback_url,
+        "metadata": metadata,
+        "forceRefresh": force_refresh,
+        "tenant": tenant,
+    }
+    musashi_batch.checkpoints.save(job_id, state)
+    _enqueue_musashi_batch(state)
+    return _musashi_batch_response(state)
+
+
+def _enqueue_musashi_batch(state: Dict[str, Any]) -> None:
+    args = (
+        state["jobId"],
+        state.get("callbackUrl"),
+        state.get("metadata") or {},
+        state.get("forceRefresh", False),
+    )
+    caller = {"tenant_id": state.get("tenant")}
+    celery = celery_tasks()
+    if celery is not None:
+        task = enqueue_job(
+            celery.score_musashi_batch_task,
+            state["jobId"],
+            "musashi_batch",
+            caller,
+            *args,
         )
         logger.info(f"Celery task queued: {task.id}")
     else:
-        raise HTTPException(
-            status_code=503,
-            detail="Celery is not available for async Musashi processing",
+        register_job(state["jobId"], "musashi_batch", caller)
+        thread = threading.Thread(
+            target=run_tracked,
+            args=(state["jobId"], musashi_batch.run_musashi_batch, *args),
+            daemon=True,
         )
+        thread.start()
+        logger.info(f"Thread started for Musashi batch: {state['jobId']}")
 
-    return CompanyEnrichAsyncResponse(
-        job_id=job_id,
-        status="processing",
-        estimated_time="30s",
+
+@app.post(
+    "/api/musashi-index/batch",
+    response_model=MusashiBatchResponse,
+    summary="Índice de Musashi — bulk scoring",
+    tags=["Musashi Index"],
+)
+async def create_musashi_batch(
+    request: MusashiBatchRequest, service_name: str = Depends(verify_api_key)
+):
+    """
+    Re-score a cohort of profiles as one resumable job.
+
+    Profiles are scored concurrently under MUSASHI_BATCH_MAX_PER_MINUTE.
+    Results are POSTed to callbackUrl in batches (type "musashi_batch") and
+    are always available as a JSONL download.
+
+    Requires X-API-Key header for authentication.
+    """
+    job_id = f"llm_batch_{uuid.uuid4().hex[:12]}"
+    total = await asyncio.to_thread(
+        musashi_batch.write_input, job_id, iter(request.profiles)
+    )
+    logger.info(f"Queueing Musashi batch of {total} profiles (job: {job_id})")
+    return _start_musashi_batch(
+        job_id,
+        total,
+        request.callback_url,
+        request.metadata or {},
+        request.force_refresh,
+        tenant_key(service_name),
+    )
+
+
+@app.post(
+    "/api/musashi-index/batch/stream",
+    response_model=MusashiBatchResponse,
+    summary="Índice de Musashi — bulk scoring from an NDJSON upload",
+    tags=["Musashi Index"],
+)
+async def create_musashi_batch_stream(
+    request: Request,
+    callback_url: Optional[str] = None,
+    force_refresh: bool = False,
+    service_name: str = Depends(verify_api_key),
+):
+    """
+    Same as /api/musashi-index/batch, but the body is newline-delimited JSON
+    (one profile per line) and is written to disk as it streams in, so very
+    large cohorts never have to fit in one request object.
+
+    Query parameters: callback_url, force_refresh.
+    Requires X-API-Key header for authentication.
+    """
+    job_id = f"llm_batch_{uuid.uuid4().hex[:12]}"
+    os.makedirs(musashi_batch.MUSASHI_BATCH_DIR, exist_ok=True)
+
+    total = 0
+    buffer = b""
+    path = musashi_batch.input_path(job_id)
+    try:
+        with open(path, "wb") as handle:
+
+            def write_lines(lines: List[bytes]) -> None:
+                nonlocal total
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    try:
+                        profile = json.loads(line)
+                    except json.JSONDecodeError:
+                        raise HTTPException(
+                            status_code=400,
+                            detail=f"Line {total + 1} is not valid JSON",
+                        )
+                    if not isinstance(profile, dict):
+                        raise HTTPException(
+                            status_code=400,
+                            detail=f"Line {total + 1} is not a JSON object",
+                        )
+                    handle.write(json.dumps(profile).encode("utf-8") + b"\n")
+                    total += 1
+
+            async for chunk in request.stream():
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                write_lines(lines)
+            write_lines([buffer])
+
+        if not total:
+            raise HTTPException(status_code=400, detail="No profiles in request body")
+    except BaseException:
+        # Bad line, empty body or dropped upload: leave no partial input behind
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+
+    logger.info(f"Queueing streamed Musashi batch of {total} profiles (job: {job_id})")
+    return _start_musashi_batch(
+        job_id, total, callback_url, {}, force_refresh, tenant_key(service_name)
+    )
+
+
+@app.get(
+    "/api/musashi-index/batch/{job_id}",
+    response_model=MusashiBatchResponse,
+    tags=["Musashi Index"],
+)
+async def get_musashi_batch(job_id: str, service_name: str = Depends(verify_api_key)):
+    """Progress of a bulk Musashi scoring job."""
+    state = await asyncio.to_thread(_musashi_batch_state, job_id, service_name)
+    return _musashi_batch_response(state)
+
+
+@app.get("/api/musashi-index/batch/{job_id}/results", tags=["Musashi Index"])
+async def download_musashi_batch_results(
+    job_id: str, service_name: str = Depends(verify_api_key)
+):
+    """Download the JSONL results file (one line per scored profile)."""
+    await asyncio.to_thread(_musashi_batch_state, job_id, service_name)
+    path = musashi_batch.results_path(job_id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="No results yet")
+    return FileResponse(
+        path, media_type="application/x-ndjson", filename=f"{job_id}.jsonl"
     )
 
 
+@app.post(
+    "/api/musashi-index/batch/{job_id}/resume",
+    response_model=MusashiBatchResponse,
+    tags=["Musashi Index"],
+)
+async def resume_musashi_batch(
+    job_id: str, service_name: str = Depends(verify_api_key)
+):
+    """
+    Re-queue a paused, failed or cancelled bulk job; profiles already scored
+    are skipped. Returns 409 while the job is queued or running, or once it
+    has completed.
+    """
+    state = await asyncio.to_thread(_musashi_batch_state, job_id, service_name)
+    # Claim the checkpoint first so two resumes never start two workers
+    claimed = await asyncio.to_thread(
+        musashi_batch.checkpoints.claim,
+        job_id,
+        musashi_batch.RESUMABLE_STATUSES,
+        status="queued",
+    )
+    if claimed is None:
+        raise HTTPException(
+            status_code=409, detail=f"Batch job is {state.get('status')}"
+        )
+    state = claimed
+
+    logger.info(f"Resuming Musashi batch {job_id} from checkpoint")
+    _enqueue_musashi_batch(state)
+    return _musashi_batch_response(state)
+
+
+# ============================================================================
+# Job status
+# ============================================================================
+
+
+def _job_record(
+    job_id: str, caller: Dict[str, Optional[str]], with_result: bool = False
+) -> Optional[Dict[str, Any]]:
+    """Registry record of one of the caller's jobs (by job ID or Celery task ID)."""
+    registry = get_job_registry()
+    record = registry.result(job_id) if with_result else registry.status(job_id)
+    if record is None:
+        task_job_id = registry.job_for_task(job_id)
+        if task_job_id is None:
+            return None
+        record = (
+            registry.result(task_job_id)
+            if with_result
+            else registry.status(task_job_id)
+        )
+    if record is None or record.get("tenant") not in (None, tenant_key(caller)):
+        return None
+    return record
+
+
+@app.get("/api/jobs/{job_id}", tags=["Jobs"])
+async def get_job_status(job_id: str, service_name: str = Depends(verify_api_key)):
+    """
+    Status of an async job: queued/running/retrying/completed/failed, queue
+    position, start time, current stage and an ETA from recent runtimes of
+    the same job kind.
+
+    Accepts our job ID or its Celery task ID. Requires X-API-Key header.
+    """
+
+    def lookup() -> Optional[Dict[str, Any]]:
+        job = _job_record(job_id, service_name)
+        if job is None:
+            return None
+        if job["kind"] == "musashi_batch":
+            state = musashi_batch.job_status(job["jobId"]) or {}
+            job["progress"] = {
+                key: state.get(key, 0)
+                for key in ("total", "completed", "failed", "delivered")
+            }
+        celery = celery_tasks() if job.get("taskId") else None
+        if celery is not None:
+            try:
+                job["celeryState"] = celery.celery_app.AsyncResult(job["taskId"]).state
+            except Exception as e:
+                logger.warning(f"Celery result backend unavailable: {e}")
+                job["celeryState"] = None
+        return job
+
+    job = await asyncio.to_thread(lookup)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+
+@app.get("/api/jobs/{job_id}/result", tags=["Jobs"])
+async def get_job_result(job_id: str, service_name: str = Depends(verify_api_key)):
+    """
+    Result of a finished job (202 with the current status while it runs).
+
+    Falls back to the Celery result backend when the registry has no
+    result stored. Requires X-API-Key header.
+    """
+    job = await asyncio.to_thread(_job_record, job_id, service_name, True)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    if job["status"] not in ("completed", "failed"):
+        pending = await asyncio.to_thread(get_job_registry().status, job["jobId"])
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=pending)
+
+    result = job.get("result")
+    if result is None and job["status"] == "completed" and job.get("taskId"):
+
+        def backend_result() -> Any:
+            celery = celery_tasks()
+            if celery is None:
+                return None
+            async_result = celery.celery_app.AsyncResult(job["taskId"])
+            return async_result.result if async_result.successful() else None
+
+        try:
+            result = await asyncio.to_thread(backend_result)
+        except Exception as e:
+            logger.warning(f"Celery result backend unavailable: {e}")
+    return {
+        "jobId": job["jobId"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "finishedAt": job.get("finishedAt"),
+        "result": result,
+        "error": job.get("error"),
+    }
+
+
+@app.post("/api/jobs/{job_id}/cancel", tags=["Jobs"])
+async def cancel_job(job_id: str, service_name: str = Depends(verify_api_key)):
+    """
+    Cancel a queued or running job.
+
+    Queued jobs are cancelled at once (and revoked in Celery). Running
+    jobs stop at their next stage check; in-flight search, fetch and LLM
+    calls are not started again, and the job finishes as "cancelled" with
+    a failure webhook flagged "cancelled". Requires X-API-Key header.
+    """
+
+    def cancel() -> Tuple[Optional[Dict[str, Any]], bool]:
+        job = _job_record(job_id, service_name)
+        if job is None or job["status"] in ("completed", "failed", "cancelled"):
+            return job, False
+        record = get_job_registry().cancel(job["jobId"])
+        if record["status"] != "cancelled":
+            return record, True
+
+        # Never started: nothing will report the outcome, so do it here
+        get_idempotency_store().record_outcome(
+            record["jobId"], {"status": "failed", "error": "Job cancelled"}
+        )
+        if record["kind"] == "musashi_batch":
+            state = musashi_batch.job_status(record["jobId"])
+            if state is not None:
+                state["status"] = "cancelled"
+                musashi_batch.checkpoints.save(record["jobId"], state)
+        celery = celery_tasks() if record.get("taskId") else None
+        if celery is not None:
+            try:
+                celery.celery_app.control.revoke(record["taskId"])
+            except Exception as e:
+                # Workers still drop the task via the cancel flag
+                logger.warning(f"Could not revoke task {record['taskId']}: {e}")
+        return record, True
+
+    job, cancelled = await asyncio.to_thread(cancel)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    if not cancelled:
+        raise HTTPException(status_code=409, detail=f"Job already {job['status']}")
+    logger.info(f"Cancel requested for job {job['jobId']} ({job['status']})")
+    return {
+        "jobId": job["jobId"],
+        "status": "cancelling" if job["status"] == "running" else job["status"],
+    }
+
+
+@app.post("/api/jobs/status", tags=["Jobs"])
+async def get_job_statuses(
+    batch_request: JobStatusBatchRequest, service_name: str = Depends(verify_api_key)
+):
+    """
+    Status of up to 500 jobs in one call (null for unknown IDs).
+
+    Same fields as /api/jobs/{job_id}, without celeryState or batch
+    progress. Requires X-API-Key header.
+    """
+
+    def lookup() -> Dict[str, Optional[Dict[str, Any]]]:
+        return {
+            job_id: _job_record(job_id, service_name)
+            for job_id in dict.fromkeys(batch_request.job_ids)
+        }
+
+    return {"jobs": await asyncio.to_thread(lookup)}
+
+
+# ============================================================================
+# Webhook outbox administration
 # ============================================================================
 
 
+@app.get("/api/admin/webhooks", tags=["Admin"])
+async def list_webhook_outbox(
+    status_filter: str = Query("dead", alias="status", pattern="^(pending|dead)$"),
+    limit: int = Query(100, ge=1, le=1000),
+    admin: bool = Depends(verify_admin_token),
+):
+    """List undelivered webhooks (pending retries or dead-lettered)."""
+    outbox = get_outbox()
+    return {
+        "stats": await asyncio.to_thread(outbox.stats),
+        "entries": await asyncio.to_thread(outbox.list, status_filter, limit),
+    }
+
+
+@app.post("/api/admin/webhooks/replay", tags=["Admin"])
+async def replay_webhooks(
+    status_filter: str = Query("dead", alias="status", pattern="^(pending|dead)$"),
+    limit: int = Query(100, ge=1, le=1000),
+    admin: bool = Depends(verify_admin_token),
+):
+    """Re-queue every listed entry now (e.g. after a receiver outage)."""
+    outbox = get_outbox()
+    entries = await asyncio.to_thread(outbox.list, status_filter, limit)
+    replayed = []
+    for entry in entries:
+        entry = await asyncio.to_thread(outbox.replay, entry["id"])
+        if entry is not None:
+            enqueue_delivery(entry)
+            replayed.append(entry["id"])
+    logger.info(f"Replayed {len(replayed)} {status_filter} webhooks")
+    return {"replayed": len(replayed), "ids": replayed}
+
+
+@app.post("/api/admin/webhooks/{entry_id}/replay", tags=["Admin"])
+async def replay_webhook(entry_id: str, admin: bool = Depends(verify_admin_token)):
+    """Re-queue one outbox entry for immediate delivery."""
+    entry = await asyncio.to_thread(get_outbox().replay, entry_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Unknown webhook: {entry_id}")
+    enqueue_delivery(entry)
+    logger.info(f"Replayed webhook {entry_id} (job {entry['payload'].get('jobId')})")
+    return {"replayed": 1, "ids": [entry_id]}
+
+
+# ============================================================================
+
+
+def warm_up() -> None:
+    """Load deferred components (startup warm-up thread)."""
+    started = time.monotonic()
+    try:
+        preload_guard_runtime()
+        celery_tasks()
+    except Exception as e:
+        logger.warning(f"Startup warm-up failed (loading on first use instead): {e}")
+    finally:
+        _warmup_done.set()
+        logger.info(f"Warm-up finished in {time.monotonic() - started:.1f}s")
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize service on startup"""
@@ -1384,6 +2703,10 @@ async def startup_event():
     logger.info("📖 ReDoc: http://localhost:5000/api/redoc")
     logger.info("=" * 80)
 
+    if LLM_STARTUP_WARMUP:
+        # Not awaited: the server starts accepting requests right away
+        threading.Thread(target=warm_up, name="startup-warmup", daemon=True).start()
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the heuristic guard rules.
+
+Compares the single-pass RuleSet (guard_rules.py) with running the same
+rules one regex after another, on clean prompts of realistic sizes (a chat
+question, a job posting, a full-size 24k-character agent prompt), for both
+the injection check and the output redaction.
+
+Usage (from apps/llm-service):
+    python benchmarks/guard_rules_benchmark.py [--number 200]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from guard_rules import LLM_GUARD_RULES_FILE, RuleSet  # noqa: E402
+
+SIZES = (500, 4_000, 24_000)
+
+PARAGRAPH = (
+    "Senior software engineer with experience building distributed systems, "
+    "data pipelines and developer tooling. Led a team of five engineers to "
+    "migrate a monolith to services on Kubernetes, cutting deploy time from "
+    "hours to minutes. Comfortable with Python, Go, TypeScript, PostgreSQL, "
+    "Redis and Kafka; mentors junior developers and writes design documents. "
+)
+
+
+def _sequential(rules: list) -> list:
+    return [
+        re.compile(rule["pattern"], re.IGNORECASE if rule.get("ignoreCase") else 0)
+        for rule in rules
+    ]
+
+
+def _clean_text(size: int) -> str:
+    return (PARAGRAPH * (size // len(PARAGRAPH) + 1))[:size]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--number", type=int, default=200, help="calls per measurement")
+    args = parser.parse_args()
+
+    with open(LLM_GUARD_RULES_FILE, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    print(f"{'check':<12}{'chars':>8}{'sequential':>14}{'rule set':>12}{'speedup':>10}")
+    for category in ("injection", "sensitive"):
+        rule_set = RuleSet(config[category])
+        patterns = _sequential(config[category])
+        for size in SIZES:
+            text = _clean_text(size)
+            if category == "injection":
+                before = lambda: any(p.search(text) for p in patterns)  # noqa: E731
+                after = lambda: rule_set.search(text)  # noqa: E731
+            else:
+
+                def before():
+                    redacted = text
+                    for pattern in patterns:
+                        redacted = pattern.sub("[REDACTED]", redacted)
+                    return redacted
+
+                after = lambda: rule_set.redact(text)  # noqa: E731
+
+            seq = min(timeit.repeat(before, number=args.number, repeat=5)) / args.number
+            one = min(timeit.repeat(after, number=args.number, repeat=5)) / args.number
+            print(
+                f"{category:<12}{size:>8}{seq * 1e6:>12.1f}us{one * 1e6:>10.1f}us"
+                f"{seq / one:>9.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
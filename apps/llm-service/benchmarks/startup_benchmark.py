@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the FastAPI LLM service.
+
+Each run starts a fresh interpreter (as Cloud Run does for a new revision)
+and measures, from the start of the import:
+
+  - import:  `import app_fastapi` done (the port can be bound)
+  - serving: first /health response after the startup event
+  - ready:   /ready returns 200 (guard scanners and Celery tasks loaded)
+
+It then lists the modules with the largest cumulative import time
+(python -X importtime), which is where further savings would come from.
+
+Usage (from apps/llm-service):
+    python benchmarks/startup_benchmark.py [--runs 5] [--top 15]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Keep /health from waiting on a real LLM backend
+CHILD_ENV = {
+    "LLAMA_SERVER_URL": "http://127.0.0.1:9",
+    "VLLM_SERVER_URL": "http://127.0.0.1:9",
+    "REDIS_HOST": os.getenv("REDIS_HOST", "127.0.0.1"),
+}
+
+
+def _child() -> None:
+    """Measure one cold start in this (fresh) process and print JSON."""
+    started = time.perf_counter()
+    sys.path.insert(0, SERVICE_DIR)
+    import app_fastapi
+    from fastapi.testclient import TestClient
+
+    imported = time.perf_counter()
+    with TestClient(app_fastapi.app) as client:
+        client.get("/health")
+        serving = time.perf_counter()
+        while client.get("/ready").status_code != 200:
+            time.sleep(0.01)
+        ready = time.perf_counter()
+
+    print(
+        json.dumps(
+            {
+                "import": imported - started,
+                "serving": serving - started,
+                "ready": ready - started,
+            }
+        )
+    )
+
+
+def _run_child() -> dict:
+    env = {**os.environ, **CHILD_ENV}
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child"],
+        cwd=SERVICE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _import_profile(top: int) -> list:
+    """Modules with the largest cumulative import time, in milliseconds."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app_fastapi"],
+        cwd=SERVICE_DIR,
+        env={**os.environ, **CHILD_ENV},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:") :].split("|")
+        try:
+            cumulative = int(parts[1])
+        except ValueError:
+            continue  # header row
+        rows.append((cumulative / 1000, parts[2].strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="cold starts to measure")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child()
+        return
+
+    runs = [_run_child() for _ in range(args.runs)]
+    print(f"Cold start over {args.runs} runs (seconds from the start of the import)")
+    print(f"{'phase':<10}{'median':>10}{'min':>10}{'max':>10}")
+    for phase in ("import", "serving", "ready"):
+        values = [run[phase] for run in runs]
+        print(
+            f"{phase:<10}{statistics.median(values):>10.3f}"
+            f"{min(values):>10.3f}{max(values):>10.3f}"
+        )
+
+    print("\nSlowest imports (cumulative ms) of `import app_fastapi`")
+    for millis, module in _import_profile(args.top):
+        print(f"{millis:>10.1f}  {module}")
+
+
+if __name__ == "__main__":
+    main()
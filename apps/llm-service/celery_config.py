@@ -6,23 +6,20 @@ API service uses database 0, LLM service uses database 1.
 """
 
 import os
-from celery import Celery
-from dotenv import load_dotenv
 
-load_dotenv()
+from celery import Celery
 
-# Redis configuration (shared with API service, different database)
-REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
-REDIS_PORT = os.getenv("REDIS_PORT", "6379")  # Same port as API service
-REDIS_DB = os.getenv("REDIS_DB", "1")  # Database 1 (API uses 0)
-REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
+from redis_store import redis_url
+from webhook_dispatcher import WEBHOOK_OUTBOX_PUMP_INTERVAL, WEBHOOK_QUEUE
 
-# Build Redis URL
-redis_url = (
-    f"redis://:{REDIS_PASSWORD}@{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
-    if REDIS_PASSWORD
-    else f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
-)
+# Workload classes get their own queues (see start-celery-worker.sh):
+#   research  — network-bound web research, mostly waiting on search APIs and
+#               pacing sleeps; run with a thread pool and high concurrency
+#   analysis  — position fit and Musashi scoring, bound by LLM backend (GPU)
+#               capacity; run prefork with concurrency matching the backends
+#   webhooks  — result delivery (WEBHOOK_QUEUE)
+RESEARCH_QUEUE = os.getenv("CELERY_RESEARCH_QUEUE", "research")
+ANALYSIS_QUEUE = os.getenv("CELERY_ANALYSIS_QUEUE", "analysis")
 
 # Create Celery app
 celery_app = Celery(
@@ -51,6 +48,27 @@ celery_app.conf.update(
         "master_name": "mymaster",
         "retry_on_timeout": True,
     },
+    # Route each workload class to its own queue so idle research tasks never
+    # hold slots that GPU-bound analysis could use; anything unrouted stays
+    # on the default "celery" queue
+    task_routes={
+        "llm_service.tasks.research_company_task": {"queue": RESEARCH_QUEUE},
+        "llm_service.tasks.research_companies_batch_task": {"queue": RESEARCH_QUEUE},
+        "llm_service.tasks.analyze_position_task": {"queue": ANALYSIS_QUEUE},
+        "llm_service.tasks.analyze_positions_batch_task": {"queue": ANALYSIS_QUEUE},
+        "llm_service.tasks.calculate_musashi_task": {"queue": ANALYSIS_QUEUE},
+        "llm_service.tasks.score_musashi_batch_task": {"queue": ANALYSIS_QUEUE},
+        "llm_service.tasks.deliver_webhook_task": {"queue": WEBHOOK_QUEUE},
+        "llm_service.tasks.pump_webhook_outbox_task": {"queue": WEBHOOK_QUEUE},
+    },
+    # Re-queue webhook deliveries whose outbox backoff has elapsed
+    # (run beat with -B; see start-celery-worker.sh)
+    beat_schedule={
+        "pump-webhook-outbox": {
+            "task": "llm_service.tasks.pump_webhook_outbox_task",
+            "schedule": WEBHOOK_OUTBOX_PUMP_INTERVAL,
+        },
+    },
     # Rate limiting (per customer/API key)
     task_annotations={
         "llm_service.tasks.research_company_task": {
@@ -59,6 +77,12 @@ celery_app.conf.update(
         "llm_service.tasks.analyze_position_task": {
             "rate_limit": "10/m",  # 10 per minute
         },
+        "llm_service.tasks.research_companies_batch_task": {
+            "rate_limit": "2/m",  # Each batch already paces its own searches
+        },
+        "llm_service.tasks.analyze_positions_batch_task": {
+            "rate_limit": "2/m",
+        },
     },
     # Redis transport: visibility_timeout must be >= task_time_limit so tasks
     # are not re-queued while still running (default is 3600 s which equals 1 h).
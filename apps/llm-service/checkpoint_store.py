@@ -0,0 +1,171 @@
+"""
+Durable job checkpoints for long-running LLM jobs.
+
+A checkpoint is a small JSON-serializable dict of job state (progress
+counters, offsets, stage outputs) saved under a namespace and job ID so a
+job can resume after a worker crash or retry. State lives in Redis when
+available (shared across workers) and in JSON files under
+LLM_CHECKPOINT_DIR otherwise.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from redis_store import get_redis, redis_key
+
+logger = logging.getLogger(__name__)
+
+LLM_CHECKPOINT_DIR = os.getenv(
+    "LLM_CHECKPOINT_DIR", os.path.join(tempfile.gettempdir(), "llm-checkpoints")
+)
+# Checkpoints of abandoned jobs expire after this many seconds (Redis tier)
+LLM_CHECKPOINT_TTL = int(os.getenv("LLM_CHECKPOINT_TTL", str(7 * 86400)))
+
+
+class CheckpointStore:
+    """Save and load job state by namespace and job ID.
+
+    Args:
+        namespace: Key namespace (e.g. "musashi_batch")
+        ttl: Lifetime of Redis checkpoints in seconds
+        directory: Root directory of the file fallback
+        use_redis: Disable to keep checkpoints on local disk only
+    """
+
+    # Replace the checkpoint only if it is still the one the caller read
+    _SWAP_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: int = LLM_CHECKPOINT_TTL,
+        directory: str = LLM_CHECKPOINT_DIR,
+        use_redis: bool = True,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.directory = os.path.join(directory, namespace)
+        self.use_redis = use_redis
+        self._lock = threading.Lock()
+        self._claim_lock = threading.Lock()
+
+    def _redis_key(self, job_id: str) -> str:
+        return redis_key("checkpoint", self.namespace, job_id)
+
+    def _path(self, job_id: str) -> str:
+        safe_id = "".join(c if c.isalnum() or c in "-_:" else "_" for c in job_id)
+        return os.path.join(self.directory, f"{safe_id}.json")
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the saved state for *job_id*, or None if there is none."""
+        client = get_redis() if self.use_redis else None
+        if client is not None:
+            try:
+                raw = client.get(self._redis_key(job_id))
+                if raw is not None:
+                    return json.loads(raw)
+            except Exception as exc:
+                logger.warning("Redis checkpoint read failed (%s): %s", job_id, exc)
+
+        try:
+            with open(self._path(job_id), encoding="utf-8") as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.warning("Checkpoint file unreadable (%s): %s", job_id, exc)
+            return None
+
+    def save(self, job_id: str, state: Dict[str, Any]) -> None:
+        """Persist *state* for *job_id*, replacing any previous checkpoint."""
+        raw = json.dumps(state)
+
+        client = get_redis() if self.use_redis else None
+        if client is not None:
+            try:
+                client.set(self._redis_key(job_id), raw, ex=self.ttl)
+                return
+            except Exception as exc:
+                logger.warning("Redis checkpoint write failed (%s): %s", job_id, exc)
+
+        # Atomic replace so a crash mid-write never leaves a torn checkpoint
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(job_id)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                handle.write(raw)
+            os.replace(tmp_path, path)
+
+    def update(self, job_id: str, **fields: Any) -> Dict[str, Any]:
+        """Merge *fields* into the saved state and return the new state."""
+        state = self.load(job_id) or {}
+        state.update(fields)
+        self.save(job_id, state)
+        return state
+
+    def claim(
+        self, job_id: str, statuses: Tuple[str, ...], **fields: Any
+    ) -> Optional[Dict[str, Any]]:
+        """Merge *fields* into the state only if its status is in *statuses*.
+
+        The check and the write are atomic, so of two callers claiming the
+        same job at once only one succeeds.
+
+        Returns:
+            The new state, or None if there is no state or its status did
+            not match
+        """
+        client = get_redis() if self.use_redis else None
+        if client is not None:
+            try:
+                key = self._redis_key(job_id)
+                # Retry while another writer changes the state under us
+                for _ in range(5):
+                    raw = client.get(key)
+                    if raw is None:
+                        break
+                    state = json.loads(raw)
+                    if state.get("status") not in statuses:
+                        return None
+                    state.update(fields)
+                    swapped = client.eval(
+                        self._SWAP_SCRIPT, 1, key, raw, json.dumps(state), self.ttl
+                    )
+                    if swapped:
+                        return state
+                else:
+                    return None
+            except Exception as exc:
+                logger.warning("Redis checkpoint claim failed (%s): %s", job_id, exc)
+
+        # File tier: atomic within this process
+        with self._claim_lock:
+            state = self.load(job_id)
+            if state is None or state.get("status") not in statuses:
+                return None
+            state.update(fields)
+            self.save(job_id, state)
+            return state
+
+    def delete(self, job_id: str) -> None:
+        client = get_redis() if self.use_redis else None
+        if client is not None:
+            try:
+                client.delete(self._redis_key(job_id))
+            except Exception as exc:
+                logger.warning("Redis checkpoint delete failed (%s): %s", job_id, exc)
+        try:
+            os.remove(self._path(job_id))
+        except FileNotFoundError:
+            pass
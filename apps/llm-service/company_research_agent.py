@@ -7,14 +7,21 @@ the web and extracts structured company information.
 
 import os
 import json
-import re
+import threading
 import time
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from googlesearch import search as google_search
 import requests
 from bs4 import BeautifulSoup
 
+from checkpoint_store import CheckpointStore
+from job_control import JobCancelled, current_job, timeout as job_timeout
+from job_registry import checkpoint
+from llm_errors import TransientError
+from llm_guard_service import segmented_prompt
+from structured_output import STRING_LIST, nullable, object_schema, parse_json_object
+
 # LangChain imports
 try:
     from langchain.tools import Tool
@@ -36,6 +43,150 @@ logger = logging.getLogger(__name__)
 SEARCH_DELAY = 1.3  # Seconds between searches to avoid rate limiting
 MAX_SEARCH_RESULTS = 4
 SNIPPET_WORD_LIMIT = 160
+# Minimum spacing between Google queries, shared by every search in a process
+SEARCH_MIN_INTERVAL = float(os.getenv("SEARCH_MIN_INTERVAL", str(SEARCH_DELAY * 2)))
+
+# Incremental research mode ("incremental" or "full")
+RESEARCH_MODE = os.getenv("COMPANY_RESEARCH_MODE", "incremental").strip().lower()
+RESEARCH_COVERAGE_THRESHOLD = float(
+    os.getenv("COMPANY_RESEARCH_COVERAGE_THRESHOLD", "0.8")
+)
+RESEARCH_TIME_BUDGET = float(os.getenv("COMPANY_RESEARCH_TIME_BUDGET", "60"))
+RESEARCH_BATCH_SIZE = max(1, int(os.getenv("COMPANY_RESEARCH_BATCH_SIZE", "2")))
+# How long the stage outputs of an unfinished job are kept for its retries
+RESEARCH_CHECKPOINT_TTL = int(os.getenv("COMPANY_RESEARCH_CHECKPOINT_TTL", "86400"))
+
+# Placeholder snippet for a page that could not be fetched (never checkpointed)
+SNIPPET_UNAVAILABLE = "Content unavailable"
+
+# Extraction schema: field name -> value description shown to the LLM
+COMPANY_FIELD_SPECS: Dict[str, str] = {
+    "legalName": "\"Official legal/registered company name (e.g., 'Google LLC', 'Meta Platforms, Inc.', 'Amazon.com, Inc.')\"",
+    "description": '"Brief 2-3 sentence company description"',
+    "industry": '"Primary industry (e.g., Technology, Healthcare, Finance)"',
+    "founded": "year as integer or null",
+    "headquarters": '"City, State/Country"',
+    "website": '"https://company-website.com"',
+    "employeeCount": '"Range like 100-500 or exact number"',
+    "revenue": '"Estimated revenue like $100M or $1B-$5B"',
+    "companySize": '"Startup" or "Mid-size" or "Enterprise"',
+    "fundingTotal": '"Total funding raised (e.g., $50M) or null"',
+    "lastFunding": '"Latest round (Series A/B/C, IPO) or null"',
+    "investors": '["Investor 1", "Investor 2"] or []',
+    "avgSalary": '"Average software engineer salary range or null"',
+    "glassdoorRating": "rating as float (1.0-5.0) or null",
+    "benefits": '["Remote work", "Health insurance", "401k"] or []',
+    "logoUrl": '"URL to company logo if found or null"',
+    "linkedinUrl": '"LinkedIn company page URL or null"',
+    "twitterHandle": '"Twitter handle without @ or null"',
+    "githubUrl": '"GitHub organization URL or null"',
+}
+
+# JSON Schema types for constrained decoding (fields not listed are strings)
+_COMPANY_FIELD_TYPES: Dict[str, Dict[str, Any]] = {
+    "founded": nullable({"type": "integer"}),
+    "glassdoorRating": nullable({"type": "number", "minimum": 1, "maximum": 5}),
+    "investors": STRING_LIST,
+    "benefits": STRING_LIST,
+}
+
+
+def company_info_schema(fields: List[str]) -> Dict[str, Any]:
+    """JSON Schema for extracting *fields* of the company info structure."""
+    return object_schema(
+        {
+            field: _COMPANY_FIELD_TYPES.get(field, nullable({"type": "string"}))
+            for field in fields
+        }
+    )
+
+
+# Search queries and the schema fields each one is expected to answer.
+# Full mode runs all of them; incremental mode skips queries whose fields
+# are already filled.
+RESEARCH_QUERIES: List[Tuple[str, Tuple[str, ...]]] = [
+    (
+        "{company} company official website",
+        ("legalName", "description", "industry", "website", "logoUrl"),
+    ),
+    (
+        "{company} number of employees revenue",
+        ("employeeCount", "revenue", "companySize"),
+    ),
+    (
+        "{company} funding investors crunchbase",
+        ("fundingTotal", "lastFunding", "investors"),
+    ),
+    ("{company} headquarters location founded", ("headquarters", "founded")),
+    ("{company} software engineer salary levels.fyi", ("avgSalary",)),
+    ("{company} glassdoor rating benefits", ("glassdoorRating", "benefits")),
+    (
+        "{company} linkedin company page",
+        ("linkedinUrl", "twitterHandle", "githubUrl"),
+    ),
+]
+
+
+def _is_filled(value: Any) -> bool:
+    """Return True when an extracted field carries actual data."""
+    if value is None:
+        return False
+    if isinstance(value, (str, list, dict)) and not value:
+        return False
+    if isinstance(value, str) and value.strip().lower() in {"null", "unknown", "n/a"}:
+        return False
+    return True
+
+
+# Stage outputs saved per job and company (see ResearchStages)
+research_checkpoints = CheckpointStore("research", ttl=RESEARCH_CHECKPOINT_TTL)
+
+
+class ResearchStages:
+    """
+    Persisted stage outputs of one company's research inside a job.
+
+    Research runs in three stages, each checkpointed as it completes:
+
+      - queries:    URLs returned for each search query
+      - snippets:   text fetched from each URL
+      - extraction: fields extracted so far and the queries still pending
+
+    A retried or redelivered task (task_reject_on_worker_lost) reloads the
+    checkpoint and skips every stage output it already has.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.state: Dict[str, Any] = research_checkpoints.load(key) or {}
+
+    def urls(self, query: str) -> Optional[List[str]]:
+        return self.state.get("queries", {}).get(query)
+
+    def save_urls(self, query: str, urls: List[str]) -> None:
+        self.state.setdefault("queries", {})[query] = urls
+        self._save()
+
+    def snippet(self, url: str) -> Optional[str]:
+        return self.state.get("snippets", {}).get(url)
+
+    def save_snippet(self, url: str, snippet: str) -> None:
+        self.state.setdefault("snippets", {})[url] = snippet
+        self._save()
+
+    def extraction(self) -> Optional[Dict[str, Any]]:
+        return self.state.get("extraction")
+
+    def save_extraction(self, **progress: Any) -> None:
+        self.state["extraction"] = progress
+        self._save()
+
+    def clear(self) -> None:
+        research_checkpoints.delete(self.key)
+        self.state = {}
+
+    def _save(self) -> None:
+        research_checkpoints.save(self.key, self.state)
 
 
 class VLLMWrapper(LLM):
@@ -62,38 +213,87 @@ class VLLMWrapper(LLM):
                 max_tokens=kwargs.get("max_tokens", 500),
             )
             return response
+        except (JobCancelled, TransientError):
+            raise
         except Exception as e:
             logger.error(f"LLM call failed: {e}")
             return ""
 
 
+class SearchRateLimiter:
+    """Thread-safe limiter that spaces out search queries.
+
+    A single instance is shared by all research running in a process, so
+    concurrent research (e.g. batch enrichment) stays within one query budget
+    instead of each company pacing itself independently.
+    """
+
+    def __init__(self, min_interval: float = SEARCH_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until the next search slot is available."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+_shared_rate_limiter = SearchRateLimiter()
+
+
 class GoogleSearchTool:
     """Tool for performing Google searches and extracting snippets."""
 
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[SearchRateLimiter] = None):
         self.user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        self.rate_limiter = rate_limiter or _shared_rate_limiter
 
-    def search(self, query: str, num_results: int = MAX_SEARCH_RESULTS) -> List[Dict]:
+    def search(
+        self,
+        query: str,
+        num_results: int = MAX_SEARCH_RESULTS,
+        stages: Optional[ResearchStages] = None,
+    ) -> List[Dict]:
         """
         Perform Google search and return cleaned results with snippets.
 
         Args:
             query: Search query string
             num_results: Number of results to return
+            stages: Job checkpoint; URLs and snippets already saved there are
+                reused, new ones are saved as they arrive
 
         Returns:
             List of dicts with {title, url, snippet}
         """
-        logger.info(f"Searching Google for: {query}")
         results = []
 
         try:
-            # Get URLs from googlesearch-python
-            urls = list(google_search(query, num_results=num_results, lang="en"))
-            time.sleep(SEARCH_DELAY)  # Rate limiting
-
-            for url in urls[:num_results]:
-                snippet = self._extract_snippet(url)
+            urls = stages.urls(query) if stages is not None else None
+            if urls is None:
+                logger.info(f"Searching Google for: {query}")
+                # Get URLs from googlesearch-python
+                self.rate_limiter.wait()  # Rate limiting
+                urls = list(google_search(query, num_results=num_results, lang="en"))
+                urls = urls[:num_results]
+                if stages is not None and urls:
+                    stages.save_urls(query, urls)
+            else:
+                logger.info(f"Reusing checkpointed search results for: {query}")
+
+            checkpoint("fetching", query=query, pages=len(urls))
+            for url in urls:
+                snippet = stages.snippet(url) if stages is not None else None
+                if snippet is None:
+                    snippet = self._extract_snippet(url)
+                    if stages is not None and snippet != SNIPPET_UNAVAILABLE:
+                        stages.save_snippet(url, snippet)
                 results.append(
                     {
                         "title": self._extract_title_from_url(url),
@@ -105,6 +305,8 @@ class GoogleSearchTool:
             logger.info(f"Found {len(results)} results for: {query}")
             return results
 
+        except JobCancelled:
+            raise
         except Exception as e:
             logger.error(f"Search failed for '{query}': {e}")
             return []
@@ -113,7 +315,7 @@ class GoogleSearchTool:
         """Fetch webpage and extract ~160 word snippet."""
         try:
             response = requests.get(
-                url, headers={"User-Agent": self.user_agent}, timeout=10
+                url, headers={"User-Agent": self.user_agent}, timeout=job_timeout(10)
             )
             response.raise_for_status()
 
@@ -130,9 +332,11 @@ class GoogleSearchTool:
 
             return snippet if snippet else "No content extracted"
 
+        except JobCancelled:
+            raise
         except Exception as e:
             logger.warning(f"Failed to extract snippet from {url}: {e}")
-            return "Content unavailable"
+            return SNIPPET_UNAVAILABLE
 
     def _extract_title_from_url(self, url: str) -> str:
         """Extract domain name as title."""
@@ -147,16 +351,18 @@ class CompanyResearchAgent:
     LangChain ReAct agent for researching companies using LLM + Google Search.
     """
 
-    def __init__(self, llm_client):
+    def __init__(self, llm_client, rate_limiter: Optional[SearchRateLimiter] = None):
         """
         Initialize agent with LLM client.
 
         Args:
             llm_client: LLM inference client (vLLM, Ollama, llama-cpp, etc.)
+            rate_limiter: Search limiter (defaults to the process-wide one)
         """
         # Wrap the LLM client in LangChain wrapper
+        self.llm_client = llm_client
         self.llm = VLLMWrapper(llm_client=llm_client)
-        self.search_tool_impl = GoogleSearchTool()
+        self.search_tool_impl = GoogleSearchTool(rate_limiter)
 
         # Create LangChain tools
         self.tools = self._create_tools()
@@ -249,55 +455,245 @@ Thought: {agent_scratchpad}"""
         Returns:
             Dict with structured company information
         """
+        company_info, _ = self.research_company_with_stats(company_name)
+        return company_info
+
+    def research_company_with_stats(self, company_name: str) -> Tuple[Dict, Dict]:
+        """
+        Research a company and report coverage / query statistics.
+
+        Inside a job, each stage is checkpointed (see ResearchStages), so a
+        retried or redelivered task resumes where the last attempt stopped.
+
+        Args:
+            company_name: Name of company to research
+
+        Returns:
+            Tuple of (company info dict, research stats dict)
+        """
         logger.info(f"Starting LangChain research for company: {company_name}")
+        stages = self._stages(company_name)
 
         # For now, use the direct search approach (more reliable than agent loops)
         # TODO: Refactor to use agent.invoke() once agent prompt tuning is complete
-        return self._research_direct(company_name)
+        if RESEARCH_MODE == "full":
+            started = time.monotonic()
+            company_info = self._research_direct(company_name, stages)
+            stats = self._build_stats(
+                "full",
+                company_info,
+                queries_run=len(RESEARCH_QUERIES),
+                extractions=1,
+                started=started,
+                stop_reason="exhausted",
+            )
+        else:
+            company_info, stats = self._research_incremental(company_name, stages)
+
+        # Finished: a later run of this job must research afresh
+        if stages is not None:
+            stages.clear()
+
+        logger.info(
+            "Research stats for %s: mode=%s coverage=%.0f%% queries=%d saved=%d (%s)",
+            company_name,
+            stats["mode"],
+            stats["coverage"] * 100,
+            stats["queriesRun"],
+            stats["queriesSaved"],
+            stats["stopReason"],
+        )
+        return company_info, stats
 
-    def _research_direct(self, company_name: str) -> Dict:
+    def _stages(self, company_name: str) -> Optional[ResearchStages]:
+        """Checkpoint of *company_name* in the current job (None outside a job)."""
+        job_id = current_job()
+        if job_id is None:
+            return None
+        return ResearchStages(f"{job_id}:{' '.join(company_name.lower().split())}")
+
+    def _research_direct(
+        self, company_name: str, stages: Optional[ResearchStages] = None
+    ) -> Dict:
         """Direct search and extraction (bypasses agent loop for reliability)."""
+        saved = stages.extraction() if stages is not None else None
+        if saved is not None:
+            logger.info(f"Reusing checkpointed extraction for: {company_name}")
+            return saved["companyInfo"]
 
         # Define search queries
         search_queries = [
-            f"{company_name} company official website",
-            f"{company_name} number of employees revenue",
-            f"{company_name} funding investors crunchbase",
-            f"{company_name} headquarters location founded",
-            f"{company_name} software engineer salary levels.fyi",
-            f"{company_name} glassdoor rating benefits",
-            f"{company_name} linkedin company page",
+            query.format(company=company_name) for query, _ in RESEARCH_QUERIES
         ]
 
         # Gather search results
         all_results = []
-        for query in search_queries:
-            results = self.search_tool_impl.search(query, num_results=3)
+        for index, query in enumerate(search_queries):
+            checkpoint("searching", queries=index, total=len(search_queries))
+            results = self.search_tool_impl.search(query, num_results=3, stages=stages)
             all_results.extend(results)
-            time.sleep(SEARCH_DELAY)  # Rate limiting
 
         # Extract structured information using LLM
+        checkpoint("extracting")
         company_info = self._extract_with_llm(company_name, all_results)
+        if stages is not None:
+            stages.save_extraction(companyInfo=company_info)
 
         logger.info(f"Research complete for: {company_name}")
         return company_info
 
-    def _extract_with_llm(self, company_name: str, search_results: List[Dict]) -> Dict:
+    def _research_incremental(
+        self, company_name: str, stages: Optional[ResearchStages] = None
+    ) -> Tuple[Dict, Dict]:
         """
-        Use LLM to extract structured data from search results.
+        Field-targeted research with early termination.
 
-        Args:
-            company_name: Company name
-            search_results: List of search result dicts
-
-        Returns:
-            Structured company info dict
+        Runs searches in small batches, extracts the still-missing fields after
+        each batch, and only issues the queries whose target fields are still
+        null. Stops once coverage passes RESEARCH_COVERAGE_THRESHOLD or the
+        RESEARCH_TIME_BUDGET (seconds) runs out. Progress is checkpointed
+        after every extraction round.
         """
-        # Prepare context from search results
-        context = self._format_search_context(search_results)
+        started = time.monotonic()
+        company_info = self._default_company_info(company_name)
+        pending = list(RESEARCH_QUERIES)
+        queries_run = 0
+        extractions = 0
+        stop_reason = "exhausted"
+
+        saved = stages.extraction() if stages is not None else None
+        if saved is not None:
+            logger.info(
+                f"Resuming research for {company_name} after "
+                f"{saved['extractions']} extraction rounds"
+            )
+            company_info = saved["companyInfo"]
+            pending = [
+                entry for entry in RESEARCH_QUERIES if entry[0] in saved["pending"]
+            ]
+            queries_run = saved["queriesRun"]
+            extractions = saved["extractions"]
+            # The time budget covers every attempt, not each one
+            started -= saved["elapsedSeconds"]
+
+        while True:
+            missing = self._missing_fields(company_info)
+            if self._coverage(company_info) >= RESEARCH_COVERAGE_THRESHOLD:
+                stop_reason = "coverage"
+                break
+            if time.monotonic() - started >= RESEARCH_TIME_BUDGET:
+                stop_reason = "time_budget"
+                break
+
+            pending = [
+                (query, fields)
+                for query, fields in pending
+                if any(field in missing for field in fields)
+            ]
+            if not pending:
+                break
+
+            batch, pending = (
+                pending[:RESEARCH_BATCH_SIZE],
+                pending[RESEARCH_BATCH_SIZE:],
+            )
+            batch_results = []
+            for query, _ in batch:
+                checkpoint("searching", queries=queries_run)
+                batch_results.extend(
+                    self.search_tool_impl.search(
+                        query.format(company=company_name), num_results=3, stages=stages
+                    )
+                )
+                queries_run += 1
+
+            if not batch_results:
+                continue
+
+            checkpoint("extracting", missing=len(missing))
+            extracted = self._extract_fields(company_name, batch_results, missing)
+            extractions += 1
+            for field, value in extracted.items():
+                if field in missing and _is_filled(value):
+                    company_info[field] = value
+
+            if stages is not None:
+                stages.save_extraction(
+                    companyInfo=company_info,
+                    pending=[query for query, _ in pending],
+                    queriesRun=queries_run,
+                    extractions=extractions,
+                    elapsedSeconds=time.monotonic() - started,
+                )
 
-        # Create extraction prompt
-        prompt = f"""You are a data extraction AI. Extract structured information about {company_name} from the provided web search results.
+        if extractions and self._coverage(company_info) > 0:
+            company_info["source"] = "langchain_research"
+
+        stats = self._build_stats(
+            "incremental",
+            company_info,
+            queries_run=queries_run,
+            extractions=extractions,
+            started=started,
+            stop_reason=stop_reason,
+        )
+        logger.info(f"Research complete for: {company_name}")
+        return company_info, stats
+
+    def _missing_fields(self, company_info: Dict) -> List[str]:
+        """Schema fields that are still null/empty."""
+        return [
+            field
+            for field in COMPANY_FIELD_SPECS
+            if not _is_filled(company_info.get(field))
+        ]
+
+    def _coverage(self, company_info: Dict) -> float:
+        """Fraction of schema fields that hold data."""
+        missing = len(self._missing_fields(company_info))
+        return (len(COMPANY_FIELD_SPECS) - missing) / len(COMPANY_FIELD_SPECS)
+
+    def _build_stats(
+        self,
+        mode: str,
+        company_info: Dict,
+        queries_run: int,
+        extractions: int,
+        started: float,
+        stop_reason: str,
+    ) -> Dict:
+        """Summarize a research run for logging and webhook payloads."""
+        missing = self._missing_fields(company_info)
+        return {
+            "mode": mode,
+            "coverage": round(self._coverage(company_info), 3),
+            "fieldsFilled": len(COMPANY_FIELD_SPECS) - len(missing),
+            "fieldsTotal": len(COMPANY_FIELD_SPECS),
+            "missingFields": missing,
+            "queriesRun": queries_run,
+            "queriesSaved": len(RESEARCH_QUERIES) - queries_run,
+            "extractions": extractions,
+            "elapsedSeconds": round(time.monotonic() - started, 2),
+            "stopReason": stop_reason,
+        }
+
+    def _build_extraction_prompt(
+        self, company_name: str, context: str, fields: List[str]
+    ) -> str:
+        """Build the JSON extraction prompt for the requested schema fields.
+
+        The company name and the scraped search results are untrusted and
+        guard-scanned; the instructions and schema are not.
+        """
+        schema = ",\n".join(
+            f'  "{field}": {COMPANY_FIELD_SPECS[field]}' for field in fields
+        )
+        legal_name_rule = (
+            "- legalName should be the official registered name including suffixes like LLC, Inc., Ltd., Corp., etc.\n"
+            if "legalName" in fields
+            else ""
+        )
+        template = """You are a data extraction AI. Extract structured information about {company_name} from the provided web search results.
 
 Search Results:
 {context}
@@ -305,57 +701,106 @@ Search Results:
 Extract the following information and return ONLY valid JSON (no markdown, no explanations):
 
 {{
-  "legalName": "Official legal/registered company name (e.g., 'Google LLC', 'Meta Platforms, Inc.', 'Amazon.com, Inc.')",
-  "description": "Brief 2-3 sentence company description",
-  "industry": "Primary industry (e.g., Technology, Healthcare, Finance)",
-  "founded": year as integer or null,
-  "headquarters": "City, State/Country",
-  "website": "https://company-website.com",
-  "employeeCount": "Range like 100-500 or exact number",
-  "revenue": "Estimated revenue like $100M or $1B-$5B",
-  "companySize": "Startup" or "Mid-size" or "Enterprise",
-  "fundingTotal": "Total funding raised (e.g., $50M) or null",
-  "lastFunding": "Latest round (Series A/B/C, IPO) or null",
-  "investors": ["Investor 1", "Investor 2"] or [],
-  "avgSalary": "Average software engineer salary range or null",
-  "glassdoorRating": rating as float (1.0-5.0) or null,
-  "benefits": ["Remote work", "Health insurance", "401k"] or [],
-  "logoUrl": "URL to company logo if found or null",
-  "linkedinUrl": "LinkedIn company page URL or null",
-  "twitterHandle": "Twitter handle without @ or null",
-  "githubUrl": "GitHub organization URL or null"
+{schema}
 }}
 
 Rules:
-- legalName should be the official registered name including suffixes like LLC, Inc., Ltd., Corp., etc.
-- Use null for unknown fields, not "Unknown" or empty strings
+{legal_name_rule}- Use null for unknown fields, not "Unknown" or empty strings
 - For arrays, use [] if no data found
 - Be precise with numbers (use null if uncertain)
 - Extract exact URLs when found
 - Return ONLY the JSON object, nothing else"""
+        return segmented_prompt(
+            template,
+            {"company_name": company_name, "context": context},
+            schema=schema,
+            legal_name_rule=legal_name_rule,
+        )
+
+    def _extract_fields(
+        self, company_name: str, search_results: List[Dict], fields: List[str]
+    ) -> Dict:
+        """
+        Extract only *fields* from a batch of search results.
+
+        Returns:
+            Partial dict of extracted values ({} when extraction fails)
+        """
+        context = self._format_search_context(search_results)
+        prompt = self._build_extraction_prompt(company_name, context, fields)
 
         try:
-            # Call LLM via LangChain wrapper
-            response = self.llm._call(prompt, temperature=0.1, max_tokens=1500)
+            extracted = self._generate_structured(prompt, fields)
+        except (JobCancelled, TransientError):
+            raise
+        except Exception as e:
+            logger.error(f"Incremental LLM extraction failed: {e}")
+            return {}
 
-            # Clean and parse response
-            cleaned_response = self._clean_json_response(response)
-            company_info = json.loads(cleaned_response)
+        if extracted is None:
+            logger.error("Failed to parse incremental extraction as JSON")
+            return {}
+        return {field: extracted.get(field) for field in fields}
 
-            # Add metadata
-            company_info["companyName"] = company_name
-            company_info["source"] = "langchain_research"
+    def _extract_with_llm(self, company_name: str, search_results: List[Dict]) -> Dict:
+        """
+        Use LLM to extract structured data from search results.
+
+        Args:
+            company_name: Company name
+            search_results: List of search result dicts
 
-            return company_info
+        Returns:
+            Structured company info dict
+        """
+        # Prepare context from search results
+        context = self._format_search_context(search_results)
 
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM response as JSON: {e}")
-            logger.debug(f"Raw response: {response}")
-            return self._default_company_info(company_name)
+        # Create extraction prompt
+        prompt = self._build_extraction_prompt(
+            company_name, context, list(COMPANY_FIELD_SPECS)
+        )
+
+        try:
+            company_info = self._generate_structured(prompt, list(COMPANY_FIELD_SPECS))
+        except (JobCancelled, TransientError):
+            raise
         except Exception as e:
             logger.error(f"LLM extraction failed: {e}")
             return self._default_company_info(company_name)
 
+        if company_info is None:
+            logger.error("Failed to parse LLM response as JSON")
+            return self._default_company_info(company_name)
+
+        # Add metadata
+        company_info["companyName"] = company_name
+        company_info["source"] = "langchain_research"
+
+        return company_info
+
+    def _generate_structured(self, prompt: str, fields: List[str]) -> Optional[Dict]:
+        """
+        Run an extraction prompt and return the parsed JSON object.
+
+        Uses schema-constrained generation when the LLM client supports it,
+        otherwise parses the free-text response.
+        """
+        generate_json = getattr(self.llm_client, "generate_json", None)
+        if generate_json is not None:
+            return generate_json(
+                prompt,
+                company_info_schema(fields),
+                temperature=0.1,
+                max_tokens=1500,
+            )
+
+        response = self.llm._call(prompt, temperature=0.1, max_tokens=1500)
+        parsed = parse_json_object(response)
+        if parsed is None:
+            logger.debug(f"Raw response: {response}")
+        return parsed
+
     def _format_search_context(self, results: List[Dict]) -> str:
         """Format search results into readable context."""
         formatted = []
@@ -367,23 +812,11 @@ Rules:
             )
         return "\n".join(formatted)
 
-    def _clean_json_response(self, response: str) -> str:
-        """Clean LLM response to extract valid JSON."""
-        # Remove markdown code blocks
-        response = re.sub(r"```json\s*", "", response)
-        response = re.sub(r"```\s*", "", response)
-
-        # Find JSON object
-        match = re.search(r"\{.*\}", response, re.DOTALL)
-        if match:
-            return match.group(0)
-
-        return response.strip()
-
     def _default_company_info(self, company_name: str) -> Dict:
         """Return default structure when extraction fails."""
         return {
             "companyName": company_name,
+            "legalName": None,
             "description": None,
             "industry": None,
             "founded": None,
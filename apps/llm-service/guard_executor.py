@@ -0,0 +1,318 @@
+"""
+Guard execution service: runs llm_guard scanners off the request threads.
+
+Scan requests from any thread are queued to a pool of guard workers (one
+per CPU by default).
+When a scanner has a batch entry point (scan_batch), each worker takes the
+requests that arrive within LLM_GUARD_BATCH_WAIT_MS (up to
+LLM_GUARD_BATCH_SIZE) and scans them as one batch:
+
+  - a scanner with scan_batch is called once for the whole batch, i.e. one
+    model forward pass
+  - other scanners are applied to each item in turn, still on the worker
+  - an item whose scan raises fails on its own; the rest of the batch goes on
+
+No llm-guard 0.3.x scanner has scan_batch. With none configured, a batch
+would only hold requests back and scan them one after another on one
+thread, so each worker takes one request at a time with no wait instead.
+A scan whose caller gave up waiting (its future was cancelled) is skipped.
+
+Scanners run in order and each sees the text sanitized by the previous one,
+as llm_guard's scan_prompt/scan_output do. The models are loaded once and
+shared by the workers (inference releases the GIL), so the pool bounds how
+many scans compete for CPU instead of every request thread running models
+at once. Per-scanner latency and batch sizes are exposed through stats().
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+logger = logging.getLogger(__name__)
+
+# Scanners without scan_batch (all of llm-guard 0.3.x) run one item at a
+# time, so throughput comes from workers; default to one per CPU
+LLM_GUARD_WORKERS = max(
+    1, int(os.getenv("LLM_GUARD_WORKERS", str(os.cpu_count() or 1)))
+)
+LLM_GUARD_BATCH_SIZE = max(1, int(os.getenv("LLM_GUARD_BATCH_SIZE", "8")))
+LLM_GUARD_BATCH_WAIT_MS = float(os.getenv("LLM_GUARD_BATCH_WAIT_MS", "5"))
+# A scan still queued or running after this many seconds is abandoned
+LLM_GUARD_SCAN_TIMEOUT = float(os.getenv("LLM_GUARD_SCAN_TIMEOUT", "30"))
+
+# Latency samples kept per scanner for percentiles
+_LATENCY_WINDOW = 500
+
+Verdict = Tuple[str, bool]
+
+
+class _ScanRequest(NamedTuple):
+    kind: str  # "prompt" or "output"
+    text: str
+    prompt_context: str
+    submitted: float
+    future: "Future[Verdict]"
+
+
+class _LatencyStats:
+    """Call count and recent latencies of one scanner (milliseconds)."""
+
+    def __init__(self):
+        self.calls = 0
+        self.items = 0
+        self.errors = 0
+        self.samples: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+
+        def percentile(fraction: float) -> float:
+            if not ordered:
+                return 0.0
+            index = min(len(ordered) - 1, int(len(ordered) * fraction))
+            return round(ordered[index], 2)
+
+        return {
+            "calls": self.calls,
+            "items": self.items,
+            "errors": self.errors,
+            "p50Ms": percentile(0.5),
+            "p95Ms": percentile(0.95),
+            "maxMs": round(ordered[-1], 2) if ordered else 0.0,
+        }
+
+
+class GuardExecutor:
+    """Queue of guard scans served by dedicated worker threads.
+
+    Args:
+        prompt_scanners: llm_guard input scanners (scan(prompt))
+        output_scanners: llm_guard output scanners (scan(prompt, output))
+        workers: Worker threads
+        batch_size: Most requests scanned together (1 if no scanner has
+            scan_batch)
+        batch_wait_ms: How long a worker waits for more requests to batch
+            (0 if no scanner has scan_batch)
+    """
+
+    def __init__(
+        self,
+        prompt_scanners: Sequence[Any],
+        output_scanners: Sequence[Any],
+        workers: int = LLM_GUARD_WORKERS,
+        batch_size: int = LLM_GUARD_BATCH_SIZE,
+        batch_wait_ms: float = LLM_GUARD_BATCH_WAIT_MS,
+    ):
+        self.scanners = {
+            "prompt": list(prompt_scanners),
+            "output": list(output_scanners),
+        }
+        if not any(
+            hasattr(scanner, "scan_batch")
+            for scanners in self.scanners.values()
+            for scanner in scanners
+        ):
+            # Nothing to batch: keep every worker busy on its own request
+            batch_size, batch_wait_ms = 1, 0.0
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait_ms / 1000
+        self._queue: "queue.Queue[Optional[_ScanRequest]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._latency: Dict[str, _LatencyStats] = {}
+        self._batches = 0
+        self._batched_items = 0
+        self._queue_wait: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self._workers = [
+            threading.Thread(target=self._run, name=f"llm-guard-{index}", daemon=True)
+            for index in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(
+        self, kind: str, text: str, prompt_context: str = ""
+    ) -> "Future[Verdict]":
+        """Queue a scan; the future resolves to (sanitized text, is_valid)."""
+        future: "Future[Verdict]" = Future()
+        if not self.scanners[kind]:
+            future.set_result((text, True))
+            return future
+        self._queue.put(
+            _ScanRequest(kind, text, prompt_context, time.monotonic(), future)
+        )
+        return future
+
+    def scan(
+        self,
+        kind: str,
+        text: str,
+        prompt_context: str = "",
+        timeout: float = LLM_GUARD_SCAN_TIMEOUT,
+    ) -> Verdict:
+        """Scan *text* and wait for the verdict (raises TimeoutError)."""
+        future = self.submit(kind, text, prompt_context)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Still queued: the worker skips it instead of scanning for nobody
+            future.cancel()
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._queue_wait)
+            return {
+                "workers": len(self._workers),
+                "queued": self._queue.qsize(),
+                "batches": self._batches,
+                "avgBatchSize": (
+                    round(self._batched_items / self._batches, 2)
+                    if self._batches
+                    else 0.0
+                ),
+                "queueWaitP50Ms": round(waits[len(waits) // 2], 2) if waits else 0.0,
+                "scanners": {
+                    name: latency.snapshot() for name, latency in self._latency.items()
+                },
+            }
+
+    def shutdown(self) -> None:
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                try:
+                    remaining = max(0.0, deadline - time.monotonic())
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Keep the stop signal for this worker's next get()
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+
+            started = time.monotonic()
+            with self._lock:
+                self._batches += 1
+                self._batched_items += len(batch)
+                self._queue_wait.extend(
+                    (started - item.submitted) * 1000 for item in batch
+                )
+
+            for kind in ("prompt", "output"):
+                group = [item for item in batch if item.kind == kind]
+                if group:
+                    self._scan_group(kind, group)
+
+    def _scan_group(self, kind: str, group: List[_ScanRequest]) -> None:
+        # Abandoned by the caller (timeout): do not spend a forward pass on it
+        group = [item for item in group if item.future.set_running_or_notify_cancel()]
+        if not group:
+            return
+        texts = [item.text for item in group]
+        valid = [True] * len(group)
+        errors: List[Optional[BaseException]] = [None] * len(group)
+        for scanner in self.scanners[kind]:
+            # An item that failed a scanner skips the rest; the others go on
+            active = [index for index, error in enumerate(errors) if error is None]
+            if not active:
+                break
+            results = self._apply(
+                kind,
+                scanner,
+                [texts[index] for index in active],
+                [group[index].prompt_context for index in active],
+            )
+            for index, result in zip(active, results):
+                if isinstance(result, BaseException):
+                    errors[index] = result
+                    continue
+                sanitized, is_valid = result
+                texts[index] = sanitized if isinstance(sanitized, str) else texts[index]
+                valid[index] = valid[index] and is_valid
+        for item, text, is_valid, error in zip(group, texts, valid, errors):
+            if error is not None:
+                item.future.set_exception(error)
+            else:
+                item.future.set_result((text, is_valid))
+
+    def _apply(
+        self, kind: str, scanner: Any, texts: List[str], contexts: List[str]
+    ) -> List[Union[Verdict, BaseException]]:
+        """Run one scanner over the batch and record its latency.
+
+        Returns a verdict, or the exception it raised, per item. A failed
+        batch call is retried item by item so one bad input does not fail
+        the others.
+        """
+        name = f"{kind}.{type(scanner).__name__}"
+        started = time.perf_counter()
+        raw: List[Any] = []
+        batch_scan = getattr(scanner, "scan_batch", None)
+        if batch_scan is not None:
+            try:
+                if kind == "prompt":
+                    raw = list(batch_scan(texts))
+                else:
+                    raw = list(batch_scan(contexts, texts))
+            except Exception as exc:
+                logger.warning("%s batch scan failed, scanning items: %s", name, exc)
+                raw = []
+        if not raw:
+            for context, text in zip(contexts, texts):
+                try:
+                    if kind == "prompt":
+                        raw.append(scanner.scan(text))
+                    else:
+                        raw.append(scanner.scan(context, text))
+                except Exception as exc:
+                    raw.append(exc)
+        elapsed = (time.perf_counter() - started) * 1000
+
+        failed = sum(1 for result in raw if isinstance(result, BaseException))
+        with self._lock:
+            latency = self._latency.setdefault(name, _LatencyStats())
+            latency.calls += 1
+            latency.items += len(texts)
+            latency.errors += failed
+            latency.samples.append(elapsed)
+        # llm_guard scanners return (sanitized, is_valid, risk_score)
+        return [
+            result
+            if isinstance(result, BaseException)
+            else (result[0], bool(result[1]))
+            for result in raw
+        ]
@@ -0,0 +1,196 @@
+r"""
+Heuristic guard rules, matched in a single pass per rule set.
+
+Rules live in guard_rules.json (LLM_GUARD_RULES_FILE) in two categories:
+
+  - injection  — prompt-injection phrases; protect_prompt warns or rejects
+  - sensitive  — secrets; protect_output redacts them
+
+A rule is:
+
+    {"name": "developer_mode", "pattern": "developer\\s+mode",
+     "ignoreCase": true, "keyword": "developer"}
+
+keyword is the literal every match starts with (compared lowercased). The
+text is lowercased once and each keyword is located with str.find, which
+clears clean text at C speed; the rule's regex is then only tried, anchored,
+where its keyword occurs. This is the keyword-automaton-plus-verification
+scheme of multi-pattern matchers, and it is much faster than one combined
+regex alternation, which in Python's re loses the literal-prefix search and
+is slower than running the patterns one by one. Rules without a keyword are
+compiled into one alternation of named groups and run as a single pass.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LLM_GUARD_RULES_FILE = os.getenv(
+    "LLM_GUARD_RULES_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "guard_rules.json"),
+)
+
+
+class RuleMatch(NamedTuple):
+    rule: str
+    start: int
+    end: int
+
+
+class _Rule(NamedTuple):
+    name: str
+    regex: "re.Pattern[str]"
+
+
+class RuleSet:
+    """Rules of one category, compiled for single-pass matching.
+
+    Args:
+        rules: Dicts with name, pattern and optional ignoreCase and keyword
+
+    Raises:
+        ValueError: If a rule is malformed, does not compile or can match
+            the empty string
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self._rules: List[_Rule] = []
+        self._by_keyword: Dict[str, List[_Rule]] = {}
+        unanchored: List[_Rule] = []
+        for index, rule in enumerate(rules):
+            name = rule.get("name") or f"rule_{index}"
+            pattern = rule.get("pattern")
+            if not pattern:
+                raise ValueError(f"Guard rule {name!r} has no pattern")
+            flags = re.IGNORECASE if rule.get("ignoreCase") else 0
+            try:
+                regex = re.compile(pattern, flags)
+            except re.error as exc:
+                raise ValueError(
+                    f"Guard rule {name!r} does not compile: {exc}"
+                ) from exc
+            if regex.match(""):
+                raise ValueError(f"Guard rule {name!r} matches the empty string")
+
+            compiled = _Rule(name, regex)
+            self._rules.append(compiled)
+            keyword = (rule.get("keyword") or "").lower()
+            if keyword:
+                self._by_keyword.setdefault(keyword, []).append(compiled)
+            else:
+                unanchored.append(compiled)
+
+        self._unanchored_names = [rule.name for rule in unanchored]
+        # Scoped flags keep each rule's case sensitivity inside the alternation
+        branches = [
+            f"(?P<r{index}>(?{'i' if rule.regex.flags & re.IGNORECASE else '-i'}:"
+            f"{rule.regex.pattern}))"
+            for index, rule in enumerate(unanchored)
+        ]
+        self._combined = re.compile("|".join(branches)) if branches else None
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def _matches(self, text: str) -> Iterator[RuleMatch]:
+        """Every rule match in *text*, unordered and possibly overlapping."""
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Lowercasing moved offsets (rare Unicode); try each rule everywhere
+            for rule in self._rules:
+                for match in rule.regex.finditer(text):
+                    yield RuleMatch(rule.name, match.start(), match.end())
+            return
+
+        for keyword, rules in self._by_keyword.items():
+            position = lowered.find(keyword)
+            while position != -1:
+                for rule in rules:
+                    match = rule.regex.match(text, position)
+                    if match is not None:
+                        yield RuleMatch(rule.name, match.start(), match.end())
+                position = lowered.find(keyword, position + 1)
+
+        if self._combined is not None:
+            for match in self._combined.finditer(text):
+                name = self._unanchored_names[int(match.lastgroup[1:])]
+                yield RuleMatch(name, match.start(), match.end())
+
+    def search(self, text: str) -> Optional[RuleMatch]:
+        """Earliest rule match in *text*, or None."""
+        return min(self._matches(text), key=lambda match: match.start, default=None)
+
+    def matches(self, text: str) -> List[RuleMatch]:
+        """Non-overlapping matches in order; the longest wins at a position."""
+        kept: List[RuleMatch] = []
+        cursor = 0
+        for match in sorted(
+            self._matches(text), key=lambda match: (match.start, -match.end)
+        ):
+            if match.start >= cursor:
+                kept.append(match)
+                cursor = match.end
+        return kept
+
+    def redact(
+        self, text: str, replacement: str = "[REDACTED]"
+    ) -> Tuple[str, List[str]]:
+        """Replace every match; returns the text and the rules that fired."""
+        matches = self.matches(text)
+        if not matches:
+            return text, []
+
+        parts: List[str] = []
+        cursor = 0
+        for match in matches:
+            parts.append(text[cursor : match.start])
+            parts.append(replacement)
+            cursor = match.end
+        parts.append(text[cursor:])
+        return "".join(parts), [match.rule for match in matches]
+
+
+class GuardRules(NamedTuple):
+    injection: RuleSet
+    sensitive: RuleSet
+
+
+def load_guard_rules(path: str = LLM_GUARD_RULES_FILE) -> GuardRules:
+    """Load and compile the rules file.
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If it is not valid JSON or a rule is malformed
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    rules = GuardRules(
+        injection=RuleSet(config.get("injection", [])),
+        sensitive=RuleSet(config.get("sensitive", [])),
+    )
+    logger.info(
+        "Loaded guard rules from %s (injection=%s, sensitive=%s)",
+        path,
+        len(rules.injection),
+        len(rules.sensitive),
+    )
+    return rules
+
+
+_rules: Optional[GuardRules] = None
+_rules_lock = threading.Lock()
+
+
+def get_guard_rules() -> GuardRules:
+    """Return the compiled rules, loading LLM_GUARD_RULES_FILE on first use."""
+    global _rules
+    if _rules is None:
+        with _rules_lock:
+            if _rules is None:
+                _rules = load_guard_rules()
+    return _rules
@@ -0,0 +1,191 @@
+"""
+Idempotent submission of async LLM jobs.
+
+api-service retries a submission when its request times out, and without
+deduplication every retry enqueued the same research or analysis again.
+Async endpoints now take an idempotency key (the Idempotency-Key header,
+else metadata.jobId) and claim it before enqueueing:
+
+  - first submission    — claim succeeds, the job is queued as usual
+  - while in flight     — the resubmission gets the original jobId back
+  - after completion    — the stored result is returned without re-running
+  - after a failure     — the key is free again and the job re-runs
+
+Records are scoped by job kind and tenant and kept in Redis (in-process
+when Redis is unavailable). Workers record the outcome through the job ID
+index, since they only know their job ID.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from redis_store import get_redis, redis_key
+from result_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Completed results are returned to resubmissions for this long
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", str(24 * 3600)))
+# A job still "processing" after this long is assumed lost and may re-run
+# (matches the broker visibility timeout)
+IDEMPOTENCY_PROCESSING_TTL = int(os.getenv("IDEMPOTENCY_PROCESSING_TTL", "3600"))
+
+
+def idempotency_key(
+    header: Optional[str], metadata: Optional[Dict[str, Any]]
+) -> Optional[str]:
+    """Caller-supplied key: Idempotency-Key header, else metadata.jobId."""
+    key = (header or "").strip() or str((metadata or {}).get("jobId") or "").strip()
+    return key or None
+
+
+class IdempotencyStore:
+    """Claim idempotency keys and record job outcomes."""
+
+    # Claim the key unless a live (processing or completed) record holds it,
+    # in one atomic step so two submissions cannot both take over a failed
+    # job. Returns the existing record, or nil when the claim succeeded.
+    _CLAIM_SCRIPT = """
+local existing = redis.call('GET', KEYS[1])
+if existing then
+    local ok, record = pcall(cjson.decode, existing)
+    if ok and record['status'] ~= 'failed' then
+        return existing
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('SET', KEYS[2], KEYS[1], 'EX', ARGV[2])
+return false
+"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = LRUCache(max_entries=4096, ttl=IDEMPOTENCY_TTL)
+
+    def _record_key(self, kind: str, tenant: str, key: str) -> str:
+        digest = hashlib.sha256(f"{tenant}\0{key}".encode("utf-8")).hexdigest()[:32]
+        return redis_key("idempotency", kind, digest)
+
+    def _job_key(self, job_id: str) -> str:
+        return redis_key("idempotency", "job", job_id)
+
+    # ------------------------------------------------------------------
+    # API side
+    # ------------------------------------------------------------------
+
+    def claim(
+        self, kind: str, tenant: str, key: str, job_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """Claim *key* for a new job.
+
+        Returns:
+            None if the caller should enqueue *job_id*, otherwise the
+            existing record (jobId, status "processing" or "completed",
+            result once completed)
+        """
+        record_key = self._record_key(kind, tenant, key)
+        record = {"jobId": job_id, "status": "processing", "createdAt": time.time()}
+        raw = json.dumps(record)
+
+        client = get_redis()
+        if client is not None:
+            try:
+                existing = client.eval(
+                    self._CLAIM_SCRIPT,
+                    2,
+                    record_key,
+                    self._job_key(job_id),
+                    raw,
+                    IDEMPOTENCY_PROCESSING_TTL,
+                )
+                return json.loads(existing) if existing is not None else None
+            except Exception as exc:
+                logger.warning("Redis idempotency claim failed (%s): %s", kind, exc)
+
+        with self._lock:
+            existing = self._local.get(record_key)
+            if existing is not None and existing["status"] != "failed":
+                return existing
+            self._local.set(record_key, record, ttl=IDEMPOTENCY_PROCESSING_TTL)
+            self._local.set(
+                self._job_key(job_id), record_key, ttl=IDEMPOTENCY_PROCESSING_TTL
+            )
+        return None
+
+    def release(self, kind: str, tenant: str, key: str) -> None:
+        """Drop a claim whose job could not be enqueued."""
+        record_key = self._record_key(kind, tenant, key)
+        client = get_redis()
+        if client is not None:
+            try:
+                client.delete(record_key)
+            except Exception as exc:
+                logger.warning("Redis idempotency release failed (%s): %s", kind, exc)
+        self._local.delete(record_key)
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+
+    def record_outcome(self, job_id: str, payload: Dict[str, Any]) -> None:
+        """Store the final webhook payload of *job_id*, if it was claimed.
+
+        Completed results are kept for IDEMPOTENCY_TTL; failures free the
+        key so a resubmission runs the job again.
+        """
+        completed = payload.get("status") == "completed"
+        update = {
+            "status": "completed" if completed else "failed",
+            "finishedAt": time.time(),
+        }
+        if completed:
+            update["result"] = payload.get("data")
+        else:
+            update["error"] = payload.get("error")
+        ttl = IDEMPOTENCY_TTL if completed else IDEMPOTENCY_PROCESSING_TTL
+
+        client = get_redis()
+        if client is not None:
+            try:
+                record_key = client.get(self._job_key(job_id))
+                if record_key is None:
+                    return
+                raw = client.get(record_key)
+                record = json.loads(raw) if raw else {"jobId": job_id}
+                if record.get("jobId") != job_id:
+                    return  # Key was taken over by a newer submission
+                record.update(update)
+                client.set(record_key, json.dumps(record), ex=ttl)
+                client.expire(self._job_key(job_id), ttl)
+                return
+            except Exception as exc:
+                logger.warning("Redis idempotency update failed (%s): %s", job_id, exc)
+
+        with self._lock:
+            record_key = self._local.get(self._job_key(job_id))
+            if record_key is None:
+                return
+            record = dict(self._local.get(record_key) or {"jobId": job_id})
+            if record.get("jobId") != job_id:
+                return
+            record.update(update)
+            self._local.set(record_key, record, ttl=ttl)
+
+
+_store: Optional[IdempotencyStore] = None
+_store_lock = threading.Lock()
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Shared idempotency store for this process."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = IdempotencyStore()
+    return _store
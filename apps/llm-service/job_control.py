@@ -0,0 +1,183 @@
+"""
+Cancellation and deadlines for async jobs.
+
+A job runs under a control context (job ID plus optional deadline) for as
+long as it executes. Agents call check() between stages (and timeout()
+before each HTTP call), which raises JobCancelled once the job was
+cancelled through POST /api/jobs/{id}/cancel or its deadline has passed:
+
+  - cancel flags live in Redis (in-process fallback), so the API can
+    cancel a job running on any worker
+  - deadlines travel with the Celery message in the "deadline" header
+    (epoch seconds), so retries and re-queues keep the original deadline;
+    the default run budget (JOB_DEADLINE_SECONDS) is kept in the job
+    registry instead and becomes a deadline when the job first starts
+  - timeout() caps HTTP timeouts at the time left, so a call in flight
+    cannot outlive the deadline
+
+Pool threads do not inherit context variables; wrap their targets with
+propagate() to run them under the submitting job's control.
+"""
+
+import contextvars
+import functools
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+from redis_store import get_redis, redis_key
+from result_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Celery message header carrying the deadline (epoch seconds)
+DEADLINE_HEADER = "deadline"
+
+# Default run budget for single async jobs, counted from when the job starts
+# running (queue time excluded); 0 = none
+JOB_DEADLINE_SECONDS = float(os.getenv("JOB_DEADLINE_SECONDS", "1800"))
+# How long a cancel request is remembered
+JOB_CANCEL_TTL = int(os.getenv("JOB_CANCEL_TTL", str(24 * 3600)))
+
+_local_flags = LRUCache(max_entries=4096, ttl=JOB_CANCEL_TTL)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job that was cancelled or ran past its deadline."""
+
+    def __init__(self, job_id: str, reason: str = "cancelled"):
+        self.job_id = job_id
+        self.reason = reason
+        message = "Deadline exceeded" if reason == "deadline" else "Job cancelled"
+        super().__init__(f"{message} ({job_id})")
+
+
+class _Control(NamedTuple):
+    job_id: str
+    deadline: Optional[float]
+
+
+_current: contextvars.ContextVar[Optional[_Control]] = contextvars.ContextVar(
+    "job_control", default=None
+)
+
+
+def deadline_after(seconds: Optional[float]) -> Optional[float]:
+    """Absolute deadline *seconds* from now (None for no deadline)."""
+    if not seconds or seconds <= 0:
+        return None
+    return time.time() + seconds
+
+
+def task_deadline(request: Any) -> Optional[float]:
+    """Deadline of the Celery task being executed (from its message headers)."""
+    deadline = getattr(request, DEADLINE_HEADER, None)
+    if deadline is None:
+        deadline = (getattr(request, "headers", None) or {}).get(DEADLINE_HEADER)
+    return float(deadline) if deadline else None
+
+
+# ----------------------------------------------------------------------
+# Cancel flags
+# ----------------------------------------------------------------------
+
+
+def request_cancel(job_id: str) -> None:
+    """Flag *job_id* as cancelled; its next check() raises JobCancelled."""
+    client = get_redis()
+    if client is not None:
+        try:
+            client.set(redis_key("job", "cancel", job_id), "1", ex=JOB_CANCEL_TTL)
+            return
+        except Exception as exc:
+            logger.warning("Redis cancel flag write failed (%s): %s", job_id, exc)
+    _local_flags.set(job_id, True)
+
+
+def clear_cancel(job_id: str) -> None:
+    """Forget a cancel request (the job is being resubmitted or resumed)."""
+    client = get_redis()
+    if client is not None:
+        try:
+            client.delete(redis_key("job", "cancel", job_id))
+        except Exception as exc:
+            logger.warning("Redis cancel flag delete failed (%s): %s", job_id, exc)
+    _local_flags.delete(job_id)
+
+
+def is_cancelled(job_id: str) -> bool:
+    client = get_redis()
+    if client is not None:
+        try:
+            return bool(client.exists(redis_key("job", "cancel", job_id)))
+        except Exception as exc:
+            logger.warning("Redis cancel flag read failed (%s): %s", job_id, exc)
+    return bool(_local_flags.get(job_id))
+
+
+# ----------------------------------------------------------------------
+# Control context
+# ----------------------------------------------------------------------
+
+
+@contextmanager
+def controlled(
+    job_id: Optional[str], deadline: Optional[float] = None
+) -> Iterator[None]:
+    """Run the enclosed code as *job_id* (no-op when job_id is None)."""
+    if job_id is None:
+        yield
+        return
+    token = _current.set(_Control(job_id, deadline))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def current_job() -> Optional[str]:
+    """ID of the job running in this context (None outside a job)."""
+    control = _current.get()
+    return control.job_id if control is not None else None
+
+
+def check() -> None:
+    """Raise JobCancelled if the current job was cancelled or is past its deadline."""
+    control = _current.get()
+    if control is None:
+        return
+    if control.deadline is not None and time.time() >= control.deadline:
+        raise JobCancelled(control.job_id, "deadline")
+    if is_cancelled(control.job_id):
+        raise JobCancelled(control.job_id)
+
+
+def remaining() -> Optional[float]:
+    """Seconds until the current job's deadline (None without one)."""
+    control = _current.get()
+    if control is None or control.deadline is None:
+        return None
+    return control.deadline - time.time()
+
+
+def timeout(default: float) -> float:
+    """check(), then *default* capped at the time left before the deadline."""
+    check()
+    left = remaining()
+    return default if left is None else max(0.1, min(default, left))
+
+
+def propagate(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap *fn* to run under the current job's control (for pool threads)."""
+    control = _current.get()
+    if control is None:
+        return fn
+
+    @functools.wraps(fn)
+    def run(*args: Any, **kwargs: Any) -> Any:
+        with controlled(control.job_id, control.deadline):
+            return fn(*args, **kwargs)
+
+    return run
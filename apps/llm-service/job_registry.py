@@ -0,0 +1,473 @@
+"""
+Job status registry for async LLM jobs.
+
+Maps our job IDs (llm_job_…, llm_batch_…) to Celery task IDs and tracks
+each job from submission to result, so callers can poll /api/jobs/{id}
+instead of re-submitting:
+
+  - status         — queued, running, retrying, completed, failed or
+                     cancelled
+  - queue position — rank among jobs waiting on the same Celery queue
+  - stage          — progress reported by the agents (searching, fetching,
+                     extracting, analyzing, …) via report_stage()
+  - ETA            — from rolling per-kind runtimes (last JOB_STATS_WINDOW
+                     runs), queue position and the queue's worker concurrency
+  - result         — the task's return value once completed
+
+Records live in Redis (shared by API and workers) for JOB_REGISTRY_TTL,
+with an in-process fallback. tracking() also runs the job under its
+job_control context, so agents call checkpoint() between stages to report
+progress and stop early when the job is cancelled or past its deadline —
+without a job ID parameter.
+"""
+
+import contextvars
+import json
+import logging
+import math
+import os
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from job_control import JobCancelled, check, clear_cancel, controlled, request_cancel
+from redis_store import get_redis, redis_key
+from result_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+JOB_REGISTRY_TTL = int(os.getenv("JOB_REGISTRY_TTL", str(24 * 3600)))
+# Runtimes kept per job kind for ETA estimates
+JOB_STATS_WINDOW = int(os.getenv("JOB_STATS_WINDOW", "100"))
+# Assumed runtime of a job kind with no history yet
+JOB_DEFAULT_DURATION = float(os.getenv("JOB_DEFAULT_DURATION", "30"))
+
+# Workers serving each queue (same variables as start-celery-worker.sh)
+QUEUE_CONCURRENCY = {
+    os.getenv("CELERY_RESEARCH_QUEUE", "research"): int(
+        os.getenv("CELERY_RESEARCH_CONCURRENCY", "8")
+    ),
+    os.getenv("CELERY_ANALYSIS_QUEUE", "analysis"): int(
+        os.getenv("CELERY_ANALYSIS_CONCURRENCY", "2")
+    ),
+}
+
+FINISHED = ("completed", "failed", "cancelled")
+
+_current_job: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_job", default=None
+)
+
+
+class JobRegistry:
+    """Job records, queue ranks and runtime stats (Redis or in-process)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = LRUCache(max_entries=4096, ttl=JOB_REGISTRY_TTL)
+        self._local_queues: Dict[str, Dict[str, float]] = {}
+        self._local_stats: Dict[str, List[float]] = {}
+
+    def _job_key(self, job_id: str) -> str:
+        return redis_key("job", job_id)
+
+    def _task_key(self, task_id: str) -> str:
+        return redis_key("job", "task", task_id)
+
+    def _queue_key(self, queue: str) -> str:
+        return redis_key("jobs", "queued", queue)
+
+    def _stats_key(self, kind: str) -> str:
+        return redis_key("jobs", "runtime", kind)
+
+    # ------------------------------------------------------------------
+    # Storage primitives
+    # ------------------------------------------------------------------
+
+    def _load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        client = get_redis()
+        if client is not None:
+            try:
+                raw = client.get(self._job_key(job_id))
+                return json.loads(raw) if raw else None
+            except Exception as exc:
+                logger.warning("Redis job read failed (%s): %s", job_id, exc)
+        record = self._local.get(self._job_key(job_id))
+        return dict(record) if record is not None else None
+
+    def _save(self, record: Dict[str, Any]) -> None:
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(
+                    self._job_key(record["jobId"]),
+                    json.dumps(record),
+                    ex=JOB_REGISTRY_TTL,
+                )
+                return
+            except Exception as exc:
+                logger.warning("Redis job write failed (%s): %s", record["jobId"], exc)
+        self._local.set(self._job_key(record["jobId"]), dict(record))
+
+    def _update(self, job_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        record = self._load(job_id)
+        if record is None:
+            return None
+        record.update(fields)
+        self._save(record)
+        return record
+
+    def _enqueue(self, queue: str, job_id: str, submitted_at: float) -> None:
+        client = get_redis()
+        if client is not None:
+            try:
+                pipe = client.pipeline()
+                pipe.zadd(self._queue_key(queue), {job_id: submitted_at})
+                # Drop ranks of jobs that were lost without ever starting
+                pipe.zremrangebyscore(
+                    self._queue_key(queue), "-inf", time.time() - JOB_REGISTRY_TTL
+                )
+                pipe.execute()
+                return
+            except Exception as exc:
+                logger.warning("Redis job queue write failed (%s): %s", queue, exc)
+        with self._lock:
+            self._local_queues.setdefault(queue, {})[job_id] = submitted_at
+
+    def _dequeue(self, queue: str, job_id: str) -> None:
+        client = get_redis()
+        if client is not None:
+            try:
+                client.zrem(self._queue_key(queue), job_id)
+                return
+            except Exception as exc:
+                logger.warning("Redis job queue update failed (%s): %s", queue, exc)
+        with self._lock:
+            self._local_queues.get(queue, {}).pop(job_id, None)
+
+    def _rank(self, queue: str, job_id: str) -> Optional[int]:
+        client = get_redis()
+        if client is not None:
+            try:
+                return client.zrank(self._queue_key(queue), job_id)
+            except Exception as exc:
+                logger.warning("Redis job queue read failed (%s): %s", queue, exc)
+        with self._lock:
+            waiting = self._local_queues.get(queue, {})
+            if job_id not in waiting:
+                return None
+            return sorted(waiting, key=waiting.get).index(job_id)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def register(
+        self,
+        job_id: str,
+        kind: str,
+        task_id: Optional[str] = None,
+        queue: str = "thread",
+        tenant: Optional[str] = None,
+        deadline: Optional[float] = None,
+        run_budget: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Record a submitted job (before it is enqueued, so workers find it).
+
+        *deadline* is absolute; *run_budget* (seconds) becomes the deadline
+        when the job first starts, so time spent queued does not count.
+        """
+        now = time.time()
+        record = {
+            "jobId": job_id,
+            "kind": kind,
+            "taskId": task_id,
+            "queue": queue,
+            "tenant": tenant,
+            "status": "queued",
+            "attempts": 0,
+            "submittedAt": now,
+            "startedAt": None,
+            "finishedAt": None,
+            "stage": None,
+            "stageDetail": None,
+            "deadline": deadline,
+            "runBudget": run_budget,
+        }
+        clear_cancel(job_id)
+        self._save(record)
+        if task_id:
+            self._index_task(task_id, job_id)
+        self._enqueue(queue, job_id, now)
+        return record
+
+    def _index_task(self, task_id: str, job_id: str) -> None:
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(self._task_key(task_id), job_id, ex=JOB_REGISTRY_TTL)
+                return
+            except Exception as exc:
+                logger.warning("Redis job task index failed (%s): %s", task_id, exc)
+        self._local.set(self._task_key(task_id), job_id)
+
+    def job_for_task(self, task_id: str) -> Optional[str]:
+        """Our job ID for a Celery task ID, if the job was registered."""
+        client = get_redis()
+        if client is not None:
+            try:
+                job_id = client.get(self._task_key(task_id))
+                if job_id:
+                    return job_id
+            except Exception as exc:
+                logger.warning("Redis job task lookup failed (%s): %s", task_id, exc)
+        return self._local.get(self._task_key(task_id))
+
+    def _current(self, job_id: str, task_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """The job record, unless *task_id* was superseded by a newer task."""
+        record = self._load(job_id)
+        if record is None or (task_id and record.get("taskId") not in (None, task_id)):
+            return None
+        return record
+
+    def mark_started(
+        self, job_id: str, task_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        record = self._current(job_id, task_id)
+        if record is None or record["status"] in FINISHED:
+            return record  # e.g. cancelled while queued; check() stops it
+        self._dequeue(record["queue"], job_id)
+        now = time.time()
+        if record.get("deadline") is None and record.get("runBudget"):
+            # First start: the run budget counts from here; retries keep it
+            record["deadline"] = now + record["runBudget"]
+        record.update(
+            status="running",
+            startedAt=now,
+            attempts=record.get("attempts", 0) + 1,
+        )
+        self._save(record)
+        return record
+
+    def requeue(
+        self,
+        job_id: str,
+        task_id: Optional[str] = None,
+        status: str = "queued",
+        error: Optional[str] = None,
+    ) -> None:
+        """Put *job_id* back in line: a Celery retry, or its next task (*task_id*)."""
+        record = self._load(job_id)
+        if record is None:
+            return
+        record.update(status=status, stage=None, stageDetail=None)
+        if error is not None:
+            record["error"] = error
+        if task_id and task_id != record.get("taskId"):
+            record["taskId"] = task_id
+            self._index_task(task_id, job_id)
+        self._save(record)
+        self._enqueue(record["queue"], job_id, time.time())
+
+    def mark_finished(
+        self,
+        job_id: str,
+        status: str,
+        result: Any = None,
+        error: Optional[str] = None,
+        task_id: Optional[str] = None,
+    ) -> None:
+        """Record the final outcome and feed the runtime stats."""
+        record = self._current(job_id, task_id)
+        if record is None:
+            return
+        now = time.time()
+        self._dequeue(record["queue"], job_id)
+        record.update(status=status, finishedAt=now, stage=None, stageDetail=None)
+        if status == "completed":
+            record["result"] = result
+            record.pop("error", None)
+        else:
+            record["error"] = error
+        self._save(record)
+        if status == "completed" and record.get("startedAt"):
+            self._record_runtime(record["kind"], now - record["startedAt"])
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel *job_id*: waiting jobs end now, running ones at their next check."""
+        record = self._load(job_id)
+        if record is None or record["status"] in FINISHED:
+            return record
+        request_cancel(job_id)
+        if record["status"] == "running":
+            record["cancelRequested"] = True
+            self._save(record)
+            return record
+        self._dequeue(record["queue"], job_id)
+        record.update(status="cancelled", finishedAt=time.time(), error="Job cancelled")
+        self._save(record)
+        return record
+
+    def record_outcome(self, job_id: str, payload: Dict[str, Any]) -> None:
+        """Finish *job_id* from its final webhook payload (threading mode)."""
+        if payload.get("status") == "completed":
+            self.mark_finished(job_id, "completed", result=payload.get("data"))
+        elif payload.get("cancelled"):
+            self.mark_finished(job_id, "cancelled", error=payload.get("error"))
+        else:
+            self.mark_finished(job_id, "failed", error=payload.get("error"))
+
+    def report_stage(self, stage: str, **detail: Any) -> None:
+        """Report progress of the job running in this context (no-op outside jobs)."""
+        job_id = _current_job.get()
+        if job_id is None:
+            return
+        try:
+            self._update(job_id, stage=stage, stageDetail=detail or None)
+        except Exception as exc:
+            logger.debug("Stage report failed for %s: %s", job_id, exc)
+
+    @contextmanager
+    def tracking(
+        self,
+        job_id: Optional[str],
+        task_id: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> Iterator[None]:
+        """Mark *job_id* running, route report_stage() calls to it and run it
+        under its cancel/deadline control (*deadline*, else the registered one).
+        """
+        if job_id is None:
+            yield
+            return
+        record = self.mark_started(job_id, task_id) or {}
+        if deadline is None:
+            deadline = record.get("deadline")
+        token = _current_job.set(job_id)
+        try:
+            with controlled(job_id, deadline):
+                yield
+        finally:
+            _current_job.reset(token)
+
+    # ------------------------------------------------------------------
+    # Stats and status
+    # ------------------------------------------------------------------
+
+    def _record_runtime(self, kind: str, seconds: float) -> None:
+        client = get_redis()
+        if client is not None:
+            try:
+                pipe = client.pipeline()
+                pipe.lpush(self._stats_key(kind), round(seconds, 3))
+                pipe.ltrim(self._stats_key(kind), 0, JOB_STATS_WINDOW - 1)
+                pipe.execute()
+                return
+            except Exception as exc:
+                logger.warning("Redis job stats write failed (%s): %s", kind, exc)
+        with self._lock:
+            samples = self._local_stats.setdefault(kind, [])
+            samples.insert(0, seconds)
+            del samples[JOB_STATS_WINDOW:]
+
+    def runtime_stats(self, kind: str) -> Dict[str, Any]:
+        """Median and p90 runtime of the last JOB_STATS_WINDOW completed jobs."""
+        samples: List[float] = []
+        client = get_redis()
+        if client is not None:
+            try:
+                samples = [
+                    float(v) for v in client.lrange(self._stats_key(kind), 0, -1)
+                ]
+            except Exception as exc:
+                logger.warning("Redis job stats read failed (%s): %s", kind, exc)
+        else:
+            with self._lock:
+                samples = list(self._local_stats.get(kind, []))
+        if not samples:
+            return {
+                "samples": 0,
+                "p50": JOB_DEFAULT_DURATION,
+                "p90": JOB_DEFAULT_DURATION,
+            }
+        ordered = sorted(samples)
+        return {
+            "samples": len(samples),
+            "p50": round(statistics.median(ordered), 2),
+            "p90": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))], 2),
+        }
+
+    def estimate_seconds(self, record: Dict[str, Any], position: Optional[int]) -> int:
+        """Seconds until *record* is expected to finish."""
+        if record["status"] in FINISHED:
+            return 0
+        runtime = self.runtime_stats(record["kind"])["p50"]
+        if record["status"] == "running" and record.get("startedAt"):
+            return max(0, math.ceil(runtime - (time.time() - record["startedAt"])))
+        concurrency = max(1, QUEUE_CONCURRENCY.get(record["queue"], 1))
+        # Jobs ahead run in waves of `concurrency`; then this job's own run
+        waves = (position or 0) // concurrency
+        return math.ceil((waves + 1) * runtime)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job record plus queue position and ETA (without the result)."""
+        record = self._load(job_id)
+        if record is None:
+            return None
+        record.pop("result", None)
+        position = None
+        if record["status"] in ("queued", "retrying"):
+            position = self._rank(record["queue"], job_id)
+        record["queuePosition"] = position
+        record["etaSeconds"] = self.estimate_seconds(record, position)
+        return record
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._load(job_id)
+
+
+_registry: Optional[JobRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_job_registry() -> JobRegistry:
+    """Shared job registry for this process."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = JobRegistry()
+    return _registry
+
+
+def report_stage(stage: str, **detail: Any) -> None:
+    """Report progress of the current job (safe to call from any agent)."""
+    get_job_registry().report_stage(stage, **detail)
+
+
+def checkpoint(stage: str, **detail: Any) -> None:
+    """Stop if the current job was cancelled or timed out, else report *stage*."""
+    check()
+    report_stage(stage, **detail)
+
+
+def run_tracked(
+    job_id: str, target: Callable[..., Any], *args: Any, **kwargs: Any
+) -> Any:
+    """Run *target* as job *job_id* and record its return value (thread target)."""
+    registry = get_job_registry()
+    try:
+        with registry.tracking(job_id):
+            result = target(*args, **kwargs)
+    except JobCancelled as exc:
+        logger.info("Job %s stopped: %s", job_id, exc)
+        registry.mark_finished(job_id, "cancelled", error=str(exc))
+        return None
+    except Exception as exc:
+        logger.error("Job %s failed: %s", job_id, exc)
+        registry.mark_finished(job_id, "failed", error=str(exc))
+        return None
+    registry.mark_finished(job_id, "completed", result=result)
+    return result
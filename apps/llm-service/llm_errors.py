@@ -0,0 +1,87 @@
+"""
+Failure taxonomy for LLM jobs.
+
+Celery tasks retry a job only when a second attempt can succeed:
+
+  - TransientError  — the LLM backend was unreachable, overloaded or timed
+    out. Retried with backoff.
+  - PermanentError  — bad input, output that cannot be parsed, a guard
+    rejection or a request the backend refuses. Never retried; the job
+    fails at once.
+
+Parse failures are already retried where they happen (generate_json
+re-prompts with the bad output), so re-running the whole job adds nothing.
+"""
+
+from typing import Optional
+
+import requests
+
+
+class LLMServiceError(Exception):
+    """Base class for classified job failures."""
+
+    retryable = False
+
+
+class TransientError(LLMServiceError):
+    """A failure that may go away on its own; the job is retried."""
+
+    retryable = True
+
+
+class BackendUnavailable(TransientError):
+    """The LLM backend refused the connection or answered 5xx/429."""
+
+
+class BackendTimeout(TransientError):
+    """The LLM backend did not answer within the request timeout."""
+
+
+class PermanentError(LLMServiceError):
+    """A failure that would repeat on retry; the job fails at once."""
+
+
+class InvalidInput(PermanentError, ValueError):
+    """The job's input is missing or malformed."""
+
+
+class OutputParseError(PermanentError, ValueError):
+    """The model's output could not be parsed into the expected structure."""
+
+
+class BackendRejected(PermanentError):
+    """The LLM backend rejected the request itself (4xx other than 408/429)."""
+
+
+# HTTP statuses from a backend that are worth retrying
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Exceptions that Celery tasks retry automatically (autoretry_for)
+RETRYABLE_ERRORS = (
+    TransientError,
+    requests.ConnectionError,
+    requests.Timeout,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+def backend_error(exc: requests.RequestException) -> LLMServiceError:
+    """Classify a requests exception raised while calling an LLM backend."""
+    if isinstance(exc, requests.Timeout):
+        return BackendTimeout(f"LLM backend timed out: {exc}")
+    status: Optional[int] = getattr(exc.response, "status_code", None)
+    if status is not None and status not in RETRYABLE_STATUS:
+        return BackendRejected(f"LLM backend rejected request ({status}): {exc}")
+    return BackendUnavailable(f"LLM backend unavailable: {exc}")
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True if a task failing with *exc* should be retried."""
+    return isinstance(exc, RETRYABLE_ERRORS)
+
+
+def error_type(exc: BaseException) -> str:
+    """Failure class reported in failure webhooks: transient or permanent."""
+    return "transient" if is_retryable(exc) else "permanent"
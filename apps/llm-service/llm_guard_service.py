@@ -1,12 +1,26 @@
 #!/usr/bin/env python3
-"""Centralized LLM guard utilities for prompt and output protection."""
+"""Centralized LLM guard utilities for prompt and output protection.
 
+The llm_guard scanners (transformer models) are not loaded at import time.
+They load on first use, or earlier through preload_guard_runtime() (the
+API calls it from a background thread once it is serving); guard_status()
+reports whether they are loaded yet. Once loaded, scans run on a
+GuardExecutor (guard_executor.py), which batches concurrent requests.
+"""
+
+import hashlib
 import importlib
 import logging
 import os
-import re
-from typing import Any
+import string
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Iterable, Mapping, NamedTuple, Optional
 
+from guard_executor import LLM_GUARD_SCAN_TIMEOUT, GuardExecutor
+from guard_rules import get_guard_rules
+from llm_errors import PermanentError
+from result_cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
@@ -21,10 +35,17 @@ def _env_bool(name: str, default: bool) -> bool:
 LLM_GUARD_ENABLED = _env_bool("LLM_GUARD_ENABLED", True)
 LLM_GUARD_FAIL_CLOSED = _env_bool("LLM_GUARD_FAIL_CLOSED", False)
 LLM_GUARD_MAX_PROMPT_CHARS = int(os.getenv("LLM_GUARD_MAX_PROMPT_CHARS", "24000"))
+# Verdicts kept per scan kind (prompt/output); 0 disables the cache
+LLM_GUARD_CACHE_SIZE = int(os.getenv("LLM_GUARD_CACHE_SIZE", "1024"))
+LLM_GUARD_CACHE_TTL = int(os.getenv("LLM_GUARD_CACHE_TTL", "3600"))
+
+
+class GuardRejection(PermanentError, ValueError):
+    """Raised when a prompt or output is rejected by policy (never retried)."""
 
 
-class GuardRejection(ValueError):
-    """Raised when a prompt or output is rejected by policy."""
+# Returned instead of an output llm_guard rejects (fail-open mode)
+OUTPUT_REFUSAL = "I am unable to provide that response."
 
 
 def _load_llm_guard_runtime() -> dict[str, Any]:
@@ -34,6 +55,8 @@ def _load_llm_guard_runtime() -> dict[str, Any]:
         "scan_output": None,
         "prompt_scanners": [],
         "output_scanners": [],
+        "executor": None,
+        "signature": "",
     }
 
     try:
@@ -56,6 +79,10 @@ def _load_llm_guard_runtime() -> dict[str, Any]:
 
         runtime["available"] = bool(runtime["scan_prompt"] and runtime["scan_output"])
         if runtime["available"]:
+            runtime["executor"] = GuardExecutor(
+                runtime["prompt_scanners"], runtime["output_scanners"]
+            )
+            runtime["signature"] = _scanner_signature(runtime)
             logger.info(
                 "llm_guard enabled (prompt_scanners=%s, output_scanners=%s)",
                 len(runtime["prompt_scanners"]),
@@ -70,113 +97,266 @@ def _load_llm_guard_runtime() -> dict[str, Any]:
     return runtime
 
 
-_LLM_GUARD_RUNTIME = _load_llm_guard_runtime()
-
-_PROMPT_INJECTION_PATTERNS = [
-    re.compile(r"ignore\\s+(all\\s+)?previous\\s+instructions", re.IGNORECASE),
-    re.compile(r"reveal\\s+(the\\s+)?system\\s+prompt", re.IGNORECASE),
-    re.compile(r"developer\\s+mode", re.IGNORECASE),
-    re.compile(r"jailbreak", re.IGNORECASE),
-    re.compile(r"bypass\\s+(safety|guardrails|policies)", re.IGNORECASE),
-]
+def _scanner_signature(runtime: dict[str, Any]) -> str:
+    """Identify the scanner set and llm_guard version that produce verdicts."""
+    from importlib import metadata
 
-_SENSITIVE_PATTERNS = [
-    re.compile(r"sk-[A-Za-z0-9]{20,}"),
-    re.compile(r"api[_-]?key\\s*[:=]\\s*[A-Za-z0-9_\\-]{12,}", re.IGNORECASE),
-    re.compile(r"token\\s*[:=]\\s*[A-Za-z0-9_\\-]{12,}", re.IGNORECASE),
-]
+    try:
+        version = metadata.version("llm-guard")
+    except Exception:
+        version = "unknown"
+    prompt = ",".join(type(scanner).__name__ for scanner in runtime["prompt_scanners"])
+    output = ",".join(type(scanner).__name__ for scanner in runtime["output_scanners"])
+    return f"llm_guard={version};prompt={prompt};output={output}"
 
 
-def _invoke_prompt_scan(prompt: str) -> tuple[str, bool]:
-    fn = _LLM_GUARD_RUNTIME.get("scan_prompt")
-    scanners = _LLM_GUARD_RUNTIME.get("prompt_scanners", [])
+_runtime: Optional[dict[str, Any]] = None
+_runtime_lock = threading.Lock()
 
-    if fn is None or not scanners:
-        return prompt, True
 
-    result = None
-    try:
-        result = fn(scanners=scanners, prompt=prompt)
-    except TypeError:
-        result = fn(scanners, prompt)
+def get_guard_runtime() -> dict[str, Any]:
+    """Return the llm_guard runtime, loading it on first use.
 
-    if isinstance(result, tuple):
-        if len(result) >= 2:
-            sanitized = result[0] if isinstance(result[0], str) else prompt
-            is_valid = bool(result[1])
-            return sanitized, is_valid
+    Callers arriving while another thread loads the scanners wait for it,
+    so no prompt is ever scanned by a half-initialized runtime.
+    """
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = _load_llm_guard_runtime()
+    return _runtime
 
-    if isinstance(result, str):
-        return result, True
 
-    return prompt, True
+def preload_guard_runtime() -> None:
+    """Load the llm_guard runtime now (startup warm-up); no-op when disabled."""
+    if LLM_GUARD_ENABLED:
+        get_guard_runtime()
 
 
-def _invoke_output_scan(text: str, prompt_context: str) -> tuple[str, bool]:
-    fn = _LLM_GUARD_RUNTIME.get("scan_output")
-    scanners = _LLM_GUARD_RUNTIME.get("output_scanners", [])
+def guard_status() -> str:
+    """disabled, cold (not loaded yet), loading, ready or fallback (no llm_guard)."""
+    if not LLM_GUARD_ENABLED:
+        return "disabled"
+    if _runtime is None:
+        return "loading" if _runtime_lock.locked() else "cold"
+    return "ready" if _runtime["available"] else "fallback"
+
+
+# Verdicts of earlier scans, so repeated content (resume context, system
+# prompt, frequent questions) skips scanner inference
+_verdict_caches = {
+    kind: LRUCache(max_entries=LLM_GUARD_CACHE_SIZE, ttl=LLM_GUARD_CACHE_TTL)
+    for kind in ("prompt", "output")
+}
+
+
+def guard_stats() -> dict[str, Any]:
+    """Guard status, scan executor stats and verdict cache hit rates."""
+    executor = _runtime.get("executor") if _runtime is not None else None
+    return {
+        "status": guard_status(),
+        "executor": executor.stats() if executor is not None else None,
+        "cache": {kind: cache.stats() for kind, cache in _verdict_caches.items()},
+    }
 
-    if fn is None or not scanners:
-        return text, True
 
-    result = None
+def _verdict_key(runtime: dict[str, Any], text: str, prompt_context: str = "") -> str:
+    digest = hashlib.sha256()
+    for part in (runtime["signature"], prompt_context, text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def submit_scan(
+    kind: str, text: str, prompt_context: str = ""
+) -> "Future[tuple[str, bool]]":
+    """Start a prompt or output scan; the future resolves to (sanitized, is_valid).
+
+    A verdict already in the cache comes back as a completed future, and new
+    verdicts are cached when their scan finishes. Output verdicts are keyed
+    on the prompt context too, since output scanners may judge the output
+    against it. Without llm_guard every text is valid as-is.
+    """
+    future: "Future[tuple[str, bool]]"
+    runtime = get_guard_runtime()
+    executor = runtime.get("executor")
+    if executor is None:
+        future = Future()
+        future.set_result((text, True))
+        return future
+    if LLM_GUARD_CACHE_SIZE <= 0:
+        return executor.submit(kind, text, prompt_context)
+
+    cache = _verdict_caches[kind]
+    key = _verdict_key(runtime, text, prompt_context if kind == "output" else "")
+    cached = cache.get(key)
+    if cached is not None:
+        sanitized, is_valid = cached
+        future = Future()
+        future.set_result(((text if sanitized is None else sanitized), is_valid))
+        return future
+
+    def remember(done: "Future[tuple[str, bool]]") -> None:
+        if not done.cancelled() and done.exception() is None:
+            sanitized, is_valid = done.result()
+            # Most content comes back unchanged; don't keep a second copy of it
+            cache.set(key, (None if sanitized == text else sanitized, is_valid))
+
+    future = executor.submit(kind, text, prompt_context)
+    future.add_done_callback(remember)
+    return future
+
+
+def _cached_scans(
+    kind: str, texts: list[str], prompt_context: str = ""
+) -> list[tuple[str, bool]]:
+    """Scan *texts*; all cache misses are submitted before waiting so they batch."""
+    futures = [submit_scan(kind, text, prompt_context) for text in texts]
     try:
-        result = fn(scanners=scanners, prompt=prompt_context, output=text)
-    except TypeError:
-        try:
-            result = fn(scanners, prompt_context, text)
-        except TypeError:
-            result = fn(scanners=scanners, output=text)
-
-    if isinstance(result, tuple):
-        if len(result) >= 2:
-            sanitized = result[0] if isinstance(result[0], str) else text
-            is_valid = bool(result[1])
-            return sanitized, is_valid
-
-    if isinstance(result, str):
-        return result, True
-
-    return text, True
+        return [future.result(timeout=LLM_GUARD_SCAN_TIMEOUT) for future in futures]
+    except FutureTimeoutError:
+        # Scans still queued are skipped by the guard workers
+        for future in futures:
+            future.cancel()
+        raise
 
 
-def protect_prompt(prompt: str, source: str = "unknown") -> str:
-    candidate = (prompt or "").strip()
-    if len(candidate) > LLM_GUARD_MAX_PROMPT_CHARS:
-        logger.warning(
-            "Prompt too large from %s (%s chars), truncating to %s",
-            source,
-            len(candidate),
-            LLM_GUARD_MAX_PROMPT_CHARS,
-        )
-        candidate = candidate[:LLM_GUARD_MAX_PROMPT_CHARS]
+def _invoke_prompt_scan(prompt: str) -> tuple[str, bool]:
+    return _cached_scans("prompt", [prompt])[0]
 
-    if not LLM_GUARD_ENABLED:
-        return candidate
 
-    for pattern in _PROMPT_INJECTION_PATTERNS:
-        if pattern.search(candidate):
-            message = f"Prompt rejected by heuristic policy from {source}"
+def _invoke_output_scan(text: str, prompt_context: str) -> tuple[str, bool]:
+    return _cached_scans("output", [text], prompt_context)[0]
+
+
+class PromptSegment(NamedTuple):
+    """A piece of an assembled prompt.
+
+    Trusted segments (our templates, the candidate's own resume) are passed
+    through as-is; untrusted ones (user messages, scraped web text, job
+    postings) are truncated and scanned.
+    """
+
+    text: str
+    trusted: bool = True
+
+
+class SegmentedPrompt(str):
+    """A prompt string that remembers which parts of it are untrusted.
+
+    It is an ordinary str everywhere else, so agents can hand it to any LLM
+    client; RemoteLLMWrapper guards it with protect_segments().
+    """
+
+    segments: tuple[PromptSegment, ...]
+
+    def __new__(cls, segments: Iterable[PromptSegment]) -> "SegmentedPrompt":
+        segments = tuple(segments)
+        prompt = super().__new__(cls, "".join(segment.text for segment in segments))
+        prompt.segments = segments
+        return prompt
+
+
+def segmented_prompt(
+    template: str, untrusted: Mapping[str, Any], **trusted: Any
+) -> SegmentedPrompt:
+    """Fill a str.format *template*, marking the *untrusted* fields' values.
+
+    Example:
+        segmented_prompt("Company: {company}\\n{rules}", {"company": name}, rules=RULES)
+    """
+    segments = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if literal:
+            segments.append(PromptSegment(literal))
+        if field is None:
+            continue
+        if field in untrusted:
+            value, is_trusted = untrusted[field], False
+        elif field in trusted:
+            value, is_trusted = trusted[field], True
+        else:
+            raise ValueError(f"Missing prompt variable: {field}")
+        if conversion:
+            value = {"r": repr, "a": ascii}.get(conversion, str)(value)
+        segments.append(PromptSegment(format(value, spec or ""), is_trusted))
+    return SegmentedPrompt(segments)
+
+
+def _guard_prompt_texts(texts: list[str], source: str) -> list[str]:
+    """Heuristic checks plus llm_guard scan of untrusted prompt texts."""
+    injection = get_guard_rules().injection
+    for text in texts:
+        match = injection.search(text)
+        if match is not None:
+            message = f"Prompt rejected by heuristic rule {match.rule} from {source}"
             if LLM_GUARD_FAIL_CLOSED:
                 raise GuardRejection(message)
             logger.warning("%s (fail-open mode)", message)
             break
 
-    if _LLM_GUARD_RUNTIME.get("available"):
+    if get_guard_runtime().get("available"):
         try:
-            sanitized, is_valid = _invoke_prompt_scan(candidate)
-            if not is_valid:
+            verdicts = _cached_scans("prompt", texts)
+            if not all(is_valid for _, is_valid in verdicts):
                 message = f"Prompt rejected by llm_guard from {source}"
                 if LLM_GUARD_FAIL_CLOSED:
                     raise GuardRejection(message)
                 logger.warning("%s (fail-open mode)", message)
-            return sanitized
+            return [sanitized for sanitized, _ in verdicts]
         except GuardRejection:
             raise
         except Exception as exc:
             logger.warning("llm_guard prompt scan failed, continuing: %s", exc)
 
-    return candidate
+    return texts
+
+
+def _truncate(text: str, source: str) -> str:
+    if len(text) > LLM_GUARD_MAX_PROMPT_CHARS:
+        logger.warning(
+            "Prompt too large from %s (%s chars), truncating to %s",
+            source,
+            len(text),
+            LLM_GUARD_MAX_PROMPT_CHARS,
+        )
+        return text[:LLM_GUARD_MAX_PROMPT_CHARS]
+    return text
+
+
+def protect_prompt(prompt: str, source: str = "unknown") -> str:
+    candidate = _truncate((prompt or "").strip(), source)
+    if not LLM_GUARD_ENABLED:
+        return candidate
+    return _guard_prompt_texts([candidate], source)[0]
+
+
+def protect_segments(segments: Iterable[PromptSegment], source: str = "unknown") -> str:
+    """Guard only the untrusted segments of a prompt and join them back.
+
+    Each untrusted segment is truncated to LLM_GUARD_MAX_PROMPT_CHARS on its
+    own, so a long scraped page can no longer cut off the instructions after
+    it, and scanner cost follows the untrusted text rather than the whole
+    prompt. Segments are scanned (and their verdicts cached) separately.
+    """
+    parts = []
+    untrusted_indexes = []
+    for segment in segments:
+        if segment.trusted or not segment.text.strip():
+            parts.append(segment.text)
+            continue
+        untrusted_indexes.append(len(parts))
+        parts.append(_truncate(segment.text, source))
+
+    if LLM_GUARD_ENABLED and untrusted_indexes:
+        guarded = _guard_prompt_texts(
+            [parts[index] for index in untrusted_indexes], source
+        )
+        for index, text in zip(untrusted_indexes, guarded):
+            parts[index] = text
+    return "".join(parts)
 
 
 def protect_output(text: str, source: str = "unknown", prompt_context: str = "") -> str:
@@ -185,7 +365,7 @@ def protect_output(text: str, source: str = "unknown", prompt_context: str = "")
     if not LLM_GUARD_ENABLED:
         return candidate
 
-    if _LLM_GUARD_RUNTIME.get("available"):
+    if get_guard_runtime().get("available"):
         try:
             sanitized, is_valid = _invoke_output_scan(candidate, prompt_context)
             if not is_valid:
@@ -193,14 +373,14 @@ def protect_output(text: str, source: str = "unknown", prompt_context: str = "")
                 if LLM_GUARD_FAIL_CLOSED:
                     raise GuardRejection(message)
                 logger.warning("%s, redacting output (fail-open mode)", message)
-                return "I am unable to provide that response."
+                return OUTPUT_REFUSAL
             candidate = sanitized
         except GuardRejection:
             raise
         except Exception as exc:
             logger.warning("llm_guard output scan failed, continuing: %s", exc)
 
-    redacted = candidate
-    for pattern in _SENSITIVE_PATTERNS:
-        redacted = pattern.sub("[REDACTED]", redacted)
+    redacted, fired = get_guard_rules().sensitive.redact(candidate)
+    if fired:
+        logger.warning("Redacted output from %s (rules: %s)", source, ", ".join(fired))
     return redacted
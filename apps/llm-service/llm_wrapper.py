@@ -3,25 +3,50 @@ LLM wrapper utilities shared between the FastAPI app and Celery tasks.
 
 Provides:
   - RemoteLLMWrapper  — adapts remote LLM backends to a simple generate() interface
-  - call_webhook      — HMAC-signed HTTP POST with exponential-backoff retry
+  - call_webhook      — HMAC-signed HTTP POST with exponential-backoff retry (blocking)
+  - dispatch_webhook  — hand a result to the webhook dispatcher and return at once
   - research_company_async  — thread-safe wrapper used in the threading fallback path
   - analyze_position_async  — thread-safe wrapper used in the threading fallback path
+  - research_companies_batch — deduped, concurrent enrichment of many companies
+  - analyze_positions_batch  — one resume scored against many jobs
 """
 
-import hashlib
-import hmac
-import json
+import itertools
 import logging
 import os
-import time
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+from typing import TYPE_CHECKING, Iterator
 
 import requests
 
-from company_research_agent import CompanyResearchAgent
-from llm_guard_service import GuardRejection, protect_output, protect_prompt
+from idempotency import get_idempotency_store
+from job_control import JobCancelled, propagate, timeout as job_timeout
+from job_registry import checkpoint, get_job_registry
+from llm_errors import backend_error, error_type
+from llm_guard_service import (
+    GuardRejection,
+    PromptSegment,
+    SegmentedPrompt,
+    protect_output,
+    protect_prompt,
+    protect_segments,
+)
 from musashi_index_agent import MusashiIndexAgent
-from position_fit_agent import PositionFitAgent
 from prompt_manager import get_prompt_manager
+from result_cache import ResultCache
+from structured_output import (
+    build_repair_prompt,
+    parse_json_object,
+    structured_output_stats,
+)
+from webhook_dispatcher import deliver_webhook, dispatch_webhook, sign_payload
+
+if TYPE_CHECKING:
+    from company_research_agent import CompanyResearchAgent
+    from position_fit_agent import PositionFitAgent
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +61,25 @@ VLLM_SERVER_URL = os.getenv("VLLM_SERVER_URL", "http://localhost:8080")
 VLLM_MODEL = os.getenv("VLLM_MODEL", "Qwen/Qwen2.5-7B-Instruct")
 LLM_REQUEST_TIMEOUT = int(os.getenv("LLM_REQUEST_TIMEOUT", "180"))
 OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "10m")
+# Optional comma-separated list of backend URLs served round-robin (same API type)
+LLM_BACKEND_URLS = [
+    url.strip().rstrip("/")
+    for url in os.getenv("LLM_BACKEND_URLS", "").split(",")
+    if url.strip()
+]
+# Max in-flight generations per backend in the pool (0 = no limit). Applies
+# to every LLM call in the process, not only batches.
+LLM_BACKEND_CONCURRENCY = int(os.getenv("LLM_BACKEND_CONCURRENCY", "0"))
+# Batch worker threads per backend when LLM_BACKEND_CONCURRENCY is off
+_BATCH_WORKERS_PER_BACKEND = 2
+# Re-prompts allowed when schema-constrained output still fails to parse
+LLM_JSON_REPAIR_ATTEMPTS = int(os.getenv("LLM_JSON_REPAIR_ATTEMPTS", "1"))
+
+COMPANY_BATCH_CONCURRENCY = int(os.getenv("COMPANY_BATCH_CONCURRENCY", "4"))
+# Concurrent LLM requests per position batch (default: backend pool capacity)
+POSITION_BATCH_CONCURRENCY = int(os.getenv("POSITION_BATCH_CONCURRENCY", "0"))
+COMPANY_RESEARCH_CACHE_TTL = int(os.getenv("COMPANY_RESEARCH_CACHE_TTL", "86400"))
+MUSASHI_CACHE_TTL = int(os.getenv("MUSASHI_CACHE_TTL", "604800"))
 
 _raw_secret = os.getenv("LLM_WEBHOOK_SECRET", "")
 if not _raw_secret:
@@ -45,6 +89,50 @@ if not _raw_secret:
 WEBHOOK_SECRET: bytes = _raw_secret.encode("utf-8") if _raw_secret else b""
 
 
+# ---------------------------------------------------------------------------
+# Backend pool
+# ---------------------------------------------------------------------------
+
+
+class _BackendPool:
+    """Round-robin over LLM backend URLs with an optional in-flight bound.
+
+    Concurrent callers (batch jobs, threaded fallbacks) spread across every
+    configured backend instead of queueing on a single server. With
+    per_backend > 0 a semaphore also keeps the total in-flight generations
+    within what the pool can serve; with 0 calls are not limited.
+
+    capacity is the default worker count for batch pools.
+    """
+
+    def __init__(self, urls: list[str], per_backend: int):
+        self.urls = urls
+        self._cycle = itertools.cycle(urls)
+        self._lock = threading.Lock()
+        self.capacity = max(1, (per_backend or _BATCH_WORKERS_PER_BACKEND) * len(urls))
+        self._slots = (
+            threading.BoundedSemaphore(self.capacity) if per_backend > 0 else None
+        )
+
+    @contextmanager
+    def acquire(self) -> Iterator[str]:
+        with self._slots or nullcontext():
+            with self._lock:
+                url = next(self._cycle)
+            yield url
+
+
+def _default_backend_urls() -> list[str]:
+    if LLM_BACKEND_URLS:
+        return LLM_BACKEND_URLS
+    if LLAMA_API_TYPE in ("openai", "vllm"):
+        return [VLLM_SERVER_URL]
+    return [LLAMA_SERVER_URL]
+
+
+backend_pool = _BackendPool(_default_backend_urls(), LLM_BACKEND_CONCURRENCY)
+
+
 # ---------------------------------------------------------------------------
 # RemoteLLMWrapper
 # ---------------------------------------------------------------------------
@@ -56,39 +144,138 @@ class RemoteLLMWrapper:
     Used by CompanyResearchAgent, PositionFitAgent, and MusashiIndexAgent.
     """
 
+    @property
+    def model_name(self) -> str:
+        """Identifier of the backend model, used in result cache keys."""
+        if LLAMA_API_TYPE == "ollama":
+            return f"ollama:{LLAMA_MODEL}"
+        if LLAMA_API_TYPE in ("openai", "vllm"):
+            return f"{LLAMA_API_TYPE}:{os.getenv('MODEL_NAME', VLLM_MODEL)}"
+        # llama.cpp serves whatever model it was started with
+        return f"{LLAMA_API_TYPE}:{LLAMA_MODEL}"
+
     def generate(
         self, prompt: str, temperature: float = 0.7, max_tokens: int = 500
     ) -> str:
-        try:
-            guarded = protect_prompt(
-                prompt,
-                source="llm_wrapper.RemoteLLMWrapper.generate",
+        """Generate text for *prompt*.
+
+        A SegmentedPrompt has only its untrusted segments guarded; any other
+        string is guarded as a whole.
+        """
+        return self._generate(prompt, temperature, max_tokens)["text"]
+
+    def generate_json(
+        self,
+        prompt: str,
+        schema: dict,
+        temperature: float = 0.1,
+        max_tokens: int = 1500,
+        max_repairs: int | None = None,
+    ) -> dict | None:
+        """Generate a JSON object constrained to *schema*.
+
+        The schema is passed to the backend's constrained decoding so the
+        output is valid JSON by construction. If parsing still fails (older
+        backend, guard redaction, truncation) the model is re-prompted with
+        the bad output and the schema, at most *max_repairs* times. Guard
+        blocks and failed generations are not repaired; transport errors
+        propagate.
+
+        Returns:
+            Parsed dict, or None if every attempt failed to parse
+        """
+        if max_repairs is None:
+            max_repairs = LLM_JSON_REPAIR_ATTEMPTS
+
+        wasted_tokens = 0
+        current_prompt = prompt
+        for attempt in range(1, max_repairs + 2):
+            result = self._generate(
+                current_prompt, temperature, max_tokens, json_schema=schema
+            )
+            if result.get("error"):
+                # Guard block or failed generation: a repair prompt cannot fix it
+                structured_output_stats.record(attempt, False, wasted_tokens)
+                return None
+            parsed = parse_json_object(result["text"])
+            if parsed is not None:
+                structured_output_stats.record(attempt, True, wasted_tokens)
+                return parsed
+
+            wasted_tokens += result["tokens"] or len(result["text"]) // 4
+            logger.warning(
+                "Structured output parse failed (attempt %d/%d)",
+                attempt,
+                max_repairs + 1,
             )
+            current_prompt = build_repair_prompt(prompt, result["text"], schema)
+            if isinstance(prompt, SegmentedPrompt):
+                # The bad output was already output-guarded; only the
+                # original untrusted segments need scanning again
+                repair = PromptSegment(current_prompt[len(prompt) :])
+                current_prompt = SegmentedPrompt([*prompt.segments, repair])
+            temperature = 0.0
+
+        structured_output_stats.record(max_repairs + 1, False, wasted_tokens)
+        return None
+
+    def _generate(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        json_schema: dict | None = None,
+    ) -> dict:
+        try:
+            if isinstance(prompt, SegmentedPrompt):
+                guarded = protect_segments(
+                    prompt.segments,
+                    source="llm_wrapper.RemoteLLMWrapper.generate",
+                )
+            else:
+                guarded = protect_prompt(
+                    prompt,
+                    source="llm_wrapper.RemoteLLMWrapper.generate",
+                )
 
             if LLAMA_API_TYPE == "ollama":
-                result = _call_ollama(guarded, max_tokens, temperature)
+                result = _call_ollama(guarded, max_tokens, temperature, json_schema)
             elif LLAMA_API_TYPE == "llama-cpp":
-                result = _call_llama_cpp(guarded, max_tokens)
+                result = _call_llama_cpp(guarded, max_tokens, temperature, json_schema)
             elif LLAMA_API_TYPE in ("openai", "vllm"):
                 result = _call_openai_compatible(
                     system_prompt="You are a helpful assistant.",
                     user_message=guarded,
                     max_tokens=max_tokens,
+                    temperature=temperature,
+                    json_schema=json_schema,
                 )
             else:
                 raise ValueError(f"Unsupported LLAMA_API_TYPE: {LLAMA_API_TYPE}")
 
-            return protect_output(
+            text = protect_output(
                 result.get("text", ""),
                 source="llm_wrapper.RemoteLLMWrapper.generate",
                 prompt_context=guarded,
             )
+            return {"text": text, "tokens": result.get("tokens", 0)}
         except GuardRejection as exc:
             logger.warning("LLM guard rejected prompt/output: %s", exc)
-            return "I am unable to process this request safely."
+            return {
+                "text": "I am unable to process this request safely.",
+                "tokens": 0,
+                "error": "guard",
+            }
+        except requests.RequestException as exc:
+            # Let the job fail with a classified error instead of an empty answer
+            error = backend_error(exc)
+            logger.error("LLM generation failed: %s", error)
+            raise error from exc
+        except JobCancelled:
+            raise
         except Exception as exc:
             logger.error("LLM generation failed: %s", exc)
-            return ""
+            return {"text": "", "tokens": 0, "error": "generation"}
 
 
 # ---------------------------------------------------------------------------
@@ -96,62 +283,104 @@ class RemoteLLMWrapper:
 # ---------------------------------------------------------------------------
 
 
-def _call_llama_cpp(prompt: str, max_tokens: int = 256) -> dict:
-    response = requests.post(
-        f"{LLAMA_SERVER_URL}/completion",
-        json={
-            "prompt": prompt,
-            "n_predict": max_tokens,
-            "temperature": 0.7,
-            "top_p": 0.9,
-            "stop": ["User:", "\n\n"],
-        },
-        timeout=LLM_REQUEST_TIMEOUT,
-    )
+def _call_llama_cpp(
+    prompt: str,
+    max_tokens: int = 256,
+    temperature: float = 0.7,
+    json_schema: dict | None = None,
+) -> dict:
+    body = {
+        "prompt": prompt,
+        "n_predict": max_tokens,
+        "temperature": temperature,
+        "top_p": 0.9,
+        "stop": ["User:", "\n\n"],
+        # Reuse the KV cache for a shared prompt prefix (e.g. batch scoring)
+        "cache_prompt": True,
+    }
+    if json_schema is not None:
+        # Grammar-constrained sampling; a blank line is valid inside JSON.
+        body["json_schema"] = json_schema
+        body["stop"] = ["User:"]
+
+    with backend_pool.acquire() as base_url:
+        response = requests.post(
+            f"{base_url}/completion",
+            json=body,
+            timeout=job_timeout(LLM_REQUEST_TIMEOUT),
+        )
     response.raise_for_status()
     data = response.json()
     return {"text": data.get("content", ""), "tokens": data.get("tokens_predicted", 0)}
 
 
-def _call_ollama(prompt: str, max_tokens: int = 256, temperature: float = 0.7) -> dict:
-    response = requests.post(
-        f"{LLAMA_SERVER_URL}/api/chat",
-        json={
-            "model": LLAMA_MODEL,
-            "keep_alive": OLLAMA_KEEP_ALIVE,
-            "messages": [{"role": "user", "content": prompt}],
-            "stream": False,
-            "options": {
-                "temperature": temperature,
-                "top_p": 0.9,
-                "num_predict": max_tokens,
-            },
+def _call_ollama(
+    prompt: str,
+    max_tokens: int = 256,
+    temperature: float = 0.7,
+    json_schema: dict | None = None,
+) -> dict:
+    body = {
+        "model": LLAMA_MODEL,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "messages": [{"role": "user", "content": prompt}],
+        "stream": False,
+        "options": {
+            "temperature": temperature,
+            "top_p": 0.9,
+            "num_predict": max_tokens,
         },
-        timeout=LLM_REQUEST_TIMEOUT,
-    )
+    }
+    if json_schema is not None:
+        body["format"] = json_schema
+
+    with backend_pool.acquire() as base_url:
+        response = requests.post(
+            f"{base_url}/api/chat",
+            json=body,
+            timeout=job_timeout(LLM_REQUEST_TIMEOUT),
+        )
     response.raise_for_status()
     data = response.json()
-    return {"text": data.get("message", {}).get("content", ""), "tokens": 0}
+    return {
+        "text": data.get("message", {}).get("content", ""),
+        "tokens": data.get("eval_count", 0),
+    }
 
 
 def _call_openai_compatible(
-    system_prompt: str, user_message: str, max_tokens: int = 128
+    system_prompt: str,
+    user_message: str,
+    max_tokens: int = 128,
+    temperature: float = 0.7,
+    json_schema: dict | None = None,
 ) -> dict:
-    response = requests.post(
-        f"{VLLM_SERVER_URL}/v1/chat/completions",
-        json={
-            "model": os.getenv("MODEL_NAME", VLLM_MODEL),
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message},
-            ],
-            "max_tokens": max_tokens,
-            "temperature": 0.7,
-            "top_p": 0.9,
-            "stop": None,
-        },
-        timeout=LLM_REQUEST_TIMEOUT,
-    )
+    body = {
+        "model": os.getenv("MODEL_NAME", VLLM_MODEL),
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message},
+        ],
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "top_p": 0.9,
+        "stop": None,
+    }
+    if json_schema is not None:
+        if LLAMA_API_TYPE == "vllm":
+            body["guided_json"] = json_schema
+        else:
+            body["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "response", "schema": json_schema},
+            }
+
+    with backend_pool.acquire() as base_url:
+        response = requests.post(
+            f"{base_url}/v1/chat/completions",
+            json=body,
+            timeout=job_timeout(LLM_REQUEST_TIMEOUT),
+        )
     response.raise_for_status()
     data = response.json()
     choice = data.get("choices", [{}])[0]
@@ -169,125 +398,113 @@ def _call_openai_compatible(
 def sign_webhook_payload(payload: dict) -> str:
     """Return an HMAC-SHA256 hex signature for *payload*.
 
-    Uses the module-level WEBHOOK_SECRET.  Callers that need to sign with a
-    freshly-read secret (e.g. Celery tasks) should call this helper after
-    re-reading the env var themselves.
+    Same signature as the X-Webhook-Signature header sent on delivery: it
+    delegates to webhook_dispatcher.sign_payload, which signs with
+    webhook_dispatcher.WEBHOOK_SECRET (LLM_WEBHOOK_SECRET, read once at
+    import).
     """
-    secret = WEBHOOK_SECRET or b"change-me-in-production"
-    payload_json = json.dumps(
-        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False
-    )
-    return hmac.new(secret, payload_json.encode("utf-8"), hashlib.sha256).hexdigest()
+    return sign_payload(payload)[1]["X-Webhook-Signature"]
 
 
 def call_webhook(callback_url: str, payload: dict, max_retries: int = 3) -> bool:
     """POST *payload* to *callback_url* with an HMAC signature and retry logic.
 
+    Blocks until delivered or retries are exhausted; use dispatch_webhook()
+    when the caller does not need to wait for the outcome.
+
     Returns True on success, False after exhausting retries.
     """
-    if not callback_url:
-        logger.warning("No callback URL provided — skipping webhook")
-        return False
-
-    secret = WEBHOOK_SECRET or b"change-me-in-production"
-    payload_json = json.dumps(
-        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False
-    )
-    signature = hmac.new(
-        secret, payload_json.encode("utf-8"), hashlib.sha256
-    ).hexdigest()
-
-    job_id = payload.get("jobId", "unknown")
-    headers = {
-        "Content-Type": "application/json",
-        "X-Webhook-Signature": signature,
-        "X-Job-Id": job_id,
-    }
-
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(
-                callback_url, data=payload_json, headers=headers, timeout=10
-            )
-            if 200 <= response.status_code < 300:
-                logger.info(
-                    "Webhook delivered for job %s (status %d)",
-                    job_id,
-                    response.status_code,
-                )
-                return True
-            logger.warning(
-                "Webhook returned status %d: %s", response.status_code, response.text
-            )
-        except requests.exceptions.Timeout:
-            logger.error("Webhook timeout (attempt %d)", attempt + 1)
-        except requests.exceptions.ConnectionError as exc:
-            logger.error("Webhook connection error (attempt %d): %s", attempt + 1, exc)
-        except Exception as exc:
-            logger.error("Webhook error (attempt %d): %s", attempt + 1, exc)
-
-        if attempt < max_retries - 1:
-            sleep_time = 2**attempt  # 1s, 2s, 4s
-            logger.info("Retrying webhook in %ds…", sleep_time)
-            time.sleep(sleep_time)
-
-    logger.error(
-        "Webhook failed permanently after %d attempts for job %s", max_retries, job_id
-    )
-    return False
+    return deliver_webhook(callback_url, payload, max_retries=max_retries)
 
 
 # ---------------------------------------------------------------------------
 # Async thread-target helpers (threading fallback when Celery is unavailable)
 # ---------------------------------------------------------------------------
 
-# Lazy-loaded agent singletons (shared within a process)
-_research_agent: CompanyResearchAgent | None = None
-_position_fit_agent: PositionFitAgent | None = None
+# Lazy-loaded agent singletons (shared within a process). The research and
+# position agents are imported on first use: LangChain, BeautifulSoup and
+# googlesearch take most of the service's import time.
+_research_agent: "CompanyResearchAgent | None" = None
+_position_fit_agent: "PositionFitAgent | None" = None
+_agent_lock = threading.Lock()
 
 
-def get_research_agent() -> CompanyResearchAgent:
+def get_research_agent() -> "CompanyResearchAgent":
     global _research_agent
     if _research_agent is None:
-        logger.info("Initializing company research agent…")
-        _research_agent = CompanyResearchAgent(RemoteLLMWrapper())
-        logger.info("Research agent initialized")
+        with _agent_lock:
+            if _research_agent is None:
+                from company_research_agent import CompanyResearchAgent
+
+                logger.info("Initializing company research agent…")
+                _research_agent = CompanyResearchAgent(RemoteLLMWrapper())
+                logger.info("Research agent initialized")
     return _research_agent
 
 
-def get_position_fit_agent() -> PositionFitAgent:
+def get_position_fit_agent() -> "PositionFitAgent":
     global _position_fit_agent
     if _position_fit_agent is None:
-        logger.info("Initializing position fit agent…")
-        _position_fit_agent = PositionFitAgent(RemoteLLMWrapper())
-        logger.info("Position fit agent initialized")
+        with _agent_lock:
+            if _position_fit_agent is None:
+                from position_fit_agent import PositionFitAgent
+
+                logger.info("Initializing position fit agent…")
+                _position_fit_agent = PositionFitAgent(RemoteLLMWrapper())
+                logger.info("Position fit agent initialized")
     return _position_fit_agent
 
 
 _musashi_agent: MusashiIndexAgent | None = None
 
+# Musashi evaluations keyed by profile + prompt template + model
+musashi_result_cache = ResultCache("musashi", ttl=MUSASHI_CACHE_TTL)
+
 
 def get_musashi_agent() -> MusashiIndexAgent:
     global _musashi_agent
     if _musashi_agent is None:
         logger.info("Initializing Musashi Index agent…")
-        _musashi_agent = MusashiIndexAgent(RemoteLLMWrapper(), get_prompt_manager())
+        _musashi_agent = MusashiIndexAgent(
+            RemoteLLMWrapper(), get_prompt_manager(), cache=musashi_result_cache
+        )
         logger.info("Musashi Index agent initialized")
     return _musashi_agent
 
 
+def send_cached_musashi_result(
+    callback_url: str, result: dict, metadata: dict, job_id: str
+) -> None:
+    """Deliver a cached Musashi evaluation via webhook (thread target)."""
+    payload = {
+        "jobId": metadata.get("jobId", job_id),
+        "type": "musashi",
+        "status": "completed",
+        "data": result,
+        "metadata": metadata,
+        "cached": True,
+    }
+    dispatch_webhook(callback_url, payload)
+
+
 def research_company_async(
     company_name: str, callback_url: str, metadata: dict, job_id: str
 ) -> None:
     """Run company research and deliver results via webhook (thread target)."""
     try:
         logger.info("Starting async research for %s (job: %s)", company_name, job_id)
-        company_info = get_research_agent().research_company(company_name)
+        with get_job_registry().tracking(job_id):
+            (
+                company_info,
+                research_stats,
+            ) = get_research_agent().research_company_with_stats(company_name)
+        cache_company_research(company_name, company_info)
         payload = {
             "jobId": metadata.get("jobId", job_id),
             "type": "company",
             "status": "completed",
             "data": company_info,
+            "researchStats": research_stats,
             "metadata": metadata,
         }
     except Exception as exc:
@@ -297,9 +514,228 @@ def research_company_async(
             "type": "company",
             "status": "failed",
             "error": str(exc),
+            "errorType": error_type(exc),
             "metadata": metadata,
         }
-    call_webhook(callback_url, payload)
+        if isinstance(exc, JobCancelled):
+            payload["cancelled"] = True
+    get_idempotency_store().record_outcome(job_id, payload)
+    get_job_registry().record_outcome(job_id, payload)
+    dispatch_webhook(callback_url, payload)
+
+
+# ---------------------------------------------------------------------------
+# Batch company enrichment
+# ---------------------------------------------------------------------------
+
+# Completed research results, shared by single and batch enrichment
+company_research_cache = ResultCache("company", ttl=COMPANY_RESEARCH_CACHE_TTL)
+
+
+def normalize_company_name(company_name: str) -> str:
+    """Cache/dedupe key for a company name (case- and whitespace-insensitive)."""
+    return re.sub(r"\s+", " ", (company_name or "").strip()).casefold()
+
+
+def cache_company_research(company_name: str, company_info: dict) -> None:
+    """Store a successful research result so batch jobs can reuse it."""
+    if company_info.get("source") == "langchain_research_failed":
+        return
+    company_research_cache.set(normalize_company_name(company_name), company_info)
+
+
+def research_companies_batch(
+    company_names: list,
+    callback_url: str,
+    metadata: dict,
+    job_id: str,
+    force_refresh: bool = False,
+) -> dict:
+    """Enrich many companies, streaming one webhook per company as it finishes.
+
+    Names are deduped (case/whitespace-insensitive) and checked against the
+    research cache first. The remaining companies are researched concurrently:
+    their searches share the process-wide search rate limiter and their LLM
+    extractions are spread over the backend pool.
+
+    Returns:
+        Summary dict with per-company status
+    """
+    batch_job_id = metadata.get("jobId", job_id)
+    unique: dict[str, str] = {}
+    for name in company_names:
+        key = normalize_company_name(name)
+        if key and key not in unique:
+            unique[key] = name.strip()
+
+    summary = {
+        "jobId": batch_job_id,
+        "requested": len(company_names),
+        "unique": len(unique),
+        "cached": 0,
+        "completed": 0,
+        "failed": 0,
+        "companies": {},
+    }
+    logger.info(
+        "Batch enrichment %s: %d requested, %d unique",
+        batch_job_id,
+        len(company_names),
+        len(unique),
+    )
+
+    def deliver(index: int, company_name: str, payload: dict) -> None:
+        payload["jobId"] = f"{batch_job_id}:{index}"
+        payload["type"] = "company"
+        payload["metadata"] = {
+            **metadata,
+            "companyName": company_name,
+            "batchJobId": batch_job_id,
+        }
+        summary["companies"][company_name] = payload["status"]
+        checkpoint(
+            "researching",
+            completed=summary["completed"],
+            failed=summary["failed"],
+            total=len(unique),
+        )
+        dispatch_webhook(callback_url, payload)
+
+    pending = []
+    for index, (key, company_name) in enumerate(unique.items()):
+        cached = None if force_refresh else company_research_cache.get(key)
+        if cached is None:
+            pending.append((index, company_name))
+            continue
+        summary["cached"] += 1
+        summary["completed"] += 1
+        deliver(
+            index,
+            company_name,
+            {"status": "completed", "data": cached, "cached": True},
+        )
+
+    if pending:
+        agent = get_research_agent()
+        workers = max(1, min(COMPANY_BATCH_CONCURRENCY, len(pending)))
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="company-batch"
+        ) as pool:
+            research = propagate(agent.research_company_with_stats)
+            futures = {
+                pool.submit(research, company_name): (index, company_name)
+                for index, company_name in pending
+            }
+            for future in as_completed(futures):
+                index, company_name = futures[future]
+                try:
+                    company_info, research_stats = future.result()
+                except Exception as exc:
+                    logger.error(
+                        "Batch research failed for %s (job: %s): %s",
+                        company_name,
+                        batch_job_id,
+                        exc,
+                    )
+                    summary["failed"] += 1
+                    deliver(
+                        index, company_name, {"status": "failed", "error": str(exc)}
+                    )
+                    continue
+
+                cache_company_research(company_name, company_info)
+                summary["completed"] += 1
+                deliver(
+                    index,
+                    company_name,
+                    {
+                        "status": "completed",
+                        "data": company_info,
+                        "researchStats": research_stats,
+                        "cached": False,
+                    },
+                )
+
+    logger.info(
+        "Batch enrichment %s done: %d completed (%d cached), %d failed",
+        batch_job_id,
+        summary["completed"],
+        summary["cached"],
+        summary["failed"],
+    )
+    return summary
+
+
+# ---------------------------------------------------------------------------
+# Batch position scoring
+# ---------------------------------------------------------------------------
+
+
+def analyze_positions_batch(
+    jobs: list,
+    resume_content: str,
+    resume_llm_context: str,
+    journal_entries: list,
+    callback_url: str,
+    metadata: dict,
+    job_id: str,
+) -> dict:
+    """Score one resume against many jobs, streaming one webhook per job.
+
+    Each job may carry its own ``metadata`` (e.g. interviewId); it is merged
+    over the shared batch metadata in that job's webhook payload. A job
+    whose analysis fails with a transient error gets a failure webhook
+    (with errorType) of its own instead of failing the whole batch.
+
+    Returns:
+        Summary dict with per-job fit scores and failed job indexes
+    """
+    batch_job_id = metadata.get("jobId", job_id)
+    summary = {"jobId": batch_job_id, "total": len(jobs), "results": [], "failed": []}
+
+    def job_payload(index: int, job: dict) -> dict:
+        own_metadata = job.get("metadata") or {}
+        return {
+            # Only a per-job jobId; the batch-level one is shared by every job
+            "jobId": own_metadata.get("jobId") or f"{batch_job_id}:{index}",
+            "type": "position",
+            "metadata": {**metadata, **own_metadata, "batchJobId": batch_job_id},
+        }
+
+    def deliver(index: int, job: dict, result: dict) -> None:
+        payload = {**job_payload(index, job), "status": "completed", "data": result}
+        summary["results"].append({"index": index, "fitScore": result.get("fitScore")})
+        dispatch_webhook(callback_url, payload)
+
+    def fail(index: int, job: dict, exc: Exception) -> None:
+        payload = {
+            **job_payload(index, job),
+            "status": "failed",
+            "error": str(exc),
+            "errorType": error_type(exc),
+        }
+        summary["failed"].append({"index": index, "errorType": error_type(exc)})
+        dispatch_webhook(callback_url, payload)
+
+    get_position_fit_agent().analyze_fit_batch(
+        jobs,
+        resume_content=resume_content,
+        resume_llm_context=resume_llm_context,
+        journal_entries=journal_entries,
+        on_result=deliver,
+        on_error=fail,
+        max_workers=POSITION_BATCH_CONCURRENCY or backend_pool.capacity,
+    )
+
+    summary["results"].sort(key=lambda item: item["index"])
+    summary["failed"].sort(key=lambda item: item["index"])
+    logger.info(
+        "Batch position scoring %s done: %d jobs, %d failed",
+        batch_job_id,
+        len(summary["results"]),
+        len(summary["failed"]),
+    )
+    return summary
 
 
 def analyze_position_async(
@@ -322,15 +758,16 @@ def analyze_position_async(
             company,
             job_id,
         )
-        result = get_position_fit_agent().analyze_fit(
-            company=company,
-            position=position,
-            job_url=job_url,
-            job_description=job_description,
-            resume_content=resume_content,
-            resume_llm_context=resume_llm_context,
-            journal_entries=journal_entries,
-        )
+        with get_job_registry().tracking(job_id):
+            result = get_position_fit_agent().analyze_fit(
+                company=company,
+                position=position,
+                job_url=job_url,
+                job_description=job_description,
+                resume_content=resume_content,
+                resume_llm_context=resume_llm_context,
+                journal_entries=journal_entries,
+            )
         payload = {
             "jobId": metadata.get("jobId", job_id),
             "type": "position",
@@ -351,6 +788,11 @@ def analyze_position_async(
             "type": "position",
             "status": "failed",
             "error": str(exc),
+            "errorType": error_type(exc),
             "metadata": metadata,
         }
-    call_webhook(callback_url, payload)
+        if isinstance(exc, JobCancelled):
+            payload["cancelled"] = True
+    get_idempotency_store().record_outcome(job_id, payload)
+    get_job_registry().record_outcome(job_id, payload)
+    dispatch_webhook(callback_url, payload)
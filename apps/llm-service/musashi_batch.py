@@ -0,0 +1,394 @@
+"""
+Bulk Musashi Index scoring.
+
+Re-scores a cohort of profiles (e.g. every stored resume after a change to
+the musashi_index prompt) as one job instead of thousands of single
+requests. Profiles are read lazily from a JSONL input file, scored
+concurrently against the backend pool under a throughput cap, and appended
+to a JSONL results file. Results are delivered to the callback URL in
+batched "musashi_batch" webhooks.
+
+The results file doubles as the progress record: a restarted job skips
+every profile that already has a result line and resends only results not
+yet acknowledged by a webhook (tracked in a CheckpointStore).
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from checkpoint_store import CheckpointStore
+from job_control import JobCancelled, check
+from llm_errors import InvalidInput
+from llm_wrapper import backend_pool, call_webhook, get_musashi_agent
+
+logger = logging.getLogger(__name__)
+
+MUSASHI_BATCH_DIR = os.getenv(
+    "MUSASHI_BATCH_DIR", os.path.join(tempfile.gettempdir(), "llm-musashi-batches")
+)
+# Concurrent evaluations per batch job (default: backend pool capacity)
+MUSASHI_BATCH_CONCURRENCY = int(os.getenv("MUSASHI_BATCH_CONCURRENCY", "0"))
+# Throughput cap in evaluations per minute (0 = uncapped)
+MUSASHI_BATCH_MAX_PER_MINUTE = float(os.getenv("MUSASHI_BATCH_MAX_PER_MINUTE", "60"))
+# Results per webhook payload
+MUSASHI_BATCH_WEBHOOK_SIZE = int(os.getenv("MUSASHI_BATCH_WEBHOOK_SIZE", "50"))
+# Celery runs a batch in slices of this many seconds, re-queueing itself in
+# between, so no single task outlives the broker visibility timeout
+MUSASHI_BATCH_SLICE_SECONDS = int(os.getenv("MUSASHI_BATCH_SLICE_SECONDS", "1800"))
+
+# Statuses a stopped job can be resumed from (queued/running jobs already
+# have a worker; see CheckpointStore.claim)
+RESUMABLE_STATUSES = ("paused", "failed", "cancelled")
+
+checkpoints = CheckpointStore("musashi_batch")
+
+
+def input_path(job_id: str) -> str:
+    return os.path.join(MUSASHI_BATCH_DIR, f"{job_id}.input.jsonl")
+
+
+def results_path(job_id: str) -> str:
+    return os.path.join(MUSASHI_BATCH_DIR, f"{job_id}.results.jsonl")
+
+
+def write_input(job_id: str, profiles: Iterator[Dict[str, Any]]) -> int:
+    """Write profiles to the job's JSONL input file.
+
+    Returns:
+        Number of profiles written
+    """
+    os.makedirs(MUSASHI_BATCH_DIR, exist_ok=True)
+    count = 0
+    with open(input_path(job_id), "w", encoding="utf-8") as handle:
+        for profile in profiles:
+            handle.write(json.dumps(profile) + "\n")
+            count += 1
+    return count
+
+
+def _read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield JSON objects from *path*, skipping a torn trailing line."""
+    try:
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping unreadable line in %s", path)
+    except FileNotFoundError:
+        return
+
+
+def _truncate_torn_line(path: str) -> None:
+    """Drop a partial last line left by a crash mid-write so appends stay valid."""
+    try:
+        with open(path, "rb+") as handle:
+            data = handle.read()
+            if data and not data.endswith(b"\n"):
+                handle.truncate(data.rfind(b"\n") + 1)
+    except FileNotFoundError:
+        pass
+
+
+def profile_id(profile: Dict[str, Any], index: int) -> str:
+    """Stable ID of a profile: explicit id, then metadata.resumeId, then index."""
+    metadata = profile.get("metadata") or {}
+    return str(profile.get("id") or metadata.get("resumeId") or index)
+
+
+def _score_kwargs(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a batch profile (API field names) to MusashiIndexAgent.score() args."""
+    resume = profile.get("resume") or {}
+    resume_content = (resume.get("content") or "").strip()
+    hidden_context = (resume.get("llmContext") or "").strip()
+    ai_context = (profile.get("aiContext") or "").strip()
+    if ai_context:
+        hidden_context = (
+            f"{hidden_context}\n\n{ai_context}" if hidden_context else ai_context
+        )
+
+    if not resume_content or not hidden_context:
+        raise InvalidInput(
+            "resume.content and resume.llmContext (or aiContext) are required"
+        )
+
+    return {
+        "career_profile": profile.get("careerProfile"),
+        "resume_content": resume_content,
+        "ai_context": hidden_context,
+        "experience_years": profile.get("experienceYears"),
+        "portfolio_items": profile.get("portfolioItems"),
+        "impact_highlights": profile.get("impactHighlights"),
+        "learning_highlights": profile.get("learningHighlights"),
+    }
+
+
+class _Throttle:
+    """Spaces evaluation starts to stay under a per-minute throughput cap."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class MusashiBatchJob:
+    """One bulk scoring job; run() is safe to call again after a crash.
+
+    Args:
+        job_id: Batch job ID (names the input/results files and checkpoint)
+        callback_url: Optional webhook URL for batched results
+        metadata: Metadata included in every webhook payload
+        force_refresh: Bypass the Musashi result cache
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        callback_url: Optional[str],
+        metadata: Dict[str, Any],
+        force_refresh: bool = False,
+        concurrency: Optional[int] = None,
+        max_per_minute: float = MUSASHI_BATCH_MAX_PER_MINUTE,
+        webhook_batch_size: int = MUSASHI_BATCH_WEBHOOK_SIZE,
+    ):
+        self.job_id = job_id
+        self.callback_url = callback_url
+        self.metadata = metadata
+        self.force_refresh = force_refresh
+        self.concurrency = max(
+            1, concurrency or MUSASHI_BATCH_CONCURRENCY or backend_pool.capacity
+        )
+        self.throttle = _Throttle(max_per_minute)
+        self.webhook_batch_size = max(1, webhook_batch_size)
+        self._lock = threading.Lock()
+        self._pending: List[Dict[str, Any]] = []
+        # Pending count that triggers the next webhook; raised after a failure
+        self._flush_at = self.webhook_batch_size
+        self.state: Dict[str, Any] = {}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def run(self, time_budget: Optional[float] = None) -> Dict[str, Any]:
+        """Score every profile without a result yet and deliver results.
+
+        Args:
+            time_budget: Stop starting new profiles after this many seconds
+                and return with status "paused"; run() again to continue
+
+        Returns:
+            Job state with counts and status ("completed" or "paused")
+
+        Raises:
+            JobCancelled: The job was cancelled or ran past its deadline
+                (state is saved as "cancelled"; resume to continue)
+            InvalidInput: The job's input file is missing (state is saved
+                as "failed")
+        """
+        deadline = time.monotonic() + time_budget if time_budget else None
+        paused = False
+        cancelled: Optional[JobCancelled] = None
+        done_ids, results = self._load_results()
+        self.state = checkpoints.load(self.job_id) or {}
+        self.state.update(
+            jobId=self.job_id,
+            status="running",
+            completed=sum(1 for r in results if r["status"] == "completed"),
+            failed=sum(1 for r in results if r["status"] == "failed"),
+            delivered=self.state.get("delivered", 0),
+            startedAt=self.state.get("startedAt") or time.time(),
+        )
+        if done_ids:
+            logger.info(
+                f"Resuming Musashi batch {self.job_id}: "
+                f"{len(done_ids)} profiles already scored"
+            )
+
+        if not os.path.exists(input_path(self.job_id)):
+            error = f"Input file for Musashi batch {self.job_id} is missing"
+            self.state.update(status="failed", error=error, finishedAt=time.time())
+            self._save_state()
+            logger.error(error)
+            raise InvalidInput(error)
+
+        # Results written before the crash but never acknowledged by a webhook
+        self._pending = results[self.state["delivered"] :]
+        self._save_state()
+
+        slots = threading.Semaphore(self.concurrency * 2)
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="musashi-batch"
+        ) as pool:
+            for index, profile in enumerate(_read_jsonl(input_path(self.job_id))):
+                item_id = profile_id(profile, index)
+                if item_id in done_ids:
+                    continue
+                if deadline is not None and time.monotonic() >= deadline:
+                    paused = True
+                    break
+                try:
+                    check()
+                except JobCancelled as exc:
+                    cancelled = exc
+                    break
+                done_ids.add(item_id)
+                # Bound queued work so huge inputs are streamed, not buffered
+                slots.acquire()
+                future = pool.submit(self._score_one, index, item_id, profile)
+                future.add_done_callback(lambda _: slots.release())
+
+        if cancelled is not None:
+            # Deliver what was scored; profiles not started are left unscored
+            self._flush(final=False)
+            self.state["status"] = "cancelled"
+            self._save_state()
+            logger.info(f"Musashi batch {self.job_id} stopped: {cancelled}")
+            raise cancelled
+
+        if paused:
+            self._flush(final=False)
+            self.state["status"] = "paused"
+            self._save_state()
+            logger.info(
+                f"Musashi batch {self.job_id} paused after time slice: "
+                f"{self.state['completed'] + self.state['failed']} profiles scored"
+            )
+            return self.state
+
+        self._flush(final=True)
+        self.state["status"] = "completed"
+        self.state["finishedAt"] = time.time()
+        self._save_state()
+        logger.info(
+            f"Musashi batch {self.job_id} done: {self.state['completed']} completed, "
+            f"{self.state['failed']} failed"
+        )
+        return self.state
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _load_results(self) -> Tuple[Set[str], List[Dict[str, Any]]]:
+        _truncate_torn_line(results_path(self.job_id))
+        results = list(_read_jsonl(results_path(self.job_id)))
+        return {str(r.get("id")) for r in results}, results
+
+    def _score_one(self, index: int, item_id: str, profile: Dict[str, Any]) -> None:
+        record: Dict[str, Any] = {
+            "id": item_id,
+            "index": index,
+            "metadata": profile.get("metadata") or {},
+        }
+        try:
+            kwargs = _score_kwargs(profile)
+            self.throttle.wait()
+            record["data"] = get_musashi_agent().score(
+                **kwargs, force_refresh=self.force_refresh
+            )
+            record["status"] = "completed"
+        except Exception as e:
+            logger.error(f"Musashi batch {self.job_id} profile {item_id} failed: {e}")
+            record["status"] = "failed"
+            record["error"] = str(e)
+
+        with self._lock:
+            with open(results_path(self.job_id), "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(record) + "\n")
+            self.state[record["status"]] += 1
+            self._pending.append(record)
+            if len(self._pending) >= self._flush_at:
+                self._flush_locked(final=False)
+
+    def _flush(self, final: bool) -> None:
+        with self._lock:
+            self._flush_locked(final)
+
+    def _flush_locked(self, final: bool) -> None:
+        """Deliver pending results, at most webhook_batch_size per POST.
+
+        Delivered results are dropped from _pending as each POST succeeds.
+        On a failure the rest stay pending and the next attempt waits for
+        another webhook_batch_size results (or the final flush).
+        """
+        if not self.callback_url:
+            self.state["delivered"] += len(self._pending)
+            self._pending = []
+            self._save_state()
+            return
+
+        while self._pending or final:
+            chunk = self._pending[: self.webhook_batch_size]
+            last = len(chunk) == len(self._pending)
+            payload = {
+                "jobId": self.metadata.get("jobId", self.job_id),
+                "type": "musashi_batch",
+                "status": "completed",
+                "data": {
+                    "results": chunk,
+                    "final": final and last,
+                    "progress": {
+                        "completed": self.state["completed"],
+                        "failed": self.state["failed"],
+                    },
+                },
+                "metadata": self.metadata,
+            }
+            if not call_webhook(self.callback_url, payload):
+                # Keep the results pending; they are resent in later batches
+                logger.warning(
+                    f"Musashi batch {self.job_id} webhook failed; "
+                    f"{len(self._pending)} results left pending"
+                )
+                self._flush_at = len(self._pending) + self.webhook_batch_size
+                self._save_state()
+                return
+
+            self.state["delivered"] += len(chunk)
+            del self._pending[: len(chunk)]
+            self._save_state()
+            if last:
+                break
+        self._flush_at = self.webhook_batch_size
+
+    def _save_state(self) -> None:
+        checkpoints.save(self.job_id, self.state)
+
+
+def run_musashi_batch(
+    job_id: str,
+    callback_url: Optional[str],
+    metadata: Dict[str, Any],
+    force_refresh: bool = False,
+    time_budget: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Run (or resume) a bulk Musashi scoring job (thread/Celery target)."""
+    return MusashiBatchJob(job_id, callback_url, metadata, force_refresh).run(
+        time_budget=time_budget
+    )
+
+
+def job_status(job_id: str) -> Optional[Dict[str, Any]]:
+    """Checkpointed state of a batch job, or None if unknown."""
+    return checkpoints.load(job_id)
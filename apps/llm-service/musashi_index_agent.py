@@ -19,11 +19,13 @@ Academic equivalencies:
   9.5–10.0 → Sword Saint / Post-doctoral / Fellow
 """
 
-import json
+import hashlib
 import logging
-import re
 from typing import Any, Dict, List, Optional
 
+from job_registry import checkpoint
+from structured_output import STRING_LIST, object_schema, parse_json_object
+
 logger = logging.getLogger(__name__)
 
 # Weights for the composite score
@@ -49,6 +51,30 @@ EQUIVALENCIES = [
 ]
 
 
+_SCORE = {"type": "number", "minimum": 0, "maximum": 10}
+
+# JSON Schema for the evaluation response (used for constrained decoding)
+MUSASHI_RESULT_SCHEMA = object_schema(
+    {
+        "scores": object_schema(
+            {
+                "tenure": _SCORE,
+                "portfolio": _SCORE,
+                "impact": _SCORE,
+                "learning": _SCORE,
+            }
+        ),
+        "im_score": _SCORE,
+        "academic_equivalent": {"type": "string"},
+        "academic_equivalent_en": {"type": "string"},
+        "citation": {"type": "string"},
+        "duels_won": STRING_LIST,
+        "growth_area": {"type": "string"},
+        "rationale": {"type": "string"},
+    }
+)
+
+
 def _resolve_equivalency(im_score: float) -> tuple[str, str]:
     for threshold, es, en in EQUIVALENCIES:
         if im_score >= threshold:
@@ -66,21 +92,6 @@ def _compute_weighted_score(scores: Dict[str, float]) -> float:
     )
 
 
-def _extract_json(text: str) -> Optional[Dict]:
-    """Extract the first JSON object from an LLM response."""
-    # Strip markdown code fences if present
-    text = re.sub(r"```(?:json)?", "", text).strip()
-    # Find the outermost {...}
-    match = re.search(r"\{.*\}", text, re.DOTALL)
-    if not match:
-        return None
-    try:
-        return json.loads(match.group(0))
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON parse error: {e}\nRaw text: {text[:500]}")
-        return None
-
-
 def _validate_result(data: Dict) -> Dict:
     """Normalise and clamp all fields so the response is always safe to return."""
     scores = data.get("scores", {})
@@ -115,14 +126,16 @@ class MusashiIndexAgent:
     experience list, or both) and returns a structured IM result.
     """
 
-    def __init__(self, llm_client, prompt_manager):
+    def __init__(self, llm_client, prompt_manager, cache=None):
         """
         Args:
             llm_client: Object with a generate(prompt: str) -> str method.
             prompt_manager: PromptManager instance for loading the prompt template.
+            cache: Optional ResultCache for evaluations, keyed by cache_key().
         """
         self.llm = llm_client
         self.prompts = prompt_manager
+        self.cache = cache
 
     # ------------------------------------------------------------------
     # Public API
@@ -137,10 +150,14 @@ class MusashiIndexAgent:
         portfolio_items: Optional[List[str]] = None,
         impact_highlights: Optional[List[str]] = None,
         learning_highlights: Optional[List[str]] = None,
+        force_refresh: bool = False,
     ) -> Dict[str, Any]:
         """
         Compute the Musashi Index for the supplied career profile.
 
+        Results are cached by cache_key(), so an unchanged profile is only
+        evaluated once per prompt template and model.
+
         Args:
             career_profile:       Optional free-form text (bio/summary/notes).
             resume_content:       Public resume content.
@@ -149,6 +166,7 @@ class MusashiIndexAgent:
             portfolio_items:      Optional list of notable projects/outputs.
             impact_highlights:    Optional list of quantified impact statements.
             learning_highlights:  Optional list of self-directed learning items.
+            force_refresh:        Ignore any cached result and re-evaluate.
 
         Returns:
             Dict with im_score, scores, academic_equivalent, citation, etc.
@@ -163,17 +181,30 @@ class MusashiIndexAgent:
             learning_highlights,
         )
 
+        cache_key = self.cache_key(enriched_profile)
+        if not force_refresh:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+
         prompt = self.prompts.get("musashi_index", career_profile=enriched_profile)
 
+        checkpoint("scoring")
         logger.info("Calling LLM for Musashi Index evaluation...")
         try:
-            raw = self.llm.generate(prompt)
-            logger.debug(f"LLM raw response (first 500 chars): {raw[:500]}")
+            generate_json = getattr(self.llm, "generate_json", None)
+            if generate_json is not None:
+                parsed = generate_json(
+                    prompt, MUSASHI_RESULT_SCHEMA, temperature=0.7, max_tokens=1200
+                )
+            else:
+                raw = self.llm.generate(prompt)
+                logger.debug(f"LLM raw response (first 500 chars): {raw[:500]}")
+                parsed = parse_json_object(raw)
         except Exception as e:
             logger.error(f"LLM call failed: {e}")
             raise
 
-        parsed = _extract_json(raw)
         if parsed is None:
             logger.warning(
                 "LLM returned non-JSON response; falling back to heuristic scores"
@@ -184,13 +215,62 @@ class MusashiIndexAgent:
                 impact_highlights,
                 learning_highlights,
             )
+            return _validate_result(parsed)
 
-        return _validate_result(parsed)
+        result = _validate_result(parsed)
+        if self.cache is not None:
+            self.cache.set(cache_key, result)
+        return result
+
+    def cached_score(
+        self,
+        career_profile: Optional[str] = None,
+        resume_content: Optional[str] = None,
+        ai_context: Optional[str] = None,
+        experience_years: Optional[float] = None,
+        portfolio_items: Optional[List[str]] = None,
+        impact_highlights: Optional[List[str]] = None,
+        learning_highlights: Optional[List[str]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Return the cached evaluation for this profile without calling the LLM.
+
+        Takes the same profile arguments as score(). Returns None on a miss.
+        """
+        enriched_profile = self._enrich_profile(
+            career_profile,
+            resume_content,
+            ai_context,
+            experience_years,
+            portfolio_items,
+            impact_highlights,
+            learning_highlights,
+        )
+        return self._cache_get(self.cache_key(enriched_profile))
+
+    def cache_key(self, enriched_profile: str) -> str:
+        """Content address of an evaluation: profile, prompt template and model."""
+        digest = hashlib.sha256()
+        for part in (
+            self.prompts.get_raw("musashi_index"),
+            getattr(self.llm, "model_name", type(self.llm).__name__),
+            enriched_profile,
+        ):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
 
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
 
+    def _cache_get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Musashi Index cache hit ({cache_key[:12]})")
+        return cached
+
     def _enrich_profile(
         self,
         base_profile: Optional[str],
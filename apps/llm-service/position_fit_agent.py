@@ -6,14 +6,98 @@ Considers resume, hidden context, journal entries, and job requirements.
 """
 
 import logging
-from typing import Dict, List, Optional, Any
-import re
-import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Any
 from bs4 import BeautifulSoup
 import requests
 
+from job_control import JobCancelled, propagate, timeout as job_timeout
+from job_registry import checkpoint
+from llm_errors import OutputParseError, TransientError
+from llm_guard_service import segmented_prompt
+from position_prescorer import (
+    POSITION_PRESCORE_SKIP_THRESHOLD,
+    PositionPrescorer,
+    skipped_analysis,
+)
+from structured_output import STRING_LIST, object_schema, parse_json_object
+
 logger = logging.getLogger(__name__)
 
+# Concurrent job posting fetches in batch scoring
+JOB_FETCH_CONCURRENCY = int(os.getenv("JOB_FETCH_CONCURRENCY", "8"))
+
+# JSON Schema for the analysis response (used for constrained decoding)
+POSITION_FIT_SCHEMA = object_schema(
+    {
+        "fitScore": {"type": "number", "minimum": 1, "maximum": 10},
+        "analysis": object_schema(
+            {
+                "summary": {"type": "string"},
+                "strengths": STRING_LIST,
+                "gaps": STRING_LIST,
+                "recommendations": STRING_LIST,
+            }
+        ),
+    }
+)
+
+# Candidate block first (shared prefix), then the untrusted job posting
+ANALYSIS_PROMPT_TEMPLATE = """You are an expert career advisor analyzing job fit for a candidate.
+
+**CANDIDATE RESUME:**
+{resume}
+
+**ADDITIONAL CONTEXT (Hidden from public):**
+{llm_context}
+
+**RECENT JOURNAL ENTRIES:**
+{journal_context}
+
+---
+
+**JOB POSTING:**
+Company: {company}
+Position: {position}
+
+{job_posting}
+
+---
+
+**TASK:**
+Analyze how well this candidate fits the position. Consider:
+1. Technical skills match (required vs. candidate's skills)
+2. Experience level alignment (years, seniority)
+3. Domain expertise relevance
+4. Soft skills and culture fit indicators from journal entries
+5. Career trajectory alignment
+6. Knowledge gaps or areas needing growth
+
+**OUTPUT FORMAT (JSON):**
+{{
+  "fitScore": <number 1-10, where 10 is perfect fit>,
+  "analysis": {{
+    "summary": "<2-3 sentence overall assessment>",
+    "strengths": [
+      "<specific strength 1>",
+      "<specific strength 2>",
+      "<specific strength 3>"
+    ],
+    "gaps": [
+      "<specific gap 1>",
+      "<specific gap 2>"
+    ],
+    "recommendations": [
+      "<actionable recommendation 1>",
+      "<actionable recommendation 2>"
+    ]
+  }}
+}}
+
+Provide ONLY the JSON output, no additional text.
+"""
+
 
 class PositionFitAgent:
     """Agent that analyzes position fit and generates a score from 1-10"""
@@ -26,6 +110,7 @@ class PositionFitAgent:
             llm_client: LLM client with generate() method (RemoteLLMWrapper, BaseLLM, etc.)
         """
         self.llm = llm_client
+        self.prescorer = PositionPrescorer()
 
     def fetch_job_posting(self, url: str, timeout: int = 15) -> Optional[str]:
         """
@@ -46,7 +131,7 @@ class PositionFitAgent:
             }
 
             response = requests.get(
-                url, headers=headers, timeout=timeout, allow_redirects=True
+                url, headers=headers, timeout=job_timeout(timeout), allow_redirects=True
             )
             response.raise_for_status()
 
@@ -67,6 +152,8 @@ class PositionFitAgent:
             logger.info(f"Successfully fetched job posting ({len(cleaned_text)} chars)")
             return cleaned_text[:15000]  # Limit to 15k chars
 
+        except JobCancelled:
+            raise
         except Exception as e:
             logger.error(f"Error fetching job posting from {url}: {e}")
             return None
@@ -80,10 +167,15 @@ class PositionFitAgent:
         resume_content: str,
         resume_llm_context: Optional[str],
         journal_entries: List[Dict[str, Any]],
+        skip_threshold: Optional[float] = None,
     ) -> Dict[str, Any]:
         """
         Analyze position fit and generate a score.
 
+        A lexical pre-score is computed first and returned under "prescore".
+        Jobs pre-scoring below *skip_threshold* get the provisional score
+        without an LLM call.
+
         Args:
             company: Company name
             position: Position title
@@ -92,12 +184,258 @@ class PositionFitAgent:
             resume_content: Public resume content
             resume_llm_context: Hidden context for LLM
             journal_entries: List of journal entries with title, content, tags, date
+            skip_threshold: Pre-score below which the LLM call is skipped
+                (defaults to POSITION_PRESCORE_SKIP_THRESHOLD; 0 disables)
 
         Returns:
             Dict with fitScore (1-10) and analysis details
         """
         logger.info(f"Analyzing fit for {position} at {company}")
 
+        checkpoint("fetching")
+        job_posting_content = self._resolve_job_posting(
+            company, position, job_url, job_description
+        )
+        checkpoint("prescoring")
+        prescore = self.prescorer.prescore(
+            job_posting_content,
+            self._prescore_text(resume_content, resume_llm_context),
+            position=position,
+        )
+        if self._should_skip(prescore, skip_threshold):
+            logger.info(
+                f"Pre-score {prescore['prescore']} below threshold, skipping LLM analysis"
+            )
+            return skipped_analysis(prescore)
+
+        checkpoint("analyzing")
+        result = self._analyze_posting(
+            company=company,
+            position=position,
+            job_posting=job_posting_content,
+            resume_content=resume_content,
+            resume_llm_context=resume_llm_context,
+            journal_context=self._format_journal_context(journal_entries),
+        )
+        result["prescore"] = prescore
+        return result
+
+    def analyze_fit_batch(
+        self,
+        jobs: List[Dict[str, Any]],
+        resume_content: str,
+        resume_llm_context: Optional[str],
+        journal_entries: List[Dict[str, Any]],
+        on_result: Optional[
+            Callable[[int, Dict[str, Any], Dict[str, Any]], None]
+        ] = None,
+        on_error: Optional[Callable[[int, Dict[str, Any], Exception], None]] = None,
+        max_workers: int = 4,
+        fetch_workers: int = JOB_FETCH_CONCURRENCY,
+        skip_threshold: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Score one candidate against many jobs.
+
+        Job postings are fetched concurrently and pre-scored as one batch.
+        Jobs below *skip_threshold* are answered from the pre-score alone;
+        the rest go to the LLM in descending pre-score order, so the most
+        promising results arrive first. The top job is analyzed on its own
+        so the backend caches the shared candidate prefix of the prompt; the
+        rest then run concurrently and reuse it.
+
+        Args:
+            jobs: Dicts with company, position, jobUrl, jobDescription
+            resume_content: Public resume content
+            resume_llm_context: Hidden context for LLM
+            journal_entries: List of journal entries with title, content, tags, date
+            on_result: Called with (index, job, result) as each job finishes
+            on_error: Called with (index, job, error) for a job whose analysis
+                failed with a transient error; the other jobs go on and its
+                result is left None
+            max_workers: Concurrent LLM requests
+            fetch_workers: Concurrent job posting fetches
+            skip_threshold: Pre-score below which the LLM call is skipped
+                (defaults to POSITION_PRESCORE_SKIP_THRESHOLD; 0 disables)
+
+        Returns:
+            Results in the same order as *jobs*
+        """
+        logger.info(f"Analyzing fit for batch of {len(jobs)} positions")
+        if not jobs:
+            return []
+
+        journal_context = self._format_journal_context(journal_entries)
+
+        checkpoint("fetching", jobs=len(jobs))
+        postings = self._resolve_job_postings(jobs, fetch_workers)
+        checkpoint("prescoring", jobs=len(jobs))
+        prescores = self._prescore_postings(
+            jobs, postings, resume_content, resume_llm_context
+        )
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+
+        def deliver(index: int, result: Dict[str, Any]) -> None:
+            results[index] = result
+            if on_result is not None:
+                try:
+                    on_result(index, jobs[index], result)
+                except Exception as e:
+                    logger.error(f"Batch result callback failed for job {index}: {e}")
+
+        def run(index: int) -> None:
+            job = jobs[index]
+            try:
+                result = self._analyze_posting(
+                    company=job.get("company") or "",
+                    position=job.get("position") or "",
+                    job_posting=postings[index],
+                    resume_content=resume_content,
+                    resume_llm_context=resume_llm_context,
+                    journal_context=journal_context,
+                )
+            except TransientError as e:
+                # Fail this job only; retrying the batch would redo the others
+                logger.error(f"Batch analysis failed for job {index}: {e}")
+                if on_error is not None:
+                    try:
+                        on_error(index, job, e)
+                    except Exception as callback_error:
+                        logger.error(
+                            f"Batch error callback failed for job {index}: "
+                            f"{callback_error}"
+                        )
+                return
+            result["prescore"] = prescores[index]
+            deliver(index, result)
+
+        queue = []
+        for index, prescore in enumerate(prescores):
+            if self._should_skip(prescore, skip_threshold):
+                deliver(index, skipped_analysis(prescore))
+            else:
+                queue.append(index)
+        queue.sort(key=lambda index: prescores[index]["prescore"], reverse=True)
+        logger.info(
+            f"Pre-scoring skipped {len(jobs) - len(queue)} of {len(jobs)} positions"
+        )
+        if not queue:
+            return results
+
+        checkpoint("analyzing", jobs=len(queue), skipped=len(jobs) - len(queue))
+        # Prime the backend prefix cache with the shared candidate block
+        run(queue[0])
+
+        if len(queue) > 1:
+            with ThreadPoolExecutor(
+                max_workers=max(1, min(max_workers, len(queue) - 1)),
+                thread_name_prefix="position-fit",
+            ) as pool:
+                for future in as_completed(
+                    [pool.submit(propagate(run), index) for index in queue[1:]]
+                ):
+                    future.result()
+
+        return results
+
+    def prescore_jobs(
+        self,
+        jobs: List[Dict[str, Any]],
+        resume_content: str,
+        resume_llm_context: Optional[str],
+        fetch_postings: bool = False,
+        fetch_workers: int = JOB_FETCH_CONCURRENCY,
+    ) -> List[Dict[str, Any]]:
+        """
+        Pre-score many jobs without any LLM call.
+
+        Args:
+            jobs: Dicts with company, position, jobUrl, jobDescription
+            resume_content: Public resume content
+            resume_llm_context: Hidden context for LLM
+            fetch_postings: Fetch jobUrl pages; otherwise only jobDescription
+                (or the title) is scored
+            fetch_workers: Concurrent job posting fetches
+
+        Returns:
+            Pre-score results in the same order as *jobs*
+        """
+        if fetch_postings:
+            postings = self._resolve_job_postings(jobs, fetch_workers)
+        else:
+            postings = [
+                self._resolve_job_posting(
+                    job.get("company") or "",
+                    job.get("position") or "",
+                    None,
+                    job.get("jobDescription"),
+                )
+                for job in jobs
+            ]
+        return self._prescore_postings(
+            jobs, postings, resume_content, resume_llm_context
+        )
+
+    def _resolve_job_postings(
+        self, jobs: List[Dict[str, Any]], fetch_workers: int
+    ) -> List[str]:
+        """Resolve posting text for many jobs, fetching URLs concurrently."""
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(fetch_workers, len(jobs))),
+            thread_name_prefix="job-fetch",
+        ) as pool:
+            return list(
+                pool.map(
+                    propagate(
+                        lambda job: self._resolve_job_posting(
+                            job.get("company") or "",
+                            job.get("position") or "",
+                            job.get("jobUrl"),
+                            job.get("jobDescription"),
+                        )
+                    ),
+                    jobs,
+                )
+            )
+
+    def _prescore_postings(
+        self,
+        jobs: List[Dict[str, Any]],
+        postings: List[str],
+        resume_content: str,
+        resume_llm_context: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        return self.prescorer.prescore_batch(
+            [
+                {"position": job.get("position") or "", "posting": posting}
+                for job, posting in zip(jobs, postings)
+            ],
+            self._prescore_text(resume_content, resume_llm_context),
+        )
+
+    @staticmethod
+    def _prescore_text(resume_content: str, resume_llm_context: Optional[str]) -> str:
+        """Resume text used for pre-scoring (public content plus hidden context)."""
+        return f"{resume_content}\n{resume_llm_context or ''}"
+
+    @staticmethod
+    def _should_skip(prescore: Dict[str, Any], skip_threshold: Optional[float]) -> bool:
+        threshold = (
+            POSITION_PRESCORE_SKIP_THRESHOLD
+            if skip_threshold is None
+            else skip_threshold
+        )
+        return threshold > 0 and prescore["prescore"] < threshold
+
+    def _resolve_job_posting(
+        self,
+        company: str,
+        position: str,
+        job_url: Optional[str],
+        job_description: Optional[str],
+    ) -> str:
+        """Fetch the posting, falling back to the description or the title."""
         # Fetch job posting if URL provided
         job_posting_content = None
         if job_url:
@@ -113,22 +451,36 @@ class PositionFitAgent:
             )
             job_posting_content = f"Position: {position} at {company}"
 
-        # Prepare journal context (last 10 entries for brevity)
-        journal_context = ""
-        if journal_entries:
-            journal_items = []
-            for entry in journal_entries[:10]:
-                date = entry.get("date", "Unknown date")
-                title = entry.get("title", "Untitled")
-                content = entry.get("content", "")[:500]  # Limit per entry
-                journal_items.append(f"[{date}] {title}\n{content}")
-            journal_context = "\n\n".join(journal_items)
+        return job_posting_content
 
+    def _format_journal_context(self, journal_entries: List[Dict[str, Any]]) -> str:
+        """Prepare journal context (last 10 entries for brevity)"""
+        if not journal_entries:
+            return ""
+
+        journal_items = []
+        for entry in journal_entries[:10]:
+            date = entry.get("date", "Unknown date")
+            title = entry.get("title", "Untitled")
+            content = entry.get("content", "")[:500]  # Limit per entry
+            journal_items.append(f"[{date}] {title}\n{content}")
+        return "\n\n".join(journal_items)
+
+    def _analyze_posting(
+        self,
+        company: str,
+        position: str,
+        job_posting: str,
+        resume_content: str,
+        resume_llm_context: Optional[str],
+        journal_context: str,
+    ) -> Dict[str, Any]:
+        """Run the LLM analysis for an already-resolved job posting."""
         # Build prompt for LLM
         prompt = self._build_analysis_prompt(
             company=company,
             position=position,
-            job_posting=job_posting_content,
+            job_posting=job_posting,
             resume=resume_content,
             llm_context=resume_llm_context or "",
             journal_context=journal_context,
@@ -137,16 +489,23 @@ class PositionFitAgent:
         # Call LLM
         logger.info("Calling LLM for position fit analysis...")
         try:
-            response = self.llm.generate(prompt)
-
-            # Parse response
-            analysis = self._parse_llm_response(response)
+            generate_json = getattr(self.llm, "generate_json", None)
+            if generate_json is not None:
+                analysis = self._normalize_analysis(
+                    generate_json(
+                        prompt, POSITION_FIT_SCHEMA, temperature=0.7, max_tokens=800
+                    )
+                )
+            else:
+                analysis = self._parse_llm_response(self.llm.generate(prompt))
 
             logger.info(
                 f"Position fit analysis complete. Score: {analysis.get('fitScore', 'N/A')}/10"
             )
             return analysis
 
+        except (JobCancelled, TransientError):
+            raise
         except Exception as e:
             logger.error(f"Error during LLM analysis: {e}")
             return {
@@ -170,84 +529,34 @@ class PositionFitAgent:
         llm_context: str,
         journal_context: str,
     ) -> str:
-        """Build the prompt for LLM analysis"""
-
-        prompt = f"""You are an expert career advisor analyzing job fit for a candidate.
+        """Build the prompt for LLM analysis.
 
-**JOB POSTING:**
-Company: {company}
-Position: {position}
-
-{job_posting}
-
----
-
-**CANDIDATE RESUME:**
-{resume}
-
-**ADDITIONAL CONTEXT (Hidden from public):**
-{llm_context}
-
-**RECENT JOURNAL ENTRIES:**
-{journal_context if journal_context else "No journal entries available"}
-
----
-
-**TASK:**
-Analyze how well this candidate fits the position. Consider:
-1. Technical skills match (required vs. candidate's skills)
-2. Experience level alignment (years, seniority)
-3. Domain expertise relevance
-4. Soft skills and culture fit indicators from journal entries
-5. Career trajectory alignment
-6. Knowledge gaps or areas needing growth
-
-**OUTPUT FORMAT (JSON):**
-{{
-  "fitScore": <number 1-10, where 10 is perfect fit>,
-  "analysis": {{
-    "summary": "<2-3 sentence overall assessment>",
-    "strengths": [
-      "<specific strength 1>",
-      "<specific strength 2>",
-      "<specific strength 3>"
-    ],
-    "gaps": [
-      "<specific gap 1>",
-      "<specific gap 2>"
-    ],
-    "recommendations": [
-      "<actionable recommendation 1>",
-      "<actionable recommendation 2>"
-    ]
-  }}
-}}
-
-Provide ONLY the JSON output, no additional text.
-"""
-        return prompt
+        The candidate block comes first and does not depend on the job, so
+        every prompt for the same candidate shares one prefix that backends
+        with prefix caching (vLLM, llama.cpp cache_prompt) only process once.
+        Only the job posting fields are untrusted and guard-scanned.
+        """
+        return segmented_prompt(
+            ANALYSIS_PROMPT_TEMPLATE,
+            {"company": company, "position": position, "job_posting": job_posting},
+            resume=resume,
+            llm_context=llm_context,
+            journal_context=journal_context or "No journal entries available",
+        )
 
     def _parse_llm_response(self, response: str) -> Dict[str, Any]:
-        """Parse LLM response into structured format"""
+        """Parse a free-text LLM response into structured format"""
+        data = parse_json_object(response)
+        if data is None:
+            logger.debug(f"Response was: {response[:500]}")
+        return self._normalize_analysis(data)
 
-        try:
-            # Try to extract JSON from response
-            # Look for JSON block (might be wrapped in markdown code fence)
-            json_match = re.search(
-                r"```(?:json)?\s*(\{.*?\})\s*```", response, re.DOTALL
-            )
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                # Try to find JSON directly
-                json_match = re.search(r"\{.*\}", response, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0)
-                else:
-                    raise ValueError("No JSON found in response")
+    def _normalize_analysis(self, data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Validate and clamp parsed analysis JSON"""
 
-            # Parse JSON
-            data = json.loads(json_str)
+        try:
+            if data is None:
+                raise OutputParseError("No JSON found in response")
 
             # Validate structure
             fit_score = float(data.get("fitScore", 5.0))
@@ -267,7 +576,6 @@ Provide ONLY the JSON output, no additional text.
 
         except Exception as e:
             logger.error(f"Error parsing LLM response: {e}")
-            logger.debug(f"Response was: {response[:500]}")
 
             # Return default structure
             return {
@@ -0,0 +1,324 @@
+"""
+Position Fit Pre-Scorer
+
+Fast, deterministic lexical scoring of a resume against job postings. Runs
+before the LLM analysis to give an instant provisional fit score (1-10) and
+to let callers skip or deprioritize obviously mismatched jobs.
+
+The score combines three signals:
+  - skill overlap   — known skills/technologies required by the posting that
+                      also appear in the resume
+  - similarity      — cosine similarity of TF-IDF term vectors
+  - seniority       — distance between the posting's level and the
+                      candidate's estimated level
+
+Pure Python with no model calls; scoring hundreds of postings takes well
+under a second once the posting text is available.
+"""
+
+import logging
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Skip the LLM call when the pre-score is below this value (0 = never skip)
+POSITION_PRESCORE_SKIP_THRESHOLD = float(
+    os.getenv("POSITION_PRESCORE_SKIP_THRESHOLD", "0")
+)
+
+# Signal weights for the combined pre-score
+SKILL_WEIGHT = 0.45
+SIMILARITY_WEIGHT = 0.35
+SENIORITY_WEIGHT = 0.20
+
+# Cosine similarity at which the similarity signal saturates. Resume/posting
+# pairs rarely exceed ~0.5 even for strong matches.
+SIMILARITY_SATURATION = 0.5
+
+_TOKEN_RE = re.compile(r"[a-z][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*")
+
+_STOPWORDS = frozenset(
+    """
+    a about above after again all also am an and any are as at be been before
+    being below between both but by can could did do does doing down during
+    each etc few for from further had has have having he her here hers him his
+    how i if in into is it its itself just me more most my no nor not now of
+    off on once only or other our ours out over own per same she should so
+    some such than that the their theirs them then there these they this
+    those through to too under until up very via was we were what when where
+    which while who whom why will with within without would you your yours
+    ability able across candidate candidates company experience including
+    job looking must new plus position preferred required requirements
+    responsibilities role strong team work working year years well using use
+    """.split()
+)
+
+# Multi-word skills are normalized to a single token before tokenizing
+_PHRASES = {
+    "machine learning": "machine-learning",
+    "deep learning": "deep-learning",
+    "data science": "data-science",
+    "computer vision": "computer-vision",
+    "natural language processing": "nlp",
+    "google cloud": "gcp",
+    "amazon web services": "aws",
+    "ruby on rails": "rails",
+    "react native": "react-native",
+    "spring boot": "spring-boot",
+    "ci/cd": "cicd",
+    "node.js": "nodejs",
+    "node js": "nodejs",
+    "next.js": "nextjs",
+    "vue.js": "vue",
+    "c++": "cpp",
+    "c#": "csharp",
+    ".net": "dotnet",
+}
+
+SKILL_TERMS = frozenset(
+    """
+    python java javascript typescript go golang rust ruby php scala kotlin
+    swift cpp csharp dotnet elixir haskell clojure perl r matlab sql bash
+    react react-native angular vue svelte nextjs nodejs nestjs express django
+    flask fastapi rails spring spring-boot laravel graphql rest grpc
+    html css tailwind redux webpack
+    postgresql postgres mysql mongodb redis elasticsearch cassandra dynamodb
+    sqlite kafka rabbitmq celery spark hadoop airflow dbt snowflake bigquery
+    aws gcp azure docker kubernetes k8s terraform ansible helm jenkins cicd
+    linux nginx prisma serverless lambda microservices
+    machine-learning deep-learning data-science computer-vision nlp llm
+    pytorch tensorflow keras scikit-learn pandas numpy langchain
+    ios android figma agile scrum
+    security oauth devops sre observability prometheus grafana
+    """.split()
+)
+
+# Ordered seniority ladder; index is used as the level distance
+SENIORITY_LEVELS = ["intern", "junior", "mid", "senior", "staff", "principal"]
+
+_LEVEL_PATTERNS = [
+    ("principal", re.compile(r"\b(principal|distinguished|director|head of|vp)\b")),
+    ("staff", re.compile(r"\b(staff|architect|lead)\b")),
+    ("senior", re.compile(r"\b(senior|sr\.?)\b")),
+    ("junior", re.compile(r"\b(junior|jr\.?|entry[- ]level|graduate)\b")),
+    ("intern", re.compile(r"\b(intern|internship|trainee)\b")),
+]
+
+_YEARS_RE = re.compile(r"(\d{1,2})\s*\+?\s*(?:years|yrs)")
+
+
+def _normalize(text: str) -> str:
+    text = (text or "").lower()
+    for phrase, token in _PHRASES.items():
+        text = text.replace(phrase, f" {token} ")
+    return text
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, normalize skill phrases and drop stopwords."""
+    return [
+        token
+        for token in _TOKEN_RE.findall(_normalize(text))
+        if token not in _STOPWORDS and (len(token) > 1 or token == "r")
+    ]
+
+
+def extract_skills(tokens: Sequence[str]) -> set:
+    """Known skill/technology terms present in *tokens*."""
+    return {token for token in tokens if token in SKILL_TERMS}
+
+
+def _level_from_years(years: int) -> str:
+    if years < 1:
+        return "intern"
+    if years < 3:
+        return "junior"
+    if years < 6:
+        return "mid"
+    if years < 9:
+        return "senior"
+    if years < 13:
+        return "staff"
+    return "principal"
+
+
+def estimate_seniority(
+    text: str, title: str = "", years_first: bool = False
+) -> Optional[str]:
+    """Estimate the seniority level named in *title* or implied by *text*.
+
+    By default level keywords win and the largest "N years" mention is the
+    fallback. Resumes use *years_first*, since words like "lead" appear in
+    them as verbs. Returns None when nothing indicates a level.
+    """
+
+    def from_keywords() -> Optional[str]:
+        for source in (title, text):
+            lowered = (source or "").lower()
+            for level, pattern in _LEVEL_PATTERNS:
+                if pattern.search(lowered):
+                    return level
+        return None
+
+    def from_years() -> Optional[str]:
+        years = [int(match) for match in _YEARS_RE.findall((text or "").lower())]
+        return _level_from_years(max(years)) if years else None
+
+    if years_first:
+        return from_years() or from_keywords()
+    return from_keywords() or from_years()
+
+
+def seniority_alignment(
+    posting_level: Optional[str], candidate_level: Optional[str]
+) -> float:
+    """1.0 for the same level, decreasing with distance; 0.7 when unknown."""
+    if posting_level is None or candidate_level is None:
+        return 0.7
+    distance = abs(
+        SENIORITY_LEVELS.index(posting_level) - SENIORITY_LEVELS.index(candidate_level)
+    )
+    # Over-qualification is penalized less than under-qualification
+    if SENIORITY_LEVELS.index(candidate_level) > SENIORITY_LEVELS.index(posting_level):
+        distance *= 0.5
+    return max(0.0, 1.0 - distance / 3)
+
+
+def _tfidf(counts: Counter, idf: Dict[str, float]) -> Dict[str, float]:
+    vector = {
+        term: (1 + math.log(count)) * idf.get(term, 1.0)
+        for term, count in counts.items()
+    }
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    if not norm:
+        return {}
+    return {term: weight / norm for term, weight in vector.items()}
+
+
+def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(term, 0.0) for term, weight in a.items())
+
+
+class PositionPrescorer:
+    """Deterministic lexical pre-scorer for resume/job pairs."""
+
+    def prescore(
+        self, job_posting: str, resume_content: str, position: str = ""
+    ) -> Dict[str, Any]:
+        """
+        Pre-score a single job posting.
+
+        Args:
+            job_posting: Job posting text
+            resume_content: Resume text (public content plus hidden context)
+            position: Position title (used for seniority detection)
+
+        Returns:
+            Dict with prescore (1-10) and the individual signals
+        """
+        return self.prescore_batch(
+            [{"position": position, "posting": job_posting}], resume_content
+        )[0]
+
+    def prescore_batch(
+        self, jobs: List[Dict[str, Any]], resume_content: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Pre-score many postings against one resume.
+
+        IDF weights are computed across the whole batch, so terms common to
+        every posting (boilerplate, the job family itself) count for less.
+
+        Args:
+            jobs: Dicts with posting text and optional position title
+            resume_content: Resume text (public content plus hidden context)
+
+        Returns:
+            One result per job, in input order
+        """
+        resume_tokens = tokenize(resume_content)
+        resume_counts = Counter(resume_tokens)
+        resume_skills = extract_skills(resume_tokens)
+        candidate_level = estimate_seniority(resume_content, years_first=True)
+
+        posting_counts = [
+            Counter(
+                tokenize(f"{job.get('position') or ''}\n{job.get('posting') or ''}")
+            )
+            for job in jobs
+        ]
+
+        documents = posting_counts + [resume_counts]
+        doc_freq: Counter = Counter()
+        for counts in documents:
+            doc_freq.update(counts.keys())
+        total = len(documents)
+        idf = {
+            term: math.log((1 + total) / (1 + freq)) + 1
+            for term, freq in doc_freq.items()
+        }
+        resume_vector = _tfidf(resume_counts, idf)
+
+        results = []
+        for job, counts in zip(jobs, posting_counts):
+            posting_skills = extract_skills(counts)
+            matched = sorted(posting_skills & resume_skills)
+            missing = sorted(posting_skills - resume_skills)
+            skill_overlap = (
+                len(matched) / len(posting_skills) if posting_skills else 0.5
+            )
+
+            similarity = _cosine(_tfidf(counts, idf), resume_vector)
+            posting_level = estimate_seniority(
+                job.get("posting") or "", job.get("position") or ""
+            )
+            alignment = seniority_alignment(posting_level, candidate_level)
+
+            combined = (
+                SKILL_WEIGHT * skill_overlap
+                + SIMILARITY_WEIGHT * min(1.0, similarity / SIMILARITY_SATURATION)
+                + SENIORITY_WEIGHT * alignment
+            )
+            results.append(
+                {
+                    "prescore": round(1 + 9 * combined, 1),
+                    "skillOverlap": round(skill_overlap, 3),
+                    "similarity": round(similarity, 3),
+                    "seniorityAlignment": round(alignment, 3),
+                    "postingLevel": posting_level,
+                    "candidateLevel": candidate_level,
+                    "matchedSkills": matched,
+                    "missingSkills": missing,
+                }
+            )
+
+        logger.debug("Pre-scored %d postings", len(results))
+        return results
+
+
+def skipped_analysis(prescore: Dict[str, Any]) -> Dict[str, Any]:
+    """Position fit result for a job whose LLM analysis was skipped."""
+    matched = prescore.get("matchedSkills") or []
+    missing = prescore.get("missingSkills") or []
+    return {
+        "fitScore": prescore["prescore"],
+        "analysis": {
+            "summary": (
+                "Low keyword and skill overlap with this posting; "
+                "detailed analysis was skipped."
+            ),
+            "strengths": [f"Matching skills: {', '.join(matched)}"] if matched else [],
+            "gaps": [f"Missing skills: {', '.join(missing)}"] if missing else [],
+            "recommendations": [
+                "Request a detailed analysis if this role is still of interest."
+            ],
+        },
+        "prescore": prescore,
+        "llmSkipped": True,
+    }
@@ -0,0 +1,320 @@
+"""
+Per-key and per-tenant rate limits and concurrency caps at the API edge.
+
+verify_api_key admits every authenticated request through the "default"
+budget:
+
+  - a token bucket per API key (LLM_RATE_LIMIT_KEY_RATE requests per minute,
+    bursts of LLM_RATE_LIMIT_KEY_BURST)
+  - a token bucket per tenant (X-Tenant-Id), so one tenant cannot use up a
+    shared key (LLM_RATE_LIMIT_TENANT_RATE / LLM_RATE_LIMIT_TENANT_BURST)
+  - at most LLM_RATE_LIMIT_KEY_INFLIGHT requests in flight per key
+
+Routes that hold a worker for a whole research or scoring run (sync company
+enrichment, sync Musashi index) also go through the "expensive" budget, a
+separate and much smaller bucket and in-flight cap per caller.
+
+All limits of a request are checked before any is charged, so a rejected
+request (and its retries) spends no tokens. State lives in Redis when
+reachable, where the check-and-charge is one Lua script, so the limits hold
+across all API instances; otherwise it is per process. In-flight slots are
+leases in a sorted set that expire after LLM_RATE_LIMIT_LEASE_SECONDS, so
+slots held by a crashed instance free themselves. A rejected request raises
+RateLimitExceeded, which the API turns into 429 with Retry-After.
+
+acquire() and release() block on Redis; call them off the event loop.
+
+A rate or cap of 0 turns that limit off.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from redis_store import get_redis, redis_key
+from tenant_scheduler import defer_seconds
+
+logger = logging.getLogger(__name__)
+
+LLM_RATE_LIMITING = os.getenv("LLM_RATE_LIMITING", "true").lower() == "true"
+# Requests per minute and burst per API key
+LLM_RATE_LIMIT_KEY_RATE = float(os.getenv("LLM_RATE_LIMIT_KEY_RATE", "120"))
+LLM_RATE_LIMIT_KEY_BURST = float(os.getenv("LLM_RATE_LIMIT_KEY_BURST", "30"))
+LLM_RATE_LIMIT_KEY_INFLIGHT = int(os.getenv("LLM_RATE_LIMIT_KEY_INFLIGHT", "16"))
+# Requests per minute and burst per tenant (X-Tenant-Id)
+LLM_RATE_LIMIT_TENANT_RATE = float(os.getenv("LLM_RATE_LIMIT_TENANT_RATE", "60"))
+LLM_RATE_LIMIT_TENANT_BURST = float(os.getenv("LLM_RATE_LIMIT_TENANT_BURST", "20"))
+# Sync research/scoring routes
+LLM_RATE_LIMIT_EXPENSIVE_RATE = float(os.getenv("LLM_RATE_LIMIT_EXPENSIVE_RATE", "6"))
+LLM_RATE_LIMIT_EXPENSIVE_BURST = float(os.getenv("LLM_RATE_LIMIT_EXPENSIVE_BURST", "3"))
+LLM_RATE_LIMIT_EXPENSIVE_INFLIGHT = int(
+    os.getenv("LLM_RATE_LIMIT_EXPENSIVE_INFLIGHT", "2")
+)
+# In-flight leases expire after this long even if never released
+LLM_RATE_LIMIT_LEASE_SECONDS = int(os.getenv("LLM_RATE_LIMIT_LEASE_SECONDS", "600"))
+
+
+class Budget(NamedTuple):
+    rate_per_minute: float
+    burst: float
+    inflight: int
+
+
+DEFAULT_BUDGETS: Dict[str, Budget] = {
+    "default": Budget(
+        LLM_RATE_LIMIT_KEY_RATE, LLM_RATE_LIMIT_KEY_BURST, LLM_RATE_LIMIT_KEY_INFLIGHT
+    ),
+    "expensive": Budget(
+        LLM_RATE_LIMIT_EXPENSIVE_RATE,
+        LLM_RATE_LIMIT_EXPENSIVE_BURST,
+        LLM_RATE_LIMIT_EXPENSIVE_INFLIGHT,
+    ),
+}
+
+
+class RateLimitExceeded(Exception):
+    """A request was over one of its limits.
+
+    Attributes:
+        scope: Which limit: "rate", "tenant" or "inflight"
+        retry_after: Whole seconds the caller should wait (Retry-After)
+    """
+
+    def __init__(self, budget: str, scope: str, wait: float):
+        self.budget = budget
+        self.scope = scope
+        self.retry_after = defer_seconds(wait)
+        super().__init__(f"Rate limit exceeded ({budget} {scope})")
+
+
+class _Lease(NamedTuple):
+    key: str
+    lease_id: str
+    in_redis: bool
+
+
+class RateLimiter:
+    """Token buckets and in-flight caps, shared through Redis when reachable.
+
+    Args:
+        budgets: Budget per name; defaults to DEFAULT_BUDGETS
+        tenant_rate_per_minute: Per-tenant bucket refill (0 disables it)
+        tenant_burst: Per-tenant bucket size
+        lease_seconds: Lifetime of an unreleased in-flight slot
+    """
+
+    # Refill the key and tenant buckets, then check them and the in-flight
+    # cap; charge all three only if every check passes. Returns
+    # {scope, wait}: scope is '' when admitted. A rate of 0 or a cap of 0
+    # skips that limit (same bucket maths as the tenant scheduler).
+    _ADMIT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local rates = {tonumber(ARGV[2]), tonumber(ARGV[4])}
+local bursts = {tonumber(ARGV[3]), tonumber(ARGV[5])}
+local scopes = {'rate', 'tenant'}
+local cap = tonumber(ARGV[6])
+local ttl = tonumber(ARGV[7])
+local tokens = {}
+for i = 1, 2 do
+    if rates[i] > 0 then
+        local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+        local level = tonumber(state[1]) or bursts[i]
+        local ts = tonumber(state[2]) or now
+        level = math.min(bursts[i], level + math.max(0, now - ts) * rates[i])
+        if level < 1 then
+            return {scopes[i], tostring((1 - level) / rates[i])}
+        end
+        tokens[i] = level
+    end
+end
+if cap > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', now)
+    if redis.call('ZCARD', KEYS[3]) >= cap then
+        return {'inflight', '1'}
+    end
+    redis.call('ZADD', KEYS[3], now + ttl, ARGV[8])
+    redis.call('EXPIRE', KEYS[3], ttl)
+end
+for i = 1, 2 do
+    if tokens[i] then
+        redis.call('HSET', KEYS[i], 'tokens', tokens[i] - 1, 'ts', now)
+        redis.call('EXPIRE', KEYS[i], math.ceil(bursts[i] / rates[i]) + 60)
+    end
+end
+return {'', '0'}
+"""
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, Budget]] = None,
+        tenant_rate_per_minute: float = LLM_RATE_LIMIT_TENANT_RATE,
+        tenant_burst: float = LLM_RATE_LIMIT_TENANT_BURST,
+        lease_seconds: int = LLM_RATE_LIMIT_LEASE_SECONDS,
+    ):
+        self.budgets = DEFAULT_BUDGETS if budgets is None else budgets
+        self.tenant_rate_per_minute = tenant_rate_per_minute
+        self.tenant_burst = tenant_burst
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, tuple] = {}
+        self._leases: Dict[str, Dict[str, float]] = {}
+        self._rejected: Dict[str, Counter] = {name: Counter() for name in self.budgets}
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+
+    def acquire(
+        self, identity: str, budget: str = "default", tenant: Optional[str] = None
+    ) -> Optional[_Lease]:
+        """Admit one request of *identity* (API key service or client address).
+
+        Returns:
+            The in-flight lease to release() when the request ends, or None
+            when the budget has no in-flight cap
+
+        Raises:
+            RateLimitExceeded: If a bucket is empty or the cap is reached
+        """
+        limits = self.budgets[budget]
+        keys = (
+            redis_key("ratelimit", budget, "key", identity),
+            redis_key("ratelimit", budget, "tenant", tenant or ""),
+            redis_key("ratelimit", budget, "inflight", identity),
+        )
+        # (rate per second, burst) of the key and tenant buckets
+        buckets = (
+            (limits.rate_per_minute / 60.0, max(1.0, limits.burst)),
+            (
+                self.tenant_rate_per_minute / 60.0 if tenant else 0.0,
+                max(1.0, self.tenant_burst),
+            ),
+        )
+        lease_id = uuid.uuid4().hex
+        scope, wait, in_redis = self._admit(keys, buckets, limits.inflight, lease_id)
+        if scope:
+            # No way to know when an in-flight slot frees up; wait is 1s then
+            self._reject(budget, scope, wait)
+        if limits.inflight <= 0:
+            return None
+        return _Lease(keys[2], lease_id, in_redis)
+
+    def release(self, lease: Optional[_Lease]) -> None:
+        """Free an in-flight slot taken by acquire()."""
+        if lease is None:
+            return
+        if lease.in_redis:
+            client = get_redis()
+            if client is not None:
+                try:
+                    client.zrem(lease.key, lease.lease_id)
+                except Exception as exc:
+                    # The lease expires on its own
+                    logger.warning("Redis in-flight release failed: %s", exc)
+            return
+        with self._lock:
+            self._leases.get(lease.key, {}).pop(lease.lease_id, None)
+
+    def _reject(self, budget: str, scope: str, wait: float) -> None:
+        with self._lock:
+            self._rejected[budget][scope] += 1
+        raise RateLimitExceeded(budget, scope, wait)
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+
+    def _admit(
+        self,
+        keys: Tuple[str, str, str],
+        buckets: Tuple[Tuple[float, float], Tuple[float, float]],
+        cap: int,
+        lease_id: str,
+    ) -> Tuple[str, float, bool]:
+        """Check every limit, then charge them all or none.
+
+        Returns:
+            (scope of the limit that refused, or "", seconds to wait,
+            whether the state is in Redis)
+        """
+        now = time.time()
+        client = get_redis()
+        if client is not None:
+            try:
+                (key_rate, key_burst), (tenant_rate, tenant_burst) = buckets
+                scope, wait = client.eval(
+                    self._ADMIT_SCRIPT,
+                    3,
+                    *keys,
+                    now,
+                    key_rate,
+                    key_burst,
+                    tenant_rate,
+                    tenant_burst,
+                    cap,
+                    self.lease_seconds,
+                    lease_id,
+                )
+                return scope, float(wait), True
+            except Exception as exc:
+                logger.warning("Redis rate limit failed (%s): %s", keys[0], exc)
+
+        with self._lock:
+            levels = []
+            for key, (rate, burst), scope in zip(keys, buckets, ("rate", "tenant")):
+                if rate <= 0:
+                    continue
+                tokens, ts = self._buckets.get(key, (burst, now))
+                tokens = min(burst, tokens + max(0.0, now - ts) * rate)
+                if tokens < 1:
+                    return scope, (1 - tokens) / rate, False
+                levels.append((key, tokens))
+
+            if cap > 0:
+                leases = self._leases.setdefault(keys[2], {})
+                for expired in [lid for lid, expiry in leases.items() if expiry <= now]:
+                    del leases[expired]
+                if len(leases) >= cap:
+                    return "inflight", 1.0, False
+                leases[lease_id] = now + self.lease_seconds
+
+            for key, tokens in levels:
+                self._buckets[key] = (tokens - 1, now)
+            return "", 0.0, False
+
+    def stats(self) -> Dict[str, Any]:
+        """Configured budgets and this process's rejection counts."""
+        with self._lock:
+            rejected = {name: dict(counts) for name, counts in self._rejected.items()}
+        return {
+            "enabled": LLM_RATE_LIMITING,
+            "budgets": {
+                name: {
+                    "ratePerMinute": limits.rate_per_minute,
+                    "burst": limits.burst,
+                    "inflight": limits.inflight,
+                    "rejected": rejected.get(name, {}),
+                }
+                for name, limits in self.budgets.items()
+            },
+            "tenantRatePerMinute": self.tenant_rate_per_minute,
+            "tenantBurst": self.tenant_burst,
+        }
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Shared rate limiter for this process."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
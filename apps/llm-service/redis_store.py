@@ -0,0 +1,88 @@
+"""
+Shared Redis connection for LLM Service state (caches, checkpoints, job data).
+
+Uses the same Redis database as Celery (REDIS_DB, default 1). Redis is
+optional: when the client library is missing or the server is unreachable,
+get_redis() returns None and callers fall back to in-process state.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Redis configuration (shared with API service, different database)
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = os.getenv("REDIS_PORT", "6379")  # Same port as API service
+REDIS_DB = os.getenv("REDIS_DB", "1")  # Database 1 (API uses 0)
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
+
+# Build Redis URL
+redis_url = (
+    f"redis://:{REDIS_PASSWORD}@{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
+    if REDIS_PASSWORD
+    else f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
+)
+
+# Prefix for every key written by llm-service helpers
+KEY_PREFIX = "llm:"
+
+# Seconds to wait before retrying a failed connection
+_RECONNECT_INTERVAL = 30.0
+
+_client: Any = None
+_last_failure = 0.0
+_lock = threading.Lock()
+
+
+def get_redis() -> Optional[Any]:
+    """Return a shared redis.Redis client, or None if Redis is unavailable."""
+    global _client, _last_failure
+
+    if _client is not None:
+        return _client
+
+    with _lock:
+        if _client is not None:
+            return _client
+        if time.monotonic() - _last_failure < _RECONNECT_INTERVAL:
+            return None
+
+        try:
+            import redis
+        except ImportError:
+            logger.warning("redis package not installed — using in-process state")
+            _last_failure = time.monotonic()
+            return None
+
+        try:
+            client = redis.Redis.from_url(
+                redis_url,
+                decode_responses=True,
+                socket_connect_timeout=2,
+                socket_timeout=5,
+                health_check_interval=30,
+            )
+            client.ping()
+        except Exception as exc:
+            logger.warning("Redis unavailable at %s: %s", REDIS_HOST, exc)
+            _last_failure = time.monotonic()
+            return None
+
+        _client = client
+        logger.info(
+            "Connected to Redis %s:%s (db %s)", REDIS_HOST, REDIS_PORT, REDIS_DB
+        )
+        return _client
+
+
+def redis_key(*parts: str) -> str:
+    """Build a namespaced key, e.g. redis_key("cache", "company", "acme")."""
+    return KEY_PREFIX + ":".join(parts)
@@ -0,0 +1,152 @@
+"""
+Two-tier result cache for expensive LLM results.
+
+Tier 1 is a bounded in-process LRU with per-entry TTL; tier 2 is Redis
+(shared across API and Celery worker processes). Values must be
+JSON-serializable. Redis failures never raise — the cache degrades to the
+in-process tier.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from redis_store import get_redis, redis_key
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Thread-safe bounded LRU with optional per-entry TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else 0.0
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "maxEntries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class ResultCache:
+    """In-process LRU in front of a shared Redis tier.
+
+    Args:
+        namespace: Key namespace (e.g. "company", "musashi")
+        ttl: Entry lifetime in seconds for both tiers
+        max_entries: Size bound of the in-process tier
+        use_redis: Disable to keep the cache process-local
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: int = 86400,
+        max_entries: int = 512,
+        use_redis: bool = True,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self.local = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.redis_hits = 0
+
+    def _redis_key(self, key: str) -> str:
+        return redis_key("cache", self.namespace, key)
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        client = get_redis() if self.use_redis else None
+        if client is None:
+            return None
+        try:
+            raw = client.get(self._redis_key(key))
+        except Exception as exc:
+            logger.warning("Redis cache read failed (%s): %s", self.namespace, exc)
+            return None
+        if raw is None:
+            return None
+
+        value = json.loads(raw)
+        self.redis_hits += 1
+        self.local.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.local.set(key, value)
+
+        client = get_redis() if self.use_redis else None
+        if client is None:
+            return
+        try:
+            client.set(self._redis_key(key), json.dumps(value), ex=self.ttl)
+        except Exception as exc:
+            logger.warning("Redis cache write failed (%s): %s", self.namespace, exc)
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+
+        client = get_redis() if self.use_redis else None
+        if client is None:
+            return
+        try:
+            client.delete(self._redis_key(key))
+        except Exception as exc:
+            logger.warning("Redis cache delete failed (%s): %s", self.namespace, exc)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.local.stats()
+        stats["namespace"] = self.namespace
+        stats["redisHits"] = self.redis_hits
+        return stats
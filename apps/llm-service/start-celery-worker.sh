@@ -1,5 +1,12 @@
 #!/bin/bash
 # Start Celery worker for LLM Service
+#
+# Usage: ./start-celery-worker.sh [all|research|analysis|webhooks]
+#
+#   all       one worker consuming every queue (development default)
+#   research  thread pool for network-bound company research
+#   analysis  prefork pool for GPU-bound position fit / Musashi scoring
+#   webhooks  thread pool for webhook delivery (start-webhook-worker.sh)
 
 set -e
 
@@ -15,24 +22,88 @@ REDIS_HOST=${REDIS_HOST:-localhost}
 REDIS_PORT=${REDIS_PORT:-6379}  # Shared Redis (same as API)
 REDIS_DB=${REDIS_DB:-1}         # Database 1 (API uses 0)
 
-echo "🚀 Starting Celery worker for LLM Service"
+RESEARCH_QUEUE=${CELERY_RESEARCH_QUEUE:-research}
+ANALYSIS_QUEUE=${CELERY_ANALYSIS_QUEUE:-analysis}
+WEBHOOK_QUEUE=${WEBHOOK_QUEUE:-webhooks}
+
+WORKER_CLASS=${1:-${CELERY_WORKER_CLASS:-all}}
+
+# Per-class defaults: queues, pool type, concurrency and beat. Research
+# tasks spend most of their time waiting on search APIs (and pacing sleeps),
+# so many threads share one process; analysis is limited by LLM backend
+# capacity, so a few prefork processes are enough to keep the GPUs busy.
+case "$WORKER_CLASS" in
+    all)
+        DEFAULT_QUEUES="celery,$RESEARCH_QUEUE,$ANALYSIS_QUEUE,$WEBHOOK_QUEUE"
+        DEFAULT_POOL=prefork
+        DEFAULT_CONCURRENCY=2
+        DEFAULT_BEAT=1
+        ;;
+    research)
+        DEFAULT_QUEUES="$RESEARCH_QUEUE"
+        DEFAULT_POOL=${CELERY_RESEARCH_POOL:-threads}  # or gevent if installed
+        DEFAULT_CONCURRENCY=${CELERY_RESEARCH_CONCURRENCY:-8}
+        DEFAULT_BEAT=0
+        ;;
+    analysis)
+        DEFAULT_QUEUES="$ANALYSIS_QUEUE,celery"
+        DEFAULT_POOL=prefork
+        DEFAULT_CONCURRENCY=${CELERY_ANALYSIS_CONCURRENCY:-2}
+        DEFAULT_BEAT=1
+        ;;
+    webhooks)
+        exec ./start-webhook-worker.sh
+        ;;
+    *)
+        echo "Unknown worker class: $WORKER_CLASS (all|research|analysis|webhooks)" >&2
+        exit 1
+        ;;
+esac
+
+CELERY_QUEUES=${CELERY_QUEUES:-$DEFAULT_QUEUES}
+CELERY_POOL=${CELERY_POOL:-$DEFAULT_POOL}
+CELERY_CONCURRENCY=${CELERY_CONCURRENCY:-$DEFAULT_CONCURRENCY}
+
+POOL_ARGS=(-P "$CELERY_POOL")
+if [ "$CELERY_POOL" = "prefork" ]; then
+    # Recycling only applies to (and is only needed by) prefork children
+    POOL_ARGS+=(--max-tasks-per-child=50)
+fi
+
+# Embedded beat scheduler for the webhook outbox pump. Running it on several
+# workers is harmless (outbox entries are claimed atomically); set
+# CELERY_BEAT=0 when a dedicated `celery beat` process is used instead.
+CELERY_BEAT=${CELERY_BEAT:-$DEFAULT_BEAT}
+BEAT_ARGS=()
+if [ "$CELERY_BEAT" = "1" ]; then
+    BEAT_ARGS=(-B --schedule "${CELERY_BEAT_SCHEDULE:-/tmp/llm-celerybeat-schedule}")
+fi
+
+echo "🚀 Starting Celery worker for LLM Service ($WORKER_CLASS)"
 echo "   Redis: $REDIS_HOST:$REDIS_PORT (DB $REDIS_DB)"
-echo "   Concurrency: 2 workers"
+echo "   Pool: $CELERY_POOL, concurrency $CELERY_CONCURRENCY"
+echo "   Queues: $CELERY_QUEUES"
+echo "   Beat: $CELERY_BEAT"
 echo ""
 
 # Start Celery worker
 # -A celery_config = app location
 # -l info = log level
-# --concurrency=2 = number of worker processes (adjust based on CPU)
-# -Q default = queue name
-# --max-tasks-per-child=50 = restart worker after N tasks (prevent memory leaks)
+# -P / --concurrency = pool type and size for this workload class
+# -Q $CELERY_QUEUES = queues to consume
+# -B = embedded beat scheduler (CELERY_BEAT=1)
+# -n = unique node name per class so several classes can run on one host
+# --max-tasks-per-child=50 = restart prefork children after N tasks (prevent memory leaks)
 
 if [ -n "$USE_POETRY" ]; then
     echo "Using Poetry environment..."
     poetry run celery -A celery_config worker \
         --loglevel=info \
-        --concurrency=2 \
-        --max-tasks-per-child=50 \
+        "${POOL_ARGS[@]}" \
+        --concurrency="$CELERY_CONCURRENCY" \
+        -Q "$CELERY_QUEUES" \
+        "${BEAT_ARGS[@]}" \
+        -n "$WORKER_CLASS@%h" \
         --task-events \
         --without-gossip \
         --without-mingle \
@@ -40,8 +111,11 @@ if [ -n "$USE_POETRY" ]; then
 else
     celery -A celery_config worker \
         --loglevel=info \
-        --concurrency=2 \
-        --max-tasks-per-child=50 \
+        "${POOL_ARGS[@]}" \
+        --concurrency="$CELERY_CONCURRENCY" \
+        -Q "$CELERY_QUEUES" \
+        "${BEAT_ARGS[@]}" \
+        -n "$WORKER_CLASS@%h" \
         --task-events \
         --without-gossip \
         --without-mingle \
@@ -0,0 +1,50 @@
+#!/bin/bash
+# Start a Celery worker dedicated to webhook delivery
+
+set -e
+
+cd "$(dirname "$0")"
+
+# Load environment variables
+if [ -f ".env" ]; then
+    export $(grep -v '^#' .env | xargs)
+fi
+
+WEBHOOK_QUEUE=${WEBHOOK_QUEUE:-webhooks}
+WEBHOOK_WORKER_CONCURRENCY=${WEBHOOK_WORKER_CONCURRENCY:-16}
+
+echo "📬 Starting webhook delivery worker for LLM Service"
+echo "   Queue: $WEBHOOK_QUEUE"
+echo "   Concurrency: $WEBHOOK_WORKER_CONCURRENCY threads"
+echo ""
+
+# Delivery is I/O-bound, so a thread pool shares one pooled HTTP session
+# (keep-alive connections to api-service) across all concurrent deliveries.
+# -P threads = thread pool instead of prefork processes
+# -Q = only the webhook queue (LLM workers: start-celery-worker.sh research|analysis)
+# --prefetch-multiplier=4 = keep a few deliveries buffered per thread
+
+if [ -n "$USE_POETRY" ]; then
+    echo "Using Poetry environment..."
+    poetry run celery -A celery_config worker \
+        --loglevel=info \
+        -P threads \
+        --concurrency="$WEBHOOK_WORKER_CONCURRENCY" \
+        -Q "$WEBHOOK_QUEUE" \
+        --prefetch-multiplier=4 \
+        -n "webhooks@%h" \
+        --without-gossip \
+        --without-mingle \
+        --without-heartbeat
+else
+    celery -A celery_config worker \
+        --loglevel=info \
+        -P threads \
+        --concurrency="$WEBHOOK_WORKER_CONCURRENCY" \
+        -Q "$WEBHOOK_QUEUE" \
+        --prefetch-multiplier=4 \
+        -n "webhooks@%h" \
+        --without-gossip \
+        --without-mingle \
+        --without-heartbeat
+fi
@@ -0,0 +1,182 @@
+"""
+Incremental output guard for streamed LLM responses.
+
+protect_output() needs the whole response before anything can be sent.
+StreamingOutputGuard takes the response chunk by chunk instead and releases
+text as soon as it has been checked:
+
+  1. Secrets (the "sensitive" guard rules) are redacted over a sliding
+     window: the last LLM_GUARD_STREAM_WINDOW characters, and any match that
+     still reaches into them, are held back, so a secret split across
+     chunks is redacted whole.
+  2. Redacted text is cut into units at sentence or paragraph ends, and each
+     unit is submitted to the llm_guard output scanners (guard executor)
+     while generation goes on.
+  3. Units are released in order as their verdicts come back.
+
+A rejected unit ends the stream with the protect_output refusal (or raises
+GuardRejection when fail-closed). Text released before it stays released;
+that is the trade-off of streaming.
+
+Usage:
+    guard = StreamingOutputGuard(source="chat_stream", prompt_context=question)
+    for text in guard.stream(backend_chunks):
+        send(text)
+"""
+
+import logging
+import os
+import re
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, Iterable, Iterator, List, Tuple
+
+from guard_executor import LLM_GUARD_SCAN_TIMEOUT
+from guard_rules import get_guard_rules
+import llm_guard_service
+from llm_guard_service import OUTPUT_REFUSAL, GuardRejection, submit_scan
+
+logger = logging.getLogger(__name__)
+
+# Characters held back for redaction; must exceed the longest secret prefix
+# a sensitive rule needs before it can match
+LLM_GUARD_STREAM_WINDOW = int(os.getenv("LLM_GUARD_STREAM_WINDOW", "256"))
+
+# Sentence end (optionally closed by a quote or bracket) or line break
+_UNIT_END = re.compile(r"[.!?][\"')\]]*\s|\n")
+# A unit without any sentence end is cut at a space once it gets this long
+_MAX_UNIT_CHARS = 1000
+
+
+class StreamingOutputGuard:
+    """Guard one streamed response.
+
+    Args:
+        source: Caller name used in logs and rejection messages
+        prompt_context: The prompt, passed to the output scanners
+        window: Characters held back for cross-chunk redaction
+    """
+
+    def __init__(
+        self,
+        source: str = "unknown",
+        prompt_context: str = "",
+        window: int = LLM_GUARD_STREAM_WINDOW,
+    ):
+        self.source = source
+        self.prompt_context = prompt_context
+        self.window = window
+        self._raw = ""  # received, not redacted yet
+        self._redacted = ""  # redacted, not in a unit yet
+        self._units: Deque[Tuple[str, "Future[Tuple[str, bool]]"]] = deque()
+        self._stopped = False
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add a chunk; returns the text now safe to send (possibly none)."""
+        if self._stopped or not chunk:
+            return []
+        self._raw += chunk
+        self._settle(final=False)
+        return self._release(wait=False)
+
+    def finish(self) -> List[str]:
+        """End of generation: check the held-back tail and return the rest."""
+        if self._stopped:
+            return []
+        self._settle(final=True)
+        released = self._release(wait=True)
+        self._stopped = True
+        return released
+
+    def stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Guard a whole chunk iterator, yielding text as it is released."""
+        for chunk in chunks:
+            yield from self.feed(chunk)
+            if self._stopped:
+                return
+        yield from self.finish()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _settle(self, final: bool) -> None:
+        """Redact what can no longer be part of a secret and queue its units."""
+        if not llm_guard_service.LLM_GUARD_ENABLED:
+            settled, self._raw = self._raw, ""
+            self._queue_unit(settled)
+            return
+
+        cut = len(self._raw)
+        if not final:
+            cut -= self.window
+            for match in get_guard_rules().sensitive.matches(self._raw):
+                if match.end > cut:
+                    # Still reaching into the tail: the secret may go on
+                    cut = min(cut, match.start)
+                    break
+            if cut <= 0:
+                return
+
+        settled, self._raw = self._raw[:cut], self._raw[cut:]
+        redacted, fired = get_guard_rules().sensitive.redact(settled)
+        if fired:
+            logger.warning(
+                "Redacted streamed output from %s (rules: %s)",
+                self.source,
+                ", ".join(fired),
+            )
+        self._redacted += redacted
+
+        if final:
+            unit, self._redacted = self._redacted, ""
+        else:
+            end = 0
+            for boundary in _UNIT_END.finditer(self._redacted):
+                end = boundary.end()
+            if not end and len(self._redacted) >= _MAX_UNIT_CHARS:
+                end = self._redacted.rfind(" ") + 1 or len(self._redacted)
+            unit, self._redacted = self._redacted[:end], self._redacted[end:]
+        self._queue_unit(unit)
+
+    def _queue_unit(self, unit: str) -> None:
+        if not unit:
+            return
+        if llm_guard_service.LLM_GUARD_ENABLED and unit.strip():
+            future = submit_scan("output", unit, self.prompt_context)
+        else:
+            future = Future()
+            future.set_result((unit, True))
+        self._units.append((unit, future))
+
+    def _release(self, wait: bool) -> List[str]:
+        """Pop the units whose verdicts are in, in order."""
+        released: List[str] = []
+        while self._units:
+            unit, future = self._units[0]
+            if not wait and not future.done():
+                break
+            self._units.popleft()
+            try:
+                sanitized, is_valid = future.result(timeout=LLM_GUARD_SCAN_TIMEOUT)
+            except Exception as exc:
+                # Skipped by the guard workers if it timed out still queued
+                future.cancel()
+                logger.warning("llm_guard output scan failed, continuing: %s", exc)
+                sanitized, is_valid = unit, True
+
+            if not is_valid:
+                self._stopped = True
+                self._units.clear()
+                message = f"Output rejected by llm_guard from {self.source}"
+                if llm_guard_service.LLM_GUARD_FAIL_CLOSED:
+                    raise GuardRejection(message)
+                logger.warning("%s, ending stream (fail-open mode)", message)
+                released.append(OUTPUT_REFUSAL)
+                break
+            released.append(sanitized)
+        return released
@@ -0,0 +1,127 @@
+"""
+Helpers for schema-constrained JSON generation.
+
+Agents declare the JSON Schema they expect; RemoteLLMWrapper.generate_json()
+forwards it to the backend's constrained-decoding feature (llama.cpp
+json_schema, Ollama format, vLLM guided_json) and falls back to a bounded
+repair prompt when the output still fails to parse. Parse statistics are
+kept per process so the failure rate and wasted tokens can be monitored.
+"""
+
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+# ---------------------------------------------------------------------------
+# Schema helpers
+# ---------------------------------------------------------------------------
+
+
+def nullable(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Allow null in addition to *schema*'s type."""
+    return {"anyOf": [schema, {"type": "null"}]}
+
+
+def object_schema(
+    properties: Dict[str, Any], required: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Closed object schema; every property is required unless listed otherwise."""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties) if required is None else required,
+        "additionalProperties": False,
+    }
+
+
+STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
+
+
+def parse_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """Parse a JSON object from *text*, tolerating code fences and chatter.
+
+    Returns None when no JSON object can be decoded.
+    """
+    if not text:
+        return None
+
+    candidate = text.strip()
+    try:
+        parsed = json.loads(candidate)
+        return parsed if isinstance(parsed, dict) else None
+    except json.JSONDecodeError:
+        pass
+
+    candidate = re.sub(r"```(?:json)?", "", candidate).strip()
+    match = re.search(r"\{.*\}", candidate, re.DOTALL)
+    if not match:
+        return None
+    try:
+        parsed = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def build_repair_prompt(prompt: str, bad_output: str, schema: Dict[str, Any]) -> str:
+    """Ask the model to re-emit its previous answer as schema-valid JSON."""
+    return f"""{prompt}
+
+Your previous answer could not be parsed as JSON:
+{bad_output[:2000]}
+
+Return ONLY a single valid JSON object that matches this JSON Schema. No markdown, no explanations.
+{json.dumps(schema, separators=(",", ":"))}"""
+
+
+# ---------------------------------------------------------------------------
+# Statistics
+# ---------------------------------------------------------------------------
+
+
+class StructuredOutputStats:
+    """Per-process counters for schema-constrained generations."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.parsed_first_try = 0
+        self.repaired = 0
+        self.failed = 0
+        self.wasted_tokens = 0
+
+    def record(self, attempts: int, success: bool, wasted_tokens: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.wasted_tokens += wasted_tokens
+            if not success:
+                self.failed += 1
+            elif attempts == 1:
+                self.parsed_first_try += 1
+            else:
+                self.repaired += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.requests
+            return {
+                "requests": requests,
+                "parsedFirstTry": self.parsed_first_try,
+                "repaired": self.repaired,
+                "failed": self.failed,
+                "parseFailureRate": (
+                    round((requests - self.parsed_first_try) / requests, 4)
+                    if requests
+                    else 0.0
+                ),
+                "wastedTokens": self.wasted_tokens,
+            }
+
+
+structured_output_stats = StructuredOutputStats()
@@ -7,14 +7,33 @@ automatic retry, monitoring, and webhook callbacks.
 
 import logging
 import os
-from celery import Task
+import uuid
+from celery import Task, states
+from celery.exceptions import Ignore, Retry
 from celery_config import celery_app
 from llm_wrapper import (
-    call_webhook,
+    cache_company_research,
+    dispatch_webhook,
     get_musashi_agent,
     get_position_fit_agent,
     get_research_agent,
+    analyze_positions_batch,
+    research_companies_batch,
 )
+from idempotency import get_idempotency_store
+from job_control import DEADLINE_HEADER, JobCancelled, check, task_deadline
+from job_registry import get_job_registry
+from llm_errors import RETRYABLE_ERRORS, error_type, is_retryable
+from musashi_batch import MUSASHI_BATCH_SLICE_SECONDS, checkpoints, run_musashi_batch
+from tenant_scheduler import (
+    LLM_TENANT_SCHEDULING,
+    TENANT_HEADER,
+    defer_seconds,
+    enqueue_for_tenant,
+    get_tenant_scheduler,
+    task_tenant,
+)
+from webhook_dispatcher import attempt_delivery, pump_outbox
 
 # Configure logging for Celery tasks
 logging.basicConfig(
@@ -46,13 +65,157 @@ class CallbackTask(Task):
         logger.error(f"Task {task_id} failed permanently: {exc}")
 
 
+class TenantFairTask(CallbackTask):
+    """Task that waits its turn in the tenant's fleet-wide token bucket.
+
+    Over-quota tasks are re-queued with a countdown under the same task ID
+    (not counted as a retry) so they do not hold a worker slot. Jobs
+    registered in the job registry are marked running, retrying and
+    finished as the task progresses. Cancelled or expired jobs stop at
+    their next check and are never auto-retried.
+
+    Only transient failures (see llm_errors) are retried; tasks pass
+    autoretry_for=RETRYABLE_ERRORS.
+    """
+
+    dont_autoretry_for = (JobCancelled,)
+
+    def will_retry(self, exc: Exception) -> bool:
+        """True if autoretry will run this task again after failing with *exc*."""
+        if not is_retryable(exc) or isinstance(exc, self.dont_autoretry_for):
+            return False
+        return self.max_retries is None or self.request.retries < self.max_retries
+
+    def _message_headers(self) -> dict:
+        """Headers to carry over when this task's message is re-published."""
+        headers = {TENANT_HEADER: task_tenant(self.request)}
+        deadline = task_deadline(self.request)
+        if deadline:
+            headers[DEADLINE_HEADER] = deadline
+        return headers
+
+    def __call__(self, *args, **kwargs):
+        if LLM_TENANT_SCHEDULING and not self.request.is_eager:
+            tenant = task_tenant(self.request)
+            scheduler = get_tenant_scheduler()
+            wait = scheduler.acquire(tenant)
+            if wait:
+                countdown = defer_seconds(wait)
+                logger.info(
+                    f"[Task {self.request.id}] Tenant {tenant} over quota — "
+                    f"deferring {countdown}s"
+                )
+                self.apply_async(
+                    args=args,
+                    kwargs=kwargs,
+                    task_id=self.request.id,
+                    headers=self._message_headers(),
+                    countdown=countdown,
+                )
+                raise Ignore()
+            scheduler.record_started(tenant)
+
+        registry = get_job_registry()
+        job_id = registry.job_for_task(self.request.id) if self.request.id else None
+        with registry.tracking(job_id, self.request.id, task_deadline(self.request)):
+            # Cancelled or expired while queued: stop before doing any work
+            check()
+            return super().__call__(*args, **kwargs)
+
+    def after_return(self, status, retval, task_id, args, kwargs, einfo):
+        """Called after success or final failure (not for retries/deferrals)."""
+        if LLM_TENANT_SCHEDULING and not self.request.is_eager:
+            get_tenant_scheduler().record_finished(task_tenant(self.request))
+
+        registry = get_job_registry()
+        job_id = registry.job_for_task(task_id)
+        if job_id is None:
+            return
+        if status == states.SUCCESS:
+            registry.mark_finished(job_id, "completed", result=retval, task_id=task_id)
+        elif isinstance(retval, JobCancelled):
+            registry.mark_finished(
+                job_id, "cancelled", error=str(retval), task_id=task_id
+            )
+            # Free the idempotency key so the job can be submitted again
+            get_idempotency_store().record_outcome(
+                job_id, {"status": "failed", "error": str(retval)}
+            )
+        else:
+            registry.mark_finished(job_id, "failed", error=str(retval), task_id=task_id)
+
+    def retry(self, *args, **options):
+        tenant = task_tenant(self.request)
+        # Keep the tenant and deadline headers on the re-published message
+        headers = {**self._message_headers(), **(options.pop("headers", None) or {})}
+        try:
+            return super().retry(*args, headers=headers, **options)
+        except Retry as retry:
+            if LLM_TENANT_SCHEDULING and not self.request.is_eager:
+                scheduler = get_tenant_scheduler()
+                scheduler.record_finished(tenant)
+                scheduler.record_enqueued(tenant)
+            registry = get_job_registry()
+            job_id = registry.job_for_task(self.request.id)
+            if job_id is not None:
+                registry.requeue(job_id, status="retrying", error=str(retry.exc or ""))
+            raise
+
+
+@celery_app.task(
+    bind=True,
+    name="llm_service.tasks.deliver_webhook_task",
+    max_retries=None,  # Bounded by WEBHOOK_MAX_RETRIES in attempt_delivery
+    ignore_result=True,
+    time_limit=60,
+    soft_time_limit=45,
+)
+def deliver_webhook_task(self, entry: dict):
+    """
+    Deliver one signed webhook from the outbox (runs on the "webhooks" queue).
+
+    Makes a single attempt; early failures are retried with a countdown so
+    no worker slot is held while waiting for the receiver to recover. Later
+    retries are re-queued by pump_webhook_outbox_task.
+
+    Args:
+        entry: Outbox entry (callbackUrl, payload, attempts, ...)
+
+    Returns:
+        bool: True if there is nothing more for this task to do
+    """
+    delay = attempt_delivery(entry)
+    if delay is not None:
+        raise self.retry(args=(entry,), countdown=delay)
+    return True
+
+
+@celery_app.task(
+    name="llm_service.tasks.pump_webhook_outbox_task",
+    ignore_result=True,
+    time_limit=120,
+    soft_time_limit=90,
+)
+def pump_webhook_outbox_task():
+    """
+    Re-queue outbox deliveries whose backoff has elapsed (Celery beat).
+
+    Safe to run from several beat schedulers at once: entries are claimed
+    atomically.
+
+    Returns:
+        int: Number of deliveries queued
+    """
+    return pump_outbox()
+
+
 @celery_app.task(
     bind=True,
-    base=CallbackTask,
+    base=TenantFairTask,
     name="llm_service.tasks.research_company_task",
     max_retries=2,
     default_retry_delay=60,  # Retry after 1 minute
-    autoretry_for=(Exception,),
+    autoretry_for=RETRYABLE_ERRORS,
     retry_backoff=True,
     retry_backoff_max=600,  # Max 10 minutes between retries
     retry_jitter=True,  # Add randomness to prevent thundering herd
@@ -80,9 +243,14 @@ def research_company_task(
         agent = get_research_agent()
 
         # Perform research (can take 10-60 seconds)
-        company_info = agent.research_company(company_name)
+        company_info, research_stats = agent.research_company_with_stats(company_name)
+        cache_company_research(company_name, company_info)
 
-        logger.info(f"[Task {self.request.id}] Research complete for {company_name}")
+        logger.info(
+            f"[Task {self.request.id}] Research complete for {company_name} "
+            f"(coverage {research_stats['coverage']:.0%}, "
+            f"{research_stats['queriesSaved']} queries saved)"
+        )
 
         # Prepare success payload
         payload = {
@@ -90,16 +258,19 @@ def research_company_task(
             "type": "company",
             "status": "completed",
             "data": company_info,
+            "researchStats": research_stats,
             "metadata": metadata,
             "celeryTaskId": self.request.id,
         }
 
+        get_idempotency_store().record_outcome(job_id, payload)
+
         # Call webhook
-        webhook_success = call_webhook(callback_url, payload)
+        webhook_success = dispatch_webhook(callback_url, payload)
 
         if not webhook_success:
             logger.warning(
-                f"[Task {self.request.id}] Webhook delivery failed, but task succeeded"
+                f"[Task {self.request.id}] Webhook could not be queued, but task succeeded"
             )
 
         return company_info
@@ -109,30 +280,90 @@ def research_company_task(
             f"[Task {self.request.id}] Research failed for {company_name}: {e}"
         )
 
-        # Send failure webhook
         failure_payload = {
             "jobId": metadata.get("jobId", job_id),
             "type": "company",
             "status": "failed",
             "error": str(e),
+            "errorType": error_type(e),
             "metadata": metadata,
             "celeryTaskId": self.request.id,
             "retries": self.request.retries,
         }
+        if isinstance(e, JobCancelled):
+            failure_payload["cancelled"] = True
 
-        call_webhook(callback_url, failure_payload)
+        if self.will_retry(e):
+            logger.info(f"[Task {self.request.id}] Transient failure, retrying")
+        else:
+            # Final failure: free the idempotency key for resubmission
+            get_idempotency_store().record_outcome(job_id, failure_payload)
+            dispatch_webhook(callback_url, failure_payload)
 
-        # Re-raise to trigger Celery retry
+        # Re-raise so Celery retries transient failures
         raise
 
 
 @celery_app.task(
     bind=True,
-    base=CallbackTask,
+    base=TenantFairTask,
+    name="llm_service.tasks.research_companies_batch_task",
+    max_retries=1,
+    default_retry_delay=60,
+    autoretry_for=RETRYABLE_ERRORS,
+    retry_backoff=True,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    time_limit=3000,  # Batches run far longer than a single research job
+    soft_time_limit=2900,
+)
+def research_companies_batch_task(
+    self,
+    company_names: list,
+    callback_url: str,
+    metadata: dict,
+    job_id: str,
+    force_refresh: bool = False,
+):
+    """
+    Enrich a list of companies and stream one webhook per company.
+
+    Companies already researched are served from the research cache, so a
+    retry only redoes the companies that had not finished.
+
+    Args:
+        company_names: Company names to research (duplicates are collapsed)
+        callback_url: URL to POST each company result to
+        metadata: Metadata to include in every webhook payload
+        job_id: Batch job ID for tracking
+        force_refresh: Ignore cached research results
+
+    Returns:
+        dict: Batch summary with per-company status
+    """
+    logger.info(
+        f"[Task {self.request.id}] Starting batch enrichment of "
+        f"{len(company_names)} companies (job: {job_id})"
+    )
+
+    summary = research_companies_batch(
+        company_names,
+        callback_url,
+        metadata,
+        job_id,
+        force_refresh=force_refresh,
+    )
+    summary["celeryTaskId"] = self.request.id
+    return summary
+
+
+@celery_app.task(
+    bind=True,
+    base=TenantFairTask,
     name="llm_service.tasks.analyze_position_task",
     max_retries=2,
     default_retry_delay=60,
-    autoretry_for=(Exception,),
+    autoretry_for=RETRYABLE_ERRORS,
     retry_backoff=True,
     retry_backoff_max=600,
     retry_jitter=True,
@@ -200,12 +431,14 @@ def analyze_position_task(
             "celeryTaskId": self.request.id,
         }
 
+        get_idempotency_store().record_outcome(job_id, payload)
+
         # Call webhook
-        webhook_success = call_webhook(callback_url, payload)
+        webhook_success = dispatch_webhook(callback_url, payload)
 
         if not webhook_success:
             logger.warning(
-                f"[Task {self.request.id}] Webhook delivery failed, but task succeeded"
+                f"[Task {self.request.id}] Webhook could not be queued, but task succeeded"
             )
 
         return result
@@ -215,30 +448,159 @@ def analyze_position_task(
             f"[Task {self.request.id}] Position analysis failed for {position} at {company}: {e}"
         )
 
-        # Send failure webhook
         failure_payload = {
             "jobId": metadata.get("jobId", job_id),
             "type": "position",
             "status": "failed",
             "error": str(e),
+            "errorType": error_type(e),
             "metadata": metadata,
             "celeryTaskId": self.request.id,
             "retries": self.request.retries,
         }
+        if isinstance(e, JobCancelled):
+            failure_payload["cancelled"] = True
 
-        call_webhook(callback_url, failure_payload)
+        if self.will_retry(e):
+            logger.info(f"[Task {self.request.id}] Transient failure, retrying")
+        else:
+            # Final failure: free the idempotency key for resubmission
+            get_idempotency_store().record_outcome(job_id, failure_payload)
+            dispatch_webhook(callback_url, failure_payload)
 
-        # Re-raise to trigger Celery retry
+        # Re-raise so Celery retries transient failures
         raise
 
 
 @celery_app.task(
     bind=True,
-    base=CallbackTask,
+    base=TenantFairTask,
+    name="llm_service.tasks.analyze_positions_batch_task",
+    max_retries=1,
+    default_retry_delay=60,
+    autoretry_for=RETRYABLE_ERRORS,
+    retry_backoff=True,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    time_limit=3000,  # Batches run far longer than a single analysis
+    soft_time_limit=2900,
+)
+def analyze_positions_batch_task(
+    self,
+    jobs: list,
+    resume_content: str,
+    resume_llm_context: str,
+    journal_entries: list,
+    callback_url: str,
+    metadata: dict,
+    job_id: str,
+):
+    """
+    Score one resume against many jobs and stream one webhook per job.
+
+    Args:
+        jobs: Dicts with company, position, jobUrl, jobDescription, metadata
+        resume_content: Resume content
+        resume_llm_context: Hidden resume context
+        journal_entries: List of journal entries
+        callback_url: URL to POST each job result to
+        metadata: Metadata to include in every webhook payload
+        job_id: Batch job ID for tracking
+
+    Returns:
+        dict: Batch summary with per-job fit scores
+    """
+    logger.info(
+        f"[Task {self.request.id}] Starting batch position analysis of "
+        f"{len(jobs)} jobs (job: {job_id})"
+    )
+
+    summary = analyze_positions_batch(
+        jobs,
+        resume_content,
+        resume_llm_context,
+        journal_entries,
+        callback_url,
+        metadata,
+        job_id,
+    )
+    summary["celeryTaskId"] = self.request.id
+    return summary
+
+
+@celery_app.task(
+    bind=True,
+    base=TenantFairTask,
+    name="llm_service.tasks.score_musashi_batch_task",
+    max_retries=3,
+    default_retry_delay=60,
+    autoretry_for=RETRYABLE_ERRORS,
+    retry_backoff=True,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    time_limit=MUSASHI_BATCH_SLICE_SECONDS + 1200,
+    soft_time_limit=MUSASHI_BATCH_SLICE_SECONDS + 1100,
+)
+def score_musashi_batch_task(
+    self,
+    job_id: str,
+    callback_url: str,
+    metadata: dict,
+    force_refresh: bool = False,
+):
+    """
+    Run one time slice of a bulk Musashi scoring job.
+
+    The job resumes from its results file, so retries and re-queued slices
+    never re-score a profile. Unfinished jobs re-queue themselves.
+
+    Args:
+        job_id: Batch job ID (input was written by the API)
+        callback_url: Optional URL for batched "musashi_batch" webhooks
+        metadata: Metadata to include in every webhook payload
+        force_refresh: Bypass the Musashi result cache
+
+    Returns:
+        dict: Job state after this slice
+    """
+    logger.info(f"[Task {self.request.id}] Running Musashi batch slice (job: {job_id})")
+
+    state = run_musashi_batch(
+        job_id,
+        callback_url,
+        metadata,
+        force_refresh=force_refresh,
+        time_budget=MUSASHI_BATCH_SLICE_SECONDS,
+    )
+    # Claimed as queued (like a resume) so a resume request cannot start a
+    # second worker while the next slice waits
+    if state["status"] == "paused" and checkpoints.claim(
+        job_id, ("paused",), status="queued"
+    ):
+        # The job follows its next slice; this task no longer finishes it
+        next_task_id = str(uuid.uuid4())
+        get_job_registry().requeue(job_id, task_id=next_task_id)
+        next_task = enqueue_for_tenant(
+            score_musashi_batch_task,
+            task_tenant(self.request),
+            job_id,
+            callback_url,
+            metadata,
+            force_refresh,
+            task_id=next_task_id,
+            headers=self._message_headers(),
+        )
+        logger.info(f"[Task {self.request.id}] Queued next slice: {next_task.id}")
+    return state
+
+
+@celery_app.task(
+    bind=True,
+    base=TenantFairTask,
     name="llm_service.tasks.calculate_musashi_task",
     max_retries=2,
     default_retry_delay=60,
-    autoretry_for=(Exception,),
+    autoretry_for=RETRYABLE_ERRORS,
     retry_backoff=True,
     retry_backoff_max=600,
     retry_jitter=True,
@@ -255,6 +617,7 @@ def calculate_musashi_task(
     callback_url: str,
     metadata: dict,
     job_id: str,
+    force_refresh: bool = False,
 ):
     """Calculate Musashi Index asynchronously and post result to webhook."""
     try:
@@ -270,6 +633,7 @@ def calculate_musashi_task(
             portfolio_items=portfolio_items,
             impact_highlights=impact_highlights,
             learning_highlights=learning_highlights,
+            force_refresh=force_refresh,
         )
 
         payload = {
@@ -281,10 +645,11 @@ def calculate_musashi_task(
             "celeryTaskId": self.request.id,
         }
 
-        webhook_success = call_webhook(callback_url, payload)
+        get_idempotency_store().record_outcome(job_id, payload)
+        webhook_success = dispatch_webhook(callback_url, payload)
         if not webhook_success:
             logger.warning(
-                f"[Task {self.request.id}] Musashi webhook delivery failed, but task succeeded"
+                f"[Task {self.request.id}] Musashi webhook could not be queued, but task succeeded"
             )
 
         return result
@@ -296,9 +661,19 @@ def calculate_musashi_task(
             "type": "musashi",
             "status": "failed",
             "error": str(e),
+            "errorType": error_type(e),
             "metadata": metadata,
             "celeryTaskId": self.request.id,
             "retries": self.request.retries,
         }
-        call_webhook(callback_url, failure_payload)
+        if isinstance(e, JobCancelled):
+            failure_payload["cancelled"] = True
+        if self.will_retry(e):
+            logger.info(f"[Task {self.request.id}] Transient failure, retrying")
+        else:
+            # Final failure: free the idempotency key for resubmission
+            get_idempotency_store().record_outcome(job_id, failure_payload)
+            dispatch_webhook(callback_url, failure_payload)
+
+        # Re-raise so Celery retries transient failures
         raise
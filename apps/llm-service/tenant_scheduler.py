@@ -0,0 +1,265 @@
+"""
+Tenant-fair scheduling for Celery jobs.
+
+All tenants share the research and analysis queues, so without a limit one
+tenant submitting a thousand analyses starves everyone else. Each task
+carries its tenant (X-Tenant-Id, else the calling service) in a Celery
+message header. Before running, the worker takes a token from that
+tenant's bucket in Redis, so the limit holds across the whole worker fleet.
+When the bucket is empty the task is re-queued with a countdown instead of
+occupying a worker slot.
+
+Buckets refill at LLM_TENANT_RATE tasks per minute times the tenant's
+weight (LLM_TENANT_WEIGHTS), with bursts of up to LLM_TENANT_BURST tasks.
+Throttling is work-conserving: a tenant over quota still runs while no
+other tenant has jobs waiting.
+
+Per-tenant queued/running/throttled counters are kept alongside the buckets
+and reported by /api/metrics. The counters are approximate: purged or lost
+messages are not subtracted.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from redis_store import get_redis, redis_key
+
+logger = logging.getLogger(__name__)
+
+# Celery message header carrying the tenant key
+TENANT_HEADER = "tenant_id"
+DEFAULT_TENANT = "default"
+
+LLM_TENANT_SCHEDULING = os.getenv("LLM_TENANT_SCHEDULING", "true").lower() == "true"
+# Tasks per minute per tenant at weight 1.0
+LLM_TENANT_RATE = float(os.getenv("LLM_TENANT_RATE", "30"))
+# Tasks a tenant may start back-to-back after being idle
+LLM_TENANT_BURST = float(os.getenv("LLM_TENANT_BURST", "10"))
+# Only throttle a tenant while other tenants have jobs waiting
+LLM_TENANT_WORK_CONSERVING = (
+    os.getenv("LLM_TENANT_WORK_CONSERVING", "true").lower() == "true"
+)
+
+
+def _load_weights() -> Dict[str, float]:
+    """Parse LLM_TENANT_WEIGHTS, e.g. '{"tenant-a": 2, "free-tier": 0.5}'."""
+    raw = os.getenv("LLM_TENANT_WEIGHTS", "{}")
+    try:
+        parsed = json.loads(raw)
+        return {str(tenant): float(weight) for tenant, weight in parsed.items()}
+    except (ValueError, TypeError, AttributeError) as exc:
+        logger.error("Invalid LLM_TENANT_WEIGHTS (%s) — using equal weights", exc)
+        return {}
+
+
+LLM_TENANT_WEIGHTS = _load_weights()
+
+
+def tenant_key(caller: Optional[Dict[str, Any]]) -> str:
+    """Tenant to schedule a request under: X-Tenant-Id, else the API key's service."""
+    caller = caller or {}
+    return caller.get("tenant_id") or caller.get("service_name") or DEFAULT_TENANT
+
+
+def task_tenant(request: Any) -> str:
+    """Tenant of the Celery task being executed (from its message headers)."""
+    tenant = getattr(request, TENANT_HEADER, None)
+    if not tenant:
+        tenant = (getattr(request, "headers", None) or {}).get(TENANT_HEADER)
+    return tenant or DEFAULT_TENANT
+
+
+class TenantScheduler:
+    """Fleet-wide per-tenant token buckets and queue-depth counters.
+
+    Uses Redis when reachable; otherwise state is per process, which still
+    keeps one tenant from monopolizing a single worker.
+    """
+
+    # Refill and take one token; returns seconds until a token is available
+    # (0 when one was taken)
+    _ACQUIRE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+return tostring(wait)
+"""
+
+    def __init__(
+        self,
+        rate_per_minute: float = LLM_TENANT_RATE,
+        burst: float = LLM_TENANT_BURST,
+        weights: Optional[Dict[str, float]] = None,
+        work_conserving: bool = LLM_TENANT_WORK_CONSERVING,
+    ):
+        self.rate_per_minute = rate_per_minute
+        self.burst = max(1.0, burst)
+        self.weights = LLM_TENANT_WEIGHTS if weights is None else weights
+        self.work_conserving = work_conserving
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, tuple] = {}
+        self._counters: Dict[str, Counter] = {
+            "queued": Counter(),
+            "running": Counter(),
+            "throttled": Counter(),
+        }
+
+    def weight(self, tenant: str) -> float:
+        return self.weights.get(tenant, 1.0)
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+
+    def acquire(self, tenant: str) -> float:
+        """Take a token for one task of *tenant*.
+
+        Returns:
+            0 if the task may run now, else seconds to defer it
+        """
+        rate = self.rate_per_minute * self.weight(tenant) / 60.0
+        if rate <= 0:
+            return 0.0
+
+        wait = self._take_token(tenant, rate)
+        if wait and self.work_conserving and not self._others_waiting(tenant):
+            # Nobody else is waiting — spare capacity goes to whoever asks
+            wait = 0.0
+        if wait:
+            self._incr("throttled", tenant)
+        return wait
+
+    def _take_token(self, tenant: str, rate: float) -> float:
+        now = time.time()
+        client = get_redis()
+        if client is not None:
+            try:
+                return float(
+                    client.eval(
+                        self._ACQUIRE_SCRIPT,
+                        1,
+                        redis_key("tenant", "bucket", tenant),
+                        rate,
+                        self.burst,
+                        now,
+                    )
+                )
+            except Exception as exc:
+                logger.warning("Redis tenant bucket failed (%s): %s", tenant, exc)
+
+        with self._lock:
+            tokens, ts = self._buckets.get(tenant, (self.burst, now))
+            tokens = min(self.burst, tokens + max(0.0, now - ts) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[tenant] = (tokens, now)
+            return wait
+
+    def _others_waiting(self, tenant: str) -> bool:
+        queued = self._read("queued")
+        return any(count > 0 for other, count in queued.items() if other != tenant)
+
+    # ------------------------------------------------------------------
+    # Queue-depth counters
+    # ------------------------------------------------------------------
+
+    def record_enqueued(self, tenant: str) -> None:
+        self._incr("queued", tenant)
+
+    def record_started(self, tenant: str) -> None:
+        self._incr("queued", tenant, -1)
+        self._incr("running", tenant)
+
+    def record_finished(self, tenant: str) -> None:
+        self._incr("running", tenant, -1)
+
+    def _incr(self, counter: str, tenant: str, amount: int = 1) -> None:
+        client = get_redis()
+        if client is not None:
+            try:
+                key = redis_key("tenant", counter)
+                if client.hincrby(key, tenant, amount) < 0:
+                    client.hset(key, tenant, 0)
+                return
+            except Exception as exc:
+                logger.warning("Redis tenant counter failed (%s): %s", tenant, exc)
+
+        with self._lock:
+            values = self._counters[counter]
+            values[tenant] = max(0, values[tenant] + amount)
+
+    def _read(self, counter: str) -> Dict[str, int]:
+        client = get_redis()
+        if client is not None:
+            try:
+                raw = client.hgetall(redis_key("tenant", counter))
+                return {tenant: int(count) for tenant, count in raw.items()}
+            except Exception as exc:
+                logger.warning("Redis tenant counter read failed: %s", exc)
+        with self._lock:
+            return dict(self._counters[counter])
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-tenant queued/running/throttled counts and effective rate."""
+        counters = {name: self._read(name) for name in self._counters}
+        tenants = set().union(*(values.keys() for values in counters.values()))
+        return {
+            tenant: {
+                "queued": counters["queued"].get(tenant, 0),
+                "running": counters["running"].get(tenant, 0),
+                "throttled": counters["throttled"].get(tenant, 0),
+                "weight": self.weight(tenant),
+                "ratePerMinute": self.rate_per_minute * self.weight(tenant),
+            }
+            for tenant in sorted(tenants)
+        }
+
+
+def defer_seconds(wait: float) -> int:
+    """Countdown for a throttled task: the bucket wait, rounded up, at least 1s."""
+    return max(1, math.ceil(wait))
+
+
+_scheduler: Optional[TenantScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_tenant_scheduler() -> TenantScheduler:
+    """Shared tenant scheduler for this process."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = TenantScheduler()
+    return _scheduler
+
+
+def enqueue_for_tenant(task: Any, tenant: str, *args: Any, **options: Any) -> Any:
+    """apply_async() *task* with the tenant header and count it as queued."""
+    headers = dict(options.pop("headers", None) or {})
+    headers[TENANT_HEADER] = tenant
+    result = task.apply_async(args=args, headers=headers, **options)
+    if LLM_TENANT_SCHEDULING:
+        get_tenant_scheduler().record_enqueued(tenant)
+    return result
@@ -0,0 +1,78 @@
+import json
+import os
+
+from api_key_auth import APIKeyManager
+
+
+def test_keys_tenants_and_cached_decisions(monkeypatch):
+    monkeypatch.setenv("LLM_API_KEYS", json.dumps({"api": "key-a", "admin": "key-b"}))
+    monkeypatch.setenv(
+        "LLM_API_KEY_TENANTS", json.dumps({"api": ["t1", "t2"], "admin": "*", "bad": 3})
+    )
+    manager = APIKeyManager(keys_file="", reload_seconds=3600)
+
+    assert manager.get_service_count() == 2
+    assert manager.validate_request("key-a", "t1") == (True, "api", None)
+    assert manager.validate_request("key-a", "t3") == (
+        False,
+        "api",
+        "tenant_not_allowed",
+    )
+    assert manager.validate_request("key-a", None) == (
+        False,
+        "api",
+        "tenant_not_allowed",
+    )
+    assert manager.validate_request("key-b", "anyone") == (True, "admin", None)
+    assert manager.validate_request("key-c", "t1") == (False, None, "invalid_api_key")
+    assert manager.validate_request(None, "t1") == (False, None, "invalid_api_key")
+    assert manager.validate_tenant("bad", "t1") is False
+
+    hits = manager._decisions.hits
+    assert manager.validate_request("key-a", "t1") == (True, "api", None)
+    assert manager._decisions.hits == hits + 1
+    # The loaded state never keeps the plaintext key
+    assert "key-a" not in repr(manager._state)
+    assert manager.key_fingerprint("key-a") != "key-a"
+
+
+def test_keys_file_hot_reload(tmp_path):
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps({"keys": {"api": "old"}, "tenants": {"api": ["t1"]}}))
+    manager = APIKeyManager(keys_file=str(path), reload_seconds=0)
+    assert manager.validate_request("old", "t1") == (True, "api", None)
+
+    path.write_text(json.dumps({"api": "new-key"}))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    # Rotated key works and the cached decision for the old one is gone
+    assert manager.validate_request("old", "t1") == (False, None, "invalid_api_key")
+    assert manager.validate_request("new-key", "other") == (True, "api", None)
+    assert manager.reload() is False
+
+
+def test_no_keys_allows_requests(monkeypatch):
+    monkeypatch.setenv("LLM_API_KEYS", "{}")
+    monkeypatch.delenv("LLM_API_KEY_TENANTS", raising=False)
+    manager = APIKeyManager(keys_file="")
+    assert manager.validate_request(None, None) == (True, "unknown", None)
+
+
+def test_failed_reload_keeps_the_loaded_keys(tmp_path):
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps({"api": "good-key"}))
+    manager = APIKeyManager(keys_file=str(path), reload_seconds=0)
+    assert manager.validate_request("good-key", None) == (True, "api", None)
+
+    # Half-written file during rotation
+    path.write_text('{"api": "new-')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert manager.reload() is False
+    assert manager.validate_request("good-key", None) == (True, "api", None)
+    assert manager.validate_request("unknown", None) == (False, None, "invalid_api_key")
+
+    path.unlink()
+    assert manager.reload() is False
+    assert manager.validate_request("unknown", None) == (False, None, "invalid_api_key")
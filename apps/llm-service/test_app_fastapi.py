@@ -1,4 +1,7 @@
 import os
+import subprocess
+import sys
+import threading
 
 import pytest
 
@@ -12,6 +15,8 @@ os.environ.setdefault("LLM_API_KEY_TENANTS", '{"api-service":["tenant-a"]}')
 from fastapi.testclient import TestClient
 
 import app_fastapi
+import rate_limiter
+from checkpoint_store import CheckpointStore
 
 
 @pytest.fixture
@@ -101,3 +106,76 @@ def test_chat_rejects_missing_user_info(client):
     )
 
     assert response.status_code == 400
+
+
+def test_chat_over_rate_limit_gets_retry_after(client, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "get_redis", lambda: None)
+    limiter = rate_limiter.RateLimiter(
+        budgets={"default": rate_limiter.Budget(rate_per_minute=6, burst=1, inflight=4)}
+    )
+    monkeypatch.setattr(app_fastapi, "get_rate_limiter", lambda: limiter)
+    headers = {"X-API-Key": "test-key", "X-Tenant-Id": "tenant-a"}
+
+    assert client.post("/api/chat", headers=headers, json={}).status_code == 422
+    response = client.post("/api/chat", headers=headers, json={})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "10"
+    # The in-flight slot of the first request was released
+    assert limiter._leases and not any(limiter._leases.values())
+
+
+def test_musashi_batches_are_private_and_resume_only_when_stopped(
+    client, monkeypatch, tmp_path
+):
+    store = CheckpointStore("musashi_batch", directory=str(tmp_path), use_redis=False)
+    monkeypatch.setattr(app_fastapi.musashi_batch, "checkpoints", store)
+    enqueued = []
+    monkeypatch.setattr(app_fastapi, "_enqueue_musashi_batch", enqueued.append)
+    headers = {"X-API-Key": "test-key", "X-Tenant-Id": "tenant-a"}
+    for job_id, tenant, status in [
+        ("theirs", "tenant-b", "paused"),
+        ("running", "tenant-a", "running"),
+        ("paused", "tenant-a", "paused"),
+    ]:
+        store.save(job_id, {"jobId": job_id, "tenant": tenant, "status": status})
+
+    base = "/api/musashi-index/batch"
+    assert client.get(f"{base}/theirs", headers=headers).status_code == 404
+    assert client.get(f"{base}/theirs/results", headers=headers).status_code == 404
+    assert client.post(f"{base}/theirs/resume", headers=headers).status_code == 404
+    assert client.post(f"{base}/running/resume", headers=headers).status_code == 409
+
+    response = client.post(f"{base}/paused/resume", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "queued"
+    # A second resume finds the job queued and does not start another worker
+    assert client.post(f"{base}/paused/resume", headers=headers).status_code == 409
+    assert [state["jobId"] for state in enqueued] == ["paused"]
+
+
+def test_import_defers_heavy_dependencies():
+    # Fresh interpreter: other tests in this session import these modules
+    check = (
+        "import sys, app_fastapi; "
+        "print(sorted(m for m in ('company_research_agent', 'langchain_core', "
+        "'tasks', 'celery', 'flask', 'llm_guard') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", check],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_ready_after_background_warm_up(monkeypatch):
+    monkeypatch.setattr(app_fastapi, "_warmup_done", threading.Event())
+    with TestClient(app_fastapi.app) as client:
+        assert app_fastapi._warmup_done.wait(timeout=30)
+        response = client.get("/ready")
+
+    assert response.status_code == 200
+    assert response.json()["components"]["guard"] in ("ready", "fallback", "disabled")
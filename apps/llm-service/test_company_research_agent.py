@@ -0,0 +1,173 @@
+import json
+
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("googlesearch")
+pytest.importorskip("langchain_core")
+
+import company_research_agent
+from checkpoint_store import CheckpointStore
+from company_research_agent import CompanyResearchAgent
+from job_control import controlled
+from llm_errors import BackendUnavailable
+
+
+class FakeSearch:
+    def __init__(self):
+        self.queries = []
+
+    def search(self, query, num_results=3, stages=None):
+        self.queries.append(query)
+        return [
+            {"title": "example.com", "url": "https://example.com", "snippet": query}
+        ]
+
+
+class FieldLLM:
+    """Answers every requested field on the first extraction."""
+
+    def __init__(self, values):
+        self.values = values
+        self.prompts = []
+
+    def generate(self, prompt, temperature=0.7, max_tokens=500):
+        self.prompts.append(prompt)
+        return json.dumps(self.values)
+
+
+@pytest.fixture(autouse=True)
+def incremental_mode(monkeypatch):
+    monkeypatch.setattr(company_research_agent, "RESEARCH_MODE", "incremental")
+    monkeypatch.setattr(company_research_agent, "RESEARCH_BATCH_SIZE", 2)
+
+
+def _agent(llm):
+    agent = CompanyResearchAgent(llm)
+    agent.search_tool_impl = FakeSearch()
+    return agent
+
+
+def test_incremental_stops_when_coverage_reached(monkeypatch):
+    monkeypatch.setattr(company_research_agent, "RESEARCH_COVERAGE_THRESHOLD", 0.8)
+    values = {field: "value" for field in company_research_agent.COMPANY_FIELD_SPECS}
+    values["investors"] = ["Fund A"]
+    values["benefits"] = ["Remote"]
+    agent = _agent(FieldLLM(values))
+
+    info, stats = agent.research_company_with_stats("Acme")
+
+    assert info["companyName"] == "Acme"
+    assert info["source"] == "langchain_research"
+    assert stats["stopReason"] == "coverage"
+    assert stats["queriesRun"] == 2
+    assert stats["queriesSaved"] == len(company_research_agent.RESEARCH_QUERIES) - 2
+    assert stats["coverage"] == 1.0
+
+
+def test_incremental_only_queries_missing_fields(monkeypatch):
+    monkeypatch.setattr(company_research_agent, "RESEARCH_COVERAGE_THRESHOLD", 1.0)
+    llm = FieldLLM({"website": "https://acme.test", "description": "Acme makes things"})
+    agent = _agent(llm)
+
+    info, stats = agent.research_company_with_stats("Acme")
+
+    assert info["website"] == "https://acme.test"
+    assert stats["stopReason"] == "exhausted"
+    assert stats["queriesRun"] == len(company_research_agent.RESEARCH_QUERIES)
+    # Fields filled by the first batch are not requested again
+    assert '"website"' not in llm.prompts[-1]
+    assert '"githubUrl"' in llm.prompts[-1]
+
+
+def test_incremental_respects_time_budget(monkeypatch):
+    monkeypatch.setattr(company_research_agent, "RESEARCH_TIME_BUDGET", 0)
+    agent = _agent(FieldLLM({}))
+
+    info, stats = agent.research_company_with_stats("Acme")
+
+    assert stats["stopReason"] == "time_budget"
+    assert stats["queriesRun"] == 0
+    assert info["source"] == "langchain_research_failed"
+
+
+class FlakyLLM(FieldLLM):
+    """Backend that is down for the first *outages* calls."""
+
+    def __init__(self, values, outages):
+        super().__init__(values)
+        self.outages = outages
+
+    def generate(self, prompt, temperature=0.7, max_tokens=500):
+        if self.outages:
+            self.outages -= 1
+            raise BackendUnavailable("connection refused")
+        return super().generate(prompt, temperature, max_tokens)
+
+
+@pytest.fixture
+def stages_store(monkeypatch, tmp_path):
+    store = CheckpointStore("research", directory=str(tmp_path), use_redis=False)
+    monkeypatch.setattr(company_research_agent, "research_checkpoints", store)
+    return store
+
+
+def test_retry_reuses_checkpointed_urls_and_snippets(monkeypatch, stages_store):
+    searched, fetched = [], []
+    monkeypatch.setattr(
+        company_research_agent,
+        "google_search",
+        lambda query, **kwargs: searched.append(query)
+        or [f"https://{len(searched)}.test"],
+    )
+    monkeypatch.setattr(
+        company_research_agent.GoogleSearchTool,
+        "_extract_snippet",
+        lambda self, url: fetched.append(url) or f"About {url}",
+    )
+    monkeypatch.setattr(company_research_agent, "RESEARCH_COVERAGE_THRESHOLD", 0.05)
+    agent = CompanyResearchAgent(
+        FlakyLLM({"website": "https://acme.test"}, outages=1),
+        rate_limiter=company_research_agent.SearchRateLimiter(min_interval=0),
+    )
+
+    with controlled("job-1"):
+        # The backend outage is not swallowed, so the task can retry it
+        with pytest.raises(BackendUnavailable):
+            agent.research_company_with_stats("Acme")
+        attempts = (list(searched), list(fetched))
+
+        info, _ = agent.research_company_with_stats("Acme")
+
+    assert info["website"] == "https://acme.test"
+    assert (searched, fetched) == attempts
+    # Finished research leaves no checkpoint behind
+    assert stages_store.load("job-1:acme") is None
+
+
+def test_retry_resumes_after_last_extraction_round(monkeypatch, stages_store):
+    monkeypatch.setattr(company_research_agent, "RESEARCH_COVERAGE_THRESHOLD", 1.0)
+    llm = FieldLLM({"website": "https://acme.test"})
+    agent = _agent(llm)
+    original = llm.generate
+    outage = iter([False, True])
+
+    def fail_second_round(prompt, temperature=0.7, max_tokens=500):
+        if next(outage, False):
+            raise BackendUnavailable("connection reset")
+        return original(prompt, temperature, max_tokens)
+
+    llm.generate = fail_second_round
+    with controlled("job-1"):
+        with pytest.raises(BackendUnavailable):
+            agent.research_company_with_stats("Acme")
+        saved = stages_store.load("job-1:acme")["extraction"]
+        assert saved["extractions"] == 1
+        assert saved["companyInfo"]["website"] == "https://acme.test"
+
+        info, stats = agent.research_company_with_stats("Acme")
+
+    assert info["website"] == "https://acme.test"
+    assert stats["queriesRun"] == len(company_research_agent.RESEARCH_QUERIES)
+    # Only the failed round's queries were searched again
+    assert len(agent.search_tool_impl.queries) == stats["queriesRun"] + 2
@@ -0,0 +1,111 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import pytest
+
+from guard_executor import GuardExecutor
+
+
+class BatchScanner:
+    """Input scanner with a batch entry point; blocks until released."""
+
+    def __init__(self):
+        self.batches = []
+        self.release = threading.Event()
+
+    def scan_batch(self, prompts):
+        self.release.wait(timeout=5)
+        self.batches.append(list(prompts))
+        return [(prompt.upper(), "bad" not in prompt, 0.0) for prompt in prompts]
+
+
+class Redactor:
+    """Output scanner without a batch entry point."""
+
+    def scan(self, prompt, output):
+        return output.replace("secret", "[REDACTED]"), True, 0.0
+
+
+class Broken:
+    def scan(self, prompt):
+        if prompt != "ok":
+            raise RuntimeError("model crashed")
+        return prompt, True, 0.0
+
+
+class BrokenBatch(Broken):
+    """Batch entry point that fails on any bad item, as a real batch would."""
+
+    def scan_batch(self, prompts):
+        return [self.scan(prompt) for prompt in prompts]
+
+
+@pytest.fixture
+def make_executor():
+    executors = []
+
+    def make(*args, **kwargs):
+        executor = GuardExecutor(*args, **kwargs)
+        executors.append(executor)
+        return executor
+
+    yield make
+    for executor in executors:
+        executor.shutdown()
+
+
+def test_concurrent_scans_share_one_batch(make_executor):
+    scanner = BatchScanner()
+    executor = make_executor([scanner], [], batch_size=8, batch_wait_ms=200)
+
+    futures = [executor.submit("prompt", text) for text in ("a", "bad b", "c")]
+    scanner.release.set()
+    verdicts = [future.result(timeout=5) for future in futures]
+
+    assert verdicts == [("A", True), ("BAD B", False), ("C", True)]
+    assert scanner.batches == [["a", "bad b", "c"]]
+    stats = executor.stats()
+    assert stats["batches"] == 1
+    assert stats["avgBatchSize"] == 3
+    assert stats["scanners"]["prompt.BatchScanner"]["calls"] == 1
+    assert stats["scanners"]["prompt.BatchScanner"]["items"] == 3
+
+
+def test_output_scanners_chain_and_errors_fail_only_their_item(make_executor):
+    executor = make_executor([Broken()], [Redactor(), Redactor()], batch_wait_ms=1)
+
+    assert executor.scan("output", "the secret", "question") == ("the [REDACTED]", True)
+    assert executor.stats()["scanners"]["output.Redactor"]["calls"] == 2
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        failures = list(pool.map(lambda _: executor.submit("prompt", "x"), range(2)))
+    for future in failures:
+        with pytest.raises(RuntimeError, match="model crashed"):
+            future.result(timeout=5)
+    assert executor.stats()["scanners"]["prompt.Broken"]["errors"] >= 1
+
+    # One bad item in a batch does not fail the others
+    executor = make_executor([BrokenBatch()], [], batch_size=8, batch_wait_ms=200)
+    ok, bad = executor.submit("prompt", "ok"), executor.submit("prompt", "boom")
+    assert ok.result(timeout=5) == ("ok", True)
+    with pytest.raises(RuntimeError, match="model crashed"):
+        bad.result(timeout=5)
+
+
+def test_without_scan_batch_workers_take_one_request_at_a_time(make_executor):
+    executor = make_executor([Broken()], [Redactor()], batch_size=8, batch_wait_ms=200)
+    assert (executor.batch_size, executor.batch_wait) == (1, 0.0)
+
+
+def test_timed_out_scans_are_skipped(make_executor):
+    scanner = BatchScanner()
+    executor = make_executor([scanner], [], workers=1, batch_size=1)
+
+    first = executor.submit("prompt", "first")
+    with pytest.raises(FutureTimeoutError):
+        executor.scan("prompt", "abandoned", timeout=0.05)
+    scanner.release.set()
+
+    assert first.result(timeout=5) == ("FIRST", True)
+    assert executor.submit("prompt", "next").result(timeout=5) == ("NEXT", True)
+    assert scanner.batches == [["first"], ["next"]]
@@ -0,0 +1,63 @@
+import pytest
+
+import idempotency
+from idempotency import IdempotencyStore, idempotency_key
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(idempotency, "get_redis", lambda: None)
+    return IdempotencyStore()
+
+
+def test_key_prefers_header_over_metadata_job_id():
+    assert idempotency_key("abc", {"jobId": "job-1"}) == "abc"
+    assert idempotency_key(None, {"jobId": "job-1"}) == "job-1"
+    assert idempotency_key("  ", {}) is None
+
+
+def test_resubmission_attaches_then_returns_result(store):
+    assert store.claim("company", "tenant-a", "job-1", "llm_job_1") is None
+
+    in_flight = store.claim("company", "tenant-a", "job-1", "llm_job_2")
+    assert in_flight["jobId"] == "llm_job_1"
+    assert in_flight["status"] == "processing"
+    # Same key from another tenant is a different job
+    assert store.claim("company", "tenant-b", "job-1", "llm_job_3") is None
+
+    store.record_outcome("llm_job_1", {"status": "completed", "data": {"name": "Acme"}})
+    done = store.claim("company", "tenant-a", "job-1", "llm_job_4")
+    assert done["status"] == "completed"
+    assert done["result"] == {"name": "Acme"}
+
+
+def test_failed_job_can_be_resubmitted(store):
+    store.claim("musashi", "t", "job-1", "llm_job_1")
+    store.record_outcome("llm_job_1", {"status": "failed", "error": "boom"})
+
+    assert store.claim("musashi", "t", "job-1", "llm_job_2") is None
+    # A late outcome from the superseded job does not overwrite the new claim
+    store.record_outcome("llm_job_1", {"status": "completed", "data": {}})
+    assert store.claim("musashi", "t", "job-1", "llm_job_3")["jobId"] == "llm_job_2"
+
+
+def test_redis_claim_is_a_single_atomic_script(monkeypatch):
+    class ScriptOnlyRedis:
+        def __init__(self, reply):
+            self.reply = reply
+            self.calls = []
+
+        def eval(self, script, numkeys, *args):
+            self.calls.append((numkeys, args))
+            return self.reply
+
+    client = ScriptOnlyRedis(None)
+    monkeypatch.setattr(idempotency, "get_redis", lambda: client)
+    store = IdempotencyStore()
+
+    assert store.claim("company", "t", "job-1", "llm_job_1") is None
+    numkeys, args = client.calls[0]
+    assert numkeys == 2 and args[1].endswith("llm_job_1")
+
+    client.reply = '{"jobId": "llm_job_1", "status": "processing"}'
+    assert store.claim("company", "t", "job-1", "llm_job_2")["jobId"] == "llm_job_1"
@@ -0,0 +1,66 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import job_control
+import job_registry
+from job_control import JobCancelled, check, controlled, propagate, timeout
+from job_registry import JobRegistry, checkpoint, run_tracked
+from result_cache import LRUCache
+
+
+@pytest.fixture(autouse=True)
+def no_redis(monkeypatch):
+    monkeypatch.setattr(job_control, "get_redis", lambda: None)
+    monkeypatch.setattr(job_control, "_local_flags", LRUCache())
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(job_registry, "get_redis", lambda: None)
+    registry = JobRegistry()
+    monkeypatch.setattr(job_registry, "_registry", registry)
+    return registry
+
+
+def test_cancel_stops_running_job_at_next_checkpoint(registry):
+    registry.register("job-1", "company")
+
+    def research():
+        checkpoint("searching")
+        registry.cancel("job-1")
+        assert registry.status("job-1")["cancelRequested"] is True
+        # Pool threads run under the job's control too
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pool.submit(propagate(checkpoint), "fetching").result()
+
+    assert run_tracked("job-1", research) is None
+    job = registry.status("job-1")
+    assert job["status"] == "cancelled"
+    assert job["etaSeconds"] == 0
+
+
+def test_cancel_queued_job_finishes_it_immediately(registry):
+    registry.register("job-1", "position", queue="analysis")
+    registry.register("job-2", "position", queue="analysis")
+
+    assert registry.cancel("job-1")["status"] == "cancelled"
+    assert registry.status("job-2")["queuePosition"] == 0
+    # A worker that still picks it up stops before doing any work
+    with pytest.raises(JobCancelled):
+        with registry.tracking("job-1"):
+            check()
+
+
+def test_deadline_caps_http_timeouts_then_aborts():
+    with controlled("job-1", deadline=time.time() + 5):
+        assert timeout(30) <= 5
+        assert timeout(2) == 2
+    # Outside a job nothing is capped or checked
+    assert timeout(30) == 30
+
+    with controlled("job-1", deadline=time.time() - 1):
+        with pytest.raises(JobCancelled) as excinfo:
+            timeout(30)
+    assert excinfo.value.reason == "deadline"
@@ -0,0 +1,81 @@
+import pytest
+
+import job_control
+import job_registry
+from job_registry import JobRegistry, report_stage
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(job_control, "get_redis", lambda: None)
+    monkeypatch.setattr(job_registry, "get_redis", lambda: None)
+    registry = JobRegistry()
+    monkeypatch.setattr(job_registry, "_registry", registry)
+    return registry
+
+
+def test_lifecycle_reports_position_stage_and_result(registry):
+    registry.register(
+        "job-1", "company", task_id="task-1", queue="research", tenant="t"
+    )
+    registry.register(
+        "job-2", "company", task_id="task-2", queue="research", tenant="t"
+    )
+    assert registry.job_for_task("task-2") == "job-2"
+    assert registry.status("job-2")["queuePosition"] == 1
+
+    with registry.tracking("job-1", "task-1"):
+        report_stage("searching", queries=2)
+        running = registry.status("job-1")
+        assert running["status"] == "running"
+        assert running["stage"] == "searching"
+        assert running["stageDetail"] == {"queries": 2}
+    assert registry.status("job-2")["queuePosition"] == 0
+
+    registry.mark_finished(
+        "job-1", "completed", result={"name": "Acme"}, task_id="task-1"
+    )
+    assert registry.result("job-1")["result"] == {"name": "Acme"}
+    assert "result" not in registry.status("job-1")
+    assert registry.runtime_stats("company")["samples"] == 1
+    # No job in context: stage reports are ignored
+    report_stage("fetching")
+
+
+def test_eta_uses_rolling_runtimes_and_queue_concurrency(registry, monkeypatch):
+    monkeypatch.setitem(job_registry.QUEUE_CONCURRENCY, "analysis", 2)
+    for seconds in (10, 20, 30):
+        registry._record_runtime("position", seconds)
+    assert registry.runtime_stats("position")["p50"] == 20
+
+    for index in range(5):
+        registry.register(f"job-{index}", "position", queue="analysis")
+    # Four jobs ahead on two workers: two waves, then its own run
+    assert registry.status("job-4")["etaSeconds"] == 60
+    assert registry.status("job-0")["etaSeconds"] == 20
+
+
+def test_superseded_task_does_not_finish_job(registry):
+    registry.register("batch-1", "musashi_batch", task_id="slice-1", queue="analysis")
+    registry.mark_started("batch-1", "slice-1")
+    registry.requeue("batch-1", task_id="slice-2")
+
+    registry.mark_finished("batch-1", "completed", result={}, task_id="slice-1")
+    assert registry.status("batch-1")["status"] == "queued"
+    assert registry.job_for_task("slice-2") == "batch-1"
+
+
+def test_run_budget_starts_counting_when_the_job_starts(registry, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(job_registry.time, "time", lambda: clock[0])
+    registry.register(
+        "job-1", "company", task_id="task-1", queue="research", run_budget=60
+    )
+
+    # An hour in the queue does not use up the budget
+    clock[0] += 3600
+    assert registry.mark_started("job-1", "task-1")["deadline"] == clock[0] + 60
+    # A retry keeps the deadline of the first start
+    registry.requeue("job-1", status="retrying")
+    clock[0] += 30
+    assert registry.mark_started("job-1", "task-1")["deadline"] == 4660.0
@@ -0,0 +1,93 @@
+from concurrent.futures import Future
+
+import pytest
+
+import llm_guard_service
+from llm_guard_service import (
+    guard_stats,
+    protect_output,
+    protect_prompt,
+    protect_segments,
+    segmented_prompt,
+)
+
+
+class CountingExecutor:
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, kind, text, prompt_context=""):
+        self.calls.append((kind, text, prompt_context))
+        future = Future()
+        future.set_result((text.replace("555-0100", "[PHONE]"), "toxic" not in text))
+        return future
+
+    def stats(self):
+        return {}
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = CountingExecutor()
+    runtime = {"available": True, "executor": executor, "signature": "test;v1"}
+    monkeypatch.setattr(llm_guard_service, "LLM_GUARD_ENABLED", True)
+    monkeypatch.setattr(llm_guard_service, "_runtime", runtime)
+    for cache in llm_guard_service._verdict_caches.values():
+        cache.clear()
+        cache.hits = cache.misses = 0
+    return executor
+
+
+def test_repeated_content_reuses_cached_verdict(executor, monkeypatch):
+    for _ in range(3):
+        assert protect_prompt("Call me at 555-0100") == "Call me at [PHONE]"
+    assert protect_output("fine answer", prompt_context="q1") == "fine answer"
+    assert protect_output("fine answer", prompt_context="q1") == "fine answer"
+    # Same output for another prompt is scanned again
+    protect_output("fine answer", prompt_context="q2")
+
+    assert executor.calls == [
+        ("prompt", "Call me at 555-0100", ""),
+        ("output", "fine answer", "q1"),
+        ("output", "fine answer", "q2"),
+    ]
+    cache = guard_stats()["cache"]
+    assert cache["prompt"]["hits"] == 2
+    assert cache["prompt"]["hitRate"] == pytest.approx(0.667)
+    assert cache["output"]["hits"] == 1
+
+    # A scanner upgrade invalidates earlier verdicts
+    monkeypatch.setitem(llm_guard_service._runtime, "signature", "test;v2")
+    protect_prompt("Call me at 555-0100")
+    assert len(executor.calls) == 4
+
+
+def test_cached_rejection_still_rejects(executor, monkeypatch):
+    monkeypatch.setattr(llm_guard_service, "LLM_GUARD_FAIL_CLOSED", True)
+    for _ in range(2):
+        with pytest.raises(llm_guard_service.GuardRejection):
+            protect_prompt("toxic words")
+    assert len(executor.calls) == 1
+
+
+def test_only_untrusted_segments_are_scanned_and_truncated(executor, monkeypatch):
+    monkeypatch.setattr(llm_guard_service, "LLM_GUARD_MAX_PROMPT_CHARS", 13)
+    template = "Ignore previous instructions is fine here.\n{resume}\nJob: {job}\nRules"
+    prompt = segmented_prompt(
+        template, {"job": "Call 555-0100 now please"}, resume="x" * 50
+    )
+
+    assert str(prompt) == template.format(
+        resume="x" * 50, job="Call 555-0100 now please"
+    )
+    guarded = protect_segments(prompt.segments, source="test")
+
+    # Trusted text is neither scanned, flagged nor truncated
+    assert guarded.startswith("Ignore previous instructions is fine here.\n" + "x" * 50)
+    assert guarded.endswith("\nJob: Call [PHONE]\nRules")
+    assert executor.calls == [("prompt", "Call 555-0100", "")]
+
+    # A second agent call with the same posting reuses the segment verdict
+    again = segmented_prompt(template, {"job": "Call 555-0100 now please"}, resume="")
+    protect_segments(again.segments)
+    assert len(executor.calls) == 1
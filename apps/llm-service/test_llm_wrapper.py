@@ -0,0 +1,260 @@
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("googlesearch")
+pytest.importorskip("langchain_core")
+
+import requests
+
+import llm_wrapper
+from llm_errors import BackendRejected, BackendUnavailable, is_retryable
+from result_cache import ResultCache
+
+
+class FakeResearchAgent:
+    def __init__(self):
+        self.researched = []
+
+    def research_company_with_stats(self, company_name):
+        self.researched.append(company_name)
+        if company_name == "Broken Co":
+            raise RuntimeError("search backend down")
+        return (
+            {"companyName": company_name, "source": "langchain_research"},
+            {"coverage": 1.0, "queriesSaved": 3},
+        )
+
+
+@pytest.fixture
+def batch_env(monkeypatch):
+    delivered = []
+    agent = FakeResearchAgent()
+    monkeypatch.setattr(
+        llm_wrapper,
+        "company_research_cache",
+        ResultCache("company-test", use_redis=False),
+    )
+    monkeypatch.setattr(llm_wrapper, "get_research_agent", lambda: agent)
+    monkeypatch.setattr(
+        llm_wrapper,
+        "dispatch_webhook",
+        lambda url, payload: delivered.append(payload) or True,
+    )
+    return agent, delivered
+
+
+def test_batch_dedupes_and_uses_cache(batch_env):
+    agent, delivered = batch_env
+    llm_wrapper.cache_company_research(
+        "Cached Inc", {"companyName": "Cached Inc", "source": "langchain_research"}
+    )
+
+    summary = llm_wrapper.research_companies_batch(
+        ["Acme", " acme ", "Cached  Inc", "Globex"],
+        "http://callback",
+        {"userId": "u1"},
+        "llm_batch_1",
+    )
+
+    assert sorted(agent.researched) == ["Acme", "Globex"]
+    assert summary["unique"] == 3
+    assert summary["cached"] == 1
+    assert summary["completed"] == 3
+    assert len(delivered) == 3
+    assert all(p["type"] == "company" for p in delivered)
+    assert all(p["metadata"]["batchJobId"] == "llm_batch_1" for p in delivered)
+    assert {p["metadata"]["userId"] for p in delivered} == {"u1"}
+
+
+def test_batch_reports_per_company_failures(batch_env):
+    agent, delivered = batch_env
+
+    summary = llm_wrapper.research_companies_batch(
+        ["Broken Co", "Acme"], "http://callback", {}, "llm_batch_2"
+    )
+
+    assert summary["failed"] == 1
+    assert summary["companies"] == {"Broken Co": "failed", "Acme": "completed"}
+    failed = [p for p in delivered if p["status"] == "failed"]
+    assert failed[0]["error"] == "search backend down"
+    # Failed research is not cached
+    assert llm_wrapper.company_research_cache.get("broken co") is None
+
+
+def test_generate_json_passes_schema_and_repairs(monkeypatch):
+    calls = []
+    replies = iter(["not json at all", '{"fitScore": 7}'])
+
+    def fake_llama_cpp(prompt, max_tokens=256, temperature=0.7, json_schema=None):
+        calls.append({"prompt": prompt, "schema": json_schema})
+        return {"text": next(replies), "tokens": 12}
+
+    monkeypatch.setattr(llm_wrapper, "LLAMA_API_TYPE", "llama-cpp")
+    monkeypatch.setattr(llm_wrapper, "_call_llama_cpp", fake_llama_cpp)
+    schema = {"type": "object", "properties": {"fitScore": {"type": "number"}}}
+
+    result = llm_wrapper.RemoteLLMWrapper().generate_json(
+        "Score this", schema, max_repairs=1
+    )
+
+    assert result == {"fitScore": 7}
+    assert all(call["schema"] == schema for call in calls)
+    assert "could not be parsed" in calls[1]["prompt"]
+
+
+def test_generate_json_gives_up_after_bounded_repairs(monkeypatch):
+    calls = []
+
+    def fake_llama_cpp(prompt, max_tokens=256, temperature=0.7, json_schema=None):
+        calls.append(prompt)
+        return {"text": "still not json", "tokens": 5}
+
+    monkeypatch.setattr(llm_wrapper, "LLAMA_API_TYPE", "llama-cpp")
+    monkeypatch.setattr(llm_wrapper, "_call_llama_cpp", fake_llama_cpp)
+
+    result = llm_wrapper.RemoteLLMWrapper().generate_json(
+        "Score this", {"type": "object"}, max_repairs=2
+    )
+
+    assert result is None
+    assert len(calls) == 3
+
+
+def test_generate_json_does_not_repair_guard_blocks(monkeypatch):
+    calls = []
+
+    def fake_llama_cpp(prompt, max_tokens=256, temperature=0.7, json_schema=None):
+        calls.append(prompt)
+        return {"text": "{}", "tokens": 5}
+
+    def reject(prompt, source="unknown"):
+        raise llm_wrapper.GuardRejection("blocked")
+
+    monkeypatch.setattr(llm_wrapper, "LLAMA_API_TYPE", "llama-cpp")
+    monkeypatch.setattr(llm_wrapper, "_call_llama_cpp", fake_llama_cpp)
+    monkeypatch.setattr(llm_wrapper, "protect_prompt", reject)
+
+    result = llm_wrapper.RemoteLLMWrapper().generate_json(
+        "Score this", {"type": "object"}, max_repairs=2
+    )
+
+    assert result is None
+    assert calls == []
+
+
+def test_backend_failures_are_classified(monkeypatch):
+    errors = iter(
+        [
+            requests.ConnectionError("connection refused"),
+            requests.HTTPError(
+                "bad request", response=type("R", (), {"status_code": 400})()
+            ),
+        ]
+    )
+
+    def failing_llama_cpp(prompt, max_tokens=256, temperature=0.7, json_schema=None):
+        raise next(errors)
+
+    monkeypatch.setattr(llm_wrapper, "LLAMA_API_TYPE", "llama-cpp")
+    monkeypatch.setattr(llm_wrapper, "_call_llama_cpp", failing_llama_cpp)
+    wrapper = llm_wrapper.RemoteLLMWrapper()
+
+    with pytest.raises(BackendUnavailable) as unavailable:
+        wrapper.generate("hello")
+    assert is_retryable(unavailable.value)
+    with pytest.raises(BackendRejected) as rejected:
+        wrapper.generate("hello")
+    assert not is_retryable(rejected.value)
+
+
+class PromptRecorder:
+    def __init__(self):
+        self.prompts = []
+
+    def generate_json(self, prompt, schema, temperature=0.1, max_tokens=1500):
+        self.prompts.append(prompt)
+        return {"fitScore": 8, "analysis": {"summary": "Good fit"}}
+
+
+def test_position_batch_shares_candidate_prefix(monkeypatch):
+    from position_fit_agent import PositionFitAgent
+
+    agent = PositionFitAgent(PromptRecorder())
+    monkeypatch.setattr(llm_wrapper, "get_position_fit_agent", lambda: agent)
+    delivered = []
+    monkeypatch.setattr(
+        llm_wrapper,
+        "dispatch_webhook",
+        lambda url, payload: delivered.append(payload) or True,
+    )
+    jobs = [
+        {
+            "company": "Acme",
+            "position": "Engineer",
+            "jobDescription": "Build APIs",
+            "metadata": {"interviewId": "i1"},
+        },
+        {
+            "company": "Globex",
+            "position": "SRE",
+            "jobDescription": "Run clusters",
+            "metadata": {"interviewId": "i2"},
+        },
+    ]
+
+    summary = llm_wrapper.analyze_positions_batch(
+        jobs,
+        "Resume text",
+        "",
+        [],
+        "http://callback",
+        {"userId": "u1", "jobId": "batch-7"},
+        "llm_batch_3",
+    )
+
+    assert [r["fitScore"] for r in summary["results"]] == [8, 8]
+    assert {p["metadata"]["interviewId"] for p in delivered} == {"i1", "i2"}
+    # A batch-level jobId never replaces the per-job ids
+    assert {p["jobId"] for p in delivered} == {"batch-7:0", "batch-7:1"}
+    assert all(p["type"] == "position" for p in delivered)
+    first, second = agent.llm.prompts
+    prefix = first[: first.index("Acme")]
+    assert "Resume text" in prefix
+    assert second.startswith(prefix)
+
+
+class FlakyBackend(PromptRecorder):
+    def generate_json(self, prompt, schema, temperature=0.1, max_tokens=1500):
+        if "Globex" in prompt:
+            raise BackendUnavailable("backend restarting")
+        return super().generate_json(prompt, schema, temperature, max_tokens)
+
+
+def test_position_batch_transient_failure_fails_only_that_job(monkeypatch):
+    from position_fit_agent import PositionFitAgent
+
+    agent = PositionFitAgent(FlakyBackend())
+    monkeypatch.setattr(llm_wrapper, "get_position_fit_agent", lambda: agent)
+    delivered = []
+    monkeypatch.setattr(
+        llm_wrapper,
+        "dispatch_webhook",
+        lambda url, payload: delivered.append(payload) or True,
+    )
+    jobs = [
+        {"company": name, "position": "Engineer", "jobDescription": "Build APIs"}
+        for name in ("Acme", "Globex", "Initech")
+    ]
+
+    summary = llm_wrapper.analyze_positions_batch(
+        jobs, "Resume text", "", [], "http://callback", {}, "llm_batch_4"
+    )
+
+    assert [r["index"] for r in summary["results"]] == [0, 2]
+    assert summary["failed"] == [{"index": 1, "errorType": "transient"}]
+    by_id = {p["jobId"]: p for p in delivered}
+    assert len(delivered) == 3
+    assert by_id["llm_batch_4:1"]["status"] == "failed"
+    assert by_id["llm_batch_4:1"]["errorType"] == "transient"
+    assert by_id["llm_batch_4:0"]["status"] == "completed"
+    assert by_id["llm_batch_4:2"]["status"] == "completed"
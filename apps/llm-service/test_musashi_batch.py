@@ -0,0 +1,127 @@
+import json
+
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("googlesearch")
+pytest.importorskip("langchain_core")
+
+import musashi_batch
+from checkpoint_store import CheckpointStore
+
+
+class FakeMusashiAgent:
+    def __init__(self, fail_on=()):
+        self.scored = []
+        self.fail_on = set(fail_on)
+
+    def score(self, resume_content=None, force_refresh=False, **kwargs):
+        self.scored.append(resume_content)
+        if resume_content in self.fail_on:
+            raise RuntimeError("backend down")
+        return {"im_score": 7.0}
+
+
+def _profile(n):
+    return {
+        "id": f"r{n}",
+        "resume": {"content": f"CV {n}", "llmContext": "ctx"},
+        "metadata": {"resumeId": f"r{n}"},
+    }
+
+
+@pytest.fixture
+def batch_env(monkeypatch, tmp_path):
+    delivered = []
+    monkeypatch.setattr(musashi_batch, "MUSASHI_BATCH_DIR", str(tmp_path))
+    monkeypatch.setattr(
+        musashi_batch,
+        "checkpoints",
+        CheckpointStore("musashi_batch", directory=str(tmp_path), use_redis=False),
+    )
+    monkeypatch.setattr(
+        musashi_batch,
+        "call_webhook",
+        lambda url, payload: delivered.append(payload) or True,
+    )
+    return delivered
+
+
+def _run(agent, monkeypatch, **kwargs):
+    monkeypatch.setattr(musashi_batch, "get_musashi_agent", lambda: agent)
+    job = musashi_batch.MusashiBatchJob(
+        "job1",
+        "http://callback",
+        {"source": "rescore"},
+        concurrency=2,
+        max_per_minute=0,
+        webhook_batch_size=2,
+        **kwargs,
+    )
+    return job.run()
+
+
+def test_batch_scores_profiles_and_batches_webhooks(batch_env, monkeypatch):
+    musashi_batch.write_input("job1", iter([_profile(n) for n in range(5)]))
+    agent = FakeMusashiAgent(fail_on={"CV 3"})
+
+    state = _run(agent, monkeypatch)
+
+    assert state["status"] == "completed"
+    assert (state["completed"], state["failed"], state["delivered"]) == (4, 1, 5)
+    assert all(p["type"] == "musashi_batch" for p in batch_env)
+    assert batch_env[-1]["data"]["final"] is True
+    sent = [r for p in batch_env for r in p["data"]["results"]]
+    assert sorted(r["id"] for r in sent) == ["r0", "r1", "r2", "r3", "r4"]
+    with open(musashi_batch.results_path("job1")) as handle:
+        assert len(handle.readlines()) == 5
+
+
+def test_batch_resumes_without_rescoring(batch_env, monkeypatch):
+    musashi_batch.write_input("job1", iter([_profile(n) for n in range(4)]))
+    # Simulate a crash after two results were written but none delivered
+    with open(musashi_batch.results_path("job1"), "w") as handle:
+        for n in range(2):
+            record = {"id": f"r{n}", "index": n, "status": "completed", "data": {}}
+            handle.write(json.dumps(record) + "\n")
+        handle.write('{"id": "r2", "ind')  # torn line
+
+    agent = FakeMusashiAgent()
+    state = _run(agent, monkeypatch)
+
+    assert sorted(agent.scored) == ["CV 2", "CV 3"]
+    assert state["completed"] == 4
+    sent = [r["id"] for p in batch_env for r in p["data"]["results"]]
+    assert sorted(sent) == ["r0", "r1", "r2", "r3"]
+    with open(musashi_batch.results_path("job1")) as handle:
+        assert sorted(json.loads(line)["id"] for line in handle) == sorted(sent)
+
+
+def test_failed_webhook_is_resent_in_bounded_chunks(batch_env, monkeypatch):
+    musashi_batch.write_input("job1", iter([_profile(n) for n in range(7)]))
+    attempts = []
+
+    def flaky_webhook(url, payload):
+        attempts.append(len(payload["data"]["results"]))
+        if len(attempts) == 1:
+            return False
+        batch_env.append(payload)
+        return True
+
+    monkeypatch.setattr(musashi_batch, "call_webhook", flaky_webhook)
+    state = _run(FakeMusashiAgent(), monkeypatch)
+
+    assert state["delivered"] == 7
+    assert max(attempts) <= 2
+    sent = [r["id"] for p in batch_env for r in p["data"]["results"]]
+    assert sorted(sent) == [f"r{n}" for n in range(7)]
+    assert batch_env[-1]["data"]["final"] is True
+
+
+def test_missing_input_fails_the_job(batch_env, monkeypatch):
+    with pytest.raises(musashi_batch.InvalidInput):
+        _run(FakeMusashiAgent(), monkeypatch)
+
+    state = musashi_batch.job_status("job1")
+    assert state["status"] == "failed"
+    assert "missing" in state["error"]
@@ -0,0 +1,72 @@
+from musashi_index_agent import MusashiIndexAgent
+from result_cache import ResultCache
+
+RESULT = {
+    "scores": {"tenure": 7, "portfolio": 6, "impact": 5, "learning": 8},
+    "im_score": 6.5,
+    "academic_equivalent": "Especialización",
+    "academic_equivalent_en": "Specialization equivalent",
+    "citation": "Steady blade.",
+    "duels_won": ["Shipped v1"],
+    "growth_area": "Impact",
+    "rationale": "Solid.",
+}
+
+
+class FakePrompts:
+    template = "Evaluate:\n{career_profile}"
+
+    def get(self, name, **variables):
+        return self.template.format(**variables)
+
+    def get_raw(self, name):
+        return self.template
+
+
+class CountingLLM:
+    model_name = "test:model-a"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_json(self, prompt, schema, temperature=0.1, max_tokens=1500):
+        self.calls += 1
+        return dict(RESULT, scores=dict(RESULT["scores"]))
+
+
+def _agent():
+    llm = CountingLLM()
+    prompts = FakePrompts()
+    cache = ResultCache("musashi-test", use_redis=False)
+    return MusashiIndexAgent(llm, prompts, cache=cache), llm, prompts
+
+
+def test_unchanged_profile_is_served_from_cache():
+    agent, llm, _ = _agent()
+
+    assert agent.cached_score(resume_content="CV", ai_context="ctx") is None
+    first = agent.score(resume_content="CV", ai_context="ctx")
+    second = agent.score(resume_content="CV", ai_context="ctx")
+
+    assert first == second
+    assert llm.calls == 1
+    assert agent.cached_score(resume_content="CV", ai_context="ctx") == first
+
+    agent.score(resume_content="CV", ai_context="ctx", force_refresh=True)
+    assert llm.calls == 2
+
+
+def test_cache_key_covers_profile_template_and_model():
+    agent, llm, prompts = _agent()
+    agent.score(resume_content="CV", ai_context="ctx")
+
+    agent.score(resume_content="CV v2", ai_context="ctx")
+    assert llm.calls == 2
+
+    prompts.template = "Evaluate carefully:\n{career_profile}"
+    agent.score(resume_content="CV", ai_context="ctx")
+    assert llm.calls == 3
+
+    llm.model_name = "test:model-b"
+    agent.score(resume_content="CV", ai_context="ctx")
+    assert llm.calls == 4
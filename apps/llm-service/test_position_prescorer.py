@@ -0,0 +1,115 @@
+import time
+
+import pytest
+
+pytest.importorskip("bs4")
+
+from position_fit_agent import PositionFitAgent
+from position_prescorer import PositionPrescorer, estimate_seniority, tokenize
+
+RESUME = """Senior backend engineer with 7 years of experience.
+Built Python and FastAPI services on AWS with PostgreSQL, Redis and Docker.
+Deployed to Kubernetes with Terraform; machine learning pipelines in PyTorch."""
+
+BACKEND_JOB = """We are hiring a Senior Backend Engineer.
+Requirements: Python, FastAPI or Django, PostgreSQL, Redis, Docker, Kubernetes, AWS."""
+
+MISMATCH_JOB = """Junior iOS developer. Swift, Figma and Xcode experience.
+Build delightful mobile interfaces for our retail app."""
+
+
+class CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_json(self, prompt, schema, temperature=0.1, max_tokens=1500):
+        self.calls += 1
+        return {"fitScore": 8, "analysis": {"summary": "Good fit"}}
+
+
+def test_matching_job_scores_above_mismatch():
+    matching, mismatch = PositionPrescorer().prescore_batch(
+        [
+            {"position": "Senior Backend Engineer", "posting": BACKEND_JOB},
+            {"position": "Junior iOS Developer", "posting": MISMATCH_JOB},
+        ],
+        RESUME,
+    )
+
+    assert matching["prescore"] > mismatch["prescore"]
+    assert matching["prescore"] >= 7
+    assert mismatch["prescore"] <= 4
+    assert "kubernetes" in matching["matchedSkills"]
+    assert "swift" in mismatch["missingSkills"]
+    assert matching["seniorityAlignment"] == 1.0
+
+
+def test_skill_phrases_and_seniority():
+    assert "machine-learning" in tokenize("Machine Learning at scale")
+    assert "nodejs" in tokenize("Node.js services")
+    assert estimate_seniority("", "Staff Engineer") == "staff"
+    assert estimate_seniority("We need 2+ years of Go") == "junior"
+
+
+def test_batch_triage_is_fast():
+    jobs = [
+        {"position": "Backend Engineer", "posting": BACKEND_JOB * 20}
+        for _ in range(500)
+    ]
+    started = time.monotonic()
+    results = PositionPrescorer().prescore_batch(jobs, RESUME)
+    assert len(results) == 500
+    assert time.monotonic() - started < 5
+
+
+def test_analyze_fit_skips_llm_below_threshold():
+    llm = CountingLLM()
+    agent = PositionFitAgent(llm)
+    kwargs = dict(
+        company="Shop",
+        position="Junior iOS Developer",
+        job_url=None,
+        job_description=MISMATCH_JOB,
+        resume_content=RESUME,
+        resume_llm_context="",
+        journal_entries=[],
+    )
+
+    skipped = agent.analyze_fit(skip_threshold=5, **kwargs)
+    analyzed = agent.analyze_fit(skip_threshold=0, **kwargs)
+
+    assert skipped["llmSkipped"] is True
+    assert skipped["fitScore"] == skipped["prescore"]["prescore"]
+    assert analyzed["fitScore"] == 8
+    assert "prescore" in analyzed
+    assert llm.calls == 1
+
+
+def test_batch_runs_best_prescored_job_first():
+    order = []
+
+    agent = PositionFitAgent(CountingLLM())
+    jobs = [
+        {
+            "company": "Shop",
+            "position": "Junior iOS Developer",
+            "jobDescription": MISMATCH_JOB,
+        },
+        {
+            "company": "Acme",
+            "position": "Senior Backend Engineer",
+            "jobDescription": BACKEND_JOB,
+        },
+    ]
+
+    agent.analyze_fit_batch(
+        jobs,
+        RESUME,
+        "",
+        [],
+        on_result=lambda index, job, result: order.append(index),
+        max_workers=1,
+        skip_threshold=0,
+    )
+
+    assert order == [1, 0]
@@ -0,0 +1,82 @@
+import pytest
+
+import rate_limiter
+from rate_limiter import Budget, RateLimiter, RateLimitExceeded
+
+
+@pytest.fixture(autouse=True)
+def no_redis(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "get_redis", lambda: None)
+
+
+def test_key_and_tenant_buckets_report_retry_after():
+    limiter = RateLimiter(
+        budgets={"default": Budget(rate_per_minute=30, burst=2, inflight=0)},
+        tenant_rate_per_minute=60,
+        tenant_burst=1,
+    )
+    assert limiter.acquire("api", tenant="t1") is None
+
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        limiter.acquire("api", tenant="t1")
+    assert exc_info.value.scope == "tenant"
+    assert exc_info.value.retry_after == 1
+
+    # The tenant refused it, so the key's token was not spent
+    assert limiter.acquire("api", tenant="t2") is None
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        limiter.acquire("api", tenant="t3")
+    assert exc_info.value.scope == "rate"
+    assert exc_info.value.retry_after == 2
+
+    limiter.acquire("other-key", tenant="t3")
+    assert limiter.stats()["budgets"]["default"]["rejected"] == {"tenant": 1, "rate": 1}
+
+
+def test_inflight_cap_per_identity_and_budget():
+    limiter = RateLimiter(
+        budgets={
+            "default": Budget(rate_per_minute=0, burst=0, inflight=2),
+            "expensive": Budget(rate_per_minute=0, burst=0, inflight=1),
+        }
+    )
+    first = limiter.acquire("api")
+    second = limiter.acquire("api")
+    heavy = limiter.acquire("api", "expensive")
+
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        limiter.acquire("api")
+    assert (exc_info.value.scope, exc_info.value.retry_after) == ("inflight", 1)
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire("api", "expensive")
+    limiter.acquire("other-key")
+
+    limiter.release(first)
+    limiter.release(heavy)
+    assert limiter.acquire("api") is not None
+    assert limiter.acquire("api", "expensive") is not None
+    limiter.release(second)
+
+
+def test_inflight_rejection_spends_no_tokens():
+    limiter = RateLimiter(
+        budgets={"default": Budget(rate_per_minute=30, burst=2, inflight=1)},
+        tenant_rate_per_minute=0,
+    )
+    lease = limiter.acquire("api")
+    for _ in range(3):
+        with pytest.raises(RateLimitExceeded) as exc_info:
+            limiter.acquire("api")
+        assert exc_info.value.scope == "inflight"
+
+    limiter.release(lease)
+    limiter.acquire("api")
+
+
+def test_unreleased_leases_expire():
+    limiter = RateLimiter(
+        budgets={"default": Budget(rate_per_minute=0, burst=0, inflight=1)},
+        lease_seconds=0,
+    )
+    limiter.acquire("api")
+    assert limiter.acquire("api") is not None
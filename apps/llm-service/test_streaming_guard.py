@@ -0,0 +1,67 @@
+from concurrent.futures import Future
+
+import pytest
+
+import llm_guard_service
+from streaming_guard import StreamingOutputGuard
+
+
+class ManualExecutor:
+    """Scans complete only when the test resolves them."""
+
+    def __init__(self):
+        self.pending = []
+
+    def submit(self, kind, text, prompt_context=""):
+        future = Future()
+        self.pending.append((text, future))
+        return future
+
+    def resolve(self, reject=()):
+        for text, future in self.pending:
+            future.set_result((text, not any(word in text for word in reject)))
+        self.pending = []
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = ManualExecutor()
+    runtime = {"available": True, "executor": executor, "signature": "stream-test"}
+    monkeypatch.setattr(llm_guard_service, "LLM_GUARD_ENABLED", True)
+    monkeypatch.setattr(llm_guard_service, "LLM_GUARD_CACHE_SIZE", 0)
+    monkeypatch.setattr(llm_guard_service, "_runtime", runtime)
+    return executor
+
+
+def test_secret_split_across_chunks_is_redacted(monkeypatch):
+    monkeypatch.setattr(llm_guard_service, "_runtime", {"available": False})
+    monkeypatch.setattr(llm_guard_service, "LLM_GUARD_ENABLED", True)
+    guard = StreamingOutputGuard(window=32)
+    secret = "sk-" + "Ab1" * 10
+    text = (
+        "Here is a long opening sentence. Your key is " + secret + " so keep it. Bye."
+    )
+
+    released = []
+    for start in range(0, len(text), 5):
+        released.append("".join(guard.feed(text[start : start + 5])))
+    released.append("".join(guard.finish()))
+
+    assert "".join(released) == text.replace(secret, "[REDACTED]")
+    # The opening sentence went out before generation finished
+    assert released[-1] != "".join(released)
+    assert "Here is a long opening sentence." in "".join(released[:-1])
+
+
+def test_units_are_released_in_order_once_verified(executor):
+    guard = StreamingOutputGuard(source="test", window=8)
+
+    assert guard.feed("First sentence here. Second one ") == []
+    assert [text for text, _ in executor.pending] == ["First sentence here. "]
+    executor.resolve()
+    assert guard.feed("follows now. And more.") == ["First sentence here. "]
+
+    executor.resolve(reject=("follows",))
+    assert guard.feed(" Still talking.") == [llm_guard_service.OUTPUT_REFUSAL]
+    assert guard.feed("Anything else.") == []
+    assert guard.finish() == []
@@ -0,0 +1,43 @@
+import pytest
+
+import tenant_scheduler
+from tenant_scheduler import TenantScheduler, tenant_key
+
+
+@pytest.fixture(autouse=True)
+def no_redis(monkeypatch):
+    monkeypatch.setattr(tenant_scheduler, "get_redis", lambda: None)
+
+
+def test_tenant_key_prefers_tenant_header():
+    assert tenant_key({"tenant_id": "acme", "service_name": "api-service"}) == "acme"
+    assert (
+        tenant_key({"tenant_id": None, "service_name": "api-service"}) == "api-service"
+    )
+    assert tenant_key(None) == "default"
+
+
+def test_busy_tenant_is_throttled_only_while_others_wait():
+    scheduler = TenantScheduler(rate_per_minute=60, burst=2, weights={"big": 1.0})
+    scheduler.record_enqueued("small")
+
+    assert scheduler.acquire("big") == 0
+    assert scheduler.acquire("big") == 0
+    assert scheduler.acquire("big") == pytest.approx(1.0, abs=0.05)
+    assert scheduler.stats()["big"]["throttled"] == 1
+
+    # Once the other tenant's job has started, spare capacity is shared again
+    scheduler.record_started("small")
+    assert scheduler.acquire("big") == 0
+
+
+def test_weights_scale_refill_rate():
+    scheduler = TenantScheduler(
+        rate_per_minute=60, burst=1, weights={"gold": 4.0}, work_conserving=False
+    )
+    scheduler.acquire("gold")
+    scheduler.acquire("basic")
+
+    assert scheduler.acquire("gold") == pytest.approx(0.25, abs=0.05)
+    assert scheduler.acquire("basic") == pytest.approx(1.0, abs=0.05)
+    assert scheduler.stats()["gold"]["ratePerMinute"] == 240
@@ -0,0 +1,168 @@
+import pytest
+
+import webhook_dispatcher
+from webhook_outbox import SQLiteWebhookOutbox
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = ""
+
+
+class FakeSession:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.requests = []
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.requests.append({"url": url, "data": data, "headers": headers})
+        return FakeResponse(self.statuses.pop(0))
+
+
+@pytest.fixture
+def session(monkeypatch):
+    def install(statuses):
+        fake = FakeSession(statuses)
+        monkeypatch.setattr(webhook_dispatcher, "get_session", lambda: fake)
+        return fake
+
+    return install
+
+
+@pytest.fixture
+def outbox(tmp_path, monkeypatch):
+    store = SQLiteWebhookOutbox(str(tmp_path / "outbox.sqlite3"))
+    monkeypatch.setattr(webhook_dispatcher, "get_outbox", lambda: store)
+    return store
+
+
+def test_post_webhook_signs_and_classifies(session):
+    fake = session([200, 503, 400, 429])
+    payload = {"jobId": "job-1", "status": "completed"}
+
+    assert webhook_dispatcher.post_webhook("http://cb", payload) == (True, False, "")
+    assert webhook_dispatcher.post_webhook("http://cb", payload) == (
+        False,
+        True,
+        "HTTP 503",
+    )
+    assert webhook_dispatcher.post_webhook("http://cb", payload) == (
+        False,
+        False,
+        "HTTP 400",
+    )
+    assert webhook_dispatcher.post_webhook("http://cb", payload) == (
+        False,
+        True,
+        "HTTP 429",
+    )
+
+    body, headers = webhook_dispatcher.sign_payload(payload)
+    assert fake.requests[0]["data"] == body.encode("utf-8")
+    assert (
+        fake.requests[0]["headers"]["X-Webhook-Signature"]
+        == headers["X-Webhook-Signature"]
+    )
+    assert fake.requests[0]["headers"]["X-Job-Id"] == "job-1"
+
+
+def test_deliver_webhook_stops_on_client_error(session, monkeypatch):
+    fake = session([400, 200])
+    monkeypatch.setattr(webhook_dispatcher.time, "sleep", lambda s: None)
+
+    assert webhook_dispatcher.deliver_webhook("http://cb", {"jobId": "j"}) is False
+    assert len(fake.requests) == 1
+
+
+def test_background_retry_is_scheduled_not_slept(session, outbox, monkeypatch):
+    session([503])
+    scheduled = []
+
+    class FakeTimer:
+        def __init__(self, delay, fn, args):
+            scheduled.append((delay, args[0]["attempts"]))
+
+        def start(self):
+            pass
+
+    monkeypatch.setattr(webhook_dispatcher.threading, "Timer", FakeTimer)
+    monkeypatch.setattr(webhook_dispatcher, "_ensure_pump_thread", lambda: None)
+    monkeypatch.setattr(
+        webhook_dispatcher.time, "sleep", lambda s: pytest.fail("must not sleep")
+    )
+
+    entry = outbox.add("http://cb", {"jobId": "j"})
+    webhook_dispatcher._background_attempt(entry)
+
+    assert scheduled == [(2, 1)]
+    # Leased away from the pump while the dispatcher retries it itself
+    assert outbox.claim_due() == []
+    assert outbox.get(entry["id"])["lastError"] == "HTTP 503"
+
+
+def test_outbox_dead_letters_and_replays(session, outbox, monkeypatch):
+    session([400, 200])
+    queued = []
+    monkeypatch.setattr(
+        webhook_dispatcher, "_schedule_background", lambda e, c=0: queued.append(e)
+    )
+    monkeypatch.setattr(webhook_dispatcher, "WEBHOOK_DISPATCH", "thread")
+
+    assert webhook_dispatcher.dispatch_webhook("http://cb", {"jobId": "j"}) is True
+    entry = queued.pop()
+    assert webhook_dispatcher.attempt_delivery(entry) is None
+    assert outbox.stats()["dead"] == 1
+
+    replayed = outbox.replay(entry["id"])
+    assert replayed["status"] == "pending"
+    assert webhook_dispatcher.attempt_delivery(replayed) is None
+    assert outbox.get(entry["id"]) is None
+    assert outbox.stats() == {"pending": 0, "dead": 0, "backend": "sqlite"}
+
+
+def test_pump_requeues_entries_after_backoff(outbox, monkeypatch):
+    queued = []
+    monkeypatch.setattr(webhook_dispatcher, "enqueue_delivery", queued.append)
+    entry = outbox.add("http://cb", {"jobId": "j"})
+    assert webhook_dispatcher.pump_outbox() == 0
+
+    outbox.record_failure(entry, "HTTP 503", retryable=True)
+    monkeypatch.setattr("webhook_outbox.time.time", lambda: entry["createdAt"] + 10)
+    assert webhook_dispatcher.pump_outbox() == 1
+    assert queued[0]["id"] == entry["id"]
+    # Claimed entries are leased, so a second pump does not double-queue
+    assert webhook_dispatcher.pump_outbox() == 0
+
+
+def test_batched_callbacks_are_coalesced_and_gzipped(session, outbox, monkeypatch):
+    import gzip
+    import json
+
+    import webhook_batcher
+
+    fake = session([200])
+    monkeypatch.setattr(webhook_batcher, "WEBHOOK_BATCH_URLS", frozenset({"http://cb"}))
+    monkeypatch.setattr(webhook_dispatcher, "WEBHOOK_GZIP_MIN_BYTES", 64)
+    batcher = webhook_batcher.WebhookBatcher(webhook_dispatcher._flush_batch, window=60)
+    monkeypatch.setattr(webhook_dispatcher, "get_batcher", lambda: batcher)
+
+    for index in range(3):
+        webhook_dispatcher.dispatch_webhook(
+            "http://cb", {"jobId": f"b:{index}", "n": index}
+        )
+    assert batcher.pending() == 3
+    batcher.flush_all()
+
+    assert len(fake.requests) == 1
+    request = fake.requests[0]
+    assert request["headers"]["Content-Encoding"] == "gzip"
+    assert request["headers"]["X-Webhook-Batch"] == "3"
+    body = gzip.decompress(request["data"]).decode("utf-8")
+    assert [item["jobId"] for item in json.loads(body)] == ["b:0", "b:1", "b:2"]
+    # Signature covers the uncompressed JSON
+    assert (
+        request["headers"]["X-Webhook-Signature"]
+        == webhook_dispatcher.sign_payload(json.loads(body))[1]["X-Webhook-Signature"]
+    )
+    assert outbox.stats()["pending"] == 0
@@ -0,0 +1,138 @@
+"""
+Batched webhook callbacks.
+
+Bulk jobs (company batches, position batches) emit one webhook per result.
+For receivers that opt in via WEBHOOK_BATCH_URLS, results bound for the
+same callback URL are coalesced for up to WEBHOOK_BATCH_WINDOW seconds and
+POSTed as one signed JSON array, so a 500-result job costs a handful of
+requests instead of 500 signatures, connections and handler round-trips.
+Bodies above WEBHOOK_GZIP_MIN_BYTES are gzip-encoded for those receivers.
+
+The batcher only groups items; webhook_dispatcher supplies the flush
+function that signs, sends and records the outcome in the outbox.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Callback URLs whose receivers accept array payloads and gzip bodies
+WEBHOOK_BATCH_URLS = frozenset(
+    url.strip().rstrip("/")
+    for url in os.getenv("WEBHOOK_BATCH_URLS", "").split(",")
+    if url.strip()
+)
+# Longest time a result waits for others to join its batch
+WEBHOOK_BATCH_WINDOW = float(os.getenv("WEBHOOK_BATCH_WINDOW", "0.5"))
+# Results per batched request
+WEBHOOK_BATCH_MAX_SIZE = int(os.getenv("WEBHOOK_BATCH_MAX_SIZE", "100"))
+# Compress request bodies at least this large (0 = never)
+WEBHOOK_GZIP_MIN_BYTES = int(os.getenv("WEBHOOK_GZIP_MIN_BYTES", "8192"))
+
+
+def batching_enabled(callback_url: str) -> bool:
+    """True if the receiver at *callback_url* opted in to batched callbacks."""
+    return bool(callback_url) and callback_url.rstrip("/") in WEBHOOK_BATCH_URLS
+
+
+class WebhookBatcher:
+    """Coalesce items per callback URL and flush them from one thread.
+
+    A batch is flushed when it reaches *max_size* items or when its oldest
+    item has waited *window* seconds, whichever comes first.
+
+    Args:
+        flush: Called as flush(callback_url, items) on the flusher thread
+        window: Seconds the first item of a batch may wait
+        max_size: Items per batch
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[str, List[Any]], None],
+        window: float = WEBHOOK_BATCH_WINDOW,
+        max_size: int = WEBHOOK_BATCH_MAX_SIZE,
+    ):
+        self.flush = flush
+        self.window = window
+        self.max_size = max(1, max_size)
+        self._batches: Dict[str, List[Any]] = {}
+        self._deadlines: Dict[str, float] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, callback_url: str, item: Any) -> None:
+        """Queue *item* for the next batch to *callback_url*."""
+        with self._cond:
+            batch = self._batches.setdefault(callback_url, [])
+            if not batch:
+                self._deadlines[callback_url] = time.monotonic() + self.window
+            batch.append(item)
+            if len(batch) >= self.max_size:
+                self._deadlines[callback_url] = 0.0
+            self._ensure_thread()
+            self._cond.notify()
+
+    def flush_all(self) -> None:
+        """Flush every pending batch now, in the calling thread."""
+        for callback_url, items in self._take(force=True):
+            self._flush(callback_url, items)
+
+    def pending(self) -> int:
+        with self._cond:
+            return sum(len(items) for items in self._batches.values())
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="webhook-batcher", daemon=True
+            )
+            self._thread.start()
+
+    def _take(self, force: bool = False) -> List[tuple]:
+        """Remove and return batches that are full or past their window."""
+        with self._cond:
+            now = time.monotonic()
+            due = [
+                url
+                for url, deadline in self._deadlines.items()
+                if force or deadline <= now
+            ]
+            ready = []
+            for url in due:
+                del self._deadlines[url]
+                items = self._batches.pop(url)
+                # A full batch may have grown past max_size before the flush
+                for start in range(0, len(items), self.max_size):
+                    ready.append((url, items[start : start + self.max_size]))
+            return ready
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._deadlines:
+                    self._cond.wait()
+                timeout = min(self._deadlines.values()) - time.monotonic()
+                if timeout > 0:
+                    self._cond.wait(timeout)
+            for callback_url, items in self._take():
+                self._flush(callback_url, items)
+
+    def _flush(self, callback_url: str, items: List[Any]) -> None:
+        try:
+            self.flush(callback_url, items)
+        except Exception as exc:
+            logger.error(
+                "Batched webhook flush failed (%d items to %s): %s",
+                len(items),
+                callback_url,
+                exc,
+            )
@@ -0,0 +1,372 @@
+"""
+Webhook delivery for LLM job results.
+
+Results are signed here and handed off for delivery so LLM workers never
+wait on (or sleep between retries against) a slow callback receiver:
+
+  - dispatch_webhook() — non-blocking. Records the delivery in the durable
+    outbox (webhook_outbox), then queues deliver_webhook_task on the
+    dedicated "webhooks" Celery queue. Early retries use a countdown;
+    later ones (minutes to an hour apart) are re-queued from the outbox by
+    the pump_webhook_outbox_task beat job. Without Celery, a small
+    background pool with timers and an in-process pump does the same.
+  - deliver_webhook()  — blocking delivery with retries, for callers that
+    need to know the outcome (e.g. batch jobs that track acknowledgements).
+
+All HTTP goes through one pooled keep-alive requests.Session per process.
+Receivers listed in WEBHOOK_BATCH_URLS get results coalesced into signed
+array payloads (see webhook_batcher).
+"""
+
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from webhook_batcher import WEBHOOK_GZIP_MIN_BYTES, WebhookBatcher, batching_enabled
+from webhook_outbox import WEBHOOK_OUTBOX_LEASE, backoff_delay, get_outbox
+
+logger = logging.getLogger(__name__)
+
+_raw_secret = os.getenv("LLM_WEBHOOK_SECRET", "")
+WEBHOOK_SECRET: bytes = _raw_secret.encode("utf-8") if _raw_secret else b""
+
+# celery = queue on WEBHOOK_QUEUE, thread = in-process background delivery
+WEBHOOK_DISPATCH = os.getenv("WEBHOOK_DISPATCH", "celery")
+WEBHOOK_QUEUE = os.getenv("WEBHOOK_QUEUE", "webhooks")
+# Retries scheduled by the delivering worker itself (2s … 32s) before the
+# outbox pump takes over with longer backoff
+WEBHOOK_MAX_RETRIES = int(os.getenv("WEBHOOK_MAX_RETRIES", "5"))
+# Seconds between outbox pump runs (Celery beat or in-process thread)
+WEBHOOK_OUTBOX_PUMP_INTERVAL = int(os.getenv("WEBHOOK_OUTBOX_PUMP_INTERVAL", "30"))
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "10"))
+# Keep-alive connections kept per callback host
+WEBHOOK_POOL_SIZE = int(os.getenv("WEBHOOK_POOL_SIZE", "16"))
+
+DELIVER_TASK_NAME = "llm_service.tasks.deliver_webhook_task"
+PUMP_TASK_NAME = "llm_service.tasks.pump_webhook_outbox_task"
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_background: Optional[ThreadPoolExecutor] = None
+_pump_thread: Optional[threading.Thread] = None
+_batcher: Optional[WebhookBatcher] = None
+
+
+def get_session() -> requests.Session:
+    """Shared pooled session (keep-alive connections to api-service)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=4, pool_maxsize=WEBHOOK_POOL_SIZE
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def sign_payload(payload: Any) -> Tuple[str, Dict[str, str]]:
+    """Serialize *payload* canonically and build the signed request headers.
+
+    *payload* is one result dict, or a list of them for a batched callback.
+    """
+    secret = WEBHOOK_SECRET or b"change-me-in-production"
+    payload_json = json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    signature = hmac.new(
+        secret, payload_json.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+    if isinstance(payload, list):
+        job_id = f"batch-{len(payload)}"
+    else:
+        job_id = str(payload.get("jobId", "unknown"))
+    headers = {
+        "Content-Type": "application/json",
+        "X-Webhook-Signature": signature,
+        "X-Job-Id": job_id,
+    }
+    if isinstance(payload, list):
+        headers["X-Webhook-Batch"] = str(len(payload))
+    return payload_json, headers
+
+
+def post_webhook(callback_url: str, payload: Any) -> Tuple[bool, bool, str]:
+    """Make a single delivery attempt.
+
+    Large bodies to batching receivers are gzip-encoded; the signature
+    always covers the uncompressed JSON.
+
+    Returns:
+        (delivered, retryable, error) — client errors other than 408/429
+        are not worth retrying
+    """
+    body, headers = sign_payload(payload)
+    job_id = headers["X-Job-Id"]
+    data = body.encode("utf-8")
+    if (
+        WEBHOOK_GZIP_MIN_BYTES
+        and len(data) >= WEBHOOK_GZIP_MIN_BYTES
+        and batching_enabled(callback_url)
+    ):
+        data = gzip.compress(data, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    try:
+        response = get_session().post(
+            callback_url, data=data, headers=headers, timeout=WEBHOOK_TIMEOUT
+        )
+    except requests.exceptions.Timeout:
+        logger.error("Webhook timeout for job %s", job_id)
+        return False, True, "timeout"
+    except requests.exceptions.ConnectionError as exc:
+        logger.error("Webhook connection error for job %s: %s", job_id, exc)
+        return False, True, f"connection error: {exc}"
+    except Exception as exc:
+        logger.error("Webhook error for job %s: %s", job_id, exc)
+        return False, True, str(exc)
+
+    if 200 <= response.status_code < 300:
+        logger.info(
+            "Webhook delivered for job %s (status %d)", job_id, response.status_code
+        )
+        return True, False, ""
+
+    logger.warning(
+        "Webhook returned status %d for job %s: %s",
+        response.status_code,
+        job_id,
+        response.text[:500],
+    )
+    retryable = response.status_code >= 500 or response.status_code in (408, 429)
+    return False, retryable, f"HTTP {response.status_code}"
+
+
+def deliver_webhook(callback_url: str, payload: dict, max_retries: int = 3) -> bool:
+    """POST *payload* with retries, blocking the caller until done.
+
+    Returns True on success, False after exhausting retries.
+    """
+    if not callback_url:
+        logger.warning("No callback URL provided — skipping webhook")
+        return False
+
+    job_id = payload.get("jobId", "unknown")
+    for attempt in range(1, max_retries + 1):
+        delivered, retryable, _ = post_webhook(callback_url, payload)
+        if delivered:
+            return True
+        if not retryable:
+            break
+        if attempt < max_retries:
+            delay = backoff_delay(attempt - 1)
+            logger.info("Retrying webhook for job %s in %ds…", job_id, delay)
+            time.sleep(delay)
+
+    logger.error("Webhook failed permanently for job %s", job_id)
+    return False
+
+
+def dispatch_webhook(callback_url: str, payload: dict) -> bool:
+    """Record *payload* in the outbox, hand it off for delivery and return.
+
+    Returns True if the webhook was queued, False if there is nothing to
+    deliver to.
+    """
+    if not callback_url:
+        logger.warning("No callback URL provided — skipping webhook")
+        return False
+
+    try:
+        entry = get_outbox().add(callback_url, payload)
+    except Exception as exc:
+        # Still deliver, just without a durable record
+        logger.error(
+            "Webhook outbox write failed (job %s): %s", payload.get("jobId"), exc
+        )
+        entry = {
+            "id": None,
+            "callbackUrl": callback_url,
+            "payload": payload,
+            "attempts": 0,
+        }
+
+    enqueue_delivery(entry)
+    return True
+
+
+def enqueue_delivery(entry: dict, countdown: float = 0, batch: bool = True) -> None:
+    """Queue one delivery attempt for an outbox entry.
+
+    Immediate deliveries to batching receivers join the in-process batch;
+    retries (countdown > 0) and *batch=False* are always sent on their own.
+    """
+    if batch and not countdown and batching_enabled(entry["callbackUrl"]):
+        get_batcher().add(entry["callbackUrl"], entry)
+        return
+
+    if WEBHOOK_DISPATCH == "celery":
+        try:
+            from celery_config import celery_app
+
+            celery_app.send_task(
+                DELIVER_TASK_NAME,
+                args=(entry,),
+                queue=WEBHOOK_QUEUE,
+                countdown=countdown or None,
+            )
+            return
+        except Exception as exc:
+            logger.warning(
+                "Could not queue webhook on Celery (%s) — delivering in background", exc
+            )
+
+    _schedule_background(entry, countdown)
+
+
+def attempt_delivery(entry: dict) -> Optional[float]:
+    """Make one attempt for *entry* and update the outbox.
+
+    Returns:
+        Seconds until the caller should retry itself, or None when there is
+        nothing more for the caller to do (delivered, dead-lettered, or
+        handed to the outbox pump for a later retry)
+    """
+    delivered, retryable, error = post_webhook(entry["callbackUrl"], entry["payload"])
+    outbox = get_outbox() if entry.get("id") else None
+
+    if delivered:
+        if outbox is not None:
+            outbox.mark_delivered(entry["id"])
+        return None
+
+    attempts = entry.get("attempts", 0) + 1
+    retry_self = retryable and attempts <= WEBHOOK_MAX_RETRIES
+    delay = backoff_delay(attempts)
+
+    if outbox is None:
+        return delay if retry_self else None
+
+    # While retrying ourselves, keep the entry leased away from the pump
+    updated = outbox.record_failure(
+        entry, error, retryable, hold=WEBHOOK_OUTBOX_LEASE if retry_self else 0
+    )
+    entry.update(updated)
+    if updated["status"] == "dead":
+        return None
+    return delay if retry_self else None
+
+
+def get_batcher() -> WebhookBatcher:
+    """Shared batcher for callbacks to receivers in WEBHOOK_BATCH_URLS."""
+    global _batcher
+    if _batcher is None:
+        with _session_lock:
+            if _batcher is None:
+                _batcher = WebhookBatcher(_flush_batch)
+    return _batcher
+
+
+def _flush_batch(callback_url: str, entries: List[dict]) -> None:
+    """Deliver coalesced outbox entries as one array payload."""
+    delivered, retryable, error = post_webhook(
+        callback_url, [entry["payload"] for entry in entries]
+    )
+    if delivered:
+        for entry in entries:
+            if entry.get("id"):
+                get_outbox().mark_delivered(entry["id"])
+        return
+
+    # Fall back to individual deliveries so one bad result cannot hold
+    # back (or dead-letter) the rest of the batch
+    logger.warning(
+        "Batched webhook to %s failed (%s) — retrying %d results individually",
+        callback_url,
+        error,
+        len(entries),
+    )
+    for entry in entries:
+        enqueue_delivery(
+            entry, countdown=backoff_delay(1) if retryable else 0, batch=False
+        )
+
+
+def pump_outbox(limit: int = 100) -> int:
+    """Re-queue outbox entries whose next attempt is due.
+
+    Returns:
+        Number of entries queued
+    """
+    entries = get_outbox().claim_due(limit)
+    for entry in entries:
+        enqueue_delivery(entry)
+    if entries:
+        logger.info("Outbox pump re-queued %d webhook deliveries", len(entries))
+    return len(entries)
+
+
+# ---------------------------------------------------------------------------
+# In-process background delivery (no Celery)
+# ---------------------------------------------------------------------------
+
+
+def _schedule_background(entry: dict, countdown: float = 0) -> None:
+    global _background
+    if _background is None:
+        with _session_lock:
+            if _background is None:
+                _background = ThreadPoolExecutor(
+                    max_workers=4, thread_name_prefix="webhook"
+                )
+    _ensure_pump_thread()
+
+    if countdown:
+        # Re-schedule instead of sleeping so delivery threads stay free
+        timer = threading.Timer(countdown, _schedule_background, args=(entry,))
+        timer.daemon = True
+        timer.start()
+        return
+    _background.submit(_background_attempt, entry)
+
+
+def _background_attempt(entry: dict) -> None:
+    delay = attempt_delivery(entry)
+    if delay is not None:
+        logger.info(
+            "Retrying webhook for job %s in %ds…", entry["payload"].get("jobId"), delay
+        )
+        _schedule_background(entry, delay)
+
+
+def _ensure_pump_thread() -> None:
+    """Start the in-process outbox pump (only used without Celery beat)."""
+    global _pump_thread
+    if _pump_thread is not None:
+        return
+    with _session_lock:
+        if _pump_thread is not None:
+            return
+
+        def loop() -> None:
+            while True:
+                time.sleep(WEBHOOK_OUTBOX_PUMP_INTERVAL)
+                try:
+                    pump_outbox()
+                except Exception as exc:
+                    logger.error("Webhook outbox pump failed: %s", exc)
+
+        _pump_thread = threading.Thread(target=loop, name="webhook-pump", daemon=True)
+        _pump_thread.start()
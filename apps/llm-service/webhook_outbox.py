@@ -0,0 +1,388 @@
+"""
+Durable outbox for webhook deliveries.
+
+Every dispatched webhook is written here before the first attempt and
+removed once api-service acknowledges it, so a finished result survives
+receiver outages and worker restarts instead of being recomputed. Failed
+deliveries back off exponentially (2s … WEBHOOK_OUTBOX_MAX_DELAY) for up to
+WEBHOOK_OUTBOX_MAX_AGE, then move to a dead-letter list that admins can
+inspect and replay.
+
+Backends:
+  - Redis  — shared by API and workers: entry JSON per ID, a "due" sorted
+             set scored by next attempt time and a "dead" sorted set
+  - SQLite — local file fallback when Redis is unavailable
+             (WEBHOOK_OUTBOX_PATH, by default data/ in the service directory)
+
+Entries are plain dicts: id, callbackUrl, payload, status (pending|dead),
+attempts, createdAt, nextAttemptAt, lastError.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from redis_store import get_redis, redis_key
+
+logger = logging.getLogger(__name__)
+
+# auto = Redis when reachable, otherwise SQLite
+WEBHOOK_OUTBOX_BACKEND = os.getenv("WEBHOOK_OUTBOX_BACKEND", "auto")
+# SQLite file; must be on persistent storage (not a temp dir) to survive
+# restarts, or undelivered and dead-lettered webhooks are lost
+WEBHOOK_OUTBOX_PATH = os.getenv(
+    "WEBHOOK_OUTBOX_PATH",
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "data", "webhook-outbox.sqlite3"
+    ),
+)
+# Give up (dead-letter) once an entry is this old
+WEBHOOK_OUTBOX_MAX_AGE = int(os.getenv("WEBHOOK_OUTBOX_MAX_AGE", str(48 * 3600)))
+# Upper bound of the exponential backoff between attempts
+WEBHOOK_OUTBOX_MAX_DELAY = int(os.getenv("WEBHOOK_OUTBOX_MAX_DELAY", "3600"))
+# How long a claimed entry is hidden from other pumps while being delivered
+WEBHOOK_OUTBOX_LEASE = int(os.getenv("WEBHOOK_OUTBOX_LEASE", "300"))
+# Dead-lettered entries are kept this long (Redis backend)
+WEBHOOK_OUTBOX_DEAD_TTL = int(os.getenv("WEBHOOK_OUTBOX_DEAD_TTL", str(14 * 86400)))
+
+
+def backoff_delay(attempts: int) -> int:
+    """Seconds to wait after *attempts* failed attempts."""
+    return min(2**attempts, WEBHOOK_OUTBOX_MAX_DELAY)
+
+
+class WebhookOutbox(ABC):
+    """Backend-independent outbox logic; subclasses implement storage."""
+
+    backend: str
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def add(self, callback_url: str, payload: dict) -> Dict[str, Any]:
+        """Record a new delivery, leased to the dispatcher that created it."""
+        now = time.time()
+        entry = {
+            "id": uuid.uuid4().hex,
+            "callbackUrl": callback_url,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "createdAt": now,
+            "nextAttemptAt": now + WEBHOOK_OUTBOX_LEASE,
+            "lastError": None,
+        }
+        self._put(entry)
+        return entry
+
+    def mark_delivered(self, entry_id: str) -> None:
+        self._remove(entry_id)
+
+    def record_failure(
+        self, entry: Dict[str, Any], error: str, retryable: bool, hold: float = 0
+    ) -> Dict[str, Any]:
+        """Count a failed attempt and schedule the next one or dead-letter.
+
+        Args:
+            entry: Entry being delivered (upserted, so a worker that did not
+                create it can still record the outcome)
+            error: Failure description
+            retryable: False for errors that will never succeed (4xx)
+            hold: Extra seconds to keep the entry away from pumps, used when
+                the caller schedules the retry itself
+
+        Returns:
+            Updated entry; status is "dead" when it will not be retried
+        """
+        now = time.time()
+        entry = dict(entry)
+        entry["attempts"] = entry.get("attempts", 0) + 1
+        entry["lastError"] = error
+        age = now - entry.get("replayedAt", entry.get("createdAt", now))
+
+        if not retryable or age >= WEBHOOK_OUTBOX_MAX_AGE:
+            entry["status"] = "dead"
+            entry["deadAt"] = now
+            logger.error(
+                "Webhook dead-lettered after %d attempts (job %s): %s",
+                entry["attempts"],
+                entry["payload"].get("jobId", "unknown"),
+                error,
+            )
+        else:
+            entry["status"] = "pending"
+            entry["nextAttemptAt"] = now + backoff_delay(entry["attempts"]) + hold
+
+        self._put(entry)
+        return entry
+
+    def claim_due(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Atomically take pending entries whose next attempt is due."""
+        return self._claim(time.time(), limit, WEBHOOK_OUTBOX_LEASE)
+
+    def replay(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        """Make a pending or dead entry due now with a fresh age budget."""
+        entry = self._get(entry_id)
+        if entry is None:
+            return None
+        now = time.time()
+        entry.update(
+            status="pending",
+            replayedAt=now,
+            nextAttemptAt=now + WEBHOOK_OUTBOX_LEASE,
+        )
+        entry.pop("deadAt", None)
+        self._put(entry)
+        return entry
+
+    def get(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        return self._get(entry_id)
+
+    def list(self, status: str = "pending", limit: int = 100) -> List[Dict[str, Any]]:
+        return self._list(status, limit)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._counts()
+        stats["backend"] = self.backend
+        return stats
+
+    # ------------------------------------------------------------------
+    # Storage primitives
+    # ------------------------------------------------------------------
+
+    @abstractmethod
+    def _put(self, entry: Dict[str, Any]) -> None:
+        """Insert or replace *entry* and index it by status and due time."""
+
+    @abstractmethod
+    def _get(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        """Entry by ID, or None."""
+
+    @abstractmethod
+    def _remove(self, entry_id: str) -> None:
+        """Delete an entry and its index records."""
+
+    @abstractmethod
+    def _claim(self, now: float, limit: int, lease: float) -> List[Dict[str, Any]]:
+        """Atomically take up to *limit* due entries for *lease* seconds."""
+
+    @abstractmethod
+    def _list(self, status: str, limit: int) -> List[Dict[str, Any]]:
+        """Up to *limit* entries with *status*."""
+
+    @abstractmethod
+    def _counts(self) -> Dict[str, int]:
+        """Entry counts by status."""
+
+
+class RedisWebhookOutbox(WebhookOutbox):
+    """Outbox in Redis, shared by the API and every worker."""
+
+    backend = "redis"
+
+    # Pick due IDs and push their score past the lease in one atomic step
+    _CLAIM_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, id in ipairs(ids) do
+    redis.call('ZADD', KEYS[1], ARGV[3], id)
+end
+return ids
+"""
+
+    def __init__(self, client):
+        self.client = client
+        self.due_key = redis_key("outbox", "due")
+        self.dead_key = redis_key("outbox", "dead")
+
+    def _entry_key(self, entry_id: str) -> str:
+        return redis_key("outbox", "entry", entry_id)
+
+    def _put(self, entry: Dict[str, Any]) -> None:
+        pipe = self.client.pipeline()
+        key = self._entry_key(entry["id"])
+        if entry["status"] == "dead":
+            pipe.set(key, json.dumps(entry), ex=WEBHOOK_OUTBOX_DEAD_TTL)
+            pipe.zrem(self.due_key, entry["id"])
+            pipe.zadd(self.dead_key, {entry["id"]: entry["deadAt"]})
+        else:
+            pipe.set(key, json.dumps(entry))
+            pipe.zrem(self.dead_key, entry["id"])
+            pipe.zadd(self.due_key, {entry["id"]: entry["nextAttemptAt"]})
+        pipe.execute()
+
+    def _get(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self._entry_key(entry_id))
+        return json.loads(raw) if raw else None
+
+    def _remove(self, entry_id: str) -> None:
+        pipe = self.client.pipeline()
+        pipe.delete(self._entry_key(entry_id))
+        pipe.zrem(self.due_key, entry_id)
+        pipe.zrem(self.dead_key, entry_id)
+        pipe.execute()
+
+    def _load_many(self, ids: List[str]) -> List[Dict[str, Any]]:
+        if not ids:
+            return []
+        raws = self.client.mget([self._entry_key(entry_id) for entry_id in ids])
+        return [json.loads(raw) for raw in raws if raw]
+
+    def _claim(self, now: float, limit: int, lease: float) -> List[Dict[str, Any]]:
+        ids = self.client.eval(
+            self._CLAIM_SCRIPT, 1, self.due_key, now, limit, now + lease
+        )
+        return self._load_many(ids)
+
+    def _expire_dead(self) -> None:
+        # Entry keys expire on their own; drop their IDs from the index too
+        self.client.zremrangebyscore(
+            self.dead_key, "-inf", time.time() - WEBHOOK_OUTBOX_DEAD_TTL
+        )
+
+    def _list(self, status: str, limit: int) -> List[Dict[str, Any]]:
+        self._expire_dead()
+        key = self.dead_key if status == "dead" else self.due_key
+        return self._load_many(self.client.zrange(key, 0, limit - 1))
+
+    def _counts(self) -> Dict[str, int]:
+        self._expire_dead()
+        return {
+            "pending": self.client.zcard(self.due_key),
+            "dead": self.client.zcard(self.dead_key),
+        }
+
+
+class SQLiteWebhookOutbox(WebhookOutbox):
+    """Outbox in a local SQLite file (single-host fallback)."""
+
+    backend = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS webhook_outbox (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    next_attempt_at REAL NOT NULL,
+                    entry TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS webhook_outbox_due "
+                "ON webhook_outbox (status, next_attempt_at)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _put(self, entry: Dict[str, Any]) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO webhook_outbox (id, status, next_attempt_at, entry) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    entry["id"],
+                    entry["status"],
+                    entry.get("nextAttemptAt", 0),
+                    json.dumps(entry),
+                ),
+            )
+
+    def _get(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT entry FROM webhook_outbox WHERE id = ?", (entry_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _remove(self, entry_id: str) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM webhook_outbox WHERE id = ?", (entry_id,))
+
+    def _claim(self, now: float, limit: int, lease: float) -> List[Dict[str, Any]]:
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT id, entry FROM webhook_outbox "
+                    "WHERE status = 'pending' AND next_attempt_at <= ? "
+                    "ORDER BY next_attempt_at LIMIT ?",
+                    (now, limit),
+                ).fetchall()
+                entries = []
+                for entry_id, raw in rows:
+                    entry = json.loads(raw)
+                    entry["nextAttemptAt"] = now + lease
+                    conn.execute(
+                        "UPDATE webhook_outbox SET next_attempt_at = ?, entry = ? "
+                        "WHERE id = ?",
+                        (entry["nextAttemptAt"], json.dumps(entry), entry_id),
+                    )
+                    entries.append(entry)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return entries
+
+    def _list(self, status: str, limit: int) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT entry FROM webhook_outbox WHERE status = ? "
+                "ORDER BY next_attempt_at LIMIT ?",
+                (status, limit),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _counts(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) FROM webhook_outbox GROUP BY status"
+            ).fetchall()
+        counts = {"pending": 0, "dead": 0}
+        counts.update(dict(rows))
+        return counts
+
+
+_outbox: Optional[WebhookOutbox] = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox() -> WebhookOutbox:
+    """Shared outbox for this process (Redis when reachable, else SQLite)."""
+    global _outbox
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                client = get_redis() if WEBHOOK_OUTBOX_BACKEND != "sqlite" else None
+                if client is not None:
+                    _outbox = RedisWebhookOutbox(client)
+                else:
+                    if WEBHOOK_OUTBOX_BACKEND == "redis":
+                        logger.warning(
+                            "Redis unavailable — webhook outbox using SQLite"
+                        )
+                    _outbox = SQLiteWebhookOutbox(WEBHOOK_OUTBOX_PATH)
+                logger.info("Webhook outbox backend: %s", _outbox.backend)
+    return _outbox